@@ -119,3 +119,14 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+
+
+# Orbitscalc admission control, based on the estimated runtime of an analysis in seconds
+# Analyses estimated above this are computed in the background queue
+ORBITSCALC_BACKGROUND_ANALYSIS_SECONDS = 30
+
+# Analyses estimated above this are rejected
+ORBITSCALC_MAXIMUM_ANALYSIS_SECONDS = 3600
+
+# Number of background analyses running concurrently per process
+ORBITSCALC_HEAVY_ANALYSIS_CONCURRENCY = 2
@@ -5,9 +5,13 @@ Licensed under the Apache License, Version 2.0
 """
 
 from django.contrib import admin
-from .models import GroundStation, Operator, Aperture, Link
+from .models import GroundStation, Operator, Aperture, Link, ContactRecord, ContactRecordCoverage, \
+    ApertureUnavailability
 
 admin.site.register(Operator)
 admin.site.register(GroundStation)
 admin.site.register(Aperture)
 admin.site.register(Link)
+admin.site.register(ContactRecord)
+admin.site.register(ContactRecordCoverage)
+admin.site.register(ApertureUnavailability)
@@ -4,19 +4,40 @@ Copyright 2021 Hannes Diener
 Licensed under the Apache License, Version 2.0
 """
 
-from skyfield.api import EarthSatellite, load
+import math
+import numpy
+from skyfield.api import EarthSatellite
 from datetime import timedelta
 from copy import copy
-from orbitscalc.general_utility import data_with_unit, CustomEnum, to_percent_max100
+from orbitscalc.general_utility import data_with_unit, CustomEnum, to_percent_max100, AnalysisDeadline, \
+    AnalysisInstrumentation, retrieve_timescale
 from orbitscalc.ground_station import GroundStation
+from orbitscalc.unavailability import UnavailabilityIndex
+from orbitscalc.contact_records import determine_tle_hash, load_recorded_contact_times, store_contact_records
+from orbitscalc.split_passes import best_contact_sequence_with_split_passes
+from orbitscalc.onboard_storage import best_contact_sequence_with_storage, limit_contacts_to_storage
+from orbitscalc.data_profile import DataProfile
+from orbitscalc.antenna_subset import AntennaSubsetSearch
+from orbitscalc.pass_statistics import PassStatistics
+from orbitscalc.coverage import determine_coverages
+from orbitscalc.fleet_scheduling import prepare_interval_sequence, select_k_best_intervals
+from orbitscalc.spatial_index import ApertureSpatialIndex, determine_search_spans, determine_reachable_latitude
 from orbitscalc.contact_utility import ContactSequence, determine_sorted_contact_groups,\
-    best_contact_sequence_from_sorted_group
+    best_contact_sequence_from_sorted_group, best_contact_sequence_with_setup_times
 from orbitscalc.regex_tle import LINE_OF_ORBITS_PER_DAY_IN_TLE, START_OF_ORBITS_PER_DAY_IN_TLE, \
-    END_OF_ORBITS_PER_DAY_IN_TLE, LINE_OF_NAME_IN_TLE, LINE_ONE_IN_TLE, LINE_TWO_IN_TLE
+    END_OF_ORBITS_PER_DAY_IN_TLE, LINE_OF_NAME_IN_TLE, LINE_ONE_IN_TLE, LINE_TWO_IN_TLE, \
+    LINE_OF_INCLINATION_IN_TLE, START_OF_INCLINATION_IN_TLE, END_OF_INCLINATION_IN_TLE, \
+    LINE_OF_ECCENTRICITY_IN_TLE, START_OF_ECCENTRICITY_IN_TLE, END_OF_ECCENTRICITY_IN_TLE
 
 
 SI_DAY_IN_SECONDS = 86400
+# Gravitationsparameter der Erde in km^3/s^2
+EARTH_GRAVITATIONAL_PARAMETER = 398600.4418
 STEPS_PER_ORBIT = 100
+# längster Analysezeitraum, für den Satellitenpositionen für Cesium berechnet werden
+MAXIMUM_DURATION_FOR_POSITIONS = timedelta(days=90)
+# Anzahl der nächstbesten Kontaktfolgen, die zusätzlich zur besten angezeigt werden
+NUMBER_OF_ALTERNATIVE_CONTACT_SEQUENCES = 3
 
 
 class AnalysisModes(CustomEnum):
@@ -24,40 +45,108 @@ class AnalysisModes(CustomEnum):
     Antennas = "Antennen einzeln"
     Operators = "Betreiber einzeln"
     All = "allen Antennen zusammen"
+    MinimalSubset = "günstigste ausreichende Antennenauswahl"
     JustOrbit = "nur Kontakte darstellen"
 
 
+class AnalysisPrecisions(CustomEnum):
+    Exact = "exakt"
+    Second = "1 Sekunde"
+    TenSeconds = "10 Sekunden"
+    Minute = "1 Minute"
+
+    def get_tolerance_seconds(self):
+        """
+        gibt maximale Abweichung der Kontaktzeitpunkte in Sekunden zurück, None bei exakter Kontaktsuche
+        :return: float
+        """
+        return PRECISION_TOLERANCE_SECONDS[self]
+
+    def get_samples_per_orbit(self):
+        """
+        gibt Anzahl der Zeitpunkte je Orbit zurück, an denen nach Tiefstständen des Satelliten gesucht wird
+        :return: int
+        """
+        return PRECISION_SAMPLES_PER_ORBIT[self]
+
+
+class SchedulingMethods(CustomEnum):
+    Instant = "sofortiger Antennenwechsel"
+    SetupTimes = "mit Rüst- und Übergabezeiten"
+    SplitPasses = "mit Wechsel während Kontakten"
+    Storage = "mit Datenspeicher an Bord"
+
+    def has_independent_contact_groups(self):
+        """
+        gibt zurück, ob sich die beste Kontaktfolge je Gruppe überlappender Kontakte unabhängig ermitteln lässt;
+        Rüstzeiten und der Füllstand des Datenspeichers verbinden aufeinanderfolgende Gruppen
+        :return: bool
+        """
+        return self not in (SchedulingMethods.SetupTimes, SchedulingMethods.Storage)
+
+
+# maximale Abweichung von Aufgang, Höchststand und Untergang je Genauigkeit
+PRECISION_TOLERANCE_SECONDS = {
+    AnalysisPrecisions.Exact: None,
+    AnalysisPrecisions.Second: 1.0,
+    AnalysisPrecisions.TenSeconds: 10.0,
+    AnalysisPrecisions.Minute: 60.0,
+}
+# grobes Zeitraster der Kontaktsuche je Genauigkeit (find_events verwendet bei exakter Suche 12 je Orbit)
+PRECISION_SAMPLES_PER_ORBIT = {
+    AnalysisPrecisions.Exact: None,
+    AnalysisPrecisions.Second: 12,
+    AnalysisPrecisions.TenSeconds: 8,
+    AnalysisPrecisions.Minute: 6,
+}
+
+
 def set_contacts_of_sequence_optimal(contact_sequence):
     for contact in contact_sequence.get_contacts():
         if contact.get_data() > 0:
             contact.set_optimal()
 
 
-def analyse_mode_antennas(ground_stations, target_data):
+def analyse_mode_antennas(ground_stations, target_data, deadline):
     """
     analysiert jede Antenne bezüglich der maximal übertragabren Datenmenge
+    bei überschrittenem Zeitbudget werden nur die bis dahin bearbeiteten Bodenstationen zurückgegeben
     :param ground_stations: list
     :param target_data: int
+    :param deadline: general_utility.AnalysisDeadline
     :return: dict
     """
     results = list()
     for ground_station in ground_stations:
-        for antenna in ground_station.get_antennas():
-            contact_sequence = antenna.get_contact_sequence()
-            for contact in contact_sequence.get_contacts():
-                contact.determine_max_data()
-                if contact.get_data() > 0:
-                    contact.set_optimal()
-            antenna.set_share(antenna.retrieve_data() / target_data)
+        if deadline.is_exceeded():
+            break
+        analyse_antennas_of_ground_station(ground_station, target_data)
         results.append(ground_station)
     return results
 
 
-def analyse_mode_all(ground_stations, target_data):
+def analyse_antennas_of_ground_station(ground_station, target_data):
+    """
+    analysiert die Antennen einer Bodenstation einzeln bezüglich der maximal übertragbaren Datenmenge
+    :param ground_station: ground_station.GroundStation
+    :param target_data: int
+    :return: None
+    """
+    for antenna in ground_station.get_antennas():
+        contact_sequence = antenna.get_contact_sequence()
+        for contact in contact_sequence.get_contacts():
+            contact.determine_max_data()
+            if contact.get_data() > 0:
+                contact.set_optimal()
+        antenna.set_share(antenna.retrieve_data() / target_data)
+
+
+def analyse_mode_all(ground_stations, target_data, deadline):
     """
     analysiert jede Antenne bezüglich der maximal übertragbaren Datenmenge
     :param ground_stations: list
     :param target_data: int
+    :param deadline: general_utility.AnalysisDeadline
     :return: dict
     """
     contacts = list()
@@ -65,7 +154,39 @@ def analyse_mode_all(ground_stations, target_data):
         for contact in ground_station.retrieve_contact_set().get_contacts():
             contact.determine_max_data()
             contacts.append(contact)
-    best_contact_sequence = determine_best_contact_sequence(contacts)
+    best_contact_sequence = determine_best_contact_sequence(contacts, deadline)
+    set_contacts_of_sequence_optimal(best_contact_sequence)
+    share = best_contact_sequence.retrieve_data() / target_data
+    return {
+        "best_contact_sequence": best_contact_sequence,
+        "alternative_contact_sequences": determine_alternative_contact_sequences(contacts, best_contact_sequence),
+        "data_with_unit": data_with_unit(best_contact_sequence.retrieve_data()),
+        "share_percentage": to_percent_max100(share),
+        "sufficient": share >= 1,
+    }
+
+
+def analyse_mode_minimal_subset(ground_stations, target_data, scheduling_method, deadline):
+    """
+    ermittelt die günstigste Auswahl von Antennen, deren gemeinsame beste Kontaktfolge die angestrebte Datenmenge
+    erreicht; die Kontakte aller Antennen werden dafür nur einmal ermittelt
+    :param ground_stations: list
+    :param target_data: int
+    :param scheduling_method: SchedulingMethods
+    :param deadline: general_utility.AnalysisDeadline
+    :return: dict
+    """
+    antennas = list()
+    for ground_station in ground_stations:
+        for antenna in ground_station.get_antennas():
+            for contact in antenna.get_contact_sequence().get_contacts():
+                contact.determine_max_data()
+            antennas.append(antenna)
+    search = AntennaSubsetSearch(antennas, target_data, determine_best_contact_sequence,
+                                 scheduling_method.has_independent_contact_groups())
+    selected_antennas = search.search(deadline)
+    contacts = [contact for antenna in selected_antennas for contact in antenna.get_contact_sequence().get_contacts()]
+    best_contact_sequence = determine_best_contact_sequence(contacts, deadline)
     set_contacts_of_sequence_optimal(best_contact_sequence)
     share = best_contact_sequence.retrieve_data() / target_data
     return {
@@ -73,15 +194,20 @@ def analyse_mode_all(ground_stations, target_data):
         "data_with_unit": data_with_unit(best_contact_sequence.retrieve_data()),
         "share_percentage": to_percent_max100(share),
         "sufficient": share >= 1,
+        "selected_antennas": selected_antennas,
+        "usage_cost": sum(antenna.retrieve_usage_cost() for antenna in selected_antennas),
+        "exact": search.get_exact(),
+        "number_of_evaluations": search.get_number_of_evaluations(),
     }
 
 
-def analyse_mode_operators(operators_database, target_data, ground_stations_dict):
+def analyse_mode_operators(operators_database, target_data, ground_stations_dict, deadline):
     """
     analysiert jeden übergebenen Betreiber auf maximal übertragbare Datenmenge
     :param operators_database: list
     :param target_data: int
     :param ground_stations_dict: dict
+    :param deadline: general_utility.AnalysisDeadline
     :return: dict
     """
     results = list()
@@ -95,7 +221,7 @@ def analyse_mode_operators(operators_database, target_data, ground_stations_dict
                 for contact in ground_station.retrieve_contact_set().get_contacts():
                     contact.determine_max_data()
                     contacts.append(contact)
-        best_contact_sequence = determine_best_contact_sequence(contacts)
+        best_contact_sequence = determine_best_contact_sequence(contacts, deadline)
         set_contacts_of_sequence_optimal(best_contact_sequence)
         share = best_contact_sequence.retrieve_data() / target_data
         results.append({
@@ -104,47 +230,134 @@ def analyse_mode_operators(operators_database, target_data, ground_stations_dict
             "data_with_unit": data_with_unit(best_contact_sequence.retrieve_data()),
             "name": operator_database.name,
             "best_contact_sequence": best_contact_sequence,
+            "alternative_contact_sequences": determine_alternative_contact_sequences(contacts, best_contact_sequence),
             "id": operator_database.id,
             "selected_ground_stations": ground_stations_of_operator,
         })
     return results
 
 
-def analyse_mode_ground_stations(ground_stations, target_data):
+def analyse_mode_ground_stations(ground_stations, target_data, deadline):
     """
     analysiert jede übergebene Bodenstation auf maximal übertragbare Datenmenge
+    bei überschrittenem Zeitbudget werden nur die bis dahin bearbeiteten Bodenstationen zurückgegeben
     :param ground_stations: list
     :param target_data: int
+    :param deadline: general_utility.AnalysisDeadline
     :return: dict
     """
     results = list()
     for ground_station in ground_stations:
-        # Datenmengen aller Kontakte berechnen
-        contacts = ground_station.retrieve_contact_set().get_contacts()
-        for contact in contacts:
-            contact.determine_max_data()
-        best_contact_sequence = determine_best_contact_sequence(contacts)
-        set_contacts_of_sequence_optimal(best_contact_sequence)
-        ground_station.set_best_contact_sequence(best_contact_sequence)
-        ground_station.set_share(best_contact_sequence.retrieve_data() / target_data)
+        if deadline.is_exceeded():
+            break
+        analyse_ground_station(ground_station, target_data)
         results.append(ground_station)
     return results
 
 
-def determine_best_contact_sequence(contacts):
+def analyse_ground_station(ground_station, target_data):
+    """
+    analysiert eine Bodenstation auf maximal übertragbare Datenmenge
+    :param ground_station: ground_station.GroundStation
+    :param target_data: int
+    :return: None
+    """
+    # Datenmengen aller Kontakte berechnen
+    contacts = ground_station.retrieve_contact_set().get_contacts()
+    for contact in contacts:
+        contact.determine_max_data()
+    best_contact_sequence = determine_best_contact_sequence(contacts)
+    set_contacts_of_sequence_optimal(best_contact_sequence)
+    ground_station.set_best_contact_sequence(best_contact_sequence)
+    ground_station.set_alternative_contact_sequences(
+        determine_alternative_contact_sequences(contacts, best_contact_sequence))
+    ground_station.set_share(best_contact_sequence.retrieve_data() / target_data)
+
+
+def determine_best_contact_sequence(contacts, deadline=None):
     """
     ermittelt aus Liste von Kontakten die Kontaktfolge, mit der der die meisten Daten übertragen werden können
+    bei überschrittenem Zeitbudget wird die Kontaktfolge nur bis zum Ende der letzten optimierten Kontaktgruppe
+    ermittelt und dieser Zeitpunkt als cutoff time vermerkt
     :param contacts: list
+    :param deadline: general_utility.AnalysisDeadline
     :return: contact_utility.ContactSequence
     """
+    if contacts:
+        analysis = next(iter(contacts)).get_antenna().retrieve_analysis()
+        if analysis.get_scheduling_method() == SchedulingMethods.SetupTimes:
+            return best_contact_sequence_with_setup_times(contacts, analysis.get_handover_gap(), deadline)
+        if analysis.get_scheduling_method() == SchedulingMethods.SplitPasses:
+            return best_contact_sequence_with_split_passes(contacts, analysis.get_handover_gap(), deadline)
+        if analysis.get_scheduling_method() == SchedulingMethods.Storage:
+            return best_contact_sequence_with_storage(
+                contacts, analysis.retrieve_data_generation_rate(), analysis.get_storage_capacity(),
+                analysis.get_start_time(), analysis.get_end_time(), deadline)
     best_sequence = ContactSequence()
     if contacts:
         contact_groups = determine_sorted_contact_groups(contacts)
-        for group in contact_groups:
+        for i, group in enumerate(contact_groups):
+            if deadline and deadline.is_exceeded():
+                # Ende der letzten optimierten Gruppe, bzw. Beginn der ersten Gruppe falls keine optimiert wurde
+                if i > 0:
+                    best_sequence.set_cutoff_time(max(contact.retrieve_end_time() for contact in contact_groups[i - 1]))
+                else:
+                    best_sequence.set_cutoff_time(group[0].retrieve_start_time())
+                break
             best_sequence.add_sequence(best_contact_sequence_from_sorted_group(group))
     return best_sequence
 
 
+def determine_alternative_contact_sequences(contacts, best_contact_sequence,
+                                            number_of_alternatives=NUMBER_OF_ALTERNATIVE_CONTACT_SEQUENCES):
+    """
+    ermittelt die nächstbesten Kontaktfolgen nach der besten in einem Durchlauf (k-beste gewichtete Intervallplanung
+    über die nach Ende sortierten Kontakte), z.B. als Ersatz, wenn eine Bodenstation einen Kontakt ablehnt;
+    die k besten beginnen mit einer besten Kontaktfolge, daher überträgt keine Alternative mehr als diese;
+    bei Rüstzeiten endet jeder Vorgänger um Übergabezeit sowie Abbau- und Rüstzeit vor dem Kontakt,
+    bei Wechsel während Kontakten bestehen die Alternativen aus ganzen Kontakten, bei Datenspeicher an Bord übertragen
+    deren Kontakte nur die vorhandenen Daten und die Alternativen werden danach neu geordnet;
+    nur bei vollständig optimierter bester Kontaktfolge
+    :param contacts: list of Contact mit ermittelter Datenmenge
+    :param best_contact_sequence: contact_utility.ContactSequence
+    :param number_of_alternatives: int
+    :return: list of contact_utility.ContactSequence, absteigend nach Datenmenge
+    """
+    contacts = [contact for contact in contacts if contact.get_data() and contact.get_data() > 0]
+    if not contacts or best_contact_sequence.get_cutoff_time():
+        return list()
+    analysis = contacts[0].get_antenna().retrieve_analysis()
+    start_times = numpy.array([contact.retrieve_start_time().timestamp() for contact in contacts])
+    if analysis.get_scheduling_method() == SchedulingMethods.SetupTimes:
+        # Vorgänger, die um beide Zeiten vor dem Kontakt enden, sind unabhängig von Bodenstation und Antenne zulässig
+        start_times -= numpy.array([max(analysis.get_handover_gap(), contact.get_antenna().retrieve_setup_time() +
+                                        contact.get_antenna().retrieve_teardown_time()) for contact in contacts])
+    order, compatible = prepare_interval_sequence(
+        start_times, numpy.array([contact.retrieve_end_time().timestamp() for contact in contacts]))
+    selections = select_k_best_intervals(
+        order, compatible, numpy.array([contact.get_data() for contact in contacts]), number_of_alternatives + 1)
+    best_contacts = set(id(contact) for contact in best_contact_sequence.get_contacts())
+    alternatives = list()
+    for data, selected in selections:
+        # beste Kontaktfolge selbst überspringen (bei gleicher Datenmenge kann sie an anderer Stelle stehen)
+        if not selected or set(id(contacts[index]) for index in selected) == best_contacts:
+            continue
+        if analysis.get_scheduling_method() == SchedulingMethods.Storage:
+            alternative = limit_contacts_to_storage(
+                [contacts[index] for index in selected], analysis.retrieve_data_generation_rate(),
+                analysis.get_storage_capacity(), analysis.get_start_time())
+            # die beste Kontaktfolge berücksichtigt den Speicher nur in diskreten Füllständen
+            if alternative.retrieve_data() > best_contact_sequence.retrieve_data():
+                continue
+        else:
+            alternative = ContactSequence()
+            for index in selected:
+                alternative.add_contact(contacts[index])
+        alternatives.append(alternative)
+    alternatives.sort(key=lambda alternative: alternative.retrieve_data(), reverse=True)
+    return alternatives[:number_of_alternatives]
+
+
 class Satellite:
     def __init__(self, tle, equivalent_isotropic_radiated_power, min_downlink_frequency, max_downlink_frequency):
         """
@@ -156,11 +369,18 @@ class Satellite:
         """
         # Skyfield Objekt erstellen
         self.__skyfield = \
-            EarthSatellite(tle[LINE_ONE_IN_TLE], tle[LINE_TWO_IN_TLE], tle[LINE_OF_NAME_IN_TLE], load.timescale())
+            EarthSatellite(tle[LINE_ONE_IN_TLE], tle[LINE_TWO_IN_TLE], tle[LINE_OF_NAME_IN_TLE], retrieve_timescale())
         # Anzahl Satelliten Orbits pro Tag aus fester Position in der zweiten Zeile des TLE ermitteln
         self.__orbits_per_day = \
             float(tle[LINE_OF_ORBITS_PER_DAY_IN_TLE][START_OF_ORBITS_PER_DAY_IN_TLE:END_OF_ORBITS_PER_DAY_IN_TLE])
+        # Bahnneigung in Grad und Exzentrizität (mit implizitem Dezimalpunkt) aus der zweiten Zeile des TLE
+        self.__inclination = \
+            float(tle[LINE_OF_INCLINATION_IN_TLE][START_OF_INCLINATION_IN_TLE:END_OF_INCLINATION_IN_TLE])
+        self.__eccentricity = \
+            float("0." + tle[LINE_OF_ECCENTRICITY_IN_TLE][START_OF_ECCENTRICITY_IN_TLE:END_OF_ECCENTRICITY_IN_TLE])
         self.__name = tle[0]
+        # identifiziert gespeicherte Kontakte dieses Satelliten
+        self.__tle_hash = determine_tle_hash(tle)
         self.__equivalent_isotropic_radiated_power = equivalent_isotropic_radiated_power
         self.__max_downlink_frequency = max_downlink_frequency
         self.__min_downlink_frequency = min_downlink_frequency
@@ -192,32 +412,103 @@ class Satellite:
     def get_name(self):
         return self.__name
 
+    def get_inclination(self):
+        """
+        Bahnneigung in Grad
+        :return: float
+        """
+        return self.__inclination
+
+    def get_eccentricity(self):
+        return self.__eccentricity
+
+    def retrieve_semi_major_axis(self):
+        """
+        große Halbachse der Bahn in km nach drittem Keplerschen Gesetz aus der mittleren Bewegung
+        :return: float
+        """
+        mean_motion = 2 * math.pi / self.get_orbit_duration()
+        return (EARTH_GRAVITATIONAL_PARAMETER / mean_motion ** 2) ** (1 / 3)
+
+    def retrieve_apogee_radius(self):
+        """
+        größter Abstand des Satelliten vom Erdmittelpunkt in km
+        :return: float
+        """
+        return self.retrieve_semi_major_axis() * (1 + self.__eccentricity)
+
+    def retrieve_perigee_radius(self):
+        """
+        kleinster Abstand des Satelliten vom Erdmittelpunkt in km
+        :return: float
+        """
+        return self.retrieve_semi_major_axis() * (1 - self.__eccentricity)
+
+    def retrieve_maximum_ground_track_latitude(self):
+        """
+        größter Betrag der Breite des Subsatellitenpunkts in Grad, auch für retrograde Bahnen
+        :return: float
+        """
+        return min(self.__inclination, 180 - self.__inclination)
+
+    def get_tle_hash(self):
+        return self.__tle_hash
+
 
 class Analysis:
     """
     repräsentiert einen Analyseprozess
     """
-    def __init__(self, start_time, end_time, data_period, data_in_period, satellite):
+    def __init__(self, start_time, end_time, data_period, data_in_period, satellite, time_budget=None,
+                 precision=AnalysisPrecisions.Exact, scheduling_method=SchedulingMethods.Instant, handover_gap=0.0,
+                 storage_capacity=None):
         """
         :param start_time: datetime.datetime
         :param end_time: datetime.datetime
         :param data_period: float
         :param data_in_period: int
         :param satellite: analysis.Satellite
+        :param time_budget: float; maximale Laufzeit von analyse in Sekunden, None für unbegrenzt
+        :param precision: AnalysisPrecisions; Genauigkeit der Kontaktzeitpunkte
+        :param scheduling_method: SchedulingMethods; ob Rüstzeiten der Antennen in Kontaktfolgen eingehalten werden
+        :param handover_gap: float; zusätzliche Zeit in Sekunden bei Wechsel der Bodenstation (mit Rüstzeiten)
+            bzw. bei Wechsel der Antenne während eines Kontakts (mit Wechsel während Kontakten)
+        :param storage_capacity: float; Größe des Datenspeichers an Bord in bit (mit Datenspeicher an Bord)
         """
         self.__satellite = satellite
+        self.__precision = precision
+        self.__scheduling_method = scheduling_method
+        self.__handover_gap = handover_gap
+        self.__storage_capacity = storage_capacity
         # startZeit und endZeit mit Datum
         self.__start_time = start_time
         self.__end_time = end_time
         # Wenn kein Zeitraum in s gegeben, ist die Dauer eines Orbits der Zeitraum
         if not data_period:
             data_period = satellite.get_orbit_duration()
+        self.__data_period = data_period
+        self.__data_in_period = data_in_period
         # zielDatenmenge berechnen
         self.__target_data = \
             (self.__end_time - self.__start_time).total_seconds() / data_period * data_in_period
         self.__mode = None
         self.__ground_stations = None
         self.__results = None
+        self.__time_budget = time_budget
+        self.__deadline = AnalysisDeadline()
+        # Bodenstationen, die wegen überschrittenem Zeitbudget nicht berechnet wurden
+        self.__incomplete_ground_stations = list()
+        # gespeicherte Kontaktzeitpunkte je Antennen-id für Antennen, die nicht propagiert werden müssen
+        self.__recorded_contact_times = dict()
+        self.__spatial_index = None
+        # Sperrzeiträume der Antennen im Analysezeitraum
+        self.__unavailability_index = UnavailabilityIndex(dict())
+        # Zeitspannen je Antennen-id, in denen ein Kontakt möglich ist
+        self.__search_spans = None
+        self.__instrumentation = AnalysisInstrumentation()
+        # Statistik der Überflüge und Abdeckung durch die Kontakte, erst bei Abfrage ermittelt
+        self.__pass_statistics = None
+        self.__coverages = None
 
     def analyse(self, operators_database, antennas_data_base, mode):
         """
@@ -228,8 +519,132 @@ class Analysis:
         :return: None
         """
         self.__mode = mode
-        # analyseBodenstationen nur mit ausgewählten Antennen erstellen
+        self.__deadline = AnalysisDeadline(self.__time_budget)
+        self.create_ground_stations(antennas_data_base)
+        # Analyse nach Modi
+        self.__results = list()
+        # zum Dartstellen in Cesium alle Kontakte ermitteln
+        self.__incomplete_ground_stations = list()
+        for ground_station_id, ground_station in list(self.__ground_stations.items()):
+            # bei überschrittenem Zeitbudget nur mit bereits berechneten Bodenstationen weiterarbeiten
+            if self.__deadline.is_exceeded():
+                self.__incomplete_ground_stations.append(ground_station)
+                del self.__ground_stations[ground_station_id]
+            else:
+                ground_station.determine_contacts(self.__recorded_contact_times)
+                ground_station.clip_contacts_to_availability(self.__unavailability_index)
+        if self.__mode == AnalysisModes.Antennas:
+            self.__results = analyse_mode_antennas(
+                self.__ground_stations.values(), self.__target_data, self.__deadline)
+        elif self.__mode == AnalysisModes.All:
+            self.__results = analyse_mode_all(self.__ground_stations.values(), self.__target_data, self.__deadline)
+        elif self.__mode == AnalysisModes.MinimalSubset:
+            self.__results = analyse_mode_minimal_subset(
+                self.__ground_stations.values(), self.__target_data, self.__scheduling_method, self.__deadline)
+            self.__instrumentation.increment(
+                "Optimierungen von Kontaktgruppen bei der Antennenauswahl", self.__results["number_of_evaluations"])
+        # jeder betreiber
+        elif self.__mode == AnalysisModes.Operators:
+            self.__results = analyse_mode_operators(
+                operators_database, self.__target_data, self.__ground_stations, self.__deadline)
+        # jede Bodenstation
+        elif self.__mode == AnalysisModes.GroundStations:
+            self.__results = analyse_mode_ground_stations(
+                self.__ground_stations.values(), self.__target_data, self.__deadline)
+        # in Einzelmodi nicht mehr ausgewertete Bodenstationen ebenfalls als unvollständig vermerken
+        if self.__mode in (AnalysisModes.Antennas, AnalysisModes.GroundStations):
+            for ground_station in list(self.__ground_stations.values())[len(self.__results):]:
+                self.__incomplete_ground_stations.append(ground_station)
+        if self.__mode in (AnalysisModes.All, AnalysisModes.MinimalSubset):
+            self.determine_data_profile(self.__results["best_contact_sequence"])
+        elif self.__mode == AnalysisModes.Operators:
+            for operator_result in self.__results:
+                self.determine_data_profile(operator_result["best_contact_sequence"])
+        else:
+            for ground_station in self.__results:
+                self.determine_data_profiles_of_ground_station(ground_station)
+        self.store_propagated_contacts(self.__ground_stations.values())
+
+    def analyse_ground_stations_progressively(self, antennas_data_base, mode):
+        """
+        führt Analyse in den Modi GroundStations oder Antennas Bodenstation für Bodenstation durch
+        und gibt jede Bodenstation zurück, sobald deren Kontakte und Kontaktfolge ermittelt sind
+        :param antennas_data_base: Aperture model object
+        :param mode: AnalysisMode
+        :return: generator of ground_station.GroundStation
+        """
+        self.__mode = mode
+        self.__deadline = AnalysisDeadline(self.__time_budget)
+        self.create_ground_stations(antennas_data_base)
+        self.__results = list()
+        self.__incomplete_ground_stations = list()
+        for ground_station_id, ground_station in list(self.__ground_stations.items()):
+            if self.__deadline.is_exceeded():
+                self.__incomplete_ground_stations.append(ground_station)
+                del self.__ground_stations[ground_station_id]
+                continue
+            ground_station.determine_contacts(self.__recorded_contact_times)
+            ground_station.clip_contacts_to_availability(self.__unavailability_index)
+            if self.__mode == AnalysisModes.Antennas:
+                analyse_antennas_of_ground_station(ground_station, self.__target_data)
+            else:
+                analyse_ground_station(ground_station, self.__target_data)
+            self.determine_data_profiles_of_ground_station(ground_station)
+            self.store_propagated_contacts([ground_station])
+            self.__results.append(ground_station)
+            yield ground_station
+
+    def determine_data_profile(self, contact_sequence):
+        """
+        legt die kumulierten übertragenen Daten der Kontaktfolge über den Analysezeitraum an
+        :param contact_sequence: ContactSequence
+        :return: None
+        """
+        contact_sequence.set_data_profile(DataProfile(
+            contact_sequence, self.__start_time, self.__end_time, self.__data_period, self.__data_in_period))
+
+    def determine_data_profiles_of_ground_station(self, ground_station):
+        """
+        legt die kumulierten übertragenen Daten der Kontaktfolge der Bodenstation bzw. im Modus Antennas der
+        Kontakte jeder ihrer Antennen an
+        :param ground_station: ground_station.GroundStation
+        :return: None
+        """
+        if self.__mode == AnalysisModes.Antennas:
+            for antenna in ground_station.get_antennas():
+                self.determine_data_profile(antenna.get_contact_sequence())
+        else:
+            self.determine_data_profile(ground_station.get_best_contact_sequence())
+
+    def determine_contacts(self, antennas_data_base):
+        """
+        ermittelt nur die Kontakte der Antennen im Analysezeitraum, ohne Auswertung nach einem Modus
+        und ohne sie zu speichern (z.B. für den jeweils neuen Abschnitt einer fortlaufenden Planung)
+        :param antennas_data_base: list of Aperture model objects
+        :return: list of Contact
+        """
+        self.__mode = AnalysisModes.JustOrbit
+        self.__deadline = AnalysisDeadline(self.__time_budget)
+        self.create_ground_stations(antennas_data_base)
+        self.__results = list()
+        contacts = list()
+        for ground_station in self.__ground_stations.values():
+            ground_station.determine_contacts(self.__recorded_contact_times)
+            ground_station.clip_contacts_to_availability(self.__unavailability_index)
+            for antenna in ground_station.get_antennas():
+                contacts.extend(antenna.get_contact_sequence().get_contacts())
+        return contacts
+
+    def create_ground_stations(self, antennas_data_base):
+        """
+        erstellt Bodenstationen nur mit den ausgewählten Antennen
+        :param antennas_data_base: Aperture model object
+        :return: None
+        """
         self.__ground_stations = dict()
+        self.__instrumentation = AnalysisInstrumentation()
+        self.__pass_statistics = None
+        self.__coverages = None
         for antenna_data_base in antennas_data_base:
             ground_station_data_base = antenna_data_base.groundstation
             ground_station_id = ground_station_data_base.id
@@ -241,25 +656,125 @@ class Analysis:
                 # analyseBodenstation Objekt erzeugen
                 self.__ground_stations.update(
                     {ground_station_id: GroundStation(self, ground_station_data_base, [antenna_data_base])})
-        # Analyse nach Modi
-        self.__results = list()
-        # zum Dartstellen in Cesium alle Kontakte ermitteln
-        for ground_station in self.__ground_stations.values():
-            ground_station.determine_contacts()
-        if self.__mode == AnalysisModes.Antennas:
-            self.__results = analyse_mode_antennas(self.__ground_stations.values(), self.__target_data)
-        elif self.__mode == AnalysisModes.All:
-            self.__results = analyse_mode_all(self.__ground_stations.values(), self.__target_data)
-        # jeder betreiber
-        elif self.__mode == AnalysisModes.Operators:
-            self.__results = analyse_mode_operators(operators_database, self.__target_data, self.__ground_stations)
-        # jede Bodenstation
-        elif self.__mode == AnalysisModes.GroundStations:
-            self.__results = analyse_mode_ground_stations(self.__ground_stations.values(), self.__target_data)
-        
+        # bereits gespeicherte Kontakte mit einer Abfrage für alle Antennen laden
+        self.__recorded_contact_times = load_recorded_contact_times(self, antennas_data_base)
+        self.__unavailability_index = UnavailabilityIndex.from_database(
+            [antenna_data_base.id for antenna_data_base in antennas_data_base], self.__start_time, self.__end_time)
+        antennas = [antenna for ground_station in self.__ground_stations.values()
+                    for antenna in ground_station.get_antennas()]
+        antennas_to_search = [antenna for antenna in antennas
+                              if antenna.retrieve_id() not in self.__recorded_contact_times]
+        self.__instrumentation.increment("Antennen", len(antennas))
+        self.__instrumentation.increment(
+            "Antennen aus gespeicherten Kontakten", len(antennas) - len(antennas_to_search))
+        # Antennen jenseits der Breite, die Bahnneigung und Footprint zulassen, sehen den Satelliten nie
+        reachable_latitude = determine_reachable_latitude(self.__satellite)
+        reachable_antennas = [antenna for antenna in antennas_to_search
+                              if abs(antenna.get_skyfield().latitude.degrees) <= reachable_latitude]
+        self.__instrumentation.increment(
+            "Antennen geometrisch unerreichbar (Bahnneigung)", len(antennas_to_search) - len(reachable_antennas))
+        # Kontaktsuche nur, solange sich Antennen im Footprint des Satelliten befinden
+        self.__spatial_index = ApertureSpatialIndex(reachable_antennas)
+        self.__search_spans = determine_search_spans(
+            self.__satellite, self.__spatial_index, self.__start_time, self.__end_time, self.__instrumentation)
+        for antenna in antennas_to_search:
+            self.__search_spans.setdefault(antenna.retrieve_id(), list())
+        self.__instrumentation.increment("Antennen ohne Kontaktmöglichkeit im Analysezeitraum", len([
+            antenna for antenna in reachable_antennas if not self.__search_spans[antenna.retrieve_id()]]))
+
+    def add_apertures(self, antennas_data_base):
+        """
+        fügt einer durchgeführten Analyse Antennen hinzu und ermittelt nur deren Kontakte und Datenmengen
+        :param antennas_data_base: list of Aperture model objects
+        :return: list of antenna.Antenna
+        """
+        antennas = list()
+        for antenna_data_base in antennas_data_base:
+            ground_station_data_base = antenna_data_base.groundstation
+            if ground_station_data_base.id not in self.__ground_stations:
+                self.__ground_stations[ground_station_data_base.id] = \
+                    GroundStation(self, ground_station_data_base, list())
+            ground_station = self.__ground_stations[ground_station_data_base.id]
+            ground_station.add_antenna(antenna_data_base)
+            antenna = ground_station.get_antennas()[-1]
+            antenna.determine_contacts()
+            antenna.clip_contacts_to_availability(UnavailabilityIndex.from_database(
+                [antenna_data_base.id], self.__start_time, self.__end_time))
+            antenna.determine_data()
+            antennas.append(antenna)
+        return antennas
+
+    def store_propagated_contacts(self, ground_stations):
+        """
+        speichert Kontakte aller Antennen der Bodenstationen, die nicht aus gespeicherten Kontakten erstellt wurden
+        :param ground_stations: list of ground_station.GroundStation
+        :return: None
+        """
+        # nur exakte Kontakte speichern, da gespeicherte Kontakte in Analysen jeder Genauigkeit verwendet werden
+        if self.__precision != AnalysisPrecisions.Exact:
+            return
+        store_contact_records(self, [
+            antenna for ground_station in ground_stations for antenna in ground_station.get_antennas()
+            if antenna.retrieve_id() not in self.__recorded_contact_times
+        ])
+
     def get_start_time(self):
         return self.__start_time
 
+    def get_precision(self):
+        return self.__precision
+
+    def get_scheduling_method(self):
+        return self.__scheduling_method
+
+    def get_handover_gap(self):
+        return self.__handover_gap
+
+    def get_storage_capacity(self):
+        return self.__storage_capacity
+
+    def retrieve_storage_capacity_with_unit(self):
+        return data_with_unit(self.__storage_capacity)
+
+    def retrieve_data_generation_rate(self):
+        """
+        an Bord erzeugte Daten in bit/s, aus angestrebter Datenmenge und Analysezeitraum
+        :return: float
+        """
+        return self.__target_data / (self.__end_time - self.__start_time).total_seconds()
+
+    def get_instrumentation(self):
+        return self.__instrumentation
+
+    def retrieve_pass_statistics(self):
+        """
+        gibt die Statistik der Überflüge aller Antennen zurück und ermittelt sie bei der ersten Abfrage
+        :return: pass_statistics.PassStatistics, None vor der Analyse
+        """
+        if self.__pass_statistics is None and self.__ground_stations is not None:
+            self.__pass_statistics = PassStatistics(self)
+        return self.__pass_statistics
+
+    def retrieve_coverages(self):
+        """
+        gibt die Abdeckung des Netzes, der Betreiber und der Bodenstationen zurück und ermittelt sie bei der ersten
+        Abfrage
+        :return: list of dict (coverage.determine_coverages), None vor der Analyse
+        """
+        if self.__coverages is None and self.__ground_stations is not None:
+            self.__coverages = determine_coverages(self)
+        return self.__coverages
+
+    def get_search_spans(self, antenna_id):
+        """
+        gibt Zeitspannen zurück, in denen ein Kontakt der Antenne möglich ist, bzw. None, falls nicht ermittelt
+        :param antenna_id: int
+        :return: list of (datetime.datetime, datetime.datetime)
+        """
+        if self.__search_spans is None:
+            return None
+        return self.__search_spans.get(antenna_id)
+
     def get_end_time(self):
         return self.__end_time
 
@@ -269,6 +784,35 @@ class Analysis:
     def get_ground_stations(self):
         return self.__ground_stations
 
+    def get_incomplete_ground_stations(self):
+        return self.__incomplete_ground_stations
+
+    def retrieve_partial(self):
+        """
+        gibt zurück, ob wegen überschrittenem Zeitbudget nur ein Teilergebnis vorliegt
+        :return: bool
+        """
+        return self.__deadline.get_exceeded()
+
+    def retrieve_cutoff_time(self):
+        """
+        gibt bei Teilergebnis den Zeitpunkt zurück, bis zu dem Kontaktfolgen optimiert wurden
+        :return: datetime.datetime / None
+        """
+        cutoff_times = list()
+        if self.__mode in (AnalysisModes.All, AnalysisModes.MinimalSubset):
+            cutoff_times.append(self.__results["best_contact_sequence"].get_cutoff_time())
+        elif self.__mode == AnalysisModes.Operators:
+            for result in self.__results:
+                cutoff_times.append(result["best_contact_sequence"].get_cutoff_time())
+        cutoff_times = [cutoff_time for cutoff_time in cutoff_times if cutoff_time]
+        if cutoff_times:
+            return min(cutoff_times)
+        return None
+
+    def get_data_period(self):
+        return self.__data_period
+
     def get_target_data_volume(self):
         return self.__target_data
 
@@ -286,12 +830,12 @@ class Analysis:
         """
         formatted_positions = list()
         # Prüfen, ob Analysezeitraum 100 Tage nicht übersteigt.
-        if self.__end_time - self.__start_time <= timedelta(days=90):
+        if self.__end_time - self.__start_time <= MAXIMUM_DURATION_FOR_POSITIONS:
             satellite = self.__satellite.get_skyfield()
             time = (self.__end_time - self.__start_time).total_seconds()
             orbit_duration = self.__satellite.get_orbit_duration()
             time_step = orbit_duration / STEPS_PER_ORBIT
-            time_scale = load.timescale()
+            time_scale = retrieve_timescale()
             time_and_positions = list()
             seconds_passed = 0
             ti = self.__start_time
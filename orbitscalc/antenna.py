@@ -1,10 +1,13 @@
-from skyfield.api import Topos, load
+from datetime import timedelta
+from skyfield.api import Topos
 from orbitscalc.contact_utility import Contact, ContactSequence
-from orbitscalc.general_utility import data_with_unit, to_percent_max100
+from orbitscalc.general_utility import data_with_unit, to_percent_max100, retrieve_timescale
 from enum import IntEnum
 
 
 MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES = 5.0
+# Puffer, um den die Feinsuche jede Zeitspanne mit möglichem Kontakt erweitert
+SEARCH_SPAN_MARGIN = timedelta(minutes=5)
 
 
 class SkyfieldEventTypes(IntEnum):
@@ -23,20 +26,22 @@ def determine_first_contact_incomplete(start_time_skyfield, events, times, anten
     :return: Contact object, int
     """
     incomplete_event_sequence_beginning = list()
-    # ersten Kontakt bei Anfang des Analysezeitraumes beginnen lassen
+    # ersten Kontakt bei Anfang des Suchzeitraums beginnen lassen
     incomplete_event_sequence_beginning.append(start_time_skyfield)
+    number_of_events = 0
     # falls erstes Event Höchststand, dieses zu anfang hinzufügen
     if events[0] == int(SkyfieldEventTypes.Culminate):
         incomplete_event_sequence_beginning.append(times[0])
-    # falls erstes Event in Liste jetzt Untergehen, dieses zu Anfang hinzufügen
-    if len(events) >= 2:
-        if events[len(incomplete_event_sequence_beginning)] == int(SkyfieldEventTypes.Set):
-            incomplete_event_sequence_beginning.append(times[len(incomplete_event_sequence_beginning)])
+        number_of_events += 1
+    # falls nächstes Event Untergehen, dieses hinzufügen
+    if len(events) > number_of_events and events[number_of_events] == int(SkyfieldEventTypes.Set):
+        incomplete_event_sequence_beginning.append(times[number_of_events])
+        number_of_events += 1
     # falls erster Kontakt unvollständig, diesen erstellen
     incomplete_contact_beginning = Contact(antenna)
     for time_skyfield in incomplete_event_sequence_beginning:
         incomplete_contact_beginning.add_relative_position_by_skyfield_time(time_skyfield)
-    return incomplete_contact_beginning, len(incomplete_event_sequence_beginning)
+    return incomplete_contact_beginning, number_of_events
 
 
 def determine_last_contact_incomplete(end_time_skyfield, events, times, antenna):
@@ -49,20 +54,23 @@ def determine_last_contact_incomplete(end_time_skyfield, events, times, antenna)
     :return: Contact object, int
     """
     incomplete_event_sequence_end = list()
-    # letztes Kontakt bei Ende des Analysezeitraums enden lassen
+    # letzten Kontakt bei Ende des Suchzeitraums enden lassen
     incomplete_event_sequence_end.append(end_time_skyfield)
+    number_of_events = 0
     # falls letztes Event Höchststand, dieses zu ende hinzufügen
     if events[-1] == int(SkyfieldEventTypes.Culminate):
         incomplete_event_sequence_end.append(times[-1])
-    # falls letztes Event in Liste Aufgehen, dieses zu Ende hinzufügen
-    if events[-1 - len(incomplete_event_sequence_end)] == int(SkyfieldEventTypes.Rise):
-        incomplete_event_sequence_end.append(times[-1 - len(incomplete_event_sequence_end)])
+        number_of_events += 1
+    # falls vorheriges Event Aufgehen, dieses hinzufügen
+    if len(events) > number_of_events and events[-1 - number_of_events] == int(SkyfieldEventTypes.Rise):
+        incomplete_event_sequence_end.append(times[-1 - number_of_events])
+        number_of_events += 1
     # Invertieren der Liste für chronologisch korrekte Reihenfolge
     incomplete_event_sequence_end.reverse()
     incomplete_contact_end = Contact(antenna)
     for time in incomplete_event_sequence_end:
         incomplete_contact_end.add_relative_position_by_skyfield_time(time)
-    return incomplete_contact_end, len(incomplete_event_sequence_end)
+    return incomplete_contact_end, number_of_events
 
 
 # AnalyseAntenne repraensentiert eine Antenne und alle ihre Kontakte mit dem Satelliten
@@ -81,16 +89,69 @@ class Antenna:
         )
         self.__antenna_data_base = antenna
         self.__contact_sequence = None
+        # Kontakte vor dem Kürzen auf die verfügbaren Zeiträume, None falls nicht gekürzt
+        self.__unclipped_contact_sequence = None
         # Verhältnis der übertragbaren zur insgesamt angestrebten Datenmenge bei Modus Antennen
         self.__share = None
         self.__sufficient = None
 
+    def determine_search_ranges(self):
+        """
+        gibt die Zeiträume zurück, in denen nach Kontakten gesucht werden muss, bzw. eine leere Liste, falls kein
+        Kontakt möglich ist; jede Zeitspanne mit möglichem Kontakt wird um einen Puffer erweitert, sich dabei
+        überschneidende Zeitspannen werden zusammengefasst
+        :return: chronologische list of (datetime.datetime, datetime.datetime)
+        """
+        analysis = self.retrieve_analysis()
+        analysis.get_instrumentation().increment(
+            "Minuten Analysezeitraum aller durchsuchten Antennen",
+            (analysis.get_end_time() - analysis.get_start_time()).total_seconds() / 60)
+        search_spans = analysis.get_search_spans(self.retrieve_id())
+        if search_spans is None:
+            return [(analysis.get_start_time(), analysis.get_end_time())]
+        # Antennen, die der Footprint des Satelliten nie überstreicht, müssen nicht durchsucht werden
+        search_ranges = list()
+        for span_start, span_end in search_spans:
+            search_start_time = max(analysis.get_start_time(), span_start - SEARCH_SPAN_MARGIN)
+            search_end_time = min(analysis.get_end_time(), span_end + SEARCH_SPAN_MARGIN)
+            if search_ranges and search_start_time <= search_ranges[-1][1]:
+                search_ranges[-1] = (search_ranges[-1][0], max(search_ranges[-1][1], search_end_time))
+            else:
+                search_ranges.append((search_start_time, search_end_time))
+        return search_ranges
+
+    def determine_search_range(self):
+        """
+        gibt den Zeitraum von Beginn der ersten bis Ende der letzten Suche zurück, bzw. None, falls kein Kontakt
+        möglich ist
+        :return: (datetime.datetime, datetime.datetime)
+        """
+        search_ranges = self.determine_search_ranges()
+        if not search_ranges:
+            return None
+        return search_ranges[0][0], search_ranges[-1][1]
+
     def determine_contacts(self):
+        analysis = self.retrieve_analysis()
+        self.__contact_sequence = ContactSequence()
+        for search_start_time, search_end_time in self.determine_search_ranges():
+            analysis.get_instrumentation().increment(
+                "Minuten Feinsuche", (search_end_time - search_start_time).total_seconds() / 60)
+            self.determine_contacts_in_range(search_start_time, search_end_time)
+
+    def determine_contacts_in_range(self, search_start_time, search_end_time):
+        """
+        sucht die Kontakte im übergebenen Zeitraum und fügt sie chronologisch der Kontaktfolge hinzu;
+        zu Beginn bzw. Ende bereits bzw. noch laufende Kontakte werden an den Grenzen des Zeitraums gekürzt
+        :param search_start_time: datetime.datetime
+        :param search_end_time: datetime.datetime
+        :return: None
+        """
         # nicht wundern, Skyfield möchte das so
-        timescale = load.timescale()
-        start_time_skyfield = timescale.from_datetime(self.retrieve_analysis().get_start_time())
-        end_time_skyfield = timescale.from_datetime(self.retrieve_analysis().get_end_time())
-        # alle Kontakte mit Satelliten im Analysezeitraum ermitteln
+        timescale = retrieve_timescale()
+        start_time_skyfield = timescale.from_datetime(search_start_time)
+        end_time_skyfield = timescale.from_datetime(search_end_time)
+        # alle Kontakte mit Satelliten im Zeitraum ermitteln
         times, events = self.retrieve_analysis().get_satellite().get_skyfield().find_events(
             self.__antenna_skyfield,
             start_time_skyfield,
@@ -99,7 +160,6 @@ class Antenna:
             altitude_degrees=MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES
         )
 
-        self.__contact_sequence = ContactSequence()
         # Falls erster Kontakt unvollständig ist
         number_of_events_beginning = 0
         if len(events) >= 1 and events[0] != int(SkyfieldEventTypes.Rise):
@@ -109,7 +169,7 @@ class Antenna:
         # Falls letzter Kontakt unvollständig ist
         last_contact = False
         number_of_events_end = 0
-        if len(events) > 1 and events[-1] != int(SkyfieldEventTypes.Set):
+        if len(events) > number_of_events_beginning and events[-1] != int(SkyfieldEventTypes.Set):
             last_contact, number_of_events_end = \
                 determine_last_contact_incomplete(end_time_skyfield, events, times, self)
         # vollständige Kontakte erstellen
@@ -122,25 +182,90 @@ class Antenna:
                     times[number_of_events_beginning
                           + len(SkyfieldEventTypes) * number_of_complete_contact + number_of_event])
             self.__contact_sequence.add_contact(contact)
-        # falls erster Kontakt unvollständig, diesen erstellen
+        # falls letzter Kontakt unvollständig, diesen erstellen
         if last_contact:
             self.__contact_sequence.add_contact(last_contact)
 
+    def determine_contacts_from_times(self, contact_times):
+        """
+        erstellt Kontakte aus bereits bekannten Kontaktzeitpunkten (gespeichert oder je Bodenstation ermittelt)
+        und kürzt sie auf den Analysezeitraum
+        :param contact_times: chronologische list of (Beginn, Höchststand, Ende) als datetime, Höchststand ggf. None
+        :return: None
+        """
+        timescale = retrieve_timescale()
+        start_time = self.retrieve_analysis().get_start_time()
+        end_time = self.retrieve_analysis().get_end_time()
+        self.__contact_sequence = ContactSequence()
+        for contact_start_time, culmination_time, contact_end_time in contact_times:
+            times = [max(contact_start_time, start_time)]
+            if culmination_time and start_time < culmination_time < end_time:
+                times.append(culmination_time)
+            times.append(min(contact_end_time, end_time))
+            contact = Contact(self)
+            for time in times:
+                contact.add_relative_position_by_skyfield_time(timescale.from_datetime(time))
+            self.__contact_sequence.add_contact(contact)
+
     def determine_data(self):
         self.__contact_sequence.determine_data()
 
+    def clip_contacts_to_availability(self, unavailability_index):
+        """
+        kürzt die Kontakte auf die Zeiträume, in denen die Antenne nicht gesperrt ist;
+        ganz gesperrte Kontakte entfallen, unterbrochene werden in ihre verfügbaren Teile zerlegt
+        :param unavailability_index: unavailability.UnavailabilityIndex
+        :return: None
+        """
+        if self.__contact_sequence is None or not unavailability_index.has_blocks(self.retrieve_id()):
+            return
+        self.__unclipped_contact_sequence = self.__contact_sequence
+        self.__contact_sequence = ContactSequence()
+        for contact in self.__unclipped_contact_sequence.get_contacts():
+            for start_time, end_time in unavailability_index.retrieve_available_parts(
+                    self.retrieve_id(), contact.retrieve_start_time(), contact.retrieve_end_time()):
+                if start_time == contact.retrieve_start_time() and end_time == contact.retrieve_end_time():
+                    self.__contact_sequence.add_contact(contact)
+                else:
+                    self.__contact_sequence.add_contact(contact.create_partial_contact(start_time, end_time))
+
     def get_contact_sequence(self):
         return self.__contact_sequence
 
+    def retrieve_recordable_contact_sequence(self):
+        """
+        gibt die Kontakte ohne Kürzung auf verfügbare Zeiträume zurück, da Sperrungen nicht mitgespeichert werden
+        :return: ContactSequence
+        """
+        if self.__unclipped_contact_sequence is not None:
+            return self.__unclipped_contact_sequence
+        return self.__contact_sequence
+
     def retrieve_gain_to_noise_temperature(self):
         return float(self.__antenna_data_base.gt_dbw_k)
 
     def retrieve_id(self):
         return self.__antenna_data_base.id
 
+    def retrieve_setup_time(self):
+        return float(self.__antenna_data_base.setup_time_s)
+
+    def retrieve_teardown_time(self):
+        return float(self.__antenna_data_base.teardown_time_s)
+
+    def retrieve_usage_cost(self):
+        return float(self.__antenna_data_base.usage_cost)
+
     def get_skyfield(self):
         return self.__antenna_skyfield
 
+    def retrieve_coordinates(self):
+        return {
+            'lat': self.__antenna_data_base.latitude,
+            'lon': self.__antenna_data_base.longitude,
+            'alt': self.__antenna_data_base.altitude,
+        }
+
     def get_ground_station(self):
         return self.__ground_station
 
@@ -0,0 +1,202 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import heapq
+from orbitscalc.contact_utility import determine_sorted_contact_groups
+
+
+# bis zu dieser Anzahl Antennen mit Kontakten wird die Auswahl des Greedy-Verfahrens per Branch and Bound verbessert
+EXACT_SEARCH_MAXIMUM_ANTENNAS = 12
+# relative Toleranz beim Vergleich mit der angestrebten Datenmenge und zwischen Zuwächsen
+DATA_TOLERANCE = 1e-9
+
+
+class AntennaSubsetSearch:
+    """
+    sucht die Antennenauswahl mit den geringsten Kosten, deren beste Kontaktfolge die angestrebte Datenmenge erreicht;
+    Kontakte und Datenmengen werden nur einmal ermittelt, bei jeder geänderten Auswahl werden nur die Gruppen
+    überlappender Kontakte neu optimiert, in denen die hinzugenommene oder entfernte Antenne Kontakte hat;
+    Greedy-Verfahren der Mengenüberdeckung mit verzögerter Neubewertung, für kleine Netze anschließend exakt
+    """
+    def __init__(self, antennas, target_data, scheduler, independent_groups=True):
+        """
+        :param antennas: list of Antenna mit ermittelten Datenmengen der Kontakte
+        :param target_data: float
+        :param scheduler: Funktion, die aus einer Liste von Kontakten die beste Kontaktfolge ermittelt
+        :param independent_groups: bool; ob sich Gruppen überlappender Kontakte unabhängig optimieren lassen,
+            sonst werden alle Kontakte gemeinsam neu optimiert
+        """
+        self.__target_data = target_data
+        self.__scheduler = scheduler
+        contacts = [contact for antenna in antennas for contact in antenna.get_contact_sequence().get_contacts()
+                    if contact.get_data() > 0]
+        antenna_ids = {contact.get_antenna().retrieve_id() for contact in contacts}
+        self.__antennas = [antenna for antenna in antennas if antenna.retrieve_id() in antenna_ids]
+        self.__costs = [antenna.retrieve_usage_cost() for antenna in self.__antennas]
+        index_of_antenna = {antenna.retrieve_id(): index for index, antenna in enumerate(self.__antennas)}
+        if independent_groups:
+            groups = determine_sorted_contact_groups(contacts)
+        else:
+            groups = [contacts] if contacts else list()
+        # je Gruppe die Kontakte mit dem Index ihrer Antenne, je Antenne die Indizes ihrer Gruppen
+        self.__groups = [[(index_of_antenna[contact.get_antenna().retrieve_id()], contact) for contact in group]
+                         for group in groups]
+        self.__groups_of_antenna = [set() for _ in self.__antennas]
+        for group_index, group in enumerate(self.__groups):
+            for antenna_index, _ in group:
+                self.__groups_of_antenna[antenna_index].add(group_index)
+        # Datenmenge jeder Antenne allein
+        self.__single_data = None
+        self.__number_of_evaluations = 0
+        self.__exact = False
+
+    def __evaluate_group(self, group_index, selected):
+        """
+        gibt die Datenmenge der besten Kontaktfolge der Gruppe mit den Kontakten der ausgewählten Antennen zurück
+        :param group_index: int
+        :param selected: set of int
+        :return: float
+        """
+        contacts = [contact for antenna_index, contact in self.__groups[group_index] if antenna_index in selected]
+        if not contacts:
+            return 0.0
+        self.__number_of_evaluations += 1
+        return self.__scheduler(contacts).retrieve_data()
+
+    def __evaluate_change(self, antenna_index, selected, group_values):
+        """
+        gibt die Änderung der Datenmenge und die neuen Werte der betroffenen Gruppen zurück, wenn die Antenne
+        hinzugenommen (nicht ausgewählt) bzw. entfernt (ausgewählt) wird
+        :param antenna_index: int
+        :param selected: set of int
+        :param group_values: list of float; Datenmenge je Gruppe mit der bisherigen Auswahl
+        :return: float, dict Gruppenindex: float
+        """
+        changed = selected ^ {antenna_index}
+        values = {group_index: self.__evaluate_group(group_index, changed)
+                  for group_index in self.__groups_of_antenna[antenna_index]}
+        return sum(value - group_values[group_index] for group_index, value in values.items()), values
+
+    def __is_sufficient(self, data):
+        return data >= self.__target_data * (1 - DATA_TOLERANCE)
+
+    def __gain_per_cost(self, gain, antenna_index):
+        cost = self.__costs[antenna_index]
+        if cost <= 0:
+            return float("inf") if gain > 0 else 0.0
+        return gain / cost
+
+    def determine_greedy_subset(self):
+        """
+        nimmt jeweils die Antenne mit dem größten Zuwachs an Daten je Kosten hinzu, bis die angestrebte Datenmenge
+        erreicht ist; die Zuwächse der übrigen Antennen werden nur neu berechnet, wenn ihr zuletzt bekannter Zuwachs
+        der größte ist; anschließend werden nicht benötigte Antennen, teuerste zuerst, wieder entfernt
+        :return: set of int, float Datenmenge der Auswahl
+        """
+        selected = set()
+        group_values = [0.0] * len(self.__groups)
+        data = 0.0
+        self.__single_data = [self.__evaluate_change(index, selected, group_values)[0]
+                              for index in range(len(self.__antennas))]
+        # Zuwachs je Kosten (negiert für heapq), zuletzt bekannt
+        heap = [(-self.__gain_per_cost(gain, index), index) for index, gain in enumerate(self.__single_data)]
+        heapq.heapify(heap)
+        while heap and not self.__is_sufficient(data):
+            _, index = heapq.heappop(heap)
+            gain, values = self.__evaluate_change(index, selected, group_values)
+            ratio = self.__gain_per_cost(gain, index)
+            if heap and ratio < -heap[0][0] * (1 - DATA_TOLERANCE):
+                heapq.heappush(heap, (-ratio, index))
+                continue
+            if gain <= 0:
+                break
+            selected.add(index)
+            for group_index, value in values.items():
+                group_values[group_index] = value
+            data += gain
+        if self.__is_sufficient(data):
+            for index in sorted(selected, key=lambda antenna_index: -self.__costs[antenna_index]):
+                change, values = self.__evaluate_change(index, selected, group_values)
+                if self.__is_sufficient(data + change):
+                    selected.remove(index)
+                    for group_index, value in values.items():
+                        group_values[group_index] = value
+                    data += change
+        return selected, data
+
+    def determine_exact_subset(self, selected, data, deadline=None):
+        """
+        verbessert eine ausreichende Auswahl von determine_greedy_subset per Branch and Bound zur günstigsten
+        ausreichenden Auswahl; Äste werden verworfen, wenn sie nicht günstiger werden können oder selbst mit allen
+        übrigen Antennen, jeweils mit ihrer Datenmenge allein, die angestrebte Datenmenge nicht erreichen
+        :param selected: set of int
+        :param data: float
+        :param deadline: general_utility.AnalysisDeadline; bei Überschreitung bleibt die bisher beste Auswahl
+        :return: set of int, bool ob die Suche vollständig war
+        """
+        order = sorted(range(len(self.__antennas)), key=lambda index: -self.__single_data[index])
+        remaining_data = [sum(self.__single_data[index] for index in order[position:])
+                          for position in range(len(order) + 1)]
+        remaining_cost = [min((self.__costs[index] for index in order[position:]), default=0)
+                          for position in range(len(order) + 1)]
+        best = {"selected": set(selected), "cost": sum(self.__costs[index] for index in selected), "data": data}
+        complete = True
+        current = set()
+        values = [0.0] * len(self.__groups)
+
+        def branch(position, cost, current_data):
+            nonlocal complete
+            if deadline and deadline.is_exceeded():
+                complete = False
+                return
+            if self.__is_sufficient(current_data):
+                if cost < best["cost"] or (cost == best["cost"] and current_data > best["data"]):
+                    best.update(selected=set(current), cost=cost, data=current_data)
+                return
+            if position == len(order) or cost + remaining_cost[position] >= best["cost"] or \
+                    not self.__is_sufficient(current_data + remaining_data[position]):
+                return
+            index = order[position]
+            gain, changed_values = self.__evaluate_change(index, current, values)
+            previous_values = {group_index: values[group_index] for group_index in changed_values}
+            current.add(index)
+            for group_index, value in changed_values.items():
+                values[group_index] = value
+            branch(position + 1, cost + self.__costs[index], current_data + gain)
+            current.remove(index)
+            for group_index, value in previous_values.items():
+                values[group_index] = value
+            branch(position + 1, cost, current_data)
+
+        branch(0, 0, 0.0)
+        return best["selected"], complete
+
+    def search(self, deadline=None):
+        """
+        ermittelt die Auswahl; erreichen auch alle Antennen die angestrebte Datenmenge nicht, wird die Auswahl
+        des Greedy-Verfahrens mit allen Antennen mit Zuwachs zurückgegeben
+        :param deadline: general_utility.AnalysisDeadline
+        :return: list of Antenna
+        """
+        selected, data = self.determine_greedy_subset()
+        self.__exact = False
+        if self.__is_sufficient(data) and len(self.__antennas) <= EXACT_SEARCH_MAXIMUM_ANTENNAS:
+            selected, self.__exact = self.determine_exact_subset(selected, data, deadline)
+        return [self.__antennas[index] for index in sorted(selected)]
+
+    def get_number_of_evaluations(self):
+        """
+        Anzahl der Optimierungen einzelner Kontaktgruppen während der Suche
+        :return: int
+        """
+        return self.__number_of_evaluations
+
+    def get_exact(self):
+        """
+        gibt zurück, ob die Auswahl nachweislich die günstigste ist
+        :return: bool
+        """
+        return self.__exact
@@ -0,0 +1,89 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.db import close_old_connections
+
+
+# Dauer, für die abgeschlossene Hintergrundanalysen abrufbar bleiben
+JOB_RETENTION_SECONDS = 900
+
+
+def run_with_own_database_connection(function):
+    """
+    führt function in einem Hintergrundthread aus und schließt danach dessen Datenbankverbindung
+    :param function: Funktion ohne Parameter
+    :return: Ergebnis von function
+    """
+    try:
+        return function()
+    finally:
+        close_old_connections()
+
+
+class BackgroundJob:
+    """
+    repräsentiert eine im Hintergrund laufende Analyse mit den Eingaben der Anfrage
+    """
+    def __init__(self, future, request_data):
+        self.__future = future
+        self.__request_data = request_data
+        self.__submit_time = time.monotonic()
+
+    def retrieve_done(self):
+        return self.__future.done()
+
+    def retrieve_result(self):
+        """
+        gibt Ergebnis der abgeschlossenen Analyse zurück bzw. löst deren Fehler aus
+        :return: analysis.Analysis
+        """
+        return self.__future.result()
+
+    def get_request_data(self):
+        return self.__request_data
+
+    def get_submit_time(self):
+        return self.__submit_time
+
+
+class BackgroundAnalysisQueue:
+    """
+    Warteschlange für aufwendige Analysen;
+    die Anzahl der Threads begrenzt die gleichzeitig laufenden aufwendigen Analysen je Prozess
+    """
+    def __init__(self, maximum_concurrent_jobs):
+        self.__executor = ThreadPoolExecutor(
+            max_workers=maximum_concurrent_jobs, thread_name_prefix="orbitscalc-analysis")
+        self.__jobs = dict()
+        self.__lock = threading.Lock()
+
+    def __remove_expired_jobs(self):
+        oldest_submit_time = time.monotonic() - JOB_RETENTION_SECONDS
+        for job_id in [job_id for job_id, job in self.__jobs.items()
+                       if job.retrieve_done() and job.get_submit_time() < oldest_submit_time]:
+            del self.__jobs[job_id]
+
+    def submit(self, job_id, function, request_data):
+        """
+        reiht Analyse ein; existiert bereits ein Auftrag mit gleicher id, wird dieser weiterverwendet
+        :param job_id: str
+        :param function: Funktion ohne Parameter
+        :param request_data: QueryDict mit den Eingaben der Anfrage
+        :return: BackgroundJob
+        """
+        with self.__lock:
+            self.__remove_expired_jobs()
+            if job_id not in self.__jobs:
+                future = self.__executor.submit(run_with_own_database_connection, function)
+                self.__jobs[job_id] = BackgroundJob(future, request_data)
+            return self.__jobs[job_id]
+
+    def get_job(self, job_id):
+        with self.__lock:
+            return self.__jobs.get(job_id)
@@ -0,0 +1,414 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import numpy
+from datetime import timedelta
+from sgp4.api import SatrecArray
+from skyfield.api import Topos
+from orbitscalc.antenna import MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES
+from orbitscalc.fleet_scheduling import determine_best_interval_sequence, FleetScheduler
+from orbitscalc.general_utility import data_with_unit, bandwidth_calculation, free_space_loss_calculation, \
+    AnalysisInstrumentation, retrieve_timescale
+from orbitscalc.spatial_index import rotate_to_earth_fixed, to_julian_date, SECONDS_PER_DAY
+from orbitscalc.station_geometry import determine_up_vectors
+
+
+# Abstand der gemeinsamen Zeitpunkte aller Satelliten
+CONSTELLATION_TIME_STEP_SECONDS = 10
+# größte Anzahl Höhen (Satelliten x Antennen x Zeitpunkte), die auf einmal berechnet werden
+MAXIMUM_ELEMENTS_PER_BLOCK = 4000000
+METERS_PER_KILOMETER = 1000
+
+
+def lookup_sorted(sorted_keys, values, keys):
+    """
+    gibt die Werte zu den Schlüsseln zurück, 0 für nicht enthaltene Schlüssel
+    :param sorted_keys: numpy.ndarray; aufsteigend sortiert, eindeutig
+    :param values: numpy.ndarray; ein Eintrag (oder eine Zeile) je Schlüssel
+    :param keys: numpy.ndarray
+    :return: numpy.ndarray
+    """
+    result = numpy.zeros((len(keys),) + values.shape[1:])
+    if not len(sorted_keys):
+        return result
+    positions = numpy.minimum(numpy.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    found = sorted_keys[positions] == keys
+    result[found] = values[positions[found]]
+    return result
+
+
+class ConstellationContacts:
+    """
+    Kontakte aller Satelliten mit allen Antennen als Spalten gleicher Länge (ein Eintrag je Kontakt)
+    """
+    def __init__(self, satellite_indices, antenna_indices, start_seconds, end_seconds, data, links):
+        """
+        :param satellite_indices: numpy.ndarray
+        :param antenna_indices: numpy.ndarray
+        :param start_seconds: numpy.ndarray; Sekunden ab Beginn der Analyse
+        :param end_seconds: numpy.ndarray
+        :param data: numpy.ndarray; übertragbare Datenmenge in bit mit dem besten Link
+        :param links: numpy.ndarray; Index des besten Links der Antenne, -1 falls keine Übertragung möglich
+        """
+        order = numpy.lexsort((start_seconds, antenna_indices, satellite_indices))
+        self.satellite_indices = satellite_indices[order]
+        self.antenna_indices = antenna_indices[order]
+        self.start_seconds = start_seconds[order]
+        self.end_seconds = end_seconds[order]
+        self.data = data[order]
+        self.links = links[order]
+
+    def __len__(self):
+        return len(self.data)
+
+
+class ConstellationAnalysis:
+    """
+    analysiert eine Konstellation mehrerer Satelliten mit einem gemeinsamen Bodennetz;
+    alle Satelliten werden gemeinsam mit SatrecArray auf denselben Zeitpunkten propagiert
+    und die Kontakte aller Satelliten mit allen Antennen in einem Durchlauf ermittelt
+    """
+    def __init__(self, start_time, end_time, satellites, antennas_data_base,
+                 time_step=CONSTELLATION_TIME_STEP_SECONDS):
+        """
+        :param start_time: datetime.datetime
+        :param end_time: datetime.datetime
+        :param satellites: list of analysis.Satellite
+        :param antennas_data_base: list of Aperture model objects
+        :param time_step: float; Abstand der Zeitpunkte in Sekunden, kürzere Kontakte können fehlen
+        """
+        self.__start_time = start_time
+        self.__end_time = end_time
+        self.__satellites = list(satellites)
+        self.__antennas_data_base = list(antennas_data_base)
+        self.__time_step = time_step
+        self.__contacts = None
+        # je Satellit Indizes der Kontakte der besten Kontaktfolge
+        self.__best_sequences = None
+        # Zuordnung der Kontakte aller Satelliten ohne Konflikte an gemeinsam genutzten Antennen
+        self.__fleet_schedule = None
+        self.__instrumentation = AnalysisInstrumentation()
+        antennas_skyfield = [Topos(
+            latitude_degrees=float(antenna.latitude),
+            longitude_degrees=float(antenna.longitude),
+            elevation_m=float(antenna.altitude)
+        ) for antenna in self.__antennas_data_base]
+        self.__antenna_positions = \
+            numpy.array([antenna.itrf_xyz().km for antenna in antennas_skyfield]).reshape(-1, 3)
+        self.__up_vectors = determine_up_vectors(antennas_skyfield).reshape(-1, 3)
+        self.__determine_link_parameters()
+
+    def __determine_link_parameters(self):
+        """
+        ermittelt je Satellit, Antenne und Downlink die nutzbare Bandbreite und höchste Frequenz;
+        Antennen mit weniger Links werden mit Bandbreite 0 aufgefüllt
+        :return: None
+        """
+        links = [[link for link in antenna.link_set.all() if link.is_usable and link.is_downlink]
+                 for antenna in self.__antennas_data_base]
+        self.__links = links
+        number_of_links = max([len(antenna_links) for antenna_links in links] + [1])
+        shape = (len(self.__satellites), len(self.__antennas_data_base), number_of_links)
+        self.__base_bandwidths = numpy.zeros(shape)
+        self.__maximum_frequencies = numpy.ones(shape)
+        for satellite_index, satellite in enumerate(self.__satellites):
+            for antenna_index, antenna_links in enumerate(links):
+                for link_index, link in enumerate(antenna_links):
+                    minimum_frequency = max(link.frequency_min, satellite.get_minimum_downlink_frequency())
+                    maximum_frequency = min(link.frequency_max, satellite.get_maximum_downlink_frequency())
+                    self.__base_bandwidths[satellite_index, antenna_index, link_index] = \
+                        max(maximum_frequency - minimum_frequency, 0)
+                    self.__maximum_frequencies[satellite_index, antenna_index, link_index] = maximum_frequency
+        self.__effective_isotropic_radiated_powers = numpy.array(
+            [satellite.get_effective_isotropic_radiated_power() for satellite in self.__satellites], dtype=float)
+        self.__gains_to_noise_temperature = numpy.array(
+            [float(antenna.gt_dbw_k) for antenna in self.__antennas_data_base], dtype=float)
+
+    def determine_data_rates(self, satellite_indices, antenna_indices, distances):
+        """
+        gibt je Kontaktzeitpunkt und Link die maximal erreichbare Datenrate zurück,
+        berechnet wie relative_position.calculate_data_rate
+        :param satellite_indices: numpy.ndarray (n)
+        :param antenna_indices: numpy.ndarray (n)
+        :param distances: numpy.ndarray (n) in m
+        :return: numpy.ndarray (n, Links)
+        """
+        base_bandwidths = self.__base_bandwidths[satellite_indices, antenna_indices]
+        path_losses = free_space_loss_calculation(
+            distances[:, numpy.newaxis], self.__maximum_frequencies[satellite_indices, antenna_indices])
+        bandwidths = bandwidth_calculation(
+            self.__effective_isotropic_radiated_powers[satellite_indices, numpy.newaxis],
+            self.__gains_to_noise_temperature[antenna_indices, numpy.newaxis], path_losses)
+        return numpy.floor(numpy.sqrt(numpy.minimum(base_bandwidths, bandwidths)))
+
+    def analyse(self):
+        """
+        ermittelt alle Kontakte, je Satellit die Kontaktfolge mit der größten Datenmenge
+        und eine Zuordnung der Kontakte aller Satelliten zu den gemeinsam genutzten Antennen
+        :return: None
+        """
+        self.__contacts = self.determine_contacts()
+        self.__best_sequences = list()
+        for satellite_index in range(len(self.__satellites)):
+            indices = numpy.flatnonzero(self.__contacts.satellite_indices == satellite_index)
+            selected = determine_best_interval_sequence(
+                self.__contacts.start_seconds[indices], self.__contacts.end_seconds[indices],
+                self.__contacts.data[indices])
+            self.__best_sequences.append(indices[selected])
+        self.__fleet_schedule = FleetScheduler(
+            self.__contacts.satellite_indices, self.__contacts.antenna_indices,
+            self.__contacts.start_seconds, self.__contacts.end_seconds, self.__contacts.data).schedule()
+
+    def determine_contacts(self):
+        """
+        propagiert alle Satelliten blockweise auf dem gemeinsamen Zeitraster
+        und ermittelt Aufgang, Untergang und Datenmenge aller Kontakte;
+        Aufgang und Untergang werden zwischen zwei Zeitpunkten linear interpoliert,
+        die Datenmenge ist die mittlere Datenrate der Zeitpunkte im Kontakt mal dessen Dauer
+        :return: ConstellationContacts
+        """
+        number_of_satellites = len(self.__satellites)
+        number_of_antennas = len(self.__antennas_data_base)
+        number_of_links = self.__base_bandwidths.shape[2]
+        duration = (self.__end_time - self.__start_time).total_seconds()
+        seconds = numpy.append(numpy.arange(0.0, duration, self.__time_step), duration)
+        satellites_array = SatrecArray([satellite.get_skyfield().model for satellite in self.__satellites])
+        julian_date = to_julian_date(self.__start_time)
+        # Differenz UT1 - UTC für die Erddrehung, über den Analysezeitraum als konstant angenommen
+        ut1_offset = retrieve_timescale().from_datetime(self.__start_time).ut1 - julian_date
+        block_size = max(2, MAXIMUM_ELEMENTS_PER_BLOCK // max(number_of_satellites * number_of_antennas, 1))
+        self.__instrumentation.increment("Satelliten", number_of_satellites)
+        self.__instrumentation.increment("Antennen", number_of_antennas)
+        self.__instrumentation.increment("Zeitpunkte", len(seconds))
+        # Zustand der Paare aus Satellit und Antenne am Ende des vorherigen Blocks
+        pair_shape = (number_of_satellites, number_of_antennas)
+        open_contacts = None
+        previous_altitudes = None
+        previous_second = 0.0
+        contact_start_seconds = numpy.zeros(pair_shape)
+        rate_sums = numpy.zeros(pair_shape + (number_of_links,))
+        sample_counts = numpy.zeros(pair_shape)
+        finished = list()
+        for block_start in range(0, len(seconds), block_size):
+            block_seconds = seconds[block_start:block_start + block_size]
+            fractions = block_seconds / SECONDS_PER_DAY
+            julian_dates = numpy.full_like(fractions, julian_date)
+            errors, positions, velocities = satellites_array.sgp4(julian_dates, fractions)
+            positions = rotate_to_earth_fixed(positions, julian_dates, fractions, ut1_offset)
+            # Vektoren von den Antennen zu den Satelliten (Satelliten, Antennen, Zeitpunkte, 3)
+            relative_positions = positions[:, numpy.newaxis] - self.__antenna_positions[numpy.newaxis, :, numpy.newaxis]
+            distances = numpy.linalg.norm(relative_positions, axis=3)
+            sine = numpy.einsum("satk,ak->sat", relative_positions, self.__up_vectors) / distances
+            altitudes = numpy.degrees(numpy.arcsin(numpy.clip(sine, -1.0, 1.0)))
+            # fehlgeschlagene Propagation (z.B. verglühter Satellit) ergibt keinen Kontakt
+            altitudes[errors[:, numpy.newaxis, :].repeat(number_of_antennas, axis=1) != 0] = -90.0
+            visible = altitudes >= MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES
+            if open_contacts is None:
+                # bereits zu Beginn laufende Kontakte beginnen mit dem Analysezeitraum
+                open_contacts = visible[:, :, 0]
+                previous_altitudes = altitudes[:, :, 0]
+            previous_visible = numpy.concatenate((open_contacts[:, :, numpy.newaxis], visible[:, :, :-1]), axis=2)
+            previous_block_altitudes = numpy.concatenate(
+                (previous_altitudes[:, :, numpy.newaxis], altitudes[:, :, :-1]), axis=2)
+            previous_seconds = numpy.concatenate(([previous_second], block_seconds[:-1]))
+            rises = visible & ~previous_visible
+            sets = ~visible & previous_visible
+            # Nummer des Kontakts innerhalb des Blocks je Paar, 0 für den aus dem vorherigen Block fortgesetzten
+            run_numbers = numpy.cumsum(rises, axis=2)
+            number_of_runs = block_seconds.size + 1
+            pair_indices = numpy.arange(number_of_satellites * number_of_antennas).reshape(pair_shape)
+            keys = pair_indices[:, :, numpy.newaxis] * number_of_runs + run_numbers
+            # Datenraten nur für sichtbare Zeitpunkte
+            satellite_indices, antenna_indices, time_indices = numpy.nonzero(visible)
+            rates = self.determine_data_rates(
+                satellite_indices, antenna_indices,
+                distances[satellite_indices, antenna_indices, time_indices] * METERS_PER_KILOMETER)
+            visible_keys = keys[satellite_indices, antenna_indices, time_indices]
+            unique_keys, inverse = numpy.unique(visible_keys, return_inverse=True)
+            run_rate_sums = numpy.zeros((len(unique_keys), number_of_links))
+            numpy.add.at(run_rate_sums, inverse, rates)
+            run_counts = numpy.bincount(inverse, minlength=len(unique_keys)).astype(float)
+            # Aufgang zwischen vorherigem und aktuellem Zeitpunkt interpolieren
+            rise_satellites, rise_antennas, rise_times = numpy.nonzero(rises)
+            rise_seconds = self.__interpolate_crossings(
+                previous_seconds[rise_times], block_seconds[rise_times],
+                previous_block_altitudes[rise_satellites, rise_antennas, rise_times],
+                altitudes[rise_satellites, rise_antennas, rise_times])
+            rise_keys = keys[rise_satellites, rise_antennas, rise_times]
+
+            # im Block endende Kontakte abschließen
+            set_satellites, set_antennas, set_times = numpy.nonzero(sets)
+            set_seconds = self.__interpolate_crossings(
+                previous_seconds[set_times], block_seconds[set_times],
+                previous_block_altitudes[set_satellites, set_antennas, set_times],
+                altitudes[set_satellites, set_antennas, set_times])
+            starts, sums, counts = self.__collect_runs(
+                set_satellites, set_antennas, keys[set_satellites, set_antennas, set_times], number_of_runs,
+                (unique_keys, run_rate_sums, run_counts), (rise_keys, rise_seconds),
+                (contact_start_seconds, rate_sums, sample_counts))
+            finished.append((set_satellites, set_antennas, starts, set_seconds, sums, counts))
+            # am Ende des Blocks noch laufende Kontakte in den nächsten Block übernehmen
+            open_contacts = visible[:, :, -1]
+            open_satellites, open_antennas = numpy.nonzero(open_contacts)
+            starts, sums, counts = self.__collect_runs(
+                open_satellites, open_antennas, keys[open_satellites, open_antennas, -1], number_of_runs,
+                (unique_keys, run_rate_sums, run_counts), (rise_keys, rise_seconds),
+                (contact_start_seconds, rate_sums, sample_counts))
+            contact_start_seconds[open_satellites, open_antennas] = starts
+            rate_sums[:] = 0.0
+            sample_counts[:] = 0.0
+            rate_sums[open_satellites, open_antennas] = sums
+            sample_counts[open_satellites, open_antennas] = counts
+            previous_altitudes = altitudes[:, :, -1]
+            previous_second = block_seconds[-1]
+        # am Ende noch laufende Kontakte enden mit dem Analysezeitraum
+        open_satellites, open_antennas = numpy.nonzero(open_contacts)
+        finished.append((open_satellites, open_antennas, contact_start_seconds[open_satellites, open_antennas],
+                         numpy.full(len(open_satellites), duration), rate_sums[open_satellites, open_antennas],
+                         sample_counts[open_satellites, open_antennas]))
+        satellite_indices, antenna_indices, start_seconds, end_seconds, sums, counts = \
+            (numpy.concatenate(column) for column in zip(*finished))
+        sums = sums.reshape(-1, number_of_links)
+        # bester Link je Kontakt
+        links = numpy.argmax(sums, axis=1)
+        best_sums = sums[numpy.arange(len(links)), links]
+        data = numpy.where(counts > 0, best_sums / numpy.maximum(counts, 1), 0.0) * (end_seconds - start_seconds)
+        links = numpy.where(data > 0, links, -1)
+        self.__instrumentation.increment("Kontakte", len(data))
+        return ConstellationContacts(satellite_indices.astype(int), antenna_indices.astype(int), start_seconds,
+                                     end_seconds, data, links)
+
+    @staticmethod
+    def __collect_runs(satellite_indices, antenna_indices, run_keys, number_of_runs, block_runs, block_rises, carried):
+        """
+        gibt Beginn, Summe der Datenraten je Link und Anzahl Zeitpunkte der Kontakte zu den Schlüsseln zurück;
+        aus dem vorherigen Block fortgesetzte Kontakte (Nummer 0) übernehmen dessen Werte
+        :param satellite_indices: numpy.ndarray
+        :param antenna_indices: numpy.ndarray
+        :param run_keys: numpy.ndarray; Paar * number_of_runs + Nummer des Kontakts im Block
+        :param number_of_runs: int
+        :param block_runs: (sortierte Schlüssel, Summen der Datenraten, Anzahl Zeitpunkte) der Kontakte im Block
+        :param block_rises: (sortierte Schlüssel, Zeitpunkte) der Aufgänge im Block
+        :param carried: (Beginn, Summen der Datenraten, Anzahl Zeitpunkte) je Paar aus dem vorherigen Block
+        :return: numpy.ndarray, numpy.ndarray, numpy.ndarray
+        """
+        unique_keys, run_rate_sums, run_counts = block_runs
+        rise_keys, rise_seconds = block_rises
+        carried_start_seconds, carried_rate_sums, carried_counts = carried
+        continued = run_keys % number_of_runs == 0
+        starts = numpy.where(continued, carried_start_seconds[satellite_indices, antenna_indices],
+                             lookup_sorted(rise_keys, rise_seconds, run_keys))
+        sums = lookup_sorted(unique_keys, run_rate_sums, run_keys) + numpy.where(
+            continued[:, numpy.newaxis], carried_rate_sums[satellite_indices, antenna_indices], 0.0)
+        counts = lookup_sorted(unique_keys, run_counts, run_keys) + numpy.where(
+            continued, carried_counts[satellite_indices, antenna_indices], 0.0)
+        return starts, sums, counts
+
+    @staticmethod
+    def __interpolate_crossings(previous_seconds, current_seconds, previous_altitudes, current_altitudes):
+        """
+        interpoliert den Zeitpunkt, an dem die Höhe zwischen zwei Zeitpunkten die Mindesthöhe kreuzt
+        :return: numpy.ndarray
+        """
+        difference = current_altitudes - previous_altitudes
+        share = numpy.where(
+            difference != 0,
+            (MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES - previous_altitudes) / numpy.where(
+                difference != 0, difference, 1.0),
+            1.0)
+        return previous_seconds + numpy.clip(share, 0.0, 1.0) * (current_seconds - previous_seconds)
+
+    def retrieve_contact_matrix(self):
+        """
+        gibt je Satellit und Antenne Anzahl der Kontakte, Kontaktdauer in Sekunden und Datenmenge in bit zurück
+        :return: numpy.ndarray, numpy.ndarray, numpy.ndarray jeweils (Satelliten, Antennen)
+        """
+        shape = (len(self.__satellites), len(self.__antennas_data_base))
+        flat_indices = self.__contacts.satellite_indices * shape[1] + self.__contacts.antenna_indices
+        size = shape[0] * shape[1]
+        counts = numpy.bincount(flat_indices, minlength=size).reshape(shape)
+        durations = numpy.bincount(flat_indices, weights=self.__contacts.end_seconds - self.__contacts.start_seconds,
+                                   minlength=size).reshape(shape)
+        data = numpy.bincount(flat_indices, weights=self.__contacts.data, minlength=size).reshape(shape)
+        return counts, durations, data
+
+    def retrieve_satellite_results(self):
+        """
+        gibt je Satellit Anzahl der Kontakte, Datenmenge aller Kontakte und Datenmenge der besten Kontaktfolge zurück;
+        die beste Kontaktfolge berücksichtigt nicht, dass andere Satelliten dieselbe Antenne belegen
+        :return: list of dict
+        """
+        counts, durations, data = self.retrieve_contact_matrix()
+        results = list()
+        for satellite_index, satellite in enumerate(self.__satellites):
+            best_sequence = self.__best_sequences[satellite_index]
+            best_data = float(self.__contacts.data[best_sequence].sum())
+            results.append({
+                "name": satellite.get_name(),
+                "number_of_contacts": int(counts[satellite_index].sum()),
+                "contact_duration_seconds": float(durations[satellite_index].sum()),
+                "data_of_all_contacts_with_unit": data_with_unit(float(data[satellite_index].sum())),
+                "data": best_data,
+                "data_with_unit": data_with_unit(best_data),
+                "best_contact_sequence": best_sequence,
+            })
+        return results
+
+    def retrieve_fleet_data(self):
+        """
+        gibt Summe der Datenmengen der besten Kontaktfolgen aller Satelliten zurück (obere Schranke,
+        da Konflikte mehrerer Satelliten an derselben Antenne nicht aufgelöst werden)
+        :return: float
+        """
+        return float(sum(self.__contacts.data[best_sequence].sum() for best_sequence in self.__best_sequences))
+
+    def retrieve_fleet_data_with_unit(self):
+        return data_with_unit(self.retrieve_fleet_data())
+
+    def retrieve_scheduled_sequences(self):
+        """
+        gibt je Satellit die Indizes der Kontakte zurück, die ihm in der Zuordnung der gesamten Konstellation
+        zugeteilt wurden (chronologisch)
+        :return: list of numpy.ndarray
+        """
+        selected = self.__fleet_schedule.get_selected()
+        selected = selected[numpy.argsort(self.__contacts.start_seconds[selected], kind="stable")]
+        satellite_indices = self.__contacts.satellite_indices[selected]
+        return [selected[satellite_indices == satellite_index] for satellite_index in range(len(self.__satellites))]
+
+    def retrieve_scheduled_fleet_data_with_unit(self):
+        return data_with_unit(self.__fleet_schedule.get_data())
+
+    def retrieve_time_of_seconds(self, seconds):
+        """
+        :param seconds: float; Sekunden ab Beginn der Analyse
+        :return: datetime.datetime
+        """
+        return self.__start_time + timedelta(seconds=float(seconds))
+
+    def get_contacts(self):
+        return self.__contacts
+
+    def get_satellites(self):
+        return self.__satellites
+
+    def get_antennas_data_base(self):
+        return self.__antennas_data_base
+
+    def get_links(self):
+        return self.__links
+
+    def get_start_time(self):
+        return self.__start_time
+
+    def get_end_time(self):
+        return self.__end_time
+
+    def get_fleet_schedule(self):
+        return self.__fleet_schedule
+
+    def get_instrumentation(self):
+        return self.__instrumentation
@@ -0,0 +1,108 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import hashlib
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Q
+from orbitscalc.models import ContactRecord, ContactRecordCoverage
+
+
+def determine_tle_hash(tle):
+    """
+    gibt Hash der beiden Datenzeilen eines TLE zurück, der den Satelliten und seine Bahn identifiziert
+    :param tle: tuple (Name, Zeile 1, Zeile 2)
+    :return: str
+    """
+    lines = "\n".join(line.strip() for line in tle[1:])
+    return hashlib.sha256(lines.encode()).hexdigest()
+
+
+def determine_position(latitude, longitude, altitude):
+    """
+    gibt die Position einer Antenne vergleichbar zurück, unabhängig davon, ob sie als Decimal (beliebig viele
+    Nachkommastellen) oder als float vorliegt
+    :param latitude: decimal.Decimal / float
+    :param longitude: decimal.Decimal / float
+    :param altitude: decimal.Decimal / float
+    :return: tuple of decimal.Decimal
+    """
+    return tuple(None if value is None else Decimal(str(value)) for value in (latitude, longitude, altitude))
+
+
+def load_recorded_contact_times(analysis, antennas_data_base):
+    """
+    gibt für jede Antenne, deren Kontakte für den gesamten Analysezeitraum an ihrer aktuellen Position gespeichert
+    sind, die Zeitpunkte ihrer Kontakte als chronologische Liste von (Beginn, Höchststand, Ende) zurück
+    :param analysis: analysis.Analysis
+    :param antennas_data_base: list of Aperture model objects
+    :return: dict
+    """
+    tle_hash = analysis.get_satellite().get_tle_hash()
+    start_time = analysis.get_start_time()
+    end_time = analysis.get_end_time()
+    positions = {antenna.id: determine_position(antenna.latitude, antenna.longitude, antenna.altitude)
+                 for antenna in antennas_data_base}
+    coverages = ContactRecordCoverage.objects.filter(
+        tle_hash=tle_hash, aperture_id__in=positions, start_time__lte=start_time, end_time__gte=end_time
+    ).values_list("aperture_id", "latitude", "longitude", "altitude")
+    recorded_contact_times = {antenna_id: list() for antenna_id, *position in coverages
+                              if determine_position(*position) == positions[antenna_id]}
+    if recorded_contact_times:
+        # eine Bereichsabfrage über den Index (tle_hash, aperture, start_time) für alle Antennen
+        records = ContactRecord.objects.filter(
+            tle_hash=tle_hash, aperture_id__in=recorded_contact_times, start_time__lte=end_time,
+            end_time__gte=start_time
+        ).order_by("start_time").values_list(
+            "aperture_id", "start_time", "culmination_time", "end_time", "latitude", "longitude", "altitude")
+        for antenna_id, contact_start_time, culmination_time, contact_end_time, *position in records:
+            if determine_position(*position) == positions[antenna_id]:
+                recorded_contact_times[antenna_id].append((contact_start_time, culmination_time, contact_end_time))
+    return recorded_contact_times
+
+
+def store_contact_records(analysis, antennas):
+    """
+    speichert die Kontakte der übergebenen Antennen für den Analysezeitraum mit der Position der Antennen;
+    bisher gespeicherte, überlappende Zeiträume dieser Antennen werden ersetzt, auch an anderer Position
+    :param analysis: analysis.Analysis
+    :param antennas: list of antenna.Antenna
+    :return: None
+    """
+    if not antennas:
+        return
+    tle_hash = analysis.get_satellite().get_tle_hash()
+    start_time = analysis.get_start_time()
+    end_time = analysis.get_end_time()
+    antenna_ids = [antenna.retrieve_id() for antenna in antennas]
+    records = list()
+    coverages = list()
+    for antenna in antennas:
+        coordinates = antenna.retrieve_coordinates()
+        position = {"latitude": coordinates["lat"], "longitude": coordinates["lon"], "altitude": coordinates["alt"]}
+        coverages.append(ContactRecordCoverage(
+            tle_hash=tle_hash, aperture_id=antenna.retrieve_id(), start_time=start_time, end_time=end_time, **position))
+        for contact in antenna.retrieve_recordable_contact_sequence().get_contacts():
+            records.append(ContactRecord(
+                tle_hash=tle_hash,
+                aperture_id=antenna.retrieve_id(),
+                start_time=contact.retrieve_start_time(),
+                culmination_time=contact.retrieve_culmination_time(),
+                end_time=contact.retrieve_end_time(),
+                **position
+            ))
+    overlapping = Q(tle_hash=tle_hash, aperture_id__in=antenna_ids, start_time__lte=end_time, end_time__gte=start_time)
+    with transaction.atomic():
+        # überlappende Zeiträume vollständig ersetzen, damit keine Kontakte doppelt gespeichert sind
+        for coverage in ContactRecordCoverage.objects.filter(overlapping):
+            ContactRecord.objects.filter(
+                tle_hash=tle_hash, aperture_id=coverage.aperture_id,
+                start_time__lte=coverage.end_time, end_time__gte=coverage.start_time
+            ).delete()
+            coverage.delete()
+        ContactRecord.objects.filter(overlapping).delete()
+        ContactRecord.objects.bulk_create(records)
+        ContactRecordCoverage.objects.bulk_create(coverages)
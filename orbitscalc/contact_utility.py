@@ -4,15 +4,19 @@ Copyright 2021 Hannes Diener
 Licensed under the Apache License, Version 2.0
 """
 
-from orbitscalc.general_utility import data_with_unit, average_time, format_time, merge_sort
+from orbitscalc.general_utility import data_with_unit, average_time, format_time, sort_by_time
 from orbitscalc.models import Link
 from orbitscalc.errors import ContactRetrieveTimeError, AddContactChronologicalError
+from bisect import bisect_left, bisect_right
+from copy import copy
 from enum import Enum
 from skyfield.api import utc
 from orbitscalc.general_utility import vector_length, max_data_rate_calculation
 
 
 SIMPLE_TIME_FORMAT = "%H:%M"
+# Aufgang, Höchststand und Untergang
+RELATIVE_POSITIONS_OF_COMPLETE_CONTACT = 3
 
 
 class OverlappingContactsDesignations(Enum):
@@ -28,8 +32,12 @@ class RelativePosition:
         satellite_skyfield = antenna.retrieve_analysis().get_satellite().get_skyfield()
         # geozentrische Position
         self.__satellite_position_skyfield = satellite_skyfield.at(time_skyfield)
-        self.__relative_position_skyfield = (satellite_skyfield - antenna.get_skyfield()).at(time_skyfield)
+        # Vektor von der Antenne zum Satelliten: Satellit nur einmal propagieren, die Antenne versetzt ihn lediglich
+        self.__relative_position_m = \
+            self.__satellite_position_skyfield.position.m - antenna.get_skyfield().at(time_skyfield).position.m
         self.__time_skyfield = time_skyfield
+        # Zeitpunkt als datetime, erst bei Abfrage umgerechnet (Sortierschlüssel der Kontakte)
+        self.__time = None
         self.__data_rate = None
         self.__antenna = antenna
 
@@ -57,14 +65,16 @@ class RelativePosition:
         gibt Zeitpunkt als datetime Objekt mit Zeitzone UTC zurück
         :return: datetime
         """
-        return self.__time_skyfield.astimezone(utc)
+        if self.__time is None:
+            self.__time = self.__time_skyfield.astimezone(utc)
+        return self.__time
 
     def retrieve_distance(self):
         """
         gibt Abstand zwischen Satellit und Antenne in Metern zurück
         :return: float
         """
-        return vector_length(self.__relative_position_skyfield.position.m)
+        return vector_length(self.__relative_position_m)
 
     def retrieve_latitude(self):
         """
@@ -106,10 +116,15 @@ class Contact:
     def __init__(self, antenna):
         self.__antenna = antenna
         self.__relative_positions = []
-        self.__is_optimal = False
+        # Zeitspannen, in denen dieser Kontakt oder aus ihm erstellte Teilkontakte in einer besten Kontaktfolge liegen
+        self.__optimal_intervals = list()
+        # Kontakt, aus dem dieser Teilkontakt bzw. begrenzte Kontakt erstellt wurde
+        self.__source_contact = None
         self.__data_calculated = False
         self.__data = None
         self.__best_link = None
+        # Änderung der Datenmenge in bit je Sekunde Abweichung aller Kontaktzeitpunkte beim besten Link
+        self.__data_sensitivity = 0
 
     # Darstellung beim Ausgeben in Konsole
     def __repr__(self):
@@ -132,6 +147,7 @@ class Contact:
         links = Link.objects.filter(aperture_id=self.__antenna.retrieve_id())
         best_link = None
         max_data = 0
+        data_sensitivity = 0
         # fuer jeden Link Datenmenge ermitteln
         for link in links:
             if link.is_downlink:
@@ -142,9 +158,11 @@ class Contact:
                     if self.__data > max_data:
                         best_link = link
                         max_data = self.__data
+                        data_sensitivity = self.__data_sensitivity
         if best_link:
             self.__best_link = best_link
         self.__data = max_data
+        self.__data_sensitivity = data_sensitivity
         self.__data_calculated = True
 
     def determine_data_rates_for_link(self, link):
@@ -191,12 +209,69 @@ class Contact:
             # Datenmenge als Produkt von Dauer des Intervalls und Datenrate ermitteln
             duration = (end_time - start_time).total_seconds()
             self.__data += data_rate * duration
+        # Ableitung der Datenmenge nach jedem Zeitpunkt: Rand verschiebt zwei Intervalle, Inneres nur deren Grenzen
+        self.__data_sensitivity = 0
+        for i in range(len(data_rates)):
+            previous_rate = data_rates[i - 1] if i != 0 else -data_rates[i]
+            next_rate = data_rates[i + 1] if i != len(data_rates) - 1 else -data_rates[i]
+            self.__data_sensitivity += abs(previous_rate - next_rate) / 2
         self.__data_calculated = True
 
+    def retrieve_data_rate_profile(self):
+        """
+        gibt die Datenraten des besten Links als Treppenfunktion zurück, wie sie determine_data_for_link integriert:
+        jede relative Position gilt bis zur Mitte zu ihren Nachbarn
+        :return: list of datetime (eine Grenze mehr als Datenraten), list of float
+        """
+        if self.__best_link:
+            data_rates = self.determine_data_rates_for_link(self.__best_link)
+        else:
+            data_rates = [0] * len(self.__relative_positions)
+        times = [relative_position.retrieve_time() for relative_position in self.__relative_positions]
+        boundaries = [times[0]] + [average_time(time, next_time) for time, next_time in zip(times, times[1:])] + \
+            [times[-1]]
+        return boundaries, data_rates
+
+    def create_partial_contact(self, start_time, end_time):
+        """
+        gibt Kontakt mit derselben Antenne zurück, der nur den übergebenen Teil dieses Kontakts umfasst
+        :param start_time: datetime.datetime
+        :param end_time: datetime.datetime
+        :return: Contact mit ermittelter Datenmenge
+        """
+        timescale = self.__relative_positions[0].get_time_skyfield().ts
+        times = [start_time]
+        culmination_time = self.retrieve_culmination_time()
+        if culmination_time and start_time < culmination_time < end_time:
+            times.append(culmination_time)
+        times.append(end_time)
+        contact = Contact(self.__antenna)
+        for time in times:
+            contact.add_relative_position_by_skyfield_time(timescale.from_datetime(time))
+        contact.determine_max_data()
+        contact.__source_contact = self
+        return contact
+
+    def create_limited_contact(self, maximum_data):
+        """
+        gibt Kontakt mit denselben Zeitpunkten zurück, in dem höchstens die übergebene Datenmenge übertragen wird,
+        z.B. weil an Bord nicht mehr Daten vorliegen
+        :param maximum_data: float
+        :return: Contact
+        """
+        contact = copy(self)
+        contact.__data = min(self.__data, maximum_data)
+        contact.__optimal_intervals = list()
+        contact.__source_contact = self
+        return contact
+
     # getter
     def get_link(self):
         return self.__best_link
 
+    def get_antenna(self):
+        return self.__antenna
+
     def get_data(self):
         return self.__data
 
@@ -206,6 +281,17 @@ class Contact:
         else:
             return None
 
+    def retrieve_data_error_bound(self):
+        """
+        gibt größtmögliche Abweichung der Datenmenge infolge der Toleranz der Kontaktzeitpunkte zurück,
+        bei exakter Kontaktsuche 0
+        :return: float
+        """
+        tolerance = self.__antenna.retrieve_analysis().get_precision().get_tolerance_seconds()
+        if tolerance is None:
+            return 0
+        return self.__data_sensitivity * tolerance
+
     def get_time_of_relative_position(self, index):
         try:
             return self.__relative_positions[index].retrieve_time()
@@ -218,11 +304,33 @@ class Contact:
     def retrieve_end_time(self):
         return self.get_time_of_relative_position(-1)
 
+    def retrieve_culmination_time(self):
+        """
+        gibt Zeitpunkt des Höchststands zurück, falls dieser im Kontakt enthalten ist, sonst None
+        :return: datetime
+        """
+        if len(self.__relative_positions) == RELATIVE_POSITIONS_OF_COMPLETE_CONTACT:
+            return self.get_time_of_relative_position(1)
+        return None
+
     def get_optimal(self):
-        return self.__is_optimal
+        return bool(self.__optimal_intervals)
+
+    def get_optimal_intervals(self):
+        return self.__optimal_intervals
 
     def set_optimal(self):
-        self.__is_optimal = True
+        """
+        vermerkt den Kontakt als Teil einer besten Kontaktfolge, auch bei den Kontakten, aus denen er erstellt wurde,
+        damit deren Darstellung (ContactGroup) die genutzte Zeitspanne enthält
+        :return: None
+        """
+        self.add_optimal_interval(self.retrieve_start_time(), self.retrieve_end_time())
+
+    def add_optimal_interval(self, start_time, end_time):
+        self.__optimal_intervals.append((start_time, end_time))
+        if self.__source_contact is not None:
+            self.__source_contact.add_optimal_interval(start_time, end_time)
 
     def generate_output_string(self):
         """
@@ -278,8 +386,8 @@ class ContactSet:
             # Pruefen, ob dieser Kontakt eher beginnt als erster Kontakt
             if contact.retrieve_start_time() < self.__start_time:
                 self.__start_time = contact_start_time
-            # Pruefen, ob dieser Kontakt spaeter endet als letzter Kontakt
-            elif contact_end_time > self.__end_time:
+            # Pruefen, ob dieser Kontakt spaeter endet als letzter Kontakt (auch wenn er eher beginnt)
+            if contact_end_time > self.__end_time:
                 self.__end_time = contact_end_time
 
     def get_contacts(self):
@@ -330,63 +438,46 @@ class ContactGroup(ContactSet):
     """
     def __init__(self):
         super().__init__()
-        self.__optimal_intervals = list()
+        # disjunkte Intervalle mit optimalen Kontakten, nach Beginn sortiert
+        self.__optimal_start_times = list()
+        self.__optimal_end_times = list()
 
     def add_contact_and_adjust_times(self, contact):
+        """
+        fügt Kontakt hinzu; jede optimale Zeitspanne des Kontakts wird mit allen Intervallen optimaler Kontakte, die sie
+        überlappt, berührt oder enthält, per Binärsuche zu einem Intervall zusammengefasst
+        :param contact: Contact
+        :return: None
+        """
         super().add_contact_and_adjust_times(contact)
-        start_time_contact = contact.retrieve_start_time()
-        end_time_contact = contact.retrieve_end_time()
-        if contact.get_optimal():
-            # fuer jedes Intervall prüfen, ob Kontakt mit Intervall überlappt
-            overlap = False
-            for interval in self.__optimal_intervals:
-                start_time_interval = interval.get_start_time()
-                end_time_interval = interval.get_end_time()
-                contact_starts_before_interval_ends = start_time_contact < end_time_interval
-                contact_starts_after_interval_starts = start_time_contact > start_time_interval
-                contact_ends_after_interval_ends = end_time_contact > end_time_interval
-                contact_ends_before_interval_ends = end_time_contact < end_time_interval
-                contact_ends_after_interval_starts = end_time_contact > start_time_interval
-                contact_starts_before_interval_starts = start_time_contact < start_time_interval
-                if contact_starts_before_interval_ends and contact_starts_after_interval_starts \
-                        and contact_ends_after_interval_ends:
-                    interval.set_end_time(end_time_contact)
-                    overlap = True
-                elif contact_ends_before_interval_ends and contact_ends_after_interval_starts \
-                        and contact_starts_before_interval_starts:
-                    interval.set_start_time(start_time_contact)
-                    overlap = True
-            if not overlap:
-                interval = ContactInterval(start_time_contact, end_time_contact, True)
-                # pruefen ob bereits Intervalle in Liste
-                if not self.__optimal_intervals:
-                    self.__optimal_intervals.append(interval)
-                # neues Intervall an entsprechender Stelle in Liste einfügen
-                for i in range(len(self.__optimal_intervals)):
-                    if self.__optimal_intervals[i].get_end_time() < start_time_contact:
-                        self.__optimal_intervals.insert(i + 1, interval)
-                        break
+        # bei Wechsel während Kontakten oder begrenzter Datenmenge ist nur ein Teil des Kontakts optimal
+        for start_time, end_time in contact.get_optimal_intervals():
+            # erstes Intervall, das nicht vor der Zeitspanne endet, und erstes, das nach ihr beginnt
+            first = bisect_left(self.__optimal_end_times, start_time)
+            after = bisect_right(self.__optimal_start_times, end_time)
+            if first < after:
+                start_time = min(start_time, self.__optimal_start_times[first])
+                end_time = max(end_time, self.__optimal_end_times[after - 1])
+            self.__optimal_start_times[first:after] = [start_time]
+            self.__optimal_end_times[first:after] = [end_time]
 
     def determine_intervals(self):
         """
         gibt chronologische Liste von Intervallen mit Information, ob optimale Kontakt stattfindet, zurück
         :return: list
         """
+        if not self.__optimal_start_times:
+            return [ContactInterval(super().get_start_time(), super().get_end_time(), False)]
         all_intervals = list()
         last_time = super().get_start_time()
-        if not self.__optimal_intervals:
-            all_intervals.append(ContactInterval(super().get_start_time(), super().get_end_time(), False))
-        # intervalle zwischen den Intervallen mit optimalem Kontakt erstellen
-        else:
-            for optimal_interval in self.__optimal_intervals:
-                if optimal_interval.get_start_time() > last_time:
-                    all_intervals.append(ContactInterval(last_time, optimal_interval.get_start_time(), False))
-                all_intervals.append(optimal_interval)
-                last_time = all_intervals[-1].get_end_time()
-            if self.__optimal_intervals:
-                if last_time is not super().get_end_time():
-                    last_interval = ContactInterval(last_time, super().get_end_time(), False)
-                    all_intervals.append(last_interval)
+        # Intervalle zwischen den Intervallen mit optimalem Kontakt ergänzen
+        for start_time, end_time in zip(self.__optimal_start_times, self.__optimal_end_times):
+            if start_time > last_time:
+                all_intervals.append(ContactInterval(last_time, start_time, False))
+            all_intervals.append(ContactInterval(start_time, end_time, True))
+            last_time = end_time
+        if last_time < super().get_end_time():
+            all_intervals.append(ContactInterval(last_time, super().get_end_time(), False))
         return all_intervals
 
 
@@ -396,6 +487,12 @@ class ContactSequence:
     """
     def __init__(self):
         self.__contacts = list()
+        # bei Teilergebnis: Zeitpunkt, bis zu dem die Kontaktfolge optimiert wurde
+        self.__cutoff_time = None
+        # bei Kontaktfolgen mit Datenspeicher an Bord: dessen Füllstand entlang der Kontaktfolge
+        self.__storage_profile = None
+        # kumulierte übertragene Daten entlang der Kontaktfolge
+        self.__data_profile = None
 
     # Kontakt ans chronologische Ende anhaengen
     def add_contact(self, contact):
@@ -432,9 +529,35 @@ class ContactSequence:
     def retrieve_data_with_unit(self):
         return data_with_unit(self.retrieve_data())
 
+    def retrieve_data_error_bound_with_unit(self):
+        """
+        gibt größtmögliche Abweichung der Datenmenge der Kontaktfolge infolge der Genauigkeit der Analyse zurück
+        :return: str
+        """
+        return data_with_unit(sum(contact.retrieve_data_error_bound() for contact in self.__contacts
+                                  if contact.get_data()))
+
     def get_contacts(self):
         return self.__contacts
 
+    def get_cutoff_time(self):
+        return self.__cutoff_time
+
+    def set_cutoff_time(self, cutoff_time):
+        self.__cutoff_time = cutoff_time
+
+    def get_storage_profile(self):
+        return self.__storage_profile
+
+    def set_storage_profile(self, storage_profile):
+        self.__storage_profile = storage_profile
+
+    def get_data_profile(self):
+        return self.__data_profile
+
+    def set_data_profile(self, data_profile):
+        self.__data_profile = data_profile
+
     def retrieve_start_time(self):
         try:
             return self.__contacts[0].retrieve_start_time()
@@ -478,60 +601,97 @@ def determine_overlapping_contacts(start_index, sorted_contacts):
     }
 
 
-def smallest_overlapping_contact_group(index_of_start_contact, sorted_contacts):
+def determine_positions(sorted_contacts):
+    """
+    gibt die Position jedes Kontakts in der sortierten Liste zurück, statt sie jeweils per list.index zu suchen
+    :param sorted_contacts: list
+    :return: dict Contact: int
+    """
+    return {contact: position for position, contact in enumerate(sorted_contacts)}
+
+
+def determine_following_contacts(sorted_contacts):
+    """
+    ermittelt für jede Position der nach Startzeit sortierten Kontaktgruppe per Binärsuche über die Startzeiten
+    den nachfolgenden Kontakt, wie ihn determine_next_contact ab dieser Position findet
+    :param sorted_contacts: list
+    :return: list of Contact / None
+    """
+    start_times = [contact.retrieve_start_time() for contact in sorted_contacts]
+    following_contacts = list()
+    for contact in sorted_contacts:
+        position = bisect_right(start_times, contact.retrieve_end_time())
+        following_contacts.append(sorted_contacts[position] if position < len(sorted_contacts) else None)
+    return following_contacts
+
+
+def smallest_overlapping_contact_group(index_of_start_contact, sorted_contacts, positions=None):
     """
     gibt mit Kontakt überlappende Kontakte zurück, welcher mit Startkontakt überlappt und als erster endet
     :param index_of_start_contact: int
     :param sorted_contacts: list of contacts sorted by start time
+    :param positions: dict Contact: int (determine_positions), sonst per list.index gesucht
     :return: list of contacts sorted by start time
     """
     # mit startKontakt ueberlappende Kontakte ermitteln
     overlapping_contacts = determine_overlapping_contacts(
         index_of_start_contact, sorted_contacts)[OverlappingContactsDesignations.OverlappingContacts]
-    # ueberlappende Kontakte nach Endzeit sortieren
-    overlapping_contacts_sorted_by_end_time = merge_sort(overlapping_contacts, False)
     # Kontakt mit geringster Endzeit als neuen Startkontakt ermitteln
-    index_of_first_ending_contact = sorted_contacts.index(overlapping_contacts_sorted_by_end_time[0])
+    first_ending_contact = sort_by_time(overlapping_contacts, False)[0]
+    if positions is None:
+        index_of_first_ending_contact = sorted_contacts.index(first_ending_contact)
+    else:
+        index_of_first_ending_contact = positions[first_ending_contact]
     # ueberlappende Kontakte neu ermitteln
     result = determine_overlapping_contacts(
         index_of_first_ending_contact, sorted_contacts)
     overlapping_contacts = result[OverlappingContactsDesignations.OverlappingContacts]
     # Kontakte vor Kontakt mit geringster Endzeit wieder zu überlappenden Kontakten hinzufügen
-    for i in range(index_of_first_ending_contact - index_of_start_contact):
-        overlapping_contacts.insert(i, sorted_contacts[index_of_start_contact + i])
+    overlapping_contacts[:0] = sorted_contacts[index_of_start_contact:index_of_first_ending_contact]
     return result
 
 
-def determine_next_contact(current_contact, contact_group):
+def determine_next_contact(current_contact, contact_group, positions=None, following_contacts=None):
     """
     gibt den dem aktuellen Kontakt nachfolgenden Kontakt aus der nach Startzeit sortierten Kontaktgruppe zurück
     :param current_contact: Contact
     :param contact_group: list
+    :param positions: dict Contact: int (determine_positions)
+    :param following_contacts: list (determine_following_contacts); mit positions ohne Durchsuchen der Gruppe
     :return: Contact
     """
+    if positions is not None and following_contacts is not None:
+        return following_contacts[positions[current_contact]]
     for contact in contact_group[contact_group.index(current_contact):]:
-        if contact.retrieve_start_time() > contact.retrieve_end_time():
+        if contact.retrieve_start_time() > current_contact.retrieve_end_time():
             return contact
 
 
-def determine_contacts_sorted_by_following_contact(contacts, contact_group):
+def determine_contacts_sorted_by_following_contact(contacts, contact_group, positions=None, following_contacts=None):
     """
     gibt die Kontakte nach nachfolgendem Kontakt gruppiert zurück
     :param contacts: list
     :param contact_group: list
+    :param positions: dict Contact: int (determine_positions)
+    :param following_contacts: list (determine_following_contacts)
     :return: list
     """
     contacts_sorted_by_following_contact = list()
     current_contacts_with_same_next_contact = list()
     following_contact_of_previous = None
-    for contact in merge_sort(contacts, True):
-        following_contact = determine_next_contact(contact, contact_group)
-        if following_contact is following_contact_of_previous:
+    if positions is None:
+        sorted_contacts = sort_by_time(contacts, True)
+    else:
+        sorted_contacts = sorted(contacts, key=positions.__getitem__)
+    for contact in sorted_contacts:
+        following_contact = determine_next_contact(contact, contact_group, positions, following_contacts)
+        if following_contact is following_contact_of_previous or not current_contacts_with_same_next_contact:
             current_contacts_with_same_next_contact.append(contact)
         else:
-            contacts_sorted_by_following_contact.append(
-                (current_contacts_with_same_next_contact, following_contact_of_previous)
-            )
+            contacts_sorted_by_following_contact.append({
+                "contacts": current_contacts_with_same_next_contact,
+                "following_contact": following_contact_of_previous
+            })
             current_contacts_with_same_next_contact = [contact]
         following_contact_of_previous = following_contact
     contacts_sorted_by_following_contact.append({
@@ -543,42 +703,38 @@ def determine_contacts_sorted_by_following_contact(contacts, contact_group):
 
 def best_contact_sequence_from_sorted_group(contact_group):
     """
-    ermittelt Kontaktfolge mit höchster Übertragener Datenmenge aus einer Kontaktgruppe
-    :param contact_group: list
-    :return: ContactSequence
+    ermittelt Kontaktfolge mit höchster Übertragener Datenmenge aus einer Kontaktgruppe;
+    die beste Kontaktfolge ab einer Position hängt nur von denen an späteren Positionen ab und wird daher
+    rückwärts je Position einmal ermittelt, auch bei langen Ketten aufeinanderfolgender Kontakte ohne Rekursion
+    :param contact_group: list sorted by start time
+    :return: ContactSequence, None falls kein Kontakt Daten überträgt
     """
-    smallest_group_of_mutually_exclusive_contacts =\
-        smallest_overlapping_contact_group(0, contact_group)[OverlappingContactsDesignations.OverlappingContacts]
-    contacts_sorted_by_following_contact = \
-        determine_contacts_sorted_by_following_contact(smallest_group_of_mutually_exclusive_contacts, contact_group)
-    sequences = list()
-    for contacts_with_following in contacts_sorted_by_following_contact:
-        current_best_sequence = ContactSequence()
-        best_contact = determine_best_contact(contacts_with_following["contacts"])
+    positions = determine_positions(contact_group)
+    following_contacts = determine_following_contacts(contact_group)
+    # je Position beste Datenmenge ab dort und gewählter Kontakt mit Position des nachfolgenden Kontakts
+    best_data = [0] * (len(contact_group) + 1)
+    choices = [None] * len(contact_group)
+    for position in range(len(contact_group) - 1, -1, -1):
+        smallest_group_of_mutually_exclusive_contacts = smallest_overlapping_contact_group(
+            position, contact_group, positions)[OverlappingContactsDesignations.OverlappingContacts]
+        contacts_sorted_by_following_contact = determine_contacts_sorted_by_following_contact(
+            smallest_group_of_mutually_exclusive_contacts, contact_group, positions, following_contacts)
+        for contacts_with_following in contacts_sorted_by_following_contact:
+            best_contact = determine_best_contact(contacts_with_following["contacts"])
+            following_contact = contacts_with_following["following_contact"]
+            following_position = positions[following_contact] if following_contact else len(contact_group)
+            data = best_data[following_position] + (best_contact.get_data() if best_contact else 0)
+            if data > best_data[position]:
+                best_data[position] = data
+                choices[position] = (best_contact, following_position)
+    if not best_data[0] > 0:
+        return None
+    best_sequence = ContactSequence()
+    position = 0
+    while position < len(contact_group) and choices[position]:
+        best_contact, position = choices[position]
         if best_contact:
-            current_best_sequence.add_contact(best_contact)
-        following_contact = contacts_with_following["following_contact"]
-        if following_contact:
-            contacts_from_following_contact = \
-                contact_group[contact_group.index(following_contact):]
-            best_following_sequence = best_contact_sequence_from_sorted_group(contacts_from_following_contact)
-            current_best_sequence.add_sequence(best_following_sequence)
-        sequences.append(current_best_sequence)
-    return determine_best_contact_sequence(sequences)
-
-
-def determine_best_contact_sequence(contact_sequences):
-    """
-    ermittelt aus einer Menge von Kontaktfolgen die Kontaktfolge mit den meisten übertragenen Daten
-    :param contact_sequences: list
-    :return: ContactSequence
-    """
-    best_sequence = None
-    best_data = 0
-    for sequence in contact_sequences:
-        if sequence.retrieve_data() > best_data:
-            best_sequence = sequence
-            best_data = sequence.retrieve_data()
+            best_sequence.add_contact(best_contact)
     return best_sequence
 
 
@@ -606,7 +762,7 @@ def determine_sorted_contact_groups(all_contacts):
     """
     contact_groups = list()
     if all_contacts:
-        sorted_contacts = merge_sort(list(all_contacts), True)
+        sorted_contacts = sort_by_time(all_contacts, True)
         current_last_end_time = sorted_contacts[0].retrieve_end_time()
         current_contact_group = list()
         for contact in sorted_contacts:
@@ -623,3 +779,75 @@ def determine_sorted_contact_groups(all_contacts):
                     current_last_end_time = contact.retrieve_end_time()
         contact_groups.append(current_contact_group)
     return contact_groups
+
+
+def best_contact_sequence_with_setup_times(contacts, handover_gap, deadline=None):
+    """
+    ermittelt aus Liste von Kontakten die Kontaktfolge mit den meisten übertragenen Daten, bei der zwischen zwei
+    aufeinanderfolgenden Kontakten derselben Antenne deren Abbau- und Rüstzeit und zwischen Kontakten verschiedener
+    Bodenstationen die Übergabezeit liegt; gewichtete Intervallplanung über die nach Ende sortierten Kontakte:
+    Vorgänger, die um beide Zeiten vor dem Kontakt enden, sind immer zulässig, der beste von ihnen wird per Binärsuche
+    gefunden; die wenigen später endenden Vorgänger werden einzeln geprüft, wobei in ihrer besten Kontaktfolge die
+    Antenne des Kontakts nicht innerhalb ihrer Abbau- und Rüstzeit genutzt sein darf (nur bei Kontakten, die kürzer
+    als diese Zeit sind, kann deshalb eine andere Kontaktfolge des Vorgängers mehr Daten ergeben)
+    bei überschrittenem Zeitbudget wird nur bis zum Beginn des ersten nicht bearbeiteten Kontakts optimiert
+    :param contacts: list of Contact mit ermittelter Datenmenge
+    :param handover_gap: float; Übergabezeit in Sekunden
+    :param deadline: general_utility.AnalysisDeadline
+    :return: ContactSequence
+    """
+    intervals = sorted(((contact.retrieve_start_time().timestamp(), contact.retrieve_end_time().timestamp(), contact)
+                        for contact in contacts if contact.get_data() and contact.get_data() > 0),
+                       key=lambda interval: interval[1])
+    ends = [interval[1] for interval in intervals]
+    # je Anzahl bearbeiteter Kontakte (nach Ende sortiert) beste Datenmenge und Index des letzten Kontakts der Folge
+    best_data = [0.0]
+    best_last = [None]
+    # Datenmenge der besten Kontaktfolge, die mit dem jeweiligen Kontakt endet, und ihr vorletzter Kontakt
+    sequence_data = list()
+    predecessors = list()
+    processed = len(intervals)
+    for index, (start, end, contact) in enumerate(intervals):
+        if deadline and deadline.is_exceeded():
+            processed = index
+            break
+        antenna = contact.get_antenna()
+        ground_station = antenna.get_ground_station()
+        rest_time = antenna.retrieve_teardown_time() + antenna.retrieve_setup_time()
+        first_close = bisect_left(ends, start - max(handover_gap, rest_time), 0, index)
+        predecessor_data, predecessor = best_data[first_close], best_last[first_close]
+        # Vorgänger, die kurz vor dem Kontakt enden, abhängig von Bodenstation und Antenne prüfen
+        for close in range(first_close, bisect_left(ends, start, first_close, index)):
+            if sequence_data[close] <= predecessor_data:
+                continue
+            close_antenna = intervals[close][2].get_antenna()
+            if close_antenna is antenna:
+                if ends[close] >= start - rest_time:
+                    continue
+            elif close_antenna.get_ground_station() is not ground_station and ends[close] >= start - handover_gap:
+                continue
+            earlier = predecessors[close]
+            while earlier is not None and ends[earlier] >= start - rest_time and \
+                    intervals[earlier][2].get_antenna() is not antenna:
+                earlier = predecessors[earlier]
+            if earlier is None or ends[earlier] < start - rest_time:
+                predecessor_data, predecessor = sequence_data[close], close
+        predecessors.append(predecessor)
+        sequence_data.append(predecessor_data + contact.get_data())
+        if sequence_data[-1] > best_data[-1]:
+            best_data.append(sequence_data[-1])
+            best_last.append(index)
+        else:
+            best_data.append(best_data[-1])
+            best_last.append(best_last[-1])
+    selected = list()
+    index = best_last[processed]
+    while index is not None:
+        selected.append(intervals[index][2])
+        index = predecessors[index]
+    best_sequence = ContactSequence()
+    for contact in reversed(selected):
+        best_sequence.add_contact(contact)
+    if processed < len(intervals):
+        best_sequence.set_cutoff_time(min(interval[2].retrieve_start_time() for interval in intervals[processed:]))
+    return best_sequence
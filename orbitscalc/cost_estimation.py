@@ -0,0 +1,107 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+from orbitscalc.analysis import AnalysisModes, AnalysisPrecisions, SchedulingMethods, STEPS_PER_ORBIT, \
+    SI_DAY_IN_SECONDS, MAXIMUM_DURATION_FOR_POSITIONS
+
+
+# Koeffizienten aus Laufzeitmessungen (ISS-TLE, 8 Antennen, 1 bis 10 Tage) kalibriert
+# durchschnittliche Anzahl Kontakte je Antenne und Orbit über alle Breitengrade
+CONTACTS_PER_APERTURE_AND_ORBIT = 0.3
+# relative Positionen je Kontakt (Aufgang, Höchststand, Untergang)
+RELATIVE_POSITIONS_PER_CONTACT = 3
+# Kontaktsuche (find_events) je Antenne und Tag
+PROPAGATION_SECONDS_PER_APERTURE_DAY = 0.006
+# Anteil der Kontaktsuche je Genauigkeit; die Suche im groben Zeitraster benötigt etwa drei Viertel der Zeit
+PROPAGATION_FACTOR = {
+    AnalysisPrecisions.Exact: 1.0,
+    AnalysisPrecisions.Second: 0.75,
+    AnalysisPrecisions.TenSeconds: 0.75,
+    AnalysisPrecisions.Minute: 0.75,
+}
+# Berechnung der Datenmenge und Optimierung der Kontaktfolge je Kontakt
+SCHEDULING_SECONDS_PER_CONTACT = {
+    AnalysisModes.JustOrbit: 0.0,
+    AnalysisModes.Antennas: 0.0015,
+    AnalysisModes.GroundStations: 0.0015,
+    AnalysisModes.Operators: 0.002,
+    AnalysisModes.All: 0.002,
+    # Greedy-Suche optimiert die Gruppen der Kontakte mehrfach neu
+    AnalysisModes.MinimalSubset: 0.006,
+}
+# zusätzliche Optimierung der Kontaktfolge je Kontakt und Verfahren der Antennenwechsel
+SCHEDULING_METHOD_SECONDS_PER_CONTACT = {
+    SchedulingMethods.Instant: 0.0,
+    SchedulingMethods.SetupTimes: 0.0,
+    # Teilstücke der Kontakte an allen Übergabezeitpunkten
+    SchedulingMethods.SplitPasses: 0.0003,
+    # Füllstände des Datenspeichers je Kontakt
+    SchedulingMethods.Storage: 0.0001,
+}
+# Berechnen und Formatieren einer Satellitenposition für Cesium
+SECONDS_PER_SATELLITE_POSITION = 0.00025
+BYTES_PER_CONTACT = 11000
+BYTES_PER_SATELLITE_POSITION = 2000
+
+
+class AnalysisCostEstimate:
+    """
+    repräsentiert die vor der Berechnung geschätzten Kosten einer Analyse
+    """
+    def __init__(self, number_of_contacts, number_of_positions, runtime_seconds, memory_bytes):
+        self.__number_of_contacts = number_of_contacts
+        self.__number_of_positions = number_of_positions
+        self.__runtime_seconds = runtime_seconds
+        self.__memory_bytes = memory_bytes
+
+    def __repr__(self):
+        return "%i Kontakte, %i Positionen: %.1f s, %.1f MB" % (
+            self.__number_of_contacts, self.__number_of_positions, self.__runtime_seconds, self.__memory_bytes / 1e6)
+
+    def get_number_of_contacts(self):
+        return self.__number_of_contacts
+
+    def get_number_of_positions(self):
+        return self.__number_of_positions
+
+    def get_runtime_seconds(self):
+        return self.__runtime_seconds
+
+    def get_memory_bytes(self):
+        return self.__memory_bytes
+
+
+def estimate_analysis_cost(start_time, end_time, satellite, number_of_apertures, mode, precision, scheduling_method):
+    """
+    schätzt Laufzeit und Speicherbedarf einer Analyse, ohne den Satelliten zu propagieren
+    :param start_time: datetime.datetime
+    :param end_time: datetime.datetime
+    :param satellite: analysis.Satellite
+    :param number_of_apertures: int
+    :param mode: analysis.AnalysisModes
+    :param precision: analysis.AnalysisPrecisions
+    :param scheduling_method: analysis.SchedulingMethods
+    :return: AnalysisCostEstimate
+    """
+    duration = end_time - start_time
+    duration_seconds = duration.total_seconds()
+    number_of_orbits = duration_seconds / satellite.get_orbit_duration()
+    number_of_contacts = number_of_apertures * number_of_orbits * CONTACTS_PER_APERTURE_AND_ORBIT
+    # Satellitenpositionen werden nur bis zu einer Höchstdauer für Cesium berechnet
+    number_of_satellite_positions = 0
+    if duration <= MAXIMUM_DURATION_FOR_POSITIONS:
+        number_of_satellite_positions = number_of_orbits * STEPS_PER_ORBIT
+    number_of_positions = number_of_contacts * RELATIVE_POSITIONS_PER_CONTACT + number_of_satellite_positions
+    scheduling_seconds_per_contact = SCHEDULING_SECONDS_PER_CONTACT[mode]
+    if mode != AnalysisModes.JustOrbit:
+        scheduling_seconds_per_contact += SCHEDULING_METHOD_SECONDS_PER_CONTACT[scheduling_method]
+    runtime_seconds = \
+        number_of_apertures * duration_seconds / SI_DAY_IN_SECONDS * PROPAGATION_SECONDS_PER_APERTURE_DAY \
+        * PROPAGATION_FACTOR[precision] \
+        + number_of_contacts * scheduling_seconds_per_contact \
+        + number_of_satellite_positions * SECONDS_PER_SATELLITE_POSITION
+    memory_bytes = number_of_contacts * BYTES_PER_CONTACT + number_of_satellite_positions * BYTES_PER_SATELLITE_POSITION
+    return AnalysisCostEstimate(int(number_of_contacts), int(number_of_positions), runtime_seconds, memory_bytes)
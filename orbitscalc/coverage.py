@@ -0,0 +1,166 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import numpy
+from datetime import timedelta
+from orbitscalc.general_utility import CustomEnum
+
+
+# Perzentile der Lückenlängen, die ausgegeben werden
+GAP_PERCENTILES = (50, 90, 99)
+# Anzahl der ausgegebenen längsten Lücken
+NUMBER_OF_LONGEST_GAPS = 5
+
+
+class CoverageDimensions(CustomEnum):
+    Network = "Netz"
+    Operator = "Betreiber"
+    GroundStation = "Bodenstation"
+
+
+def determine_interval_union(starts, ends):
+    """
+    vereinigt Intervalle per Sweep-Line: nach Beginn sortiert beginnt ein neuer Abschnitt, wo ein Intervall nach dem
+    spätesten Ende aller vorherigen beginnt; sich berührende Intervalle werden zusammengefasst, O(n log n)
+    :param starts: numpy.ndarray
+    :param ends: numpy.ndarray
+    :return: numpy.ndarray Beginn und numpy.ndarray Ende der Abschnitte, numpy.ndarray Reihenfolge der Intervalle
+        nach Beginn, numpy.ndarray Index des Abschnitts je Intervall in dieser Reihenfolge
+    """
+    starts = numpy.asarray(starts, dtype=float)
+    ends = numpy.asarray(ends, dtype=float)
+    order = numpy.argsort(starts, kind="stable")
+    if not len(order):
+        return numpy.zeros(0), numpy.zeros(0), order, numpy.zeros(0, dtype=int)
+    sorted_starts = starts[order]
+    running_ends = numpy.maximum.accumulate(ends[order])
+    begins_section = numpy.ones(len(order), dtype=bool)
+    begins_section[1:] = sorted_starts[1:] > running_ends[:-1]
+    section_of_interval = numpy.cumsum(begins_section) - 1
+    last_of_section = numpy.append(numpy.flatnonzero(begins_section)[1:] - 1, len(order) - 1)
+    return sorted_starts[begins_section], running_ends[last_of_section], order, section_of_interval
+
+
+class Coverage:
+    """
+    Vereinigung der Kontakte einer Menge von Antennen im Analysezeitraum mit den Lücken dazwischen;
+    Lücken vor dem ersten und nach dem letzten Kontakt zählen mit
+    """
+    def __init__(self, contacts, start_time, end_time):
+        """
+        :param contacts: iterable of Contact
+        :param start_time: datetime.datetime; Beginn des Analysezeitraums
+        :param end_time: datetime.datetime; Ende des Analysezeitraums
+        """
+        self.__start_time = start_time
+        self.__duration = (end_time - start_time).total_seconds()
+        times = [(contact.retrieve_start_time(), contact.retrieve_end_time()) for contact in contacts]
+        times = numpy.array([((start - start_time).total_seconds(), (end - start_time).total_seconds())
+                             for start, end in times if start is not None and end is not None]).reshape(-1, 2)
+        times = numpy.clip(times, 0, self.__duration)
+        self.__starts, self.__ends, _, _ = determine_interval_union(times[:, 0], times[:, 1])
+        gap_starts = numpy.concatenate(([0.0], self.__ends))
+        gap_ends = numpy.concatenate((self.__starts, [self.__duration]))
+        has_gap = gap_ends > gap_starts
+        self.__gap_starts = gap_starts[has_gap]
+        self.__gap_lengths = (gap_ends - gap_starts)[has_gap]
+
+    def __to_datetime(self, seconds):
+        return self.__start_time + timedelta(seconds=float(seconds))
+
+    def retrieve_intervals(self):
+        """
+        gibt die Abschnitte mit Kontakt chronologisch zurück
+        :return: list of (datetime.datetime, datetime.datetime)
+        """
+        return [(self.__to_datetime(start), self.__to_datetime(end))
+                for start, end in zip(self.__starts.tolist(), self.__ends.tolist())]
+
+    def retrieve_contact_seconds(self):
+        return float(numpy.sum(self.__ends - self.__starts))
+
+    def retrieve_contact_fraction(self):
+        """
+        Anteil des Analysezeitraums, in dem mindestens ein Kontakt besteht
+        :return: float
+        """
+        if self.__duration <= 0:
+            return 0.0
+        return self.retrieve_contact_seconds() / self.__duration
+
+    def retrieve_contact_percentage(self):
+        return self.retrieve_contact_fraction() * 100
+
+    def retrieve_number_of_gaps(self):
+        return len(self.__gap_lengths)
+
+    def retrieve_longest_gaps(self, number_of_gaps=NUMBER_OF_LONGEST_GAPS):
+        """
+        gibt die längsten Lücken absteigend nach Länge zurück
+        :param number_of_gaps: int
+        :return: list of (datetime.datetime, datetime.datetime, float); Beginn, Ende, Länge in Sekunden
+        """
+        longest = numpy.argsort(-self.__gap_lengths, kind="stable")[:number_of_gaps]
+        return [(self.__to_datetime(self.__gap_starts[index]),
+                 self.__to_datetime(self.__gap_starts[index] + self.__gap_lengths[index]),
+                 float(self.__gap_lengths[index])) for index in longest.tolist()]
+
+    def retrieve_maximum_gap_seconds(self):
+        return float(self.__gap_lengths.max()) if len(self.__gap_lengths) else 0.0
+
+    def retrieve_gap_percentiles(self):
+        """
+        gibt Perzentile der Lückenlängen in Sekunden zurück, leer ohne Lücken
+        :return: dict Perzentil: float
+        """
+        if not len(self.__gap_lengths):
+            return dict()
+        return dict(zip(GAP_PERCENTILES, numpy.percentile(self.__gap_lengths, GAP_PERCENTILES).tolist()))
+
+    def generate_json(self):
+        """
+        :return: dict
+        """
+        return {
+            "contact_fraction": self.retrieve_contact_fraction(),
+            "number_of_gaps": self.retrieve_number_of_gaps(),
+            "maximum_gap_seconds": self.retrieve_maximum_gap_seconds(),
+            "gap_percentiles_seconds": {str(percentile): value
+                                        for percentile, value in self.retrieve_gap_percentiles().items()},
+            "longest_gaps": [{"start": start.isoformat(), "end": end.isoformat(), "seconds": seconds}
+                             for start, end, seconds in self.retrieve_longest_gaps()],
+        }
+
+
+def determine_coverages(analysis):
+    """
+    ermittelt die Abdeckung des ganzen Netzes, jedes Betreibers und jeder Bodenstation der Analyse
+    :param analysis: analysis.Analysis nach durchgeführter Analyse
+    :return: list of dict mit dimension, name und coverage
+    """
+    ground_stations = list(analysis.get_ground_stations().values())
+    contacts_of_ground_station = [list(ground_station.retrieve_contact_set().get_contacts())
+                                  for ground_station in ground_stations]
+    start_time = analysis.get_start_time()
+    end_time = analysis.get_end_time()
+    coverages = [{
+        "dimension": CoverageDimensions.Network,
+        "name": CoverageDimensions.Network.value,
+        "coverage": Coverage([contact for contacts in contacts_of_ground_station for contact in contacts],
+                             start_time, end_time),
+    }]
+    # Name und Kontakte je Betreiber-id
+    operators = dict()
+    for ground_station, contacts in zip(ground_stations, contacts_of_ground_station):
+        for operator in ground_station.retrieve_operators():
+            operators.setdefault(operator.id, (operator.name, list()))[1].extend(contacts)
+    for name, contacts in operators.values():
+        coverages.append({"dimension": CoverageDimensions.Operator, "name": name,
+                          "coverage": Coverage(contacts, start_time, end_time)})
+    for ground_station, contacts in zip(ground_stations, contacts_of_ground_station):
+        coverages.append({"dimension": CoverageDimensions.GroundStation, "name": ground_station.get_name(),
+                          "coverage": Coverage(contacts, start_time, end_time)})
+    return coverages
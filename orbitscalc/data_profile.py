@@ -0,0 +1,166 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import numpy
+from datetime import datetime, timezone
+from orbitscalc.general_utility import data_with_unit, format_time
+
+
+SECONDS_PER_MINUTE = 60
+# relative Toleranz beim Vergleich der Datenmenge eines Zeitraums mit dessen angestrebter Datenmenge
+QUOTA_TOLERANCE = 1e-9
+
+
+def to_datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+class DataProfile:
+    """
+    kumulierte übertragene Daten entlang einer Kontaktfolge; innerhalb eines Kontakts steigen die Daten linear mit
+    der Zeit; Abfragen (Daten bis Zeitpunkt, Zeitpunkt bis Datenmenge, Daten je Zeitraum) per Interpolation bzw.
+    Binärsuche über die Präfixsummen, jeweils für viele Zeitpunkte bzw. Datenmengen auf einmal
+    """
+    def __init__(self, contact_sequence, start_time, end_time, data_period, data_in_period):
+        """
+        :param contact_sequence: ContactSequence
+        :param start_time: datetime.datetime; Beginn des Analysezeitraums
+        :param end_time: datetime.datetime; Ende des Analysezeitraums
+        :param data_period: float; Zeitraum in Sekunden, in dem data_in_period übertragen werden sollen
+        :param data_in_period: float
+        """
+        self.__start = start_time.timestamp()
+        self.__end = end_time.timestamp()
+        self.__data_period = data_period
+        self.__data_in_period = data_in_period
+        contacts = contact_sequence.get_contacts()
+        data = numpy.array([contact.get_data() for contact in contacts], dtype=float)
+        data_after = numpy.cumsum(data)
+        # Stützstellen: Beginn und Ende jedes Kontakts mit den bis dahin übertragenen Daten
+        contact_times = numpy.array([(contact.retrieve_start_time().timestamp(),
+                                      contact.retrieve_end_time().timestamp()) for contact in contacts],
+                                    dtype=float).reshape(-1)
+        contact_data = numpy.column_stack((data_after - data, data_after)).reshape(-1)
+        self.__times = numpy.concatenate(([self.__start], contact_times, [self.__end]))
+        self.__cumulative_data = numpy.concatenate(([0.0], contact_data, [data_after[-1] if len(data) else 0.0]))
+
+    def retrieve_cumulative_data(self, timestamps):
+        """
+        gibt die bis zu den Zeitpunkten übertragenen Daten zurück
+        :param timestamps: numpy.ndarray; Zeitpunkte in Sekunden
+        :return: numpy.ndarray
+        """
+        return numpy.interp(timestamps, self.__times, self.__cumulative_data)
+
+    def retrieve_timestamps_to_reach(self, data):
+        """
+        gibt die Zeitpunkte zurück, zu denen die Datenmengen übertragen sind, nan für nicht erreichte
+        :param data: numpy.ndarray; Datenmengen in bit
+        :return: numpy.ndarray; Zeitpunkte in Sekunden
+        """
+        data = numpy.asarray(data, dtype=float)
+        # erste Stützstelle, an der die Datenmenge erreicht ist; davor liegen weniger Daten vor
+        indices = numpy.clip(numpy.searchsorted(self.__cumulative_data, data, side="left"), 1, len(self.__times) - 1)
+        previous_data = self.__cumulative_data[indices - 1]
+        increase = self.__cumulative_data[indices] - previous_data
+        fraction = numpy.divide(data - previous_data, increase, out=numpy.zeros_like(data), where=increase > 0)
+        timestamps = self.__times[indices - 1] + fraction * (self.__times[indices] - self.__times[indices - 1])
+        timestamps = numpy.where(data <= 0, self.__start, timestamps)
+        return numpy.where(data > self.__cumulative_data[-1], numpy.nan, timestamps)
+
+    def retrieve_target_time(self):
+        """
+        gibt den Zeitpunkt zurück, zu dem die im Analysezeitraum angestrebte Datenmenge übertragen ist
+        :return: datetime.datetime, None falls nicht erreicht
+        """
+        target_data = (self.__end - self.__start) / self.__data_period * self.__data_in_period
+        timestamp = self.retrieve_timestamps_to_reach(numpy.array([target_data]))[0]
+        return None if numpy.isnan(timestamp) else to_datetime(timestamp)
+
+    def retrieve_period_boundaries(self):
+        """
+        Grenzen der aufeinanderfolgenden Zeiträume ab Beginn der Analyse, der letzte ist ggf. kürzer
+        :return: numpy.ndarray
+        """
+        # Rundungsfehler dürfen keinen verschwindend kurzen letzten Zeitraum erzeugen
+        number_of_periods = int(numpy.ceil((self.__end - self.__start) / self.__data_period - QUOTA_TOLERANCE))
+        boundaries = self.__start + numpy.arange(number_of_periods) * self.__data_period
+        return numpy.append(boundaries, self.__end)
+
+    def retrieve_period_data(self):
+        """
+        gibt je Zeitraum die übertragenen und die angestrebten Daten zurück; die angestrebten Daten eines kürzeren
+        letzten Zeitraums sind anteilig
+        :return: numpy.ndarray, numpy.ndarray
+        """
+        boundaries = self.retrieve_period_boundaries()
+        period_data = numpy.diff(self.retrieve_cumulative_data(boundaries))
+        return period_data, numpy.diff(boundaries) / self.__data_period * self.__data_in_period
+
+    def retrieve_insufficient_periods(self):
+        """
+        gibt die Zeiträume zurück, in denen weniger als die angestrebten Daten übertragen werden
+        :return: list of (datetime.datetime, datetime.datetime, str); Beginn, Ende, Datenmenge mit Einheit
+        """
+        boundaries = self.retrieve_period_boundaries()
+        period_data, quotas = self.retrieve_period_data()
+        insufficient = numpy.flatnonzero(period_data < quotas * (1 - QUOTA_TOLERANCE))
+        return [(to_datetime(boundaries[index]), to_datetime(boundaries[index + 1]), data_with_unit(period_data[index]))
+                for index in insufficient.tolist()]
+
+    def retrieve_number_of_periods(self):
+        return len(self.retrieve_period_boundaries()) - 1
+
+    def retrieve_number_of_sufficient_periods(self):
+        return self.retrieve_number_of_periods() - len(self.retrieve_insufficient_periods())
+
+    def retrieve_minimum_window(self):
+        """
+        gibt das gleitende Zeitfenster der Länge eines Zeitraums mit den wenigsten übertragenen Daten zurück;
+        die Datenmenge im Fenster ist stückweise linear in dessen Beginn, das Minimum liegt daher an einem Beginn,
+        zu dem Beginn oder Ende des Fensters auf eine Stützstelle fallen
+        :return: (datetime.datetime, datetime.datetime, float), None falls Analysezeitraum kürzer als ein Zeitraum
+        """
+        latest_start = self.__end - self.__data_period
+        if latest_start < self.__start:
+            return None
+        window_starts = numpy.unique(numpy.clip(
+            numpy.concatenate((self.__times, self.__times - self.__data_period)), self.__start, latest_start))
+        window_data = self.retrieve_cumulative_data(window_starts + self.__data_period) - \
+            self.retrieve_cumulative_data(window_starts)
+        index = window_data.argmin()
+        return (to_datetime(window_starts[index]), to_datetime(window_starts[index] + self.__data_period),
+                float(window_data[index]))
+
+    def retrieve_minimum_window_data_with_unit(self):
+        minimum_window = self.retrieve_minimum_window()
+        return data_with_unit(minimum_window[2]) if minimum_window else None
+
+    def retrieve_minimum_window_sufficient(self):
+        minimum_window = self.retrieve_minimum_window()
+        return minimum_window is not None and minimum_window[2] >= self.__data_in_period * (1 - QUOTA_TOLERANCE)
+
+    def get_data_period(self):
+        return self.__data_period
+
+    def retrieve_data_period_minutes(self):
+        return self.__data_period / SECONDS_PER_MINUTE
+
+    def retrieve_data_in_period_with_unit(self):
+        return data_with_unit(self.__data_in_period)
+
+    def generate_output_string(self):
+        """
+        gibt String mit Zeitpunkt der erreichten angestrebten Datenmenge und Anzahl ausreichender Zeiträume zurück
+        :return: string
+        """
+        target_time = self.retrieve_target_time()
+        if target_time:
+            target = "angestrebte Datenmenge am %s erreicht" % format_time(target_time)
+        else:
+            target = "angestrebte Datenmenge nicht erreicht"
+        return "%s, %i von %i Zeiträumen ausreichend" % (
+            target, self.retrieve_number_of_sufficient_periods(), self.retrieve_number_of_periods())
@@ -0,0 +1,327 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import numpy
+from bisect import bisect_left
+from heapq import nlargest
+from orbitscalc.contact_utility import ContactSequence
+
+
+# Anzahl der Subgradientenschritte der Lagrange-Relaxation
+LAGRANGIAN_ITERATIONS = 100
+# anfänglicher Faktor der Schrittweite nach Polyak
+INITIAL_STEP_FACTOR = 2.0
+# Schrittweite halbieren, wenn sich die obere Schranke so viele Schritte nicht verbessert
+STEPS_WITHOUT_IMPROVEMENT = 2
+
+
+def prepare_interval_sequence(start_times, end_times):
+    """
+    sortiert Intervalle nach Ende und ermittelt je Intervall die Anzahl der Intervalle, die vor seinem Beginn enden
+    :param start_times: numpy.ndarray
+    :param end_times: numpy.ndarray
+    :return: numpy.ndarray Reihenfolge, numpy.ndarray kompatible Vorgänger
+    """
+    order = numpy.argsort(end_times, kind="stable")
+    compatible = numpy.searchsorted(end_times[order], start_times[order], side="left")
+    return order, compatible
+
+
+def select_best_intervals(order, compatible, weights):
+    """
+    wählt sich nicht überschneidende Intervalle mit größter Summe der Gewichte aus (gewichtete Intervallplanung)
+    :param order: numpy.ndarray; aus prepare_interval_sequence
+    :param compatible: numpy.ndarray; aus prepare_interval_sequence
+    :param weights: numpy.ndarray; Intervalle mit Gewicht <= 0 werden nie gewählt
+    :return: list of int; Indizes der gewählten Intervalle in chronologischer Reihenfolge
+    """
+    best = [0.0] * (len(order) + 1)
+    sorted_weights = weights[order].tolist()
+    compatible_list = compatible.tolist()
+    for index in range(len(order)):
+        with_interval = best[compatible_list[index]] + sorted_weights[index]
+        best[index + 1] = with_interval if with_interval > best[index] else best[index]
+    selected = list()
+    index = len(order)
+    while index > 0:
+        if best[index] == best[index - 1]:
+            index -= 1
+        else:
+            selected.append(int(order[index - 1]))
+            index = compatible_list[index - 1]
+    selected.reverse()
+    return selected
+
+
+def select_k_best_intervals(order, compatible, weights, number_of_selections):
+    """
+    ermittelt die Auswahlen sich nicht überschneidender Intervalle mit den größten Summen der Gewichte
+    in einem Durchlauf: je Präfix der nach Ende sortierten Intervalle werden die besten Werte mit Herkunft gespeichert
+    :param order: numpy.ndarray; aus prepare_interval_sequence
+    :param compatible: numpy.ndarray; aus prepare_interval_sequence
+    :param weights: numpy.ndarray; Intervalle mit Gewicht <= 0 werden nie gewählt
+    :param number_of_selections: int
+    :return: list of (float, list of int); Summe der Gewichte und chronologische Indizes, absteigend nach Summe
+    """
+    sorted_weights = weights[order].tolist()
+    compatible_list = compatible.tolist()
+    # je Präfix Liste von (Wert, gewählt, Präfix des Vorgängers, Rang im Vorgänger)
+    best = [[(0.0, False, None, None)]]
+    for index in range(len(order)):
+        candidates = [(value, False, index, rank) for rank, (value, *_) in enumerate(best[index])]
+        if sorted_weights[index] > 0:
+            candidates += [(value + sorted_weights[index], True, compatible_list[index], rank)
+                           for rank, (value, *_) in enumerate(best[compatible_list[index]])]
+        best.append(nlargest(number_of_selections, candidates, key=lambda candidate: candidate[0]))
+    selections = list()
+    for rank, (value, *_) in enumerate(best[-1]):
+        selected = list()
+        prefix = len(order)
+        while prefix:
+            _, is_selected, previous_prefix, previous_rank = best[prefix][rank]
+            if is_selected:
+                selected.append(int(order[prefix - 1]))
+            prefix, rank = previous_prefix, previous_rank
+        selected.reverse()
+        selections.append((value, selected))
+    return selections
+
+
+def determine_best_interval_sequence(start_times, end_times, weights):
+    """
+    wählt sich nicht überschneidende Intervalle mit größter Summe der Gewichte aus;
+    ein Intervall darf erst nach dem Ende des vorherigen beginnen
+    :param start_times: numpy.ndarray
+    :param end_times: numpy.ndarray
+    :param weights: numpy.ndarray
+    :return: numpy.ndarray; Indizes der gewählten Intervalle in chronologischer Reihenfolge
+    """
+    order, compatible = prepare_interval_sequence(start_times, end_times)
+    return numpy.array(select_best_intervals(order, compatible, weights), dtype=int)
+
+
+class ResourceOccupancy:
+    """
+    belegte Zeiträume einer Ressource (Antenne oder Satellit), nach Beginn sortiert
+    """
+    def __init__(self):
+        self.__start_times = list()
+        self.__end_times = list()
+
+    def is_free(self, start_time, end_time):
+        """
+        prüft, ob sich der Zeitraum mit keinem belegten Zeitraum überschneidet (gleiche Zeitpunkte überschneiden sich)
+        :return: bool
+        """
+        position = bisect_left(self.__start_times, start_time)
+        if position < len(self.__start_times) and self.__start_times[position] <= end_time:
+            return False
+        return position == 0 or self.__end_times[position - 1] < start_time
+
+    def occupy(self, start_time, end_time):
+        position = bisect_left(self.__start_times, start_time)
+        self.__start_times.insert(position, start_time)
+        self.__end_times.insert(position, end_time)
+
+
+class FleetSchedule:
+    """
+    Zuordnung von Kontakten mehrerer Satelliten zu Antennen, bei der keine Antenne zwei Satelliten
+    und kein Satellit zwei Antennen gleichzeitig nutzt
+    """
+    def __init__(self, selected, data, upper_bound):
+        """
+        :param selected: numpy.ndarray; Indizes der eingeplanten Kontakte
+        :param data: float; Datenmenge aller eingeplanten Kontakte
+        :param upper_bound: float; obere Schranke der Lagrange-Relaxation für die größtmögliche Datenmenge
+        """
+        self.__selected = selected
+        self.__data = data
+        self.__upper_bound = upper_bound
+
+    def get_selected(self):
+        return self.__selected
+
+    def get_data(self):
+        return self.__data
+
+    def get_upper_bound(self):
+        return self.__upper_bound
+
+    def retrieve_optimality_gap(self):
+        """
+        gibt höchstens möglichen Anteil zurück, um den eine optimale Zuordnung mehr Daten überträgt
+        :return: float
+        """
+        if self.__upper_bound <= 0:
+            return 0.0
+        return max(self.__upper_bound - self.__data, 0.0) / self.__upper_bound
+
+
+class FleetScheduler:
+    """
+    plant Kontakte vieler Satelliten mit gemeinsam genutzten Antennen über eine Lagrange-Relaxation:
+    die Bedingung, dass eine Antenne zu jedem Zeitpunkt höchstens einen Satelliten bedient, wird mit Preisen
+    je Beginn eines Kontakts an der Antenne relaxiert; jeder Satellit wählt dann unabhängig seine beste
+    Kontaktfolge mit den um die Preise verminderten Datenmengen (gewichtete Intervallplanung),
+    Konflikte an Antennen werden repariert und freie Antennenzeit gierig aufgefüllt
+    """
+    def __init__(self, satellite_keys, antenna_keys, start_times, end_times, data):
+        """
+        :param satellite_keys: numpy.ndarray; Satellit je Kontakt
+        :param antenna_keys: numpy.ndarray; Antenne je Kontakt
+        :param start_times: numpy.ndarray; Beginn je Kontakt in Sekunden
+        :param end_times: numpy.ndarray; Ende je Kontakt in Sekunden
+        :param data: numpy.ndarray; übertragbare Datenmenge je Kontakt
+        """
+        self.__satellite_keys = numpy.asarray(satellite_keys)
+        self.__antenna_keys = numpy.asarray(antenna_keys)
+        self.__start_times = numpy.asarray(start_times, dtype=float)
+        self.__end_times = numpy.asarray(end_times, dtype=float)
+        self.__data = numpy.asarray(data, dtype=float)
+        # je Satellit Kontakte und vorbereitete Intervallplanung
+        self.__satellites = list()
+        for satellite_key in numpy.unique(self.__satellite_keys):
+            indices = numpy.flatnonzero((self.__satellite_keys == satellite_key) & (self.__data > 0))
+            order, compatible = prepare_interval_sequence(self.__start_times[indices], self.__end_times[indices])
+            self.__satellites.append((indices, order, compatible))
+        # Preise je Kontakt für den Zeitpunkt seines Beginns an seiner Antenne;
+        # ein Kontakt belegt alle Beginne seiner Antenne von seinem Beginn bis zu seinem Ende
+        price_order = numpy.lexsort((self.__start_times, self.__antenna_keys))
+        sorted_antennas = self.__antenna_keys[price_order]
+        sorted_starts = self.__start_times[price_order]
+        # Bereich [erster, letzter) der belegten Beginne in der sortierten Reihenfolge
+        self.__first_prices = numpy.empty(len(self.__data), dtype=int)
+        self.__last_prices = numpy.empty(len(self.__data), dtype=int)
+        for antenna_key in numpy.unique(self.__antenna_keys):
+            begin = numpy.searchsorted(sorted_antennas, antenna_key, side="left")
+            end = numpy.searchsorted(sorted_antennas, antenna_key, side="right")
+            members = price_order[begin:end]
+            self.__first_prices[members] = begin + numpy.searchsorted(
+                sorted_starts[begin:end], self.__start_times[members], side="left")
+            self.__last_prices[members] = begin + numpy.searchsorted(
+                sorted_starts[begin:end], self.__end_times[members], side="right")
+
+    def schedule(self, iterations=LAGRANGIAN_ITERATIONS):
+        """
+        :param iterations: int
+        :return: FleetSchedule
+        """
+        number_of_contacts = len(self.__data)
+        if not number_of_contacts:
+            return FleetSchedule(numpy.array([], dtype=int), 0.0, 0.0)
+        prices = numpy.zeros(number_of_contacts)
+        step_factor = INITIAL_STEP_FACTOR
+        best_selected = numpy.array([], dtype=int)
+        best_data = 0.0
+        upper_bound = numpy.inf
+        steps_without_improvement = 0
+        for iteration in range(iterations):
+            cumulative_prices = numpy.concatenate(([0.0], numpy.cumsum(prices)))
+            reduced_data = \
+                self.__data - (cumulative_prices[self.__last_prices] - cumulative_prices[self.__first_prices])
+            selected = self.__select_per_satellite(reduced_data)
+            # Wert der Relaxation ist obere Schranke für jede zulässige Zuordnung
+            relaxation_value = reduced_data[selected].sum() + prices.sum()
+            if relaxation_value < upper_bound - 1e-9:
+                upper_bound = relaxation_value
+                steps_without_improvement = 0
+            else:
+                steps_without_improvement += 1
+                if steps_without_improvement >= STEPS_WITHOUT_IMPROVEMENT:
+                    step_factor /= 2
+                    steps_without_improvement = 0
+            feasible = self.repair(selected)
+            feasible_data = self.__data[feasible].sum()
+            if feasible_data > best_data:
+                best_selected = feasible
+                best_data = feasible_data
+            # Subgradient: Anzahl gleichzeitig eingeplanter Kontakte je Beginn an einer Antenne minus 1
+            usage = numpy.zeros(number_of_contacts + 1)
+            numpy.add.at(usage, self.__first_prices[selected], 1)
+            numpy.add.at(usage, self.__last_prices[selected], -1)
+            subgradient = numpy.cumsum(usage)[:-1] - 1
+            if upper_bound - best_data <= 1e-9 * max(upper_bound, 1):
+                break
+            # Preise, die 0 sind und weiter sinken würden, tragen nicht zum Schritt bei
+            subgradient[(prices <= 0) & (subgradient < 0)] = 0
+            norm = numpy.dot(subgradient, subgradient)
+            if norm == 0:
+                break
+            step = step_factor * (relaxation_value - best_data) / norm
+            prices = numpy.maximum(prices + step * subgradient, 0.0)
+        return FleetSchedule(numpy.sort(best_selected), float(best_data), float(max(upper_bound, best_data)))
+
+    def __select_per_satellite(self, weights):
+        """
+        wählt je Satellit unabhängig die Kontaktfolge mit der größten Summe der Gewichte
+        :param weights: numpy.ndarray
+        :return: numpy.ndarray
+        """
+        selected = list()
+        for indices, order, compatible in self.__satellites:
+            selected.extend(indices[select_best_intervals(order, compatible, weights[indices])])
+        return numpy.array(selected, dtype=int)
+
+    def repair(self, selected):
+        """
+        macht eine Auswahl zulässig: Kontakte werden nach Datenmenge absteigend übernommen, sofern Antenne und
+        Satellit frei sind; danach werden alle übrigen Kontakte in derselben Weise aufgefüllt
+        :param selected: numpy.ndarray
+        :return: numpy.ndarray; Indizes der zulässigen Auswahl
+        """
+        antennas = dict()
+        satellites = dict()
+        accepted = list()
+        is_selected = numpy.zeros(len(self.__data), dtype=bool)
+        is_selected[selected] = True
+        remaining = numpy.flatnonzero(~is_selected & (self.__data > 0))
+        candidates = numpy.concatenate((
+            selected[numpy.argsort(-self.__data[selected], kind="stable")],
+            remaining[numpy.argsort(-self.__data[remaining], kind="stable")],
+        ))
+        for index in candidates.tolist():
+            start_time = self.__start_times[index]
+            end_time = self.__end_times[index]
+            antenna = antennas.setdefault(self.__antenna_keys[index], ResourceOccupancy())
+            satellite = satellites.setdefault(self.__satellite_keys[index], ResourceOccupancy())
+            if antenna.is_free(start_time, end_time) and satellite.is_free(start_time, end_time):
+                antenna.occupy(start_time, end_time)
+                satellite.occupy(start_time, end_time)
+                accepted.append(index)
+        return numpy.array(accepted, dtype=int)
+
+
+def schedule_contacts_of_satellites(contacts_of_satellites, iterations=LAGRANGIAN_ITERATIONS):
+    """
+    plant Kontakte mehrerer Satellitenanalysen mit gemeinsam genutzten Antennen
+    und gibt je Satellit die eingeplanten Kontakte als Kontaktfolge zurück
+    :param contacts_of_satellites: list of list of contact_utility.Contact mit ermittelter Datenmenge
+    :param iterations: int
+    :return: list of ContactSequence, FleetSchedule
+    """
+    contacts = [(satellite_index, contact) for satellite_index, satellite_contacts in enumerate(contacts_of_satellites)
+                for contact in satellite_contacts]
+    scheduler = FleetScheduler(
+        [satellite_index for satellite_index, contact in contacts],
+        [contact.get_antenna().retrieve_id() for satellite_index, contact in contacts],
+        [contact.retrieve_start_time().timestamp() for satellite_index, contact in contacts],
+        [contact.retrieve_end_time().timestamp() for satellite_index, contact in contacts],
+        [contact.get_data() or 0 for satellite_index, contact in contacts],
+    )
+    fleet_schedule = scheduler.schedule(iterations)
+    scheduled = [list() for _ in contacts_of_satellites]
+    for index in fleet_schedule.get_selected():
+        satellite_index, contact = contacts[index]
+        scheduled[satellite_index].append(contact)
+    contact_sequences = list()
+    for satellite_contacts in scheduled:
+        contact_sequence = ContactSequence()
+        for contact in sorted(satellite_contacts, key=lambda contact: contact.retrieve_start_time()):
+            contact.set_optimal()
+            contact_sequence.add_contact(contact)
+        contact_sequences.append(contact_sequence)
+    return contact_sequences, fleet_schedule
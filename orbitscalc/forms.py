@@ -6,7 +6,7 @@ Licensed under the Apache License, Version 2.0
 
 from django.forms import DecimalField, SplitDateTimeField, SplitDateTimeWidget, Form, NumberInput, \
     ChoiceField, IntegerField, Select, Textarea, RegexField
-from orbitscalc.analysis import AnalysisModes
+from orbitscalc.analysis import AnalysisModes, AnalysisPrecisions, SchedulingMethods
 from orbitscalc.regex_tle import REGEX_TLE, MAX_LENGTH_TLE, NUMBER_OF_COLUMNS_TLE, NUMBER_OF_ROWS_TLE
 from orbitscalc.general_utility import CustomEnum
 
@@ -80,6 +80,12 @@ class InputForm(Form):
     maximum_frequency_unit = ChoiceField(choices=FREQUENCY_UNITS, widget=Select())
 
     mode = ChoiceField(choices=AnalysisModes.retrieve_list_of_tuples(AnalysisModes), widget=Select())
+    precision = ChoiceField(choices=AnalysisPrecisions.retrieve_list_of_tuples(AnalysisPrecisions), widget=Select())
+    scheduling_method = ChoiceField(
+        choices=SchedulingMethods.retrieve_list_of_tuples(SchedulingMethods), widget=Select())
+    handover_gap = DecimalField(required=False, widget=NumberInput(attrs={'step': "any", 'min': 0, "value": 0}))
+    storage_capacity_unit = ChoiceField(choices=DATA_UNITS, required=False, widget=Select())
+    storage_capacity = DecimalField(required=False, widget=NumberInput(attrs={'step': "any", 'min': 0}))
 
     def clean(self):
         cleaned_data = super().clean()
@@ -108,6 +114,13 @@ class InputForm(Form):
             error_message = "Startzeit nach Endzeit"
             self.add_error('end_time', error_message)
 
+        # Datenspeicher an Bord muss angegeben sein
+        if cleaned_data.get("scheduling_method") == SchedulingMethods.Storage.name:
+            storage_capacity = cleaned_data.get("storage_capacity")
+            if not storage_capacity or storage_capacity <= 0 or not cleaned_data.get("storage_capacity_unit"):
+                error_message = "Für Kontaktfolgen mit Datenspeicher muss dessen Größe angegeben werden."
+                self.add_error('storage_capacity', error_message)
+
         # angestrebte Datenmenge = 0
         if cleaned_data.get("mode") is not AnalysisModes.JustOrbit:
             if cleaned_data.get("data") <= 0:
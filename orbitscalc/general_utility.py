@@ -5,7 +5,10 @@ Licensed under the Apache License, Version 2.0
 """
 
 import math
+import time
 from enum import Enum
+from functools import lru_cache
+from skyfield.api import load
 
 
 # Abkürzungen für Einheiten
@@ -88,52 +91,21 @@ def data_with_unit(data_bit):
     return "%s %s" % (str(data_rounded_to_unit), suffix)
 
 
-def merge(left_part, right_part, sort_by_start):
+def sort_by_time(unordered_list, sort_by_start):
     """
-    Mergen der unsortierten Hälften
-    :param left_part: list
-    :param right_part: list
+    sortiert Liste stabil nach Start- bzw. Endzeit steigend; die Zeitpunkte werden je Element nur einmal als
+    Sortierschlüssel ermittelt
+    :param unordered_list: iterable
     :param sort_by_start: Boolean
     :return: list
     """
-    result = list()
-    while len(left_part) > 0 and len(right_part) > 0:
-        if sort_by_start:
-            left_value = left_part[0].retrieve_start_time()
-            right_value = right_part[0].retrieve_start_time()
-        else:
-            left_value = left_part[0].retrieve_end_time()
-            right_value = right_part[0].retrieve_end_time()
-        if left_value < right_value:
-            result.append(left_part[0])
-            del left_part[0]
-        else:
-            result.append(right_part[0])
-            del right_part[0]
-    if len(left_part) == 0:
-        result += right_part
+    elements = list(unordered_list)
+    if sort_by_start:
+        keys = [element.retrieve_start_time() for element in elements]
     else:
-        result += left_part
-    return result
-
-
-def merge_sort(unordered_list, sort_by_start):
-    """
-    sortiert liste nach Zeit von Index 0 bis -1 steigend
-    :param unordered_list: list
-    :param sort_by_start: Boolean
-    :return: list
-    """
-    if len(unordered_list) <= 1:
-        return unordered_list
-    # Mittelpunkt finden und Liste an Mittelpunkt aufteilen
-    middle = math.floor(len(unordered_list) / 2)
-    right_list = unordered_list[middle:]
-    left_list = unordered_list[:middle]
-    right_list = merge_sort(right_list, sort_by_start)
-    left_list = merge_sort(left_list, sort_by_start)
-
-    return list(merge(left_list, right_list, sort_by_start))
+        keys = [element.retrieve_end_time() for element in elements]
+    order = sorted(range(len(elements)), key=keys.__getitem__)
+    return [elements[index] for index in order]
 
 
 def to_dB(value):
@@ -148,10 +120,10 @@ def to_dB(value):
 def from_dB(value):
     """
     Wert aus logarithmischer Form umrechnen
-    :param value: float
-    :return: float
+    :param value: float / numpy.ndarray
+    :return: float / numpy.ndarray
     """
-    return math.pow(10, value / 10.0)
+    return 10 ** (value / 10.0)
 
 
 def to_percent_max100(value):
@@ -196,6 +168,16 @@ def format_time(time):
     return time.strftime(TIME_FORMAT_STRING)
 
 
+@lru_cache(maxsize=None)
+def retrieve_timescale():
+    """
+    gibt die gemeinsame Zeitskala von Skyfield zurück; load.timescale() liest bei jedem Aufruf die Dateien für
+    Delta T und Schaltsekunden neu ein und vermerkt dies dauerhaft im Protokoll des Loaders
+    :return: skyfield.timelib.Timescale
+    """
+    return load.timescale()
+
+
 def enum_to_list_of_tuples(enum):
     """
     gibt liste mit Attributen von Enum als Tupel zurück
@@ -211,3 +193,45 @@ class CustomEnum(Enum):
     """
     def retrieve_list_of_tuples(self):
         return enum_to_list_of_tuples(self)
+
+
+class AnalysisDeadline:
+    """
+    Zeitbudget einer Analyse, welches von den Berechnungsschritten kooperativ geprüft wird
+    """
+    def __init__(self, time_budget_seconds=None):
+        """
+        :param time_budget_seconds: float; None für unbegrenzte Laufzeit
+        """
+        if time_budget_seconds is None:
+            self.__end = None
+        else:
+            self.__end = time.monotonic() + time_budget_seconds
+        self.__exceeded = False
+
+    def is_exceeded(self):
+        """
+        prüft, ob das Zeitbudget aufgebraucht ist; einmal überschritten bleibt es überschritten
+        :return: bool
+        """
+        if not self.__exceeded and self.__end is not None:
+            self.__exceeded = time.monotonic() >= self.__end
+        return self.__exceeded
+
+    def get_exceeded(self):
+        return self.__exceeded
+
+
+class AnalysisInstrumentation:
+    """
+    zählt den Aufwand einer Analyse, um die Einsparungen der Vorfilter nachvollziehen zu können
+    """
+    def __init__(self):
+        # Bezeichnung: Wert, in Reihenfolge des ersten Auftretens
+        self.__counters = dict()
+
+    def increment(self, name, amount=1):
+        self.__counters[name] = self.__counters.get(name, 0) + amount
+
+    def get_counters(self):
+        return self.__counters
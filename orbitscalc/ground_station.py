@@ -6,7 +6,13 @@ Licensed under the Apache License, Version 2.0
 
 from orbitscalc.antenna import Antenna
 from orbitscalc.contact_utility import ContactSet, ContactGroup
-from orbitscalc.general_utility import merge_sort, to_percent_max100
+from orbitscalc.coverage import determine_interval_union
+from orbitscalc.general_utility import to_percent_max100
+from orbitscalc.station_geometry import determine_station_contact_times
+
+
+# ab dieser Anzahl zu durchsuchender Antennen werden Kontaktzeitfenster für die Bodenstation gemeinsam gesucht
+MINIMUM_ANTENNAS_FOR_SHARED_SEARCH = 2
 
 
 class GroundStation:
@@ -18,6 +24,8 @@ class GroundStation:
             self.add_antenna(antenna_data_base)
         self.__share = None
         self.__best_contact_sequence = None
+        # nächstbeste Kontaktfolgen, absteigend nach Datenmenge
+        self.__alternative_contact_sequences = list()
 
     def __repr__(self):
         return "Bodenstation %s" % self.get_name()
@@ -25,14 +33,74 @@ class GroundStation:
     def add_antenna(self, antenna_data_base):
         self.__antennas.append(Antenna(self, antenna_data_base))
 
-    def determine_contacts(self):
+    def determine_contacts(self, recorded_contact_times=None):
         """
-        lässt alle Antennen ihre Kontakte ermitteln
+        lässt alle Antennen ihre Kontakte ermitteln;
+        Antennen mit gespeicherten Kontakten erstellen diese daraus, statt den Satelliten zu propagieren,
+        mehrere zu durchsuchende Antennen teilen sich die Suche der Kontaktzeitfenster am Mittelpunkt der Bodenstation;
+        bei nicht exakter Genauigkeit werden Kontakte stets im groben Zeitraster gesucht, nie mit find_events
+        :param recorded_contact_times: dict Antennen-id: list of (Beginn, Höchststand, Ende)
         :return: None
         """
+        antennas_to_search = list()
         for antenne in self.__antennas:
+            if recorded_contact_times and antenne.retrieve_id() in recorded_contact_times:
+                antenne.determine_contacts_from_times(recorded_contact_times[antenne.retrieve_id()])
+            else:
+                antennas_to_search.append(antenne)
+        if self.__analyse.get_precision().get_tolerance_seconds() is not None:
+            self.determine_contacts_sampled(antennas_to_search)
+            return
+        if len(antennas_to_search) >= MINIMUM_ANTENNAS_FOR_SHARED_SEARCH:
+            search_ranges = {antenne: antenne.determine_search_range() for antenne in antennas_to_search}
+            for antenne in [antenne for antenne, search_range in search_ranges.items() if search_range is None]:
+                antenne.determine_contacts_from_times(list())
+                antennas_to_search.remove(antenne)
+            if len(antennas_to_search) >= MINIMUM_ANTENNAS_FOR_SHARED_SEARCH:
+                search_start_time = min(search_ranges[antenne][0] for antenne in antennas_to_search)
+                search_end_time = max(search_ranges[antenne][1] for antenne in antennas_to_search)
+                contact_times = determine_station_contact_times(
+                    self.__analyse, self.get_coordinates(), antennas_to_search, search_start_time, search_end_time)
+                # Antennen zu weit verstreut: jede Antenne sucht einzeln
+                if contact_times is not None:
+                    for antenne, antenna_contact_times in zip(antennas_to_search, contact_times):
+                        antenne.determine_contacts_from_times(antenna_contact_times)
+                    return
+        for antenne in antennas_to_search:
             antenne.determine_contacts()
 
+    def determine_contacts_sampled(self, antennas_to_search):
+        """
+        ermittelt Kontakte der Antennen im groben Zeitraster der Genauigkeit der Analyse,
+        gemeinsam für die Bodenstation oder, falls die Antennen zu weit verstreut sind, je Antenne
+        :param antennas_to_search: list of antenna.Antenna
+        :return: None
+        """
+        search_ranges = dict()
+        for antenne in antennas_to_search:
+            search_range = antenne.determine_search_range()
+            if search_range is None:
+                antenne.determine_contacts_from_times(list())
+            else:
+                search_ranges[antenne] = search_range
+        if not search_ranges:
+            return
+        search_start_time = min(search_range[0] for search_range in search_ranges.values())
+        search_end_time = max(search_range[1] for search_range in search_ranges.values())
+        antennas = list(search_ranges)
+        contact_times = determine_station_contact_times(
+            self.__analyse, self.get_coordinates(), antennas, search_start_time, search_end_time)
+        if contact_times is None:
+            contact_times = [determine_station_contact_times(
+                self.__analyse, antenne.retrieve_coordinates(), [antenne], *search_ranges[antenne])[0]
+                for antenne in antennas]
+        for antenne, antenna_contact_times in zip(antennas, contact_times):
+            antenne.determine_contacts_from_times(antenna_contact_times)
+
+    def clip_contacts_to_availability(self, unavailability_index):
+        for antenna in self.__antennas:
+            antenna.clip_contacts_to_availability(unavailability_index)
+
     def determine_data(self):
         """
         lässt alle Antennen ihre Datenmengen ermitteln
@@ -60,6 +128,9 @@ class GroundStation:
     def retrieve_id(self):
         return self.__ground_station_data_base.id
 
+    def retrieve_operators(self):
+        return list(self.__ground_station_data_base.operator.all())
+
     def get_analysis(self):
         return self.__analyse
 
@@ -88,34 +159,26 @@ class GroundStation:
     def set_best_contact_sequence(self, contact_sequence):
         self.__best_contact_sequence = contact_sequence
 
+    def get_alternative_contact_sequences(self):
+        return self.__alternative_contact_sequences
+
+    def set_alternative_contact_sequences(self, contact_sequences):
+        self.__alternative_contact_sequences = contact_sequences
+
     def get_contact_groups(self):
         """
         gibt Kontaktsets zur Darstellung in Cesium zurück,
-        welche ein Intervall mit ununterbrochen Kontakte mit dem Satelliten repräsentieren
+        welche ein Intervall mit ununterbrochen Kontakte mit dem Satelliten repräsentieren;
+        die Intervalle sind die Abschnitte der Vereinigung aller Kontakte (coverage.determine_interval_union)
         :return: list
         """
-        contacts = self.retrieve_contact_set().get_contacts()
-        groups_of_contiguous_contacts = list()
-        # Pruefen, ob es Kontakte gibt
-        if contacts:
-            # Kontakte nach Startzeit sortieren
-            sorted_contacts = merge_sort(list(contacts), True)
-            # Gruppen ueberlappender Kontakte ermitteln
-            highest_end_time = sorted_contacts[0].retrieve_end_time()
-            contiguous_contacts = ContactGroup()
-            contiguous_contacts.add_contact_and_adjust_times(sorted_contacts[0])
-            for contact in sorted_contacts[1:]:
-                # pruefen, ob Kontakt nach Ende des letzten Kontaktes erst anfaengt
-                if contact.retrieve_start_time() > highest_end_time:
-                    # aktuelle Gruppe zusammenhaengender Kontakte abschliessen
-                    groups_of_contiguous_contacts.append(
-                        contiguous_contacts)
-                    # mit aktuellem Kontakt neue Gruppe beginnen
-                    contiguous_contacts = ContactGroup()
-                contiguous_contacts.add_contact_and_adjust_times(contact)
-                if contact.retrieve_end_time() > highest_end_time:
-                    highest_end_time = contact.retrieve_end_time()
-            # letzte Gruppe zusammenhaenger Kontakte abschliessen
-            groups_of_contiguous_contacts.append(
-                contiguous_contacts)
+        contacts = list(self.retrieve_contact_set().get_contacts())
+        reference_time = self.__analyse.get_start_time()
+        _, _, order, section_of_contact = determine_interval_union(
+            [(contact.retrieve_start_time() - reference_time).total_seconds() for contact in contacts],
+            [(contact.retrieve_end_time() - reference_time).total_seconds() for contact in contacts])
+        groups_of_contiguous_contacts = [ContactGroup() for _ in range(section_of_contact[-1] + 1 if contacts else 0)]
+        # Kontakte nach Startzeit in ihre Gruppe einfügen
+        for index, section in zip(order.tolist(), section_of_contact.tolist()):
+            groups_of_contiguous_contacts[section].add_contact_and_adjust_times(contacts[index])
         return groups_of_contiguous_contacts
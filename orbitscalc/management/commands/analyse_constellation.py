@@ -0,0 +1,74 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+from django.core.management.base import BaseCommand
+from orbitscalc.analysis import Satellite
+from orbitscalc.constellation import ConstellationAnalysis, CONSTELLATION_TIME_STEP_SECONDS
+from orbitscalc.general_utility import data_with_unit
+from orbitscalc.management.commands.prefill_contact_records import read_tles
+from orbitscalc.models import Aperture
+
+
+DEFAULT_DAYS = 1
+MEGA_HERTZ = 1e6
+
+
+class Command(BaseCommand):
+    help = "analysiert alle Satelliten einer TLE-Datei gemeinsam mit allen nutzbaren Antennen " \
+           "und gibt Datenmengen je Satellit und für die gesamte Konstellation aus"
+
+    def add_arguments(self, parser):
+        parser.add_argument("tle_file", help="Datei mit TLE (Name und zwei Zeilen je Satellit)")
+        parser.add_argument("--eirp", type=float, required=True, help="EIRP jedes Satelliten in dBW")
+        parser.add_argument("--minimum-frequency", type=float, required=True,
+                            help="untere Grenze des Downlinks in MHz")
+        parser.add_argument("--maximum-frequency", type=float, required=True,
+                            help="obere Grenze des Downlinks in MHz")
+        parser.add_argument("--start", type=datetime.fromisoformat,
+                            help="Beginn des Zeitraums (ISO 8601, UTC), Standard heute 0 Uhr UTC")
+        parser.add_argument("--days", type=float, default=DEFAULT_DAYS, help="Länge des Zeitraums in Tagen")
+        parser.add_argument("--time-step", type=float, default=CONSTELLATION_TIME_STEP_SECONDS,
+                            help="Abstand der gemeinsamen Zeitpunkte in Sekunden")
+        parser.add_argument("--matrix", action="store_true",
+                            help="zusätzlich Anzahl der Kontakte je Satellit und Antenne ausgeben")
+
+    def handle(self, *args, **options):
+        if options["start"]:
+            start_time = options["start"].replace(tzinfo=timezone.utc)
+        else:
+            start_time = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        end_time = start_time + timedelta(days=options["days"])
+        satellites = [Satellite(tle, options["eirp"], options["minimum_frequency"] * MEGA_HERTZ,
+                                options["maximum_frequency"] * MEGA_HERTZ)
+                      for tle in read_tles(options["tle_file"])]
+        antennas_data_base = [antenna for antenna in Aperture.objects.all() if antenna.is_usable]
+        runtime = time.monotonic()
+        analysis = ConstellationAnalysis(start_time, end_time, satellites, antennas_data_base, options["time_step"])
+        analysis.analyse()
+        runtime = time.monotonic() - runtime
+        contacts = analysis.get_contacts()
+        for result, scheduled in zip(analysis.retrieve_satellite_results(), analysis.retrieve_scheduled_sequences()):
+            self.stdout.write("%s: %i Kontakte, %s eingeplant, %s in bester Kontaktfolge (%s in allen Kontakten)" % (
+                result["name"], result["number_of_contacts"], data_with_unit(float(contacts.data[scheduled].sum())),
+                result["data_with_unit"], result["data_of_all_contacts_with_unit"]))
+        if options["matrix"]:
+            counts, durations, data = analysis.retrieve_contact_matrix()
+            self.stdout.write(";".join([""] + [str(antenna) for antenna in antennas_data_base]))
+            for satellite, satellite_counts in zip(satellites, counts):
+                self.stdout.write(";".join([satellite.get_name()] + [str(count) for count in satellite_counts]))
+            self.stdout.write("Datenmenge je Antenne: " + ", ".join(
+                "%s %s" % (antenna, data_with_unit(antenna_data))
+                for antenna, antenna_data in zip(antennas_data_base, data.sum(axis=0))))
+        fleet_schedule = analysis.get_fleet_schedule()
+        self.stdout.write("Konstellation: %s eingeplant von %s bis %s (höchstens %.1f %% unter dem Optimum, "
+                          "%s bei exklusiver Nutzung aller Antennen je Satellit)" % (
+                              analysis.retrieve_scheduled_fleet_data_with_unit(), start_time, end_time,
+                              100 * fleet_schedule.retrieve_optimality_gap(),
+                              analysis.retrieve_fleet_data_with_unit()))
+        self.stdout.write("berechnet in %.1f s: %s" % (runtime, ", ".join(
+            "%s %i" % (name, value) for name, value in analysis.get_instrumentation().get_counters().items())))
@@ -0,0 +1,99 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import json
+import numpy
+import time
+from datetime import datetime, timedelta, timezone
+from django.core.management.base import BaseCommand, CommandError
+from orbitscalc.analysis import Satellite
+from orbitscalc.general_utility import data_with_unit
+from orbitscalc.management.commands.prefill_contact_records import read_tles
+from orbitscalc.models import Aperture
+from orbitscalc.site_grid import SiteGridAnalysis, GRID_VALUES, SITE_GRID_TIME_STEP_SECONDS
+
+
+DEFAULT_DAYS = 1
+DEFAULT_GRID_STEP = 1.0
+# G/T einer typischen Antenne im S-Band
+DEFAULT_GAIN_TO_NOISE_TEMPERATURE = 20.0
+DEFAULT_NUMBER_OF_BEST_CELLS = 10
+MEGA_HERTZ = 1e6
+
+
+class Command(BaseCommand):
+    help = "bewertet mögliche Standorte neuer Antennen auf einem Gitter aus Breiten- und Längengraden " \
+           "gegenüber dem bestehenden Netz und gibt die besten Zellen sowie optional GeoJSON, PNG und Arrays aus"
+
+    def add_arguments(self, parser):
+        parser.add_argument("tle_file", help="Datei mit TLE (Name und zwei Zeilen je Satellit)")
+        parser.add_argument("--eirp", type=float, required=True, help="EIRP jedes Satelliten in dBW")
+        parser.add_argument("--minimum-frequency", type=float, required=True,
+                            help="untere Grenze des Downlinks in MHz")
+        parser.add_argument("--maximum-frequency", type=float, required=True,
+                            help="obere Grenze des Downlinks in MHz")
+        parser.add_argument("--gain-to-noise-temperature", type=float, default=DEFAULT_GAIN_TO_NOISE_TEMPERATURE,
+                            help="G/T der möglichen Antennen in dB/K")
+        parser.add_argument("--link-minimum-frequency", type=float,
+                            help="untere Grenze des Links der möglichen Antennen in MHz, Standard die des Downlinks")
+        parser.add_argument("--link-maximum-frequency", type=float,
+                            help="obere Grenze des Links der möglichen Antennen in MHz, Standard die des Downlinks")
+        parser.add_argument("--apertures", type=int, nargs="*",
+                            help="ids der Antennen des bestehenden Netzes, Standard alle nutzbaren")
+        parser.add_argument("--grid-step", type=float, default=DEFAULT_GRID_STEP, help="Abstand der Zellen in Grad")
+        parser.add_argument("--start", type=datetime.fromisoformat,
+                            help="Beginn des Zeitraums (ISO 8601, UTC), Standard heute 0 Uhr UTC")
+        parser.add_argument("--days", type=float, default=DEFAULT_DAYS, help="Länge des Zeitraums in Tagen")
+        parser.add_argument("--time-step", type=float, default=SITE_GRID_TIME_STEP_SECONDS,
+                            help="Abstand der Zeitpunkte in Sekunden")
+        parser.add_argument("--best", type=int, default=DEFAULT_NUMBER_OF_BEST_CELLS,
+                            help="Anzahl der auszugebenden Zellen mit dem größten Zuwachs")
+        parser.add_argument("--geojson", help="Datei für alle Zellen als GeoJSON")
+        parser.add_argument("--png", help="Datei für die Heatmap als PNG")
+        parser.add_argument("--png-values", choices=list(GRID_VALUES), default="marginal_data",
+                            help="in der Heatmap dargestellte Werte")
+        parser.add_argument("--array", help="Datei für alle Werte als numpy-Arrays (.npz)")
+
+    def handle(self, *args, **options):
+        if options["grid_step"] <= 0 or options["time_step"] <= 0:
+            raise CommandError("Abstand der Zellen und der Zeitpunkte müssen positiv sein")
+        if options["start"]:
+            start_time = options["start"].replace(tzinfo=timezone.utc)
+        else:
+            start_time = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        end_time = start_time + timedelta(days=options["days"])
+        satellites = [Satellite(tle, options["eirp"], options["minimum_frequency"] * MEGA_HERTZ,
+                                options["maximum_frequency"] * MEGA_HERTZ)
+                      for tle in read_tles(options["tle_file"])]
+        antennas_data_base = [antenna for antenna in Aperture.objects.all() if antenna.is_usable]
+        if options["apertures"] is not None:
+            antennas_data_base = [antenna for antenna in antennas_data_base if antenna.id in options["apertures"]]
+        link_minimum_frequency = options["link_minimum_frequency"] or options["minimum_frequency"]
+        link_maximum_frequency = options["link_maximum_frequency"] or options["maximum_frequency"]
+        runtime = time.monotonic()
+        analysis = SiteGridAnalysis(start_time, end_time, satellites, antennas_data_base,
+                                    options["gain_to_noise_temperature"], link_minimum_frequency * MEGA_HERTZ,
+                                    link_maximum_frequency * MEGA_HERTZ, options["grid_step"], options["time_step"])
+        analysis.analyse()
+        runtime = time.monotonic() - runtime
+        self.stdout.write("bestehendes Netz (%i Antennen): %s von %s bis %s" % (
+            len(antennas_data_base), analysis.retrieve_network_data_with_unit(), start_time, end_time))
+        for cell in analysis.retrieve_best_cells(options["best"]):
+            self.stdout.write("%.2f° %.2f°: Zuwachs %s, %s, %i Kontakte, %.0f s" % (
+                cell["latitude"], cell["longitude"], data_with_unit(cell["marginal_data"]),
+                data_with_unit(cell["data"]), cell["number_of_contacts"], cell["contact_seconds"]))
+        if options["geojson"]:
+            with open(options["geojson"], "w") as geo_json_file:
+                json.dump(analysis.generate_geo_json(), geo_json_file)
+        if options["png"]:
+            with open(options["png"], "wb") as png_file:
+                png_file.write(analysis.generate_png(options["png_values"]))
+        if options["array"]:
+            numpy.savez_compressed(options["array"], latitudes=analysis.get_latitudes(),
+                                   longitudes=analysis.get_longitudes(),
+                                   **{name: analysis.get_values(name) for name in GRID_VALUES})
+        self.stdout.write("berechnet in %.1f s: %s" % (runtime, ", ".join(
+            "%s %i" % (name, value) for name, value in analysis.get_instrumentation().get_counters().items())))
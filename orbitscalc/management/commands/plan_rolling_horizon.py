@@ -0,0 +1,92 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries
+from orbitscalc.analysis import AnalysisPrecisions, SchedulingMethods, Satellite
+from orbitscalc.management.commands.prefill_contact_records import read_tles
+from orbitscalc.models import Aperture
+from orbitscalc.rolling_horizon import RollingHorizonPlanner
+
+
+DEFAULT_HORIZON_DAYS = 3
+DEFAULT_FROZEN_HOURS = 6
+DEFAULT_INTERVAL_HOURS = 3
+MEGA_HERTZ = 1e6
+
+
+class Command(BaseCommand):
+    help = "plant die Kontakte eines Satelliten fortlaufend über einen mitlaufenden Planungszeitraum " \
+           "und gibt je Schritt die festgeschriebenen Kontakte aus (läuft bis zum Abbruch)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("tle_file", help="Datei mit TLE (Name und zwei Zeilen je Satellit)")
+        parser.add_argument("--satellite", help="Name des Satelliten in der TLE-Datei, Standard der erste")
+        parser.add_argument("--eirp", type=float, required=True, help="EIRP des Satelliten in dBW")
+        parser.add_argument("--minimum-frequency", type=float, required=True,
+                            help="untere Grenze des Downlinks in MHz")
+        parser.add_argument("--maximum-frequency", type=float, required=True,
+                            help="obere Grenze des Downlinks in MHz")
+        parser.add_argument("--horizon-days", type=float, default=DEFAULT_HORIZON_DAYS,
+                            help="Länge des Planungszeitraums in Tagen")
+        parser.add_argument("--frozen-hours", type=float, default=DEFAULT_FROZEN_HOURS,
+                            help="Länge des festgeschriebenen Zeitraums in Stunden")
+        parser.add_argument("--interval-hours", type=float, default=DEFAULT_INTERVAL_HOURS,
+                            help="Abstand der Planungsschritte in Stunden")
+        parser.add_argument("--precision", choices=[precision.name for precision in AnalysisPrecisions],
+                            default=AnalysisPrecisions.Exact.name, help="Genauigkeit der Kontaktzeitpunkte")
+        # Datenspeicher an Bord bräuchte dessen Füllstand am Ende des festgeschriebenen Zeitraums
+        parser.add_argument("--scheduling-method", choices=[method.name for method in SchedulingMethods
+                                                            if method != SchedulingMethods.Storage],
+                            default=SchedulingMethods.Instant.name, help="Art der Kontaktfolgen")
+        parser.add_argument("--handover-gap", type=float, default=0.0,
+                            help="Übergabezeit in Sekunden bei Wechsel der Bodenstation bzw. Antenne")
+        parser.add_argument("--start", type=datetime.fromisoformat,
+                            help="simulierter Beginn (ISO 8601, UTC); Schritte folgen dann ohne Wartezeit aufeinander")
+        parser.add_argument("--ticks", type=int, help="Anzahl der Planungsschritte, Standard unbegrenzt")
+
+    def handle(self, *args, **options):
+        horizon = timedelta(days=options["horizon_days"])
+        frozen_duration = timedelta(hours=options["frozen_hours"])
+        interval = timedelta(hours=options["interval_hours"])
+        if horizon <= frozen_duration + interval:
+            raise CommandError("Planungszeitraum muss länger als festgeschriebener Zeitraum "
+                               "und Abstand der Schritte sein")
+        tles = read_tles(options["tle_file"])
+        if options["satellite"]:
+            tles = [tle for tle in tles if tle[0].strip() == options["satellite"]]
+            if not tles:
+                raise CommandError("%s enthält keinen Satelliten %s" % (options["tle_file"], options["satellite"]))
+        satellite = Satellite(tles[0], options["eirp"], options["minimum_frequency"] * MEGA_HERTZ,
+                              options["maximum_frequency"] * MEGA_HERTZ)
+        antennas_data_base = [antenna for antenna in Aperture.objects.all() if antenna.is_usable]
+        planner = RollingHorizonPlanner(
+            satellite, antennas_data_base, horizon, frozen_duration, AnalysisPrecisions[options["precision"]],
+            SchedulingMethods[options["scheduling_method"]], options["handover_gap"])
+        simulated = options["start"] is not None
+        now = options["start"].replace(tzinfo=timezone.utc) if simulated else datetime.now(timezone.utc)
+        tick = 0
+        while options["ticks"] is None or tick < options["ticks"]:
+            runtime = time.monotonic()
+            committed_contacts = planner.tick(now)
+            runtime = time.monotonic() - runtime
+            self.stdout.write("%s: %i Kontakte bis %s festgeschrieben, %i Kontakte bis %s in Planung, "
+                              "%i Gruppen neu optimiert in %.2f s" % (
+                                  now, len(committed_contacts), planner.get_frozen_end_time(),
+                                  planner.retrieve_number_of_planned_contacts(), planner.get_horizon_end_time(),
+                                  planner.get_number_of_recomputed_groups(), runtime))
+            for contact in committed_contacts:
+                self.stdout.write("  %s: %s bis %s, %s" % (
+                    contact.get_antenna().get_name(), contact.retrieve_start_time(), contact.retrieve_end_time(),
+                    contact.retrieve_data_with_unit()))
+            # Abfrageprotokoll bei DEBUG leeren, damit der Speicherbedarf nicht mit der Laufzeit wächst
+            reset_queries()
+            tick += 1
+            now += interval
+            if not simulated:
+                time.sleep(max((now - datetime.now(timezone.utc)).total_seconds(), 0))
@@ -0,0 +1,53 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+from datetime import datetime, timedelta, timezone
+from django.core.management.base import BaseCommand, CommandError
+from orbitscalc.analysis import Analysis, AnalysisModes, Satellite
+from orbitscalc.models import Aperture, ContactRecord, ContactRecordCoverage
+from orbitscalc.regex_tle import NUMBER_OF_ROWS_TLE
+
+
+DEFAULT_DAYS = 14
+
+
+def read_tles(path):
+    """
+    liest Datei mit beliebig vielen TLE (jeweils Name und zwei Datenzeilen)
+    :param path: str
+    :return: list of tuple (Name, Zeile 1, Zeile 2)
+    """
+    with open(path) as tle_file:
+        lines = [line.rstrip() for line in tle_file if line.strip()]
+    lines_per_tle = NUMBER_OF_ROWS_TLE + 1
+    if len(lines) % lines_per_tle:
+        raise CommandError("%s enthält keine vollständigen TLE mit Namenszeile" % path)
+    return [tuple(lines[index:index + lines_per_tle]) for index in range(0, len(lines), lines_per_tle)]
+
+
+class Command(BaseCommand):
+    help = "berechnet die Kontakte der Satelliten einer TLE-Datei mit allen nutzbaren Antennen im Voraus " \
+           "und speichert sie für folgende Analysen (z.B. nächtlich per cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("tle_file", help="Datei mit TLE (Name und zwei Zeilen je Satellit)")
+        parser.add_argument("--days", type=float, default=DEFAULT_DAYS,
+                            help="Länge des Zeitraums ab heute 0 Uhr UTC in Tagen")
+
+    def handle(self, *args, **options):
+        start_time = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        end_time = start_time + timedelta(days=options["days"])
+        # abgelaufene Kontakte entfernen, auch die von Satelliten mit inzwischen neuem TLE
+        ContactRecord.objects.filter(end_time__lt=start_time).delete()
+        ContactRecordCoverage.objects.filter(end_time__lt=start_time).delete()
+        antennas_data_base = [antenna for antenna in Aperture.objects.all() if antenna.is_usable]
+        for tle in read_tles(options["tle_file"]):
+            # für den Kontaktplan sind nur die Bahndaten relevant, Datenmengen werden je Analyse berechnet
+            satellite = Satellite(tle, 0, 0, 0)
+            analysis = Analysis(start_time, end_time, None, 0, satellite)
+            analysis.analyse(list(), antennas_data_base, AnalysisModes.JustOrbit)
+            self.stdout.write("%s: Kontakte mit %i Antennen von %s bis %s gespeichert" % (
+                satellite.get_name(), len(antennas_data_base), start_time, end_time))
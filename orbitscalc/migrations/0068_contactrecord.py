@@ -0,0 +1,49 @@
+# Generated by Django 3.0.14 on 2026-10-19 12:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orbitscalc', '0067_auto_20201222_1823'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactRecordCoverage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tle_hash', models.CharField(max_length=64)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('latitude', models.DecimalField(decimal_places=12, max_digits=15, null=True)),
+                ('longitude', models.DecimalField(decimal_places=12, max_digits=15, null=True)),
+                ('altitude', models.DecimalField(decimal_places=3, max_digits=7, null=True)),
+                ('aperture', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='orbitscalc.Aperture')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContactRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tle_hash', models.CharField(max_length=64)),
+                ('start_time', models.DateTimeField()),
+                ('culmination_time', models.DateTimeField(null=True)),
+                ('end_time', models.DateTimeField()),
+                ('latitude', models.DecimalField(decimal_places=12, max_digits=15, null=True)),
+                ('longitude', models.DecimalField(decimal_places=12, max_digits=15, null=True)),
+                ('altitude', models.DecimalField(decimal_places=3, max_digits=7, null=True)),
+                ('aperture', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='orbitscalc.Aperture')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='contactrecordcoverage',
+            index=models.Index(fields=['tle_hash', 'aperture'], name='orbitscalc__tle_has_0aa139_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactrecord',
+            index=models.Index(fields=['tle_hash', 'aperture', 'start_time'], name='orbitscalc__tle_has_56bca0_idx'),
+        ),
+    ]
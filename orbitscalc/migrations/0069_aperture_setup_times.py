@@ -0,0 +1,23 @@
+# Generated by Django 3.0.14 on 2026-10-19 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orbitscalc', '0068_contactrecord'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aperture',
+            name='setup_time_s',
+            field=models.DecimalField(decimal_places=1, default=0, max_digits=7),
+        ),
+        migrations.AddField(
+            model_name='aperture',
+            name='teardown_time_s',
+            field=models.DecimalField(decimal_places=1, default=0, max_digits=7),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.0.14 on 2026-10-19 12:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orbitscalc', '0069_aperture_setup_times'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApertureUnavailability',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('recurrence_interval_hours', models.DecimalField(blank=True, decimal_places=3, max_digits=10, null=True)),
+                ('recurrence_end', models.DateTimeField(blank=True, null=True)),
+                ('reason', models.CharField(blank=True, max_length=200, null=True)),
+                ('aperture', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='orbitscalc.Aperture')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='apertureunavailability',
+            index=models.Index(fields=['aperture', 'start_time'], name='orbitscalc__apertur_a03fb1_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.14 on 2026-10-19 13:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orbitscalc', '0070_apertureunavailability'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aperture',
+            name='usage_cost',
+            field=models.DecimalField(decimal_places=2, default=1, max_digits=12),
+        ),
+    ]
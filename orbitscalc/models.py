@@ -66,6 +66,11 @@ class Aperture(models.Model):
     diameter = models.DecimalField(max_digits=6, decimal_places=3, null=True)
     is_operational = models.BooleanField(null=True)
     polarisation = models.CharField(max_length=200, null=True)
+    # Zeit zum Ausrichten vor und zum Freigeben nach einem Kontakt in Sekunden
+    setup_time_s = models.DecimalField(max_digits=7, decimal_places=1, default=0)
+    teardown_time_s = models.DecimalField(max_digits=7, decimal_places=1, default=0)
+    # Kosten der Nutzung für die Suche nach der günstigsten ausreichenden Antennenauswahl; 1 zählt Antennen
+    usage_cost = models.DecimalField(max_digits=12, decimal_places=2, default=1)
 
     def __str__(self):
         if self.name:
@@ -92,6 +97,26 @@ class Aperture(models.Model):
             return False
 
 
+# Zeitraum, in dem eine Antenne nicht verfügbar ist (Wartung, Buchung), optional regelmäßig wiederkehrend
+class ApertureUnavailability(models.Model):
+    aperture = models.ForeignKey(Aperture, on_delete=models.CASCADE)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    # Abstand der Wiederholungen in Stunden, leer für einmalige Sperrung
+    recurrence_interval_hours = models.DecimalField(max_digits=10, decimal_places=3, null=True, blank=True)
+    # Beginn der letzten Wiederholung, leer für unbegrenzte Wiederholung
+    recurrence_end = models.DateTimeField(null=True, blank=True)
+    reason = models.CharField(max_length=200, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["aperture", "start_time"]),
+        ]
+
+    def __str__(self):
+        return "unavailability of %s from %s to %s" % (self.aperture, self.start_time, self.end_time)
+
+
 class Link(models.Model):
     aperture = models.ForeignKey(Aperture, on_delete=models.CASCADE, null=True)
     frequency_min_MHz = models.DecimalField(max_digits=10, decimal_places=3, null=True)
@@ -114,3 +139,44 @@ class Link(models.Model):
     @property
     def frequency_max(self):
         return float(self.frequency_max_MHz) * MEGA_PREFIX_SIZE
+
+
+# berechneter Kontakt eines Satelliten (identifiziert über Hash des TLE) mit einer Antenne
+class ContactRecord(models.Model):
+    tle_hash = models.CharField(max_length=64)
+    aperture = models.ForeignKey(Aperture, on_delete=models.CASCADE)
+    start_time = models.DateTimeField()
+    culmination_time = models.DateTimeField(null=True)
+    end_time = models.DateTimeField()
+    # Position der Antenne bei der Berechnung; nach Änderung der Position gelten die Kontakte nicht mehr
+    latitude = models.DecimalField(max_digits=15, decimal_places=12, null=True)
+    longitude = models.DecimalField(max_digits=15, decimal_places=12, null=True)
+    altitude = models.DecimalField(max_digits=7, decimal_places=3, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["tle_hash", "aperture", "start_time"]),
+        ]
+
+    def __str__(self):
+        return "contact of %s from %s to %s" % (self.aperture, self.start_time, self.end_time)
+
+
+# Zeitraum, für den alle (an dessen Grenzen gekürzten) Kontakte eines Satelliten mit einer Antenne gespeichert sind
+class ContactRecordCoverage(models.Model):
+    tle_hash = models.CharField(max_length=64)
+    aperture = models.ForeignKey(Aperture, on_delete=models.CASCADE)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    # Position der Antenne bei der Berechnung wie bei ContactRecord
+    latitude = models.DecimalField(max_digits=15, decimal_places=12, null=True)
+    longitude = models.DecimalField(max_digits=15, decimal_places=12, null=True)
+    altitude = models.DecimalField(max_digits=7, decimal_places=3, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["tle_hash", "aperture"]),
+        ]
+
+    def __str__(self):
+        return "contacts of %s recorded from %s to %s" % (self.aperture, self.start_time, self.end_time)
@@ -0,0 +1,256 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import numpy
+from orbitscalc.contact_utility import ContactSequence
+from orbitscalc.general_utility import data_with_unit
+
+
+# Anzahl der Füllstände, auf die der Datenspeicher für die Kontaktfolge diskretisiert wird
+STORAGE_LEVELS = 64
+# Ereignisse der Kontakte; Beginne vor Enden, da aufeinanderfolgende Kontakte sich nicht berühren dürfen
+CONTACT_START = 0
+CONTACT_END = 1
+
+
+class StorageProfile:
+    """
+    Füllstand des Datenspeichers an Bord entlang einer Kontaktfolge mit den Zeiträumen, in denen er übergelaufen ist
+    """
+    def __init__(self, times, levels, capacity, generated_data, overflow_data, overflow_periods):
+        """
+        :param times: list of datetime.datetime
+        :param levels: list of float; Füllstand in bit zu den Zeitpunkten
+        :param capacity: float
+        :param generated_data: float
+        :param overflow_data: float; wegen vollem Speicher verlorene Daten
+        :param overflow_periods: list of (datetime.datetime, datetime.datetime)
+        """
+        self.__times = times
+        self.__levels = levels
+        self.__capacity = capacity
+        self.__generated_data = generated_data
+        self.__overflow_data = overflow_data
+        self.__overflow_periods = overflow_periods
+
+    def get_times(self):
+        return self.__times
+
+    def get_levels(self):
+        return self.__levels
+
+    def get_capacity(self):
+        return self.__capacity
+
+    def retrieve_capacity_with_unit(self):
+        return data_with_unit(self.__capacity)
+
+    def retrieve_generated_data_with_unit(self):
+        return data_with_unit(self.__generated_data)
+
+    def get_overflow_data(self):
+        return self.__overflow_data
+
+    def retrieve_overflow_data_with_unit(self):
+        return data_with_unit(self.__overflow_data)
+
+    def get_overflow_periods(self):
+        return self.__overflow_periods
+
+    def retrieve_final_level_with_unit(self):
+        return data_with_unit(self.__levels[-1])
+
+
+def fill_storage(level, generation_rate, capacity, seconds):
+    """
+    gibt Füllstand nach der Zeitspanne ohne Übertragung und die dabei wegen vollem Speicher verlorenen Daten zurück
+    :param level: float / numpy.ndarray
+    :param generation_rate: float; bit/s
+    :param capacity: float
+    :param seconds: float
+    :return: float / numpy.ndarray, float / numpy.ndarray
+    """
+    filled = level + generation_rate * seconds
+    return numpy.minimum(filled, capacity), numpy.maximum(filled - capacity, 0)
+
+
+def transfer_data(level, contact_data, generation_rate, capacity, seconds):
+    """
+    gibt die in einem Kontakt übertragbare Datenmenge und den Füllstand an dessen Ende zurück; übertragen werden
+    höchstens die zu Beginn gespeicherten und die während des Kontakts erzeugten Daten
+    :param level: float / numpy.ndarray; Füllstand zu Beginn
+    :param contact_data: float; größte Datenmenge des Kontakts
+    :param generation_rate: float
+    :param capacity: float
+    :param seconds: float; Dauer des Kontakts
+    :return: float / numpy.ndarray übertragen, float / numpy.ndarray Füllstand, float / numpy.ndarray verloren
+    """
+    available = level + generation_rate * seconds
+    transferred = numpy.minimum(available, contact_data)
+    remaining = available - transferred
+    return transferred, numpy.minimum(remaining, capacity), numpy.maximum(remaining - capacity, 0)
+
+
+def reduce_storage_states(levels, values, nodes, capacity, number_of_levels):
+    """
+    behält von Zuständen nur die nicht dominierten (kein anderer hat mehr Daten im Speicher und mehr übertragen)
+    und je diskretem Füllstand den mit den meisten übertragenen Daten
+    :param levels: numpy.ndarray
+    :param values: numpy.ndarray; bisher übertragene Daten
+    :param nodes: numpy.ndarray; Index des letzten Kontakts im Pfad
+    :param capacity: float
+    :param number_of_levels: int
+    :return: numpy.ndarray, numpy.ndarray, numpy.ndarray
+    """
+    order = numpy.lexsort((-values, -levels))
+    levels, values, nodes = levels[order], values[order], nodes[order]
+    # absteigend nach Füllstand: nur Zustände mit mehr Daten als alle volleren behalten
+    best_of_fuller = numpy.concatenate(([-numpy.inf], numpy.maximum.accumulate(values)[:-1]))
+    keep = values > best_of_fuller
+    levels, values, nodes = levels[keep], values[keep], nodes[keep]
+    bins = numpy.minimum((levels / capacity * number_of_levels).astype(int), number_of_levels - 1)
+    # absteigend sortiert steigen die Daten der verbliebenen Zustände, der letzte je Stufe hat die meisten
+    first = numpy.concatenate(([True], bins[1:] != bins[:-1]))
+    last_in_bin = numpy.concatenate((numpy.flatnonzero(first)[1:] - 1, [len(bins) - 1]))
+    return levels[last_in_bin], values[last_in_bin], nodes[last_in_bin]
+
+
+def best_contact_sequence_with_storage(contacts, generation_rate, capacity, start_time, end_time, deadline=None,
+                                       number_of_levels=STORAGE_LEVELS):
+    """
+    ermittelt aus Liste von Kontakten die Kontaktfolge mit den meisten übertragenen Daten, wenn an Bord nur die mit
+    gleichbleibender Rate erzeugten und im begrenzten Speicher vorhandenen Daten übertragen werden können;
+    dynamische Programmierung über die Beginne und Enden der Kontakte mit höchstens number_of_levels Zuständen
+    des Füllstands, Laufzeit linear in der Anzahl der Kontakte; der Speicher ist zu Beginn leer;
+    Kontakte, in denen weniger Daten vorliegen als übertragbar wären, werden mit der vorhandenen Datenmenge angesetzt
+    bei überschrittenem Zeitbudget wird die Kontaktfolge nur bis zum Beginn des ersten nicht berechneten Kontakts
+    ermittelt
+    :param contacts: list of Contact mit ermittelter Datenmenge
+    :param generation_rate: float; an Bord erzeugte Daten in bit/s
+    :param capacity: float; Größe des Datenspeichers in bit
+    :param start_time: datetime.datetime; Beginn des Analysezeitraums
+    :param end_time: datetime.datetime; Ende des Analysezeitraums
+    :param deadline: general_utility.AnalysisDeadline
+    :param number_of_levels: int
+    :return: ContactSequence mit StorageProfile
+    """
+    contacts = [contact for contact in contacts if contact.get_data()]
+    starts = [contact.retrieve_start_time().timestamp() for contact in contacts]
+    ends = [contact.retrieve_end_time().timestamp() for contact in contacts]
+    events = sorted([(start, CONTACT_START, index) for index, start in enumerate(starts)] +
+                    [(end, CONTACT_END, index) for index, end in enumerate(ends)])
+    # Zustände zum aktuellen Zeitpunkt: Füllstand, übertragene Daten, letzter Knoten des Pfads
+    time = start_time.timestamp()
+    levels = numpy.zeros(1)
+    values = numpy.zeros(1)
+    nodes = numpy.full(1, -1)
+    # Knoten: gewählter Kontakt, vorheriger Knoten und im Kontakt übertragene Daten
+    node_contacts = list()
+    node_parents = list()
+    node_transferred = list()
+    # Zustände am Ende begonnener Kontakte
+    pending = dict()
+    cutoff_time = None
+    for event_time, event_type, index in events:
+        levels = fill_storage(levels, generation_rate, capacity, event_time - time)[0]
+        time = event_time
+        if event_type == CONTACT_START:
+            if deadline and deadline.is_exceeded():
+                cutoff_time = contacts[index].retrieve_start_time()
+                break
+            transferred, end_levels, _ = transfer_data(
+                levels, contacts[index].get_data(), generation_rate, capacity, ends[index] - starts[index])
+            end_nodes = numpy.arange(len(node_contacts), len(node_contacts) + len(levels))
+            node_contacts.extend([index] * len(levels))
+            node_parents.extend(nodes.tolist())
+            node_transferred.extend(transferred.tolist())
+            pending[index] = reduce_storage_states(
+                end_levels, values + transferred, end_nodes, capacity, number_of_levels)
+        elif index in pending:
+            end_levels, end_values, end_nodes = pending.pop(index)
+            levels, values, nodes = reduce_storage_states(
+                numpy.concatenate((levels, end_levels)), numpy.concatenate((values, end_values)),
+                numpy.concatenate((nodes, end_nodes)), capacity, number_of_levels)
+    selected = list()
+    node = int(nodes[values.argmax()])
+    while node >= 0:
+        if node_transferred[node] > 0:
+            selected.append((node_contacts[node], node_transferred[node]))
+        node = node_parents[node]
+    best_sequence = ContactSequence()
+    for index, transferred in reversed(selected):
+        contact = contacts[index]
+        if transferred < contact.get_data():
+            contact = contact.create_limited_contact(transferred)
+        best_sequence.add_contact(contact)
+    best_sequence.set_cutoff_time(cutoff_time)
+    best_sequence.set_storage_profile(
+        determine_storage_profile(best_sequence, generation_rate, capacity, start_time, cutoff_time or end_time))
+    return best_sequence
+
+
+def limit_contacts_to_storage(contacts, generation_rate, capacity, start_time):
+    """
+    gibt die Kontaktfolge zurück, in der jeder Kontakt höchstens die an Bord vorhandenen Daten überträgt;
+    der Speicher ist zu Beginn leer
+    :param contacts: list of Contact; chronologisch, ohne Überschneidung
+    :param generation_rate: float
+    :param capacity: float
+    :param start_time: datetime.datetime; Beginn des Analysezeitraums
+    :return: ContactSequence
+    """
+    contact_sequence = ContactSequence()
+    level = 0.0
+    time = start_time.timestamp()
+    for contact in contacts:
+        start = contact.retrieve_start_time().timestamp()
+        end = contact.retrieve_end_time().timestamp()
+        level = fill_storage(level, generation_rate, capacity, start - time)[0]
+        transferred, level, _ = transfer_data(level, contact.get_data(), generation_rate, capacity, end - start)
+        time = end
+        if transferred > 0:
+            contact_sequence.add_contact(
+                contact if transferred >= contact.get_data() else contact.create_limited_contact(float(transferred)))
+    return contact_sequence
+
+
+def determine_storage_profile(contact_sequence, generation_rate, capacity, start_time, end_time):
+    """
+    ermittelt Füllstand des anfangs leeren Datenspeichers zu Beginn und Ende jedes Kontakts der Kontaktfolge
+    sowie die Zeiträume, in denen er übergelaufen ist
+    :param contact_sequence: ContactSequence
+    :param generation_rate: float
+    :param capacity: float
+    :param start_time: datetime.datetime
+    :param end_time: datetime.datetime
+    :return: StorageProfile
+    """
+    times = [start_time]
+    levels = [0.0]
+    overflow_data = 0.0
+    overflow_periods = list()
+
+    def fill_until(time):
+        nonlocal overflow_data
+        seconds = (time - times[-1]).total_seconds()
+        level, overflow = fill_storage(levels[-1], generation_rate, capacity, seconds)
+        if overflow > 0:
+            overflow_data += overflow
+            overflow_periods.append((time - (time - times[-1]) * (overflow / (generation_rate * seconds)), time))
+        times.append(time)
+        levels.append(float(level))
+
+    for contact in contact_sequence.get_contacts():
+        fill_until(contact.retrieve_start_time())
+        seconds = (contact.retrieve_end_time() - contact.retrieve_start_time()).total_seconds()
+        _, level, overflow = transfer_data(levels[-1], contact.get_data(), generation_rate, capacity, seconds)
+        overflow_data += float(overflow)
+        times.append(contact.retrieve_end_time())
+        levels.append(float(level))
+    if end_time > times[-1]:
+        fill_until(end_time)
+    generated_data = generation_rate * (times[-1] - start_time).total_seconds()
+    return StorageProfile(times, levels, capacity, generated_data, overflow_data, overflow_periods)
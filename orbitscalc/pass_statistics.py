@@ -0,0 +1,225 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import numpy
+from datetime import timedelta
+from orbitscalc.antenna import MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES
+from orbitscalc.general_utility import data_with_unit, CustomEnum
+from orbitscalc.spatial_index import SECONDS_PER_DAY
+from orbitscalc.station_geometry import StationGeometry
+
+
+# Grenzen der Klassen der maximalen Elevation eines Überflugs in Grad
+ELEVATION_BIN_EDGES_DEGREES = (MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES, 10, 20, 30, 45, 60, 90)
+# Spalten der Zusammenfassungen in Reihenfolge der CSV-Ausgabe
+STATISTICS_COLUMNS = (
+    "number_of_passes", "duration_seconds", "mean_duration_seconds", "maximum_elevation_degrees",
+    "mean_maximum_elevation_degrees", "data", "mean_gap_seconds", "maximum_gap_seconds", "mean_revisit_seconds",
+)
+
+
+class StatisticsDimensions(CustomEnum):
+    Day = "Tag"
+    GroundStation = "Bodenstation"
+    Operator = "Betreiber"
+    Antenna = "Antenne"
+    ElevationBin = "maximale Elevation"
+
+
+class PassStatistics:
+    """
+    Statistik der Überflüge aller Antennen einer Analyse als Würfel über Tag, Antenne und Klasse der maximalen
+    Elevation; der Würfel wird in einem Durchlauf über alle Kontakte per bincount gefüllt, Zusammenfassungen je Tag,
+    Bodenstation, Betreiber, Antenne und Elevationsklasse fassen dessen Zellen zusammen;
+    Lücke ist die Zeit seit dem Ende, Wiederkehr die Zeit seit dem Beginn des vorherigen Überflugs derselben Antenne
+    """
+    def __init__(self, analysis):
+        """
+        :param analysis: analysis.Analysis nach durchgeführter Analyse
+        """
+        self.__antennas = [antenna for ground_station in analysis.get_ground_stations().values()
+                           for antenna in ground_station.get_antennas() if antenna.get_contact_sequence()]
+        self.__ground_stations = list(analysis.get_ground_stations().values())
+        # Tage beginnen um 0 Uhr UTC
+        start_time = analysis.get_start_time()
+        self.__first_day = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        self.__number_of_days = max(int(numpy.ceil(
+            (analysis.get_end_time() - self.__first_day).total_seconds() / SECONDS_PER_DAY)), 1)
+        self.__number_of_bins = len(ELEVATION_BIN_EDGES_DEGREES) - 1
+        antenna_indices = list()
+        times = list()
+        data = list()
+        for antenna_index, antenna in enumerate(self.__antennas):
+            for contact in antenna.get_contact_sequence().get_contacts():
+                start = contact.retrieve_start_time()
+                end = contact.retrieve_end_time()
+                if start is None or end is None:
+                    continue
+                culmination = contact.retrieve_culmination_time() or start
+                antenna_indices.append(antenna_index)
+                times.append([(moment - self.__first_day).total_seconds() for moment in (start, culmination, end)])
+                data.append(contact.get_data() or 0)
+        antenna_indices = numpy.array(antenna_indices, dtype=int)
+        times = numpy.array(times, dtype=float).reshape(-1, 3)
+        data = numpy.array(data, dtype=float)
+        self.__number_of_contacts = len(data)
+        # maximale Elevation an Aufgang, Höchststand und Untergang, für alle Kontakte mit einer Propagation
+        if self.__number_of_contacts:
+            geometry = StationGeometry(
+                analysis.get_satellite(), [antenna.get_skyfield() for antenna in self.__antennas], self.__first_day)
+            elevations = geometry.retrieve_altitudes(times.reshape(-1), numpy.repeat(antenna_indices, 3))
+            elevations = elevations.reshape(-1, 3).max(axis=1)
+        else:
+            elevations = numpy.zeros(0)
+        starts = times[:, 0]
+        durations = times[:, 2] - starts
+        # Lücke und Wiederkehr zum vorherigen Überflug derselben Antenne
+        order = numpy.lexsort((starts, antenna_indices))
+        same_antenna = numpy.zeros(self.__number_of_contacts, dtype=bool)
+        gaps = numpy.zeros(self.__number_of_contacts)
+        revisits = numpy.zeros(self.__number_of_contacts)
+        if self.__number_of_contacts:
+            same_antenna[order[1:]] = antenna_indices[order[1:]] == antenna_indices[order[:-1]]
+            gaps[order[1:]] = numpy.maximum(starts[order[1:]] - times[order[:-1], 2], 0)
+            revisits[order[1:]] = starts[order[1:]] - starts[order[:-1]]
+        days = numpy.clip((starts // SECONDS_PER_DAY).astype(int), 0, self.__number_of_days - 1)
+        bins = numpy.clip(numpy.digitize(elevations, ELEVATION_BIN_EDGES_DEGREES[1:-1]), 0, self.__number_of_bins - 1)
+        self.__cube_shape = (self.__number_of_days, len(self.__antennas), self.__number_of_bins)
+        cells = numpy.ravel_multi_index((days, antenna_indices, bins), self.__cube_shape)
+        size = int(numpy.prod(self.__cube_shape))
+        self.__sums = {
+            "number_of_passes": numpy.bincount(cells, minlength=size).astype(float),
+            "duration_seconds": numpy.bincount(cells, weights=durations, minlength=size),
+            "elevation": numpy.bincount(cells, weights=elevations, minlength=size),
+            "data": numpy.bincount(cells, weights=data, minlength=size),
+            "gap": numpy.bincount(cells, weights=numpy.where(same_antenna, gaps, 0), minlength=size),
+            "revisit": numpy.bincount(cells, weights=numpy.where(same_antenna, revisits, 0), minlength=size),
+            "number_of_gaps": numpy.bincount(cells, weights=same_antenna, minlength=size),
+        }
+        self.__maxima = {
+            "maximum_elevation_degrees": numpy.zeros(size),
+            "maximum_gap_seconds": numpy.zeros(size),
+        }
+        numpy.maximum.at(self.__maxima["maximum_elevation_degrees"], cells, elevations)
+        numpy.maximum.at(self.__maxima["maximum_gap_seconds"], cells[same_antenna], gaps[same_antenna])
+
+    def determine_groups(self, dimension):
+        """
+        gibt Bezeichnungen der Gruppen einer Dimension sowie Paare aus Zelle des Würfels und Gruppe zurück;
+        eine Bodenstation mehrerer Betreiber zählt bei jedem ihrer Betreiber
+        :param dimension: StatisticsDimensions
+        :return: list of str, numpy.ndarray Zellen, numpy.ndarray Gruppen
+        """
+        cube_cells = numpy.arange(int(numpy.prod(self.__cube_shape))).reshape(self.__cube_shape)
+        days, antennas, bins = numpy.indices(self.__cube_shape)
+        if dimension == StatisticsDimensions.Day:
+            labels = [(self.__first_day + timedelta(days=day)).date().isoformat()
+                      for day in range(self.__number_of_days)]
+            return labels, cube_cells.reshape(-1), days.reshape(-1)
+        if dimension == StatisticsDimensions.Antenna:
+            labels = ["%s: %s" % (antenna.get_ground_station().get_name(), antenna.get_name())
+                      for antenna in self.__antennas]
+            return labels, cube_cells.reshape(-1), antennas.reshape(-1)
+        if dimension == StatisticsDimensions.ElevationBin:
+            labels = ["%g° bis %g°" % (lower, upper)
+                      for lower, upper in zip(ELEVATION_BIN_EDGES_DEGREES, ELEVATION_BIN_EDGES_DEGREES[1:])]
+            return labels, cube_cells.reshape(-1), bins.reshape(-1)
+        index_of_ground_station = {id(ground_station): index
+                                   for index, ground_station in enumerate(self.__ground_stations)}
+        station_of_antenna = numpy.array([index_of_ground_station[id(antenna.get_ground_station())]
+                                          for antenna in self.__antennas], dtype=int)
+        if dimension == StatisticsDimensions.GroundStation:
+            labels = [ground_station.get_name() for ground_station in self.__ground_stations]
+            return labels, cube_cells.reshape(-1), station_of_antenna[antennas.reshape(-1)]
+        # Paare aus Antenne und Betreiber ihrer Bodenstation
+        labels = list()
+        index_of_operator = dict()
+        pair_antennas = list()
+        pair_operators = list()
+        for ground_station_index, ground_station in enumerate(self.__ground_stations):
+            for operator in ground_station.retrieve_operators():
+                if operator.id not in index_of_operator:
+                    index_of_operator[operator.id] = len(labels)
+                    labels.append(operator.name)
+                for antenna_index in numpy.flatnonzero(station_of_antenna == ground_station_index).tolist():
+                    pair_antennas.append(antenna_index)
+                    pair_operators.append(index_of_operator[operator.id])
+        pair_cells = cube_cells[:, pair_antennas, :]
+        pair_groups = numpy.broadcast_to(numpy.array(pair_operators, dtype=int)[numpy.newaxis, :, numpy.newaxis],
+                                         pair_cells.shape)
+        return labels, pair_cells.reshape(-1), pair_groups.reshape(-1)
+
+    def retrieve_summary(self, dimension):
+        """
+        fasst die Zellen des Würfels je Gruppe der Dimension zusammen; Gruppen ohne Überflug werden ausgelassen
+        :param dimension: StatisticsDimensions
+        :return: list of dict mit label und STATISTICS_COLUMNS, Werte ohne Überflug None
+        """
+        labels, cells, groups = self.determine_groups(dimension)
+        sums = {name: numpy.bincount(groups, weights=values[cells], minlength=len(labels))
+                for name, values in self.__sums.items()}
+        maxima = dict()
+        for name, values in self.__maxima.items():
+            maxima[name] = numpy.zeros(len(labels))
+            numpy.maximum.at(maxima[name], groups, values[cells])
+        number_of_passes = sums["number_of_passes"]
+        rows = list()
+        for index in numpy.flatnonzero(number_of_passes > 0).tolist():
+            passes = number_of_passes[index]
+            gaps = sums["number_of_gaps"][index]
+            rows.append({
+                "label": labels[index],
+                "number_of_passes": int(passes),
+                "duration_seconds": float(sums["duration_seconds"][index]),
+                "mean_duration_seconds": float(sums["duration_seconds"][index] / passes),
+                "maximum_elevation_degrees": float(maxima["maximum_elevation_degrees"][index]),
+                "mean_maximum_elevation_degrees": float(sums["elevation"][index] / passes),
+                "data": float(sums["data"][index]),
+                "mean_gap_seconds": float(sums["gap"][index] / gaps) if gaps else None,
+                "maximum_gap_seconds": float(maxima["maximum_gap_seconds"][index]) if gaps else None,
+                "mean_revisit_seconds": float(sums["revisit"][index] / gaps) if gaps else None,
+            })
+        return rows
+
+    def retrieve_summaries(self):
+        """
+        gibt die Zusammenfassungen aller Dimensionen zurück
+        :return: list of dict mit dimension, name und rows (zusätzlich data_with_unit je Zeile)
+        """
+        summaries = list()
+        for dimension in StatisticsDimensions:
+            rows = self.retrieve_summary(dimension)
+            for row in rows:
+                row["data_with_unit"] = data_with_unit(row["data"])
+            summaries.append({"dimension": dimension.name, "name": dimension.value, "rows": rows})
+        return summaries
+
+    def generate_json(self):
+        """
+        gibt Würfel-Metadaten und alle Zusammenfassungen als JSON-serialisierbares dict zurück
+        :return: dict
+        """
+        return {
+            "first_day": self.__first_day.date().isoformat(),
+            "number_of_days": self.__number_of_days,
+            "number_of_passes": self.__number_of_contacts,
+            "elevation_bin_edges_degrees": list(ELEVATION_BIN_EDGES_DEGREES),
+            "summaries": self.retrieve_summaries(),
+        }
+
+    def generate_csv_rows(self):
+        """
+        gibt alle Zusammenfassungen als Zeilen einer Tabelle mit Kopfzeile zurück
+        :return: list of list
+        """
+        rows = [["dimension", "label"] + list(STATISTICS_COLUMNS)]
+        for dimension in StatisticsDimensions:
+            for row in self.retrieve_summary(dimension):
+                rows.append([dimension.name, row["label"]] + [row[column] for column in STATISTICS_COLUMNS])
+        return rows
+
+    def get_number_of_contacts(self):
+        return self.__number_of_contacts
@@ -41,6 +41,12 @@ MAX_LENGTH_TLE = 24 + NUMBER_OF_COLUMNS_TLE * NUMBER_OF_ROWS_TLE + 4
 LINE_OF_ORBITS_PER_DAY_IN_TLE = 2
 START_OF_ORBITS_PER_DAY_IN_TLE = 52
 END_OF_ORBITS_PER_DAY_IN_TLE = 63
+LINE_OF_INCLINATION_IN_TLE = 2
+START_OF_INCLINATION_IN_TLE = 8
+END_OF_INCLINATION_IN_TLE = 16
+LINE_OF_ECCENTRICITY_IN_TLE = 2
+START_OF_ECCENTRICITY_IN_TLE = 26
+END_OF_ECCENTRICITY_IN_TLE = 33
 LINE_OF_NAME_IN_TLE = 0
 LINE_ONE_IN_TLE = 1
 LINE_TWO_IN_TLE = 2
@@ -0,0 +1,124 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import hashlib
+import json
+import threading
+import time
+from decimal import Decimal
+
+
+# Dauer, für die ein fertiges Ergebnis für identische Anfragen wiederverwendet wird
+RESULT_CACHE_TIME_TO_LIVE_SECONDS = 60
+
+
+def canonical_value(value):
+    """
+    gibt Formularwert in einheitlicher, vergleichbarer Darstellung zurück
+    :param value: beliebiger Formularwert
+    :return: str / float
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, str):
+        # Zeilenumbrüche (z.B. beim TLE) vereinheitlichen
+        return "\n".join(line.rstrip() for line in value.splitlines())
+    return str(value)
+
+
+def determine_request_key(cleaned_data, antenna_ids, operator_ids):
+    """
+    gibt kanonischen Hash der Formulareingaben und der ausgewählten Antennen und Betreiber zurück
+    :param cleaned_data: dict
+    :param antenna_ids: list of int
+    :param operator_ids: list of int
+    :return: str
+    """
+    canonical_input = {
+        "form": {key: canonical_value(value) for key, value in cleaned_data.items()},
+        "antennas": sorted(antenna_ids),
+        "operators": sorted(operator_ids),
+    }
+    return hashlib.sha256(json.dumps(canonical_input, sort_keys=True).encode()).hexdigest()
+
+
+class InFlightComputation:
+    """
+    repräsentiert eine laufende Berechnung, auf deren Ergebnis weitere Anfragen warten können
+    """
+    def __init__(self):
+        self.__finished = threading.Event()
+        self.__result = None
+        self.__error = None
+
+    def finish(self, result):
+        self.__result = result
+        self.__finished.set()
+
+    def fail(self, error):
+        self.__error = error
+        self.__finished.set()
+
+    def wait(self):
+        """
+        wartet auf Ende der Berechnung und gibt deren Ergebnis zurück bzw. löst deren Fehler aus
+        :return: Ergebnis der Berechnung
+        """
+        self.__finished.wait()
+        if self.__error is not None:
+            raise self.__error
+        return self.__result
+
+
+class SingleFlight:
+    """
+    führt identische, gleichzeitige Berechnungen nur einmal aus und hält Ergebnisse kurzzeitig vor
+    gilt nur innerhalb eines Prozesses
+    """
+    def __init__(self, time_to_live=RESULT_CACHE_TIME_TO_LIVE_SECONDS):
+        self.__lock = threading.Lock()
+        self.__in_flight = dict()
+        # key: (Ablaufzeitpunkt, Ergebnis)
+        self.__results = dict()
+        self.__time_to_live = time_to_live
+
+    def __remove_expired_results(self):
+        now = time.monotonic()
+        for key in [key for key, (expiry, result) in self.__results.items() if expiry <= now]:
+            del self.__results[key]
+
+    def execute(self, key, function):
+        """
+        gibt Ergebnis von function zurück; läuft bereits eine Berechnung mit gleichem Schlüssel,
+        wird auf diese gewartet, statt erneut zu rechnen
+        :param key: str
+        :param function: Funktion ohne Parameter
+        :return: Ergebnis von function
+        """
+        with self.__lock:
+            self.__remove_expired_results()
+            if key in self.__results:
+                return self.__results[key][1]
+            computation = self.__in_flight.get(key)
+            is_leader = computation is None
+            if is_leader:
+                computation = InFlightComputation()
+                self.__in_flight[key] = computation
+        # andere Anfrage berechnet bereits dasselbe Ergebnis
+        if not is_leader:
+            return computation.wait()
+        try:
+            result = function()
+        except Exception as error:
+            with self.__lock:
+                del self.__in_flight[key]
+            computation.fail(error)
+            raise
+        with self.__lock:
+            del self.__in_flight[key]
+            self.__results[key] = (time.monotonic() + self.__time_to_live, result)
+        computation.finish(result)
+        return result
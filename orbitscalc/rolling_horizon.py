@@ -0,0 +1,131 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+from collections import deque
+from datetime import timedelta
+from orbitscalc.analysis import Analysis, AnalysisPrecisions, SchedulingMethods
+from orbitscalc.contact_utility import ContactSequence
+from orbitscalc.schedule_repair import ScheduleRepair
+
+
+# Vorlauf vor dem frühesten am Ende abgeschnittenen Kontakt, damit dieser im neuen Abschnitt vollständig gefunden wird
+TAIL_SEARCH_MARGIN = timedelta(minutes=1)
+
+
+class RollingHorizonPlanner:
+    """
+    plant die Kontakte eines Satelliten fortlaufend über einen mitlaufenden Planungszeitraum; zwischen den Schritten
+    bleiben Satellit, Kontakte und die Kontaktgruppen der ScheduleRepair erhalten, je Schritt wird nur der neu
+    hinzukommende Abschnitt propagiert und nur die davon betroffenen Gruppen neu optimiert;
+    Kontakte vor Ende des festgeschriebenen Zeitraums werden nicht mehr verändert und nach ihrem Ende verworfen
+    """
+    def __init__(self, satellite, antennas_data_base, horizon, frozen_duration,
+                 precision=AnalysisPrecisions.Exact, scheduling_method=SchedulingMethods.Instant, handover_gap=0.0):
+        """
+        :param satellite: analysis.Satellite
+        :param antennas_data_base: list of Aperture model objects
+        :param horizon: datetime.timedelta; Länge des Planungszeitraums ab dem jeweiligen Zeitpunkt
+        :param frozen_duration: datetime.timedelta; Länge des festgeschriebenen Zeitraums ab dem jeweiligen Zeitpunkt
+        :param precision: AnalysisPrecisions
+        :param scheduling_method: SchedulingMethods
+        :param handover_gap: float
+        """
+        self.__satellite = satellite
+        self.__antennas_data_base = antennas_data_base
+        self.__horizon = horizon
+        self.__frozen_duration = frozen_duration
+        self.__precision = precision
+        self.__scheduling_method = scheduling_method
+        self.__handover_gap = handover_gap
+        self.__schedule_repair = ScheduleRepair(list())
+        # festgeschriebene Kontakte der besten Kontaktfolge, chronologisch
+        self.__committed_contacts = deque()
+        self.__frozen_end_time = None
+        self.__horizon_end_time = None
+        # am Ende des Planungszeitraums abgeschnittene Kontakte, die im nächsten Abschnitt vollständig ermittelt werden
+        self.__truncated_contacts = list()
+        self.__number_of_recomputed_groups = 0
+
+    def tick(self, now):
+        """
+        verwirft vergangene Kontakte, propagiert den neuen Abschnitt bis zum Ende des Planungszeitraums, optimiert die
+        betroffenen Gruppen neu und schreibt danach die Kontaktfolge bis zum Ende des festgeschriebenen Zeitraums fest;
+        bereits beendete Kontakte werden nicht festgeschrieben
+        :param now: datetime.datetime
+        :return: list of Contact; in diesem Schritt festgeschriebene Kontakte, die nach now enden
+        """
+        while self.__committed_contacts and self.__committed_contacts[0].retrieve_end_time() <= now:
+            self.__committed_contacts.popleft()
+        self.__frozen_end_time = now + self.__frozen_duration
+        number_of_recomputed_groups = self.__schedule_repair.get_number_of_recomputed_groups()
+        self.__propagate_tail(now, now + self.__horizon)
+        self.__number_of_recomputed_groups = \
+            self.__schedule_repair.get_number_of_recomputed_groups() - number_of_recomputed_groups
+        committed_contacts = [contact for contact in self.__schedule_repair.commit_groups_before(self.__frozen_end_time)
+                              if contact.retrieve_end_time() > now]
+        self.__committed_contacts.extend(committed_contacts)
+        return committed_contacts
+
+    def __propagate_tail(self, now, end_time):
+        """
+        ermittelt die Kontakte zwischen bisherigem und neuem Ende des Planungszeitraums und fügt sie hinzu;
+        am bisherigen Ende abgeschnittene, noch nicht festgeschriebene Kontakte werden durch vollständige ersetzt
+        :param now: datetime.datetime; Beginn des ersten Abschnitts
+        :param end_time: datetime.datetime
+        :return: None
+        """
+        previous_end_time = self.__horizon_end_time
+        start_time = now
+        if previous_end_time is not None:
+            if end_time <= previous_end_time:
+                return
+            start_time = previous_end_time
+            truncated_contacts = [contact for contact in self.__truncated_contacts
+                                  if contact.retrieve_start_time() >= self.__frozen_end_time]
+            if truncated_contacts:
+                self.__schedule_repair.remove_contacts(truncated_contacts)
+                start_time = min(contact.retrieve_start_time() for contact in truncated_contacts) - TAIL_SEARCH_MARGIN
+        analysis = Analysis(start_time, end_time, None, 0, self.__satellite, precision=self.__precision,
+                            scheduling_method=self.__scheduling_method, handover_gap=self.__handover_gap)
+        contacts = analysis.determine_contacts(self.__antennas_data_base)
+        if previous_end_time is not None:
+            # Kontakte bis zum bisherigen Ende sind bereits enthalten, am Beginn des Abschnitts abgeschnittene ebenso
+            contacts = [contact for contact in contacts if contact.retrieve_end_time() > previous_end_time
+                        and contact.retrieve_start_time() > start_time]
+        self.__truncated_contacts = [contact for contact in contacts if contact.retrieve_end_time() >= end_time]
+        self.__horizon_end_time = end_time
+        self.__schedule_repair.add_contacts(contacts)
+
+    def retrieve_best_contact_sequence(self):
+        """
+        gibt die festgeschriebenen und die im restlichen Planungszeitraum besten Kontakte als Kontaktfolge zurück
+        :return: ContactSequence
+        """
+        best_contact_sequence = ContactSequence()
+        for contact in self.__committed_contacts:
+            best_contact_sequence.add_contact(contact)
+        for contact in self.__schedule_repair.retrieve_best_contact_sequence().get_contacts():
+            best_contact_sequence.add_contact(contact)
+        return best_contact_sequence
+
+    def get_committed_contacts(self):
+        return self.__committed_contacts
+
+    def get_frozen_end_time(self):
+        return self.__frozen_end_time
+
+    def get_horizon_end_time(self):
+        return self.__horizon_end_time
+
+    def retrieve_number_of_planned_contacts(self):
+        return self.__schedule_repair.retrieve_number_of_contacts()
+
+    def get_number_of_recomputed_groups(self):
+        """
+        Anzahl der im letzten Schritt neu optimierten Kontaktgruppen
+        :return: int
+        """
+        return self.__number_of_recomputed_groups
@@ -0,0 +1,226 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+from bisect import bisect_left, bisect_right
+from orbitscalc.analysis import AnalysisModes, determine_best_contact_sequence
+from orbitscalc.contact_utility import ContactSequence, determine_sorted_contact_groups
+
+
+class ScheduleRepair:
+    """
+    hält die beste Kontaktfolge einer Analyse als Folge unabhängiger Kontaktgruppen
+    (determine_sorted_contact_groups) und passt sie an ausgefallene, hinzugefügte oder zeitweise gesperrte Antennen an;
+    nur die betroffenen Gruppen werden neu optimiert, alle anderen Teilfolgen bleiben erhalten
+    """
+    def __init__(self, contacts, best_contact_sequence=None):
+        """
+        :param contacts: list of Contact
+        :param best_contact_sequence: ContactSequence; bereits ermittelte beste Kontaktfolge der Kontakte,
+            deren Teilfolgen übernommen statt neu berechnet werden
+        """
+        self.__group_starts = list()
+        self.__group_ends = list()
+        self.__groups = list()
+        self.__best_sequences = list()
+        self.__number_of_recomputed_groups = 0
+        contacts = [contact for contact in contacts if self.__has_data(contact)]
+        # ohne Kontakte wird die Methode beim ersten Einfügen von Gruppen übernommen
+        self.__scheduling_method = contacts[0].get_antenna().retrieve_analysis().get_scheduling_method() \
+            if contacts else None
+        if best_contact_sequence is None or best_contact_sequence.get_cutoff_time():
+            self.__insert_groups(contacts)
+            return
+        for group in determine_sorted_contact_groups(contacts):
+            self.__group_starts.append(min(contact.retrieve_start_time() for contact in group))
+            self.__group_ends.append(max(contact.retrieve_end_time() for contact in group))
+            self.__groups.append(group)
+            self.__best_sequences.append(ContactSequence())
+        for contact in best_contact_sequence.get_contacts():
+            index = bisect_right(self.__group_starts, contact.retrieve_start_time()) - 1
+            self.__best_sequences[index].add_contact(contact)
+
+    @classmethod
+    def from_analysis(cls, analysis):
+        """
+        erstellt Reparatur aus allen Kontakten einer Analyse; im Modus "allen Antennen zusammen"
+        wird deren beste Kontaktfolge übernommen
+        :param analysis: analysis.Analysis
+        :return: ScheduleRepair
+        """
+        contacts = list()
+        for ground_station in analysis.get_ground_stations().values():
+            for contact in ground_station.retrieve_contact_set().get_contacts():
+                if contact.get_data() is None:
+                    contact.determine_max_data()
+                contacts.append(contact)
+        best_contact_sequence = None
+        if analysis.get_mode() == AnalysisModes.All:
+            best_contact_sequence = analysis.get_results()["best_contact_sequence"]
+        return cls(contacts, best_contact_sequence)
+
+    @staticmethod
+    def __has_data(contact):
+        if contact.get_data() is None:
+            contact.determine_max_data()
+        return contact.get_data() > 0
+
+    def __insert_groups(self, contacts):
+        """
+        bildet aus Kontakten Gruppen, optimiert diese und fügt sie chronologisch ein
+        :param contacts: list of Contact
+        :return: None
+        """
+        if self.__scheduling_method is None and contacts:
+            self.__scheduling_method = contacts[0].get_antenna().retrieve_analysis().get_scheduling_method()
+        for group in determine_sorted_contact_groups(contacts):
+            start_time = min(contact.retrieve_start_time() for contact in group)
+            index = bisect_left(self.__group_starts, start_time)
+            self.__group_starts.insert(index, start_time)
+            self.__group_ends.insert(index, max(contact.retrieve_end_time() for contact in group))
+            self.__groups.insert(index, group)
+            # bei Rüstzeiten oder Datenspeicher hängen Gruppen voneinander ab, die Folge wird dann
+            # in retrieve_best_contact_sequence über alle Kontakte ermittelt
+            if not self.__scheduling_method.has_independent_contact_groups():
+                self.__best_sequences.insert(index, None)
+            else:
+                self.__best_sequences.insert(index, determine_best_contact_sequence(group))
+            self.__number_of_recomputed_groups += 1
+
+    def __replace_groups(self, indices, contacts):
+        """
+        entfernt die Gruppen mit den Indizes und fügt die neu gebildeten Gruppen der Kontakte ein
+        :param indices: iterable of int
+        :param contacts: list of Contact
+        :return: None
+        """
+        for index in sorted(set(indices), reverse=True):
+            del self.__group_starts[index]
+            del self.__group_ends[index]
+            del self.__groups[index]
+            del self.__best_sequences[index]
+        self.__insert_groups([contact for contact in contacts if self.__has_data(contact)])
+
+    def __overlapping_group_indices(self, start_time, end_time):
+        """
+        gibt Indizes der Gruppen zurück, die sich mit dem Zeitraum überschneiden (Gruppen sind disjunkt und sortiert)
+        :return: range
+        """
+        return range(bisect_left(self.__group_ends, start_time), bisect_right(self.__group_starts, end_time))
+
+    def remove_apertures(self, aperture_ids):
+        """
+        entfernt alle Kontakte der Antennen, z.B. bei Wartung über den gesamten Analysezeitraum
+        :param aperture_ids: iterable of int
+        :return: None
+        """
+        aperture_ids = set(aperture_ids)
+        indices = [index for index, group in enumerate(self.__groups)
+                   if any(contact.get_antenna().retrieve_id() in aperture_ids for contact in group)]
+        contacts = [contact for index in indices for contact in self.__groups[index]
+                    if contact.get_antenna().retrieve_id() not in aperture_ids]
+        self.__replace_groups(indices, contacts)
+
+    def block_time_interval(self, start_time, end_time, aperture_ids=None):
+        """
+        sperrt Antennen im Zeitraum; Kontakte werden auf die Teile vor und nach dem Zeitraum gekürzt
+        :param start_time: datetime.datetime
+        :param end_time: datetime.datetime
+        :param aperture_ids: iterable of int; None für alle Antennen
+        :return: None
+        """
+        aperture_ids = set(aperture_ids) if aperture_ids is not None else None
+        indices = self.__overlapping_group_indices(start_time, end_time)
+        contacts = list()
+        for index in indices:
+            for contact in self.__groups[index]:
+                contact_start_time = contact.retrieve_start_time()
+                contact_end_time = contact.retrieve_end_time()
+                if contact_start_time > end_time or contact_end_time < start_time or \
+                        (aperture_ids is not None and contact.get_antenna().retrieve_id() not in aperture_ids):
+                    contacts.append(contact)
+                    continue
+                if contact_start_time < start_time:
+                    contacts.append(contact.create_partial_contact(contact_start_time, start_time))
+                if contact_end_time > end_time:
+                    contacts.append(contact.create_partial_contact(end_time, contact_end_time))
+        self.__replace_groups(indices, contacts)
+
+    def add_contacts(self, contacts):
+        """
+        fügt Kontakte hinzu, z.B. einer wieder verfügbaren oder neuen Antenne;
+        mit ihnen überlappende Gruppen werden zusammengeführt
+        :param contacts: list of Contact
+        :return: None
+        """
+        indices = set()
+        for contact in contacts:
+            indices.update(self.__overlapping_group_indices(contact.retrieve_start_time(), contact.retrieve_end_time()))
+        self.__replace_groups(indices, [contact for index in indices for contact in self.__groups[index]] + contacts)
+
+    def remove_contacts(self, contacts):
+        """
+        entfernt einzelne Kontakte, z.B. am Ende des Planungszeitraums abgeschnittene
+        :param contacts: list of Contact
+        :return: None
+        """
+        removed = set(map(id, contacts))
+        indices = set()
+        for contact in contacts:
+            indices.update(self.__overlapping_group_indices(contact.retrieve_start_time(), contact.retrieve_end_time()))
+        self.__replace_groups(indices, [contact for index in indices for contact in self.__groups[index]
+                                        if id(contact) not in removed])
+
+    def commit_groups_before(self, time):
+        """
+        entfernt alle Gruppen, die vor dem Zeitpunkt beginnen, und gibt deren Kontakte der besten Kontaktfolge zurück;
+        die Kontakte werden damit festgeschrieben und später nicht mehr neu optimiert
+        :param time: datetime.datetime
+        :return: list of Contact
+        """
+        number_of_groups = bisect_left(self.__group_starts, time)
+        if not number_of_groups:
+            return list()
+        if not self.__scheduling_method.has_independent_contact_groups():
+            committed_end_time = self.__group_ends[number_of_groups - 1]
+            contacts = [contact for contact in self.retrieve_best_contact_sequence().get_contacts()
+                        if contact.retrieve_start_time() <= committed_end_time]
+        else:
+            contacts = [contact for sequence in self.__best_sequences[:number_of_groups]
+                        for contact in sequence.get_contacts()]
+        del self.__group_starts[:number_of_groups]
+        del self.__group_ends[:number_of_groups]
+        del self.__groups[:number_of_groups]
+        del self.__best_sequences[:number_of_groups]
+        return contacts
+
+    def retrieve_number_of_contacts(self):
+        return sum(len(group) for group in self.__groups)
+
+    def add_apertures(self, analysis, antennas_data_base):
+        """
+        ermittelt die Kontakte zusätzlicher Antennen in der Analyse und fügt sie hinzu
+        :param analysis: analysis.Analysis
+        :param antennas_data_base: list of Aperture model objects
+        :return: None
+        """
+        self.add_contacts([contact for antenna in analysis.add_apertures(antennas_data_base)
+                           for contact in antenna.get_contact_sequence().get_contacts()])
+
+    def retrieve_best_contact_sequence(self):
+        """
+        gibt die aus den Teilfolgen aller Gruppen zusammengesetzte beste Kontaktfolge zurück
+        :return: ContactSequence
+        """
+        if self.__scheduling_method and not self.__scheduling_method.has_independent_contact_groups():
+            return determine_best_contact_sequence([contact for group in self.__groups for contact in group])
+        best_sequence = ContactSequence()
+        for sequence in self.__best_sequences:
+            for contact in sequence.get_contacts():
+                best_sequence.add_contact(contact)
+        return best_sequence
+
+    def get_number_of_recomputed_groups(self):
+        return self.__number_of_recomputed_groups
@@ -0,0 +1,317 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import math
+import numpy
+import struct
+import zlib
+from sgp4.api import SatrecArray
+from orbitscalc.antenna import MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES
+from orbitscalc.constellation import ConstellationAnalysis, MAXIMUM_ELEMENTS_PER_BLOCK, METERS_PER_KILOMETER
+from orbitscalc.general_utility import bandwidth_calculation, free_space_loss_calculation, data_with_unit, \
+    AnalysisInstrumentation, retrieve_timescale
+from orbitscalc.spatial_index import footprint_central_angle, determine_reachable_latitude, rotate_to_earth_fixed, \
+    to_julian_date, FOOTPRINT_MARGIN_DEGREES, SECONDS_PER_DAY
+from orbitscalc.station_geometry import EARTH_EQUATORIAL_RADIUS_KM
+
+
+# Abstand der Zeitpunkte; Kontaktdauer und Datenmenge werden je Zeitpunkt aufsummiert
+SITE_GRID_TIME_STEP_SECONDS = 30
+# Abplattung der Erde nach WGS84
+EARTH_FLATTENING = 1 / 298.257223563
+# Werte, die je Zelle ermittelt werden, mit Bezeichnung
+GRID_VALUES = {
+    "data": "Datenmenge",
+    "marginal_data": "Zuwachs zum bestehenden Netz",
+    "contact_seconds": "Kontaktdauer in s",
+    "number_of_contacts": "Anzahl Kontakte",
+}
+# Farbverlauf der Heatmap von kleinen zu großen Werten (RGB)
+HEAT_MAP_COLORS = numpy.array([(20, 20, 80), (30, 120, 180), (120, 200, 120), (250, 230, 50)], dtype=float)
+
+
+def determine_geodetic_positions(latitudes, longitudes, altitudes):
+    """
+    gibt erdfeste Positionen und Einheitsvektoren der Ellipsoidnormalen (Zenit) von Orten auf dem WGS84-Ellipsoid
+    für alle Orte auf einmal zurück
+    :param latitudes: numpy.ndarray in Grad
+    :param longitudes: numpy.ndarray in Grad
+    :param altitudes: numpy.ndarray in m
+    :return: numpy.ndarray (n, 3) in km, numpy.ndarray (n, 3)
+    """
+    latitudes = numpy.radians(latitudes)
+    longitudes = numpy.radians(longitudes)
+    altitudes = numpy.asarray(altitudes, dtype=float) / METERS_PER_KILOMETER
+    eccentricity_squared = EARTH_FLATTENING * (2 - EARTH_FLATTENING)
+    # Querkrümmungsradius
+    radii = EARTH_EQUATORIAL_RADIUS_KM / numpy.sqrt(1 - eccentricity_squared * numpy.sin(latitudes) ** 2)
+    up_vectors = numpy.column_stack((
+        numpy.cos(latitudes) * numpy.cos(longitudes),
+        numpy.cos(latitudes) * numpy.sin(longitudes),
+        numpy.sin(latitudes),
+    ))
+    positions = numpy.column_stack((
+        (radii + altitudes) * up_vectors[:, 0],
+        (radii + altitudes) * up_vectors[:, 1],
+        (radii * (1 - eccentricity_squared) + altitudes) * up_vectors[:, 2],
+    ))
+    return positions, up_vectors
+
+
+def encode_png(values):
+    """
+    kodiert Werte als Heatmap im PNG-Format (RGB, eine Zeile je Zeile der Werte), ohne Bildbibliothek
+    :param values: numpy.ndarray (Zeilen, Spalten); nan wird schwarz dargestellt
+    :return: bytes
+    """
+    maximum = numpy.nanmax(values) if numpy.any(numpy.isfinite(values)) else 0
+    scaled = numpy.nan_to_num(values / maximum if maximum > 0 else numpy.zeros_like(values), nan=0.0)
+    positions = numpy.clip(scaled, 0, 1) * (len(HEAT_MAP_COLORS) - 1)
+    lower = numpy.minimum(positions.astype(int), len(HEAT_MAP_COLORS) - 2)
+    fraction = (positions - lower)[..., numpy.newaxis]
+    pixels = HEAT_MAP_COLORS[lower] * (1 - fraction) + HEAT_MAP_COLORS[lower + 1] * fraction
+    pixels[numpy.isnan(values)] = 0
+    pixels = pixels.round().astype(numpy.uint8)
+    height, width = values.shape
+    # jede Zeile beginnt mit Filtertyp 0
+    raw = numpy.concatenate((numpy.zeros((height, 1), dtype=numpy.uint8), pixels.reshape(height, -1)), axis=1)
+
+    def chunk(chunk_type, data):
+        return struct.pack(">I", len(data)) + chunk_type + data + \
+            struct.pack(">I", zlib.crc32(chunk_type + data) & 0xffffffff)
+
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)) + \
+        chunk(b"IDAT", zlib.compress(raw.tobytes(), 9)) + chunk(b"IEND", b"")
+
+
+class SiteGridAnalysis:
+    """
+    bewertet mögliche Standorte neuer Antennen auf einem Gitter aus Breiten- und Längengraden: je Zelle Anzahl und
+    Dauer der Kontakte, Datenmenge mit einheitlichem G/T und Link sowie der Zuwachs gegenüber dem bestehenden Netz;
+    alle Satelliten werden gemeinsam mit SatrecArray propagiert, je Block von Zeitpunkten werden per Zentriwinkel
+    nur die Zellen im Footprint genauer berechnet;
+    der Zuwachs summiert je Zeitpunkt, um wie viel die Datenrate der Zelle die beste des bestehenden Netzes
+    übersteigt (Wechsel der Antenne jederzeit möglich), und ist damit eine obere Schranke des Zuwachses
+    ganzer Kontakte; Konflikte mehrerer Satelliten an derselben Antenne werden nicht berücksichtigt
+    """
+    def __init__(self, start_time, end_time, satellites, antennas_data_base, gain_to_noise_temperature,
+                 minimum_frequency, maximum_frequency, grid_step=1.0, time_step=SITE_GRID_TIME_STEP_SECONDS):
+        """
+        :param start_time: datetime.datetime
+        :param end_time: datetime.datetime
+        :param satellites: list of analysis.Satellite
+        :param antennas_data_base: list of Aperture model objects; bestehendes Netz
+        :param gain_to_noise_temperature: float; G/T der Zellen in dB/K
+        :param minimum_frequency: float; untere Grenze des Links der Zellen in Hz
+        :param maximum_frequency: float; obere Grenze des Links der Zellen in Hz
+        :param grid_step: float; Abstand der Zellen in Grad
+        :param time_step: float; Abstand der Zeitpunkte in Sekunden
+        """
+        self.__start_time = start_time
+        self.__end_time = end_time
+        self.__satellites = list(satellites)
+        self.__antennas_data_base = list(antennas_data_base)
+        self.__gain_to_noise_temperature = gain_to_noise_temperature
+        self.__time_step = time_step
+        self.__latitudes = numpy.arange(-90.0, 90.0 + grid_step / 2, grid_step)
+        self.__longitudes = numpy.arange(-180.0, 180.0 - grid_step / 2, grid_step)
+        self.__grid_step = grid_step
+        shape = (len(self.__latitudes), len(self.__longitudes))
+        self.__values = {name: numpy.zeros(shape) for name in GRID_VALUES}
+        self.__network_data = 0.0
+        self.__instrumentation = AnalysisInstrumentation()
+        # Link der Zellen je Satellit: nutzbare Bandbreite und höchste Frequenz
+        self.__base_bandwidths = numpy.array([max(
+            min(maximum_frequency, satellite.get_maximum_downlink_frequency()) -
+            max(minimum_frequency, satellite.get_minimum_downlink_frequency()), 0)
+            for satellite in self.__satellites], dtype=float)
+        self.__maximum_frequencies = numpy.array([
+            min(maximum_frequency, satellite.get_maximum_downlink_frequency()) for satellite in self.__satellites])
+        self.__effective_isotropic_radiated_powers = numpy.array(
+            [satellite.get_effective_isotropic_radiated_power() for satellite in self.__satellites], dtype=float)
+        # Links des bestehenden Netzes wie in der Analyse einer Konstellation
+        self.__network = ConstellationAnalysis(start_time, end_time, self.__satellites, self.__antennas_data_base,
+                                               time_step)
+        self.__network_positions, self.__network_up_vectors = determine_geodetic_positions(
+            numpy.array([float(antenna.latitude) for antenna in self.__antennas_data_base]),
+            numpy.array([float(antenna.longitude) for antenna in self.__antennas_data_base]),
+            numpy.array([float(antenna.altitude) for antenna in self.__antennas_data_base]))
+
+    def determine_cell_data_rates(self, satellite_index, distances):
+        """
+        gibt die Datenrate des Links der Zellen zurück, berechnet wie relative_position.calculate_data_rate
+        :param satellite_index: int
+        :param distances: numpy.ndarray in m
+        :return: numpy.ndarray
+        """
+        path_losses = free_space_loss_calculation(distances, self.__maximum_frequencies[satellite_index])
+        bandwidths = bandwidth_calculation(self.__effective_isotropic_radiated_powers[satellite_index],
+                                           self.__gain_to_noise_temperature, path_losses)
+        return numpy.floor(numpy.sqrt(numpy.minimum(self.__base_bandwidths[satellite_index], bandwidths)))
+
+    def determine_network_data_rates(self, satellite_index, positions):
+        """
+        gibt je Zeitpunkt die höchste Datenrate einer Antenne des bestehenden Netzes zurück, 0 ohne Kontakt
+        :param satellite_index: int
+        :param positions: numpy.ndarray (Zeitpunkte, 3) erdfest in km
+        :return: numpy.ndarray (Zeitpunkte)
+        """
+        rates = numpy.zeros(len(positions))
+        if not self.__antennas_data_base:
+            return rates
+        relative_positions = positions[numpy.newaxis] - self.__network_positions[:, numpy.newaxis]
+        distances = numpy.linalg.norm(relative_positions, axis=2)
+        sine = numpy.einsum("atk,ak->at", relative_positions, self.__network_up_vectors) / distances
+        antenna_indices, time_indices = numpy.nonzero(
+            sine >= math.sin(math.radians(MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES)))
+        link_rates = self.__network.determine_data_rates(
+            numpy.full(len(antenna_indices), satellite_index), antenna_indices,
+            distances[antenna_indices, time_indices] * METERS_PER_KILOMETER)
+        numpy.maximum.at(rates, time_indices, link_rates.max(axis=1, initial=0))
+        return rates
+
+    def analyse(self):
+        """
+        propagiert alle Satelliten blockweise und summiert je Zelle Kontaktdauer, Anzahl der Kontakte,
+        Datenmenge und Zuwachs zum bestehenden Netz; Zellen außerhalb der erreichbaren Breiten werden übersprungen
+        :return: None
+        """
+        duration = (self.__end_time - self.__start_time).total_seconds()
+        seconds = numpy.arange(0.0, duration, self.__time_step)
+        julian_date = to_julian_date(self.__start_time)
+        ut1_offset = retrieve_timescale().from_datetime(self.__start_time).ut1 - julian_date
+        latitude_grid, longitude_grid = numpy.meshgrid(self.__latitudes, self.__longitudes, indexing="ij")
+        reachable_latitude = max([determine_reachable_latitude(satellite) for satellite in self.__satellites] + [0])
+        cells = numpy.flatnonzero(numpy.abs(latitude_grid.reshape(-1)) <= reachable_latitude)
+        cell_positions, cell_up_vectors = determine_geodetic_positions(
+            latitude_grid.reshape(-1)[cells], longitude_grid.reshape(-1)[cells], numpy.zeros(len(cells)))
+        cell_directions = cell_positions / numpy.linalg.norm(cell_positions, axis=1)[:, numpy.newaxis]
+        minimum_sine = math.sin(math.radians(MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES))
+        self.__instrumentation.increment("Zellen", latitude_grid.size)
+        self.__instrumentation.increment("Zellen in erreichbaren Breiten", len(cells))
+        self.__instrumentation.increment("Zeitpunkte", len(seconds))
+        values = {name: numpy.zeros(len(cells)) for name in GRID_VALUES}
+        block_size = max(1, MAXIMUM_ELEMENTS_PER_BLOCK // max(len(cells), 1))
+        satellites_array = SatrecArray([satellite.get_skyfield().model for satellite in self.__satellites])
+        # ob die Zelle zum letzten Zeitpunkt des vorherigen Blocks Kontakt hatte, je Satellit
+        previous_visible = numpy.zeros((len(self.__satellites), len(cells)), dtype=bool)
+        for block_start in range(0, len(seconds), block_size):
+            block_seconds = seconds[block_start:block_start + block_size]
+            fractions = block_seconds / SECONDS_PER_DAY
+            julian_dates = numpy.full_like(fractions, julian_date)
+            errors, positions, velocities = satellites_array.sgp4(julian_dates, fractions)
+            positions = rotate_to_earth_fixed(positions, julian_dates, fractions, ut1_offset)
+            for satellite_index in range(len(self.__satellites)):
+                # fehlgeschlagene Propagation (z.B. verglühter Satellit) ergibt keinen Kontakt
+                valid = errors[satellite_index] == 0
+                satellite_positions = positions[satellite_index]
+                radii = numpy.linalg.norm(satellite_positions, axis=1)
+                # Vorauswahl: Zellen, deren Zentriwinkel zum Subsatellitenpunkt höchstens dem Footprint entspricht
+                maximum_angles = footprint_central_angle(radii) + math.radians(FOOTPRINT_MARGIN_DEGREES)
+                cosines = cell_directions @ (satellite_positions / radii[:, numpy.newaxis]).T
+                cell_indices, time_indices = numpy.nonzero(
+                    (cosines >= numpy.cos(maximum_angles)[numpy.newaxis]) & valid[numpy.newaxis])
+                self.__instrumentation.increment("Paare im Footprint", len(cell_indices))
+                relative_positions = satellite_positions[time_indices] - cell_positions[cell_indices]
+                distances = numpy.linalg.norm(relative_positions, axis=1)
+                sine = numpy.einsum("nk,nk->n", relative_positions, cell_up_vectors[cell_indices]) / distances
+                visible = sine >= minimum_sine
+                cell_indices, time_indices, distances = cell_indices[visible], time_indices[visible], distances[visible]
+                rates = self.determine_cell_data_rates(satellite_index, distances * METERS_PER_KILOMETER)
+                network_rates = self.determine_network_data_rates(satellite_index, satellite_positions)
+                self.__network_data += float(network_rates.sum()) * self.__time_step
+                values["contact_seconds"] += numpy.bincount(cell_indices, minlength=len(cells)) * self.__time_step
+                values["data"] += numpy.bincount(cell_indices, weights=rates, minlength=len(cells)) * self.__time_step
+                values["marginal_data"] += numpy.bincount(
+                    cell_indices, weights=numpy.maximum(rates - network_rates[time_indices], 0),
+                    minlength=len(cells)) * self.__time_step
+                # ein Kontakt beginnt, wo die Zelle zum vorherigen Zeitpunkt keinen Kontakt hatte
+                block_visible = numpy.zeros((len(cells), len(block_seconds)), dtype=bool)
+                block_visible[cell_indices, time_indices] = True
+                earlier_visible = numpy.concatenate(
+                    (previous_visible[satellite_index][:, numpy.newaxis], block_visible[:, :-1]), axis=1)
+                values["number_of_contacts"] += (block_visible & ~earlier_visible).sum(axis=1)
+                previous_visible[satellite_index] = block_visible[:, -1]
+        for name, cell_values in values.items():
+            self.__values[name].reshape(-1)[cells] = cell_values
+
+    def get_latitudes(self):
+        return self.__latitudes
+
+    def get_longitudes(self):
+        return self.__longitudes
+
+    def get_grid_step(self):
+        return self.__grid_step
+
+    def get_values(self, name):
+        """
+        :param name: str; Schlüssel von GRID_VALUES
+        :return: numpy.ndarray (Breiten, Längen)
+        """
+        return self.__values[name]
+
+    def get_network_data(self):
+        """
+        Datenmenge des bestehenden Netzes bei Wechsel der Antenne zu jedem Zeitpunkt, Bezugsgröße des Zuwachses
+        :return: float
+        """
+        return self.__network_data
+
+    def retrieve_network_data_with_unit(self):
+        return data_with_unit(self.__network_data)
+
+    def get_instrumentation(self):
+        return self.__instrumentation
+
+    def retrieve_best_cells(self, number_of_cells, name="marginal_data"):
+        """
+        gibt die Zellen mit den größten Werten zurück
+        :param number_of_cells: int
+        :param name: str; Schlüssel von GRID_VALUES
+        :return: list of dict
+        """
+        flat_values = self.__values[name].reshape(-1)
+        best = numpy.argsort(-flat_values, kind="stable")[:number_of_cells]
+        latitude_indices, longitude_indices = numpy.unravel_index(best, self.__values[name].shape)
+        return [{
+            "latitude": float(self.__latitudes[latitude_index]),
+            "longitude": float(self.__longitudes[longitude_index]),
+            **{value_name: float(self.__values[value_name][latitude_index, longitude_index])
+               for value_name in GRID_VALUES},
+        } for latitude_index, longitude_index in zip(latitude_indices, longitude_indices)]
+
+    def generate_geo_json(self):
+        """
+        gibt alle Zellen als GeoJSON-FeatureCollection mit den Werten als Eigenschaften zurück
+        :return: dict
+        """
+        half_step = self.__grid_step / 2
+        features = list()
+        for latitude_index, latitude in enumerate(self.__latitudes.tolist()):
+            south = max(latitude - half_step, -90.0)
+            north = min(latitude + half_step, 90.0)
+            for longitude_index, longitude in enumerate(self.__longitudes.tolist()):
+                west = longitude - half_step
+                east = longitude + half_step
+                features.append({
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "Polygon",
+                        "coordinates": [[[west, south], [east, south], [east, north], [west, north], [west, south]]],
+                    },
+                    "properties": {name: float(values[latitude_index, longitude_index])
+                                   for name, values in self.__values.items()},
+                })
+        return {"type": "FeatureCollection", "features": features}
+
+    def generate_png(self, name="marginal_data"):
+        """
+        gibt die Werte als Heatmap zurück, Norden oben, ein Pixel je Zelle
+        :param name: str; Schlüssel von GRID_VALUES
+        :return: bytes
+        """
+        return encode_png(self.__values[name][::-1])
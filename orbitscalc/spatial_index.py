@@ -0,0 +1,254 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import math
+import numpy
+from datetime import timedelta
+from skyfield.sgp4lib import theta_GMST1982
+from orbitscalc.antenna import MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES
+
+
+# Polradius nach WGS84 in km; der kleinste Erdradius ergibt den größten Footprint
+EARTH_POLAR_RADIUS_KM = 6356.752
+# Zuschlag auf den Footprint für Abweichungen von der Kugelgestalt (Ellipsoidnormale, Höhe der Antenne)
+FOOTPRINT_MARGIN_DEGREES = 1.0
+# Kantenlänge der Zellen des Gitters auf der Einheitskugel
+GRID_CELL_DEGREES = 10.0
+# Abstand der Stützstellen der groben Propagation
+COARSE_STEP_SECONDS = 60
+# Anzahl Stützstellen, die mit einer gemeinsamen Abfrage des Index geprüft werden
+SAMPLES_PER_QUERY = 10
+UNIX_EPOCH_JULIAN_DATE = 2440587.5
+SECONDS_PER_DAY = 86400
+
+
+def footprint_central_angle(orbit_radius_km,
+                            minimum_elevation_degrees=MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES):
+    """
+    gibt Zentriwinkel zwischen Subsatellitenpunkt und Rand des Footprints zurück,
+    innerhalb dessen der Satellit mindestens in der gegebenen Höhe über dem Horizont steht
+    :param orbit_radius_km: float / numpy.ndarray; Abstand des Satelliten vom Erdmittelpunkt
+    :param minimum_elevation_degrees: float
+    :return: float / numpy.ndarray in rad
+    """
+    elevation = math.radians(minimum_elevation_degrees)
+    ratio = numpy.clip(EARTH_POLAR_RADIUS_KM / orbit_radius_km * math.cos(elevation), -1.0, 1.0)
+    return numpy.maximum(numpy.arccos(ratio) - elevation, 0.0)
+
+
+def determine_reachable_latitude(satellite):
+    """
+    gibt größten Betrag der Breite zurück, an dem der Satellit über der Mindesthöhe stehen kann:
+    größte Breite der Bodenspur (Bahnneigung) zuzüglich des größten Footprints (im Apogäum)
+    :param satellite: analysis.Satellite
+    :return: float in Grad
+    """
+    footprint = math.degrees(footprint_central_angle(satellite.retrieve_apogee_radius()))
+    return min(90.0, satellite.retrieve_maximum_ground_track_latitude() + footprint + FOOTPRINT_MARGIN_DEGREES)
+
+
+def to_julian_date(date_time):
+    """
+    :param date_time: datetime.datetime mit Zeitzone
+    :return: float; julianisches Datum in UTC
+    """
+    return UNIX_EPOCH_JULIAN_DATE + date_time.timestamp() / SECONDS_PER_DAY
+
+
+def rotate_to_earth_fixed(positions, julian_dates, fractions, ut1_offset=0.0):
+    """
+    dreht Positionen aus dem TEME-System von SGP4 um die Sternzeit ins erdfeste System;
+    die Polbewegung wird vernachlässigt
+    :param positions: numpy.ndarray (..., n, 3) in km
+    :param julian_dates: numpy.ndarray (n); julianisches Datum in UTC
+    :param fractions: numpy.ndarray (n); Tage ab julian_dates
+    :param ut1_offset: float; UT1 - UTC in Tagen
+    :return: numpy.ndarray (..., n, 3) in km
+    """
+    theta, theta_dot = theta_GMST1982(julian_dates, fractions + ut1_offset)
+    cos_theta = numpy.cos(theta)
+    sin_theta = numpy.sin(theta)
+    return numpy.stack((
+        cos_theta * positions[..., 0] + sin_theta * positions[..., 1],
+        -sin_theta * positions[..., 0] + cos_theta * positions[..., 1],
+        positions[..., 2],
+    ), axis=-1)
+
+
+def determine_satellite_positions(satellite_skyfield, julian_date, fractions, ut1_offset=0.0):
+    """
+    propagiert Satellit für alle Zeitpunkte auf einmal mit SGP4 und dreht die Positionen ins erdfeste System
+    :param satellite_skyfield: skyfield.sgp4lib.EarthSatellite
+    :param julian_date: float; julianisches Datum in UTC
+    :param fractions: numpy.ndarray; Tage ab julian_date
+    :param ut1_offset: float; UT1 - UTC in Tagen
+    :return: numpy.ndarray (n, 3) in km
+    """
+    julian_dates = numpy.full_like(fractions, julian_date)
+    errors, positions, velocities = satellite_skyfield.model.sgp4_array(julian_dates, fractions)
+    return rotate_to_earth_fixed(positions, julian_dates, fractions, ut1_offset)
+
+
+def determine_satellite_directions(satellite_skyfield, julian_date, fractions):
+    """
+    :param satellite_skyfield: skyfield.sgp4lib.EarthSatellite
+    :param julian_date: float; julianisches Datum in UTC
+    :param fractions: numpy.ndarray; Tage ab julian_date
+    :return: numpy.ndarray (n, 3) erdfeste Einheitsvektoren, numpy.ndarray (n) Abstände vom Erdmittelpunkt in km
+    """
+    positions = determine_satellite_positions(satellite_skyfield, julian_date, fractions)
+    radii = numpy.linalg.norm(positions, axis=1)
+    return positions / radii[:, numpy.newaxis], radii
+
+
+class ApertureSpatialIndex:
+    """
+    Gitter auf der Einheitskugel über den erdfesten Positionen der Antennen,
+    um schnell die Antennen innerhalb eines Footprints zu finden
+    """
+    def __init__(self, antennas):
+        """
+        :param antennas: list of antenna.Antenna
+        """
+        self.__antennas = list(antennas)
+        positions = numpy.array([antenna.get_skyfield().itrf_xyz().km for antenna in self.__antennas]).reshape(-1, 3)
+        self.__directions = positions / numpy.linalg.norm(positions, axis=1)[:, numpy.newaxis]
+        self.__latitudes = numpy.degrees(numpy.arcsin(numpy.clip(self.__directions[:, 2], -1.0, 1.0)))
+        longitudes = numpy.degrees(numpy.arctan2(self.__directions[:, 1], self.__directions[:, 0]))
+        self.__number_of_longitude_cells = int(math.ceil(360 / GRID_CELL_DEGREES))
+        cells = dict()
+        for index, (latitude, longitude) in enumerate(zip(self.__latitudes, longitudes)):
+            cells.setdefault(self.__determine_cell(latitude, longitude), list()).append(index)
+        # Zelle: Indizes der Antennen
+        self.__cells = {cell: numpy.array(indices) for cell, indices in cells.items()}
+
+    def __determine_cell(self, latitude, longitude):
+        latitude_index = int((latitude + 90) // GRID_CELL_DEGREES)
+        longitude_index = int((longitude + 180) // GRID_CELL_DEGREES) % self.__number_of_longitude_cells
+        return latitude_index, longitude_index
+
+    def get_antennas(self):
+        return self.__antennas
+
+    def get_directions(self):
+        return self.__directions
+
+    def retrieve_latitude_range(self):
+        """
+        gibt kleinste und größte geozentrische Breite der Antennen in Grad zurück
+        :return: float, float
+        """
+        return self.__latitudes.min(), self.__latitudes.max()
+
+    def query(self, direction, central_angle):
+        """
+        gibt Indizes der Antennen zurück, deren Zellen den Kugelkreis um direction schneiden;
+        die Antennen selbst können noch außerhalb des Kugelkreises liegen
+        :param direction: numpy.ndarray Einheitsvektor
+        :param central_angle: float in rad
+        :return: numpy.ndarray
+        """
+        latitude = math.degrees(math.asin(max(-1.0, min(1.0, direction[2]))))
+        longitude = math.degrees(math.atan2(direction[1], direction[0]))
+        radius = math.degrees(central_angle)
+        minimum_latitude_index = int((max(latitude - radius, -90) + 90) // GRID_CELL_DEGREES)
+        maximum_latitude_index = int((min(latitude + radius, 90) + 90) // GRID_CELL_DEGREES)
+        # Kugelkreis enthält einen Pol: alle Längengrade betroffen
+        if latitude + radius >= 90 or latitude - radius <= -90 or radius >= 90:
+            longitude_indices = range(self.__number_of_longitude_cells)
+        else:
+            half_width = math.degrees(math.asin(min(1.0, math.sin(central_angle) / math.cos(math.radians(latitude)))))
+            minimum_longitude_index = int((longitude - half_width + 180) // GRID_CELL_DEGREES)
+            maximum_longitude_index = int((longitude + half_width + 180) // GRID_CELL_DEGREES)
+            longitude_indices = {
+                index % self.__number_of_longitude_cells
+                for index in range(minimum_longitude_index, maximum_longitude_index + 1)
+            }
+        candidates = [
+            self.__cells[(latitude_index, longitude_index)]
+            for latitude_index in range(minimum_latitude_index, maximum_latitude_index + 1)
+            for longitude_index in longitude_indices
+            if (latitude_index, longitude_index) in self.__cells
+        ]
+        if not candidates:
+            return numpy.array([], dtype=int)
+        return numpy.concatenate(candidates)
+
+
+def determine_search_spans(satellite, spatial_index, start_time, end_time, instrumentation):
+    """
+    ermittelt mit grober Propagation für jede Antenne die Zeitspannen, in denen ein Kontakt möglich ist;
+    der Satellit steht zu Beginn und Ende jeder Zeitspanne (außer an den Grenzen des Analysezeitraums)
+    unter der Mindesthöhe, sodass die Kontaktsuche nur innerhalb dieser Zeitspannen erfolgen muss
+    :param satellite: analysis.Satellite
+    :param spatial_index: ApertureSpatialIndex
+    :param start_time: datetime.datetime
+    :param end_time: datetime.datetime
+    :param instrumentation: general_utility.AnalysisInstrumentation
+    :return: dict Antennen-id: chronologische list of (Beginn, Ende) als datetime.datetime
+    """
+    antennas = spatial_index.get_antennas()
+    if not antennas:
+        return dict()
+    number_of_samples = int(math.ceil((end_time - start_time).total_seconds() / COARSE_STEP_SECONDS)) + 1
+    fractions = numpy.arange(number_of_samples) * COARSE_STEP_SECONDS / SECONDS_PER_DAY
+    directions, radii = determine_satellite_directions(satellite.get_skyfield(), to_julian_date(start_time), fractions)
+    # zwischen zwei Stützstellen zurückgelegter Winkel, um keinen Kontakt zwischen den Stützstellen zu verpassen
+    step_angles = numpy.arccos(numpy.clip(numpy.sum(directions[:-1] * directions[1:], axis=1), -1.0, 1.0))
+    step_angle = numpy.nanmax(step_angles) if len(step_angles) else 0.0
+    query_angles = footprint_central_angle(radii) + step_angle + math.radians(FOOTPRINT_MARGIN_DEGREES)
+    antenna_directions = spatial_index.get_directions()
+    minimum_antenna_latitude, maximum_antenna_latitude = spatial_index.retrieve_latitude_range()
+    subsatellite_latitudes = numpy.degrees(numpy.arcsin(numpy.clip(directions[:, 2], -1.0, 1.0)))
+    visible_sample_indices = list()
+    visible_antenna_indices = list()
+    for chunk_start in range(0, number_of_samples, SAMPLES_PER_QUERY):
+        chunk = slice(chunk_start, min(chunk_start + SAMPLES_PER_QUERY, number_of_samples))
+        chunk_directions = directions[chunk]
+        if numpy.isnan(chunk_directions).any():
+            # SGP4 liefert keine Position (z.B. verglühter Satellit)
+            continue
+        instrumentation.increment("Abschnitte der groben Suche")
+        # Breitenband, das der Footprint im Abschnitt überstreicht, enthält keine Antenne
+        chunk_footprint = math.degrees(query_angles[chunk].max())
+        if subsatellite_latitudes[chunk].max() + chunk_footprint < minimum_antenna_latitude or \
+                subsatellite_latitudes[chunk].min() - chunk_footprint > maximum_antenna_latitude:
+            instrumentation.increment("Abschnitte ohne Kontaktmöglichkeit (Breitenband)")
+            continue
+        center = chunk_directions[len(chunk_directions) // 2]
+        spread = numpy.arccos(numpy.clip(chunk_directions @ center, -1.0, 1.0)).max()
+        candidates = spatial_index.query(center, spread + query_angles[chunk].max())
+        if not len(candidates):
+            continue
+        # exakter Test je Stützstelle und Kandidat
+        visible = \
+            chunk_directions @ antenna_directions[candidates].T >= numpy.cos(query_angles[chunk])[:, numpy.newaxis]
+        sample_offsets, candidate_offsets = numpy.nonzero(visible)
+        visible_sample_indices.append(chunk_start + sample_offsets)
+        visible_antenna_indices.append(candidates[candidate_offsets])
+    search_spans = {antenna.retrieve_id(): list() for antenna in antennas}
+    if not visible_sample_indices:
+        return search_spans
+    sample_indices = numpy.concatenate(visible_sample_indices)
+    antenna_indices = numpy.concatenate(visible_antenna_indices)
+    # Kandidaten gefunden, aber keiner an einer Stützstelle sichtbar (z.B. bei kurzem Zeitraum)
+    if not len(sample_indices):
+        return search_spans
+    order = numpy.lexsort((sample_indices, antenna_indices))
+    sample_indices = sample_indices[order]
+    antenna_indices = antenna_indices[order]
+    # zusammenhängende Stützstellen einer Antenne bilden eine Zeitspanne,
+    # die je eine Stützstelle vor und nach dem Footprint umfasst
+    run_starts = numpy.flatnonzero(numpy.concatenate((
+        [True], (numpy.diff(antenna_indices) != 0) | (numpy.diff(sample_indices) > 2))))
+    run_ends = numpy.concatenate((run_starts[1:], [len(sample_indices)])) - 1
+    step = timedelta(seconds=COARSE_STEP_SECONDS)
+    for run_start, run_end in zip(run_starts.tolist(), run_ends.tolist()):
+        antenna = antennas[int(antenna_indices[run_start])]
+        span_start = max(start_time + step * (int(sample_indices[run_start]) - 1), start_time)
+        span_end = min(start_time + step * (int(sample_indices[run_end]) + 1), end_time)
+        search_spans[antenna.retrieve_id()].append((span_start, span_end))
+    return search_spans
@@ -0,0 +1,198 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import numpy
+from datetime import datetime, timezone
+from orbitscalc.contact_utility import ContactSequence, determine_sorted_contact_groups
+from orbitscalc.fleet_scheduling import determine_best_interval_sequence
+
+
+# Länge der Zeitscheiben, in denen jeweils eine Antenne genutzt wird
+SPLIT_PASS_SLICE_SECONDS = 10
+# kürzeste Zeit ohne Übertragung beim Wechsel der Antenne während eines Kontakts
+MINIMUM_SWITCHING_TIME_SECONDS = 1.0
+# Anzahl überlappender Kontaktgruppen, die gemeinsam berechnet werden (Zeitbudget wird zwischen ihnen geprüft)
+GROUPS_PER_BATCH = 256
+
+
+def determine_slice_rates(groups, slice_seconds):
+    """
+    ermittelt je Kontaktgruppe, Zeitscheibe und Kontakt die Datenrate in der Mitte der Zeitscheibe
+    :param groups: list of list of Contact
+    :param slice_seconds: float
+    :return: numpy.ndarray Beginn der Gruppen, numpy.ndarray Datenraten (Gruppen, Zeitscheiben, Kontakte),
+        numpy.ndarray ob Kontakt in Zeitscheibe besteht
+    """
+    group_starts = numpy.array([min(contact.retrieve_start_time() for contact in group).timestamp()
+                                for group in groups])
+    group_ends = numpy.array([max(contact.retrieve_end_time() for contact in group).timestamp() for group in groups])
+    number_of_slices = int(numpy.ceil((group_ends - group_starts).max() / slice_seconds))
+    number_of_contacts = max(len(group) for group in groups)
+    shape = (len(groups), number_of_slices, number_of_contacts)
+    rates = numpy.zeros(shape)
+    active = numpy.zeros(shape, dtype=bool)
+    offsets = (numpy.arange(number_of_slices) + 0.5) * slice_seconds
+    for group_index, group in enumerate(groups):
+        midpoints = group_starts[group_index] + offsets
+        for contact_index, contact in enumerate(group):
+            boundaries, data_rates = contact.retrieve_data_rate_profile()
+            boundaries = numpy.array([boundary.timestamp() for boundary in boundaries])
+            inside = (midpoints >= boundaries[0]) & (midpoints <= boundaries[-1])
+            positions = numpy.minimum(numpy.searchsorted(boundaries, midpoints[inside], side="right") - 1,
+                                      len(data_rates) - 1)
+            rates[group_index, inside, contact_index] = numpy.array(data_rates, dtype=float)[positions]
+            active[group_index, inside, contact_index] = True
+    return group_starts, rates, active
+
+
+def determine_slice_states(rates, active, slice_seconds, switching_time):
+    """
+    wählt je Gruppe und Zeitscheibe den genutzten Kontakt (1 ... Kontakte) oder keinen (0) mit größter Datenmenge;
+    Viterbi-Algorithmus über die Zeitscheiben, gleichzeitig für alle Gruppen: ein Kontakt, der nicht in seiner ersten
+    Zeitscheibe aus dem Ruhezustand begonnen wird, verliert die Daten der Umschaltzeit
+    :param rates: numpy.ndarray (Gruppen, Zeitscheiben, Kontakte)
+    :param active: numpy.ndarray (Gruppen, Zeitscheiben, Kontakte)
+    :param slice_seconds: float
+    :param switching_time: float
+    :return: numpy.ndarray (Gruppen, Zeitscheiben)
+    """
+    number_of_groups, number_of_slices, number_of_contacts = rates.shape
+    gains = rates * slice_seconds
+    switching_losses = rates * switching_time
+    first_slices = active.copy()
+    first_slices[:, 1:] &= ~active[:, :-1]
+    group_indices = numpy.arange(number_of_groups)
+    contact_indices = numpy.arange(number_of_contacts)
+    values = numpy.full((number_of_groups, number_of_contacts + 1), -numpy.inf)
+    values[:, 0] = 0
+    pointers = numpy.empty((number_of_slices, number_of_groups, number_of_contacts + 1), dtype=int)
+    for slice_index in range(number_of_slices):
+        contact_values = values[:, 1:]
+        # bester und zweitbester Kontakt der vorherigen Zeitscheibe als Herkunft eines Wechsels
+        best = contact_values.argmax(axis=1)
+        others = contact_values.copy()
+        others[group_indices, best] = -numpy.inf
+        second = others.argmax(axis=1)
+        is_best = contact_indices == best[:, numpy.newaxis]
+        switch_origins = numpy.where(is_best, second[:, numpy.newaxis], best[:, numpy.newaxis]) + 1
+        switch_values = values[group_indices[:, numpy.newaxis], switch_origins] - switching_losses[:, slice_index]
+        idle_values = values[:, :1] - numpy.where(first_slices[:, slice_index], 0, switching_losses[:, slice_index])
+        candidates = numpy.stack((contact_values, switch_values, idle_values))
+        choices = candidates.argmax(axis=0)
+        origins = numpy.choose(choices, (contact_indices + 1, switch_origins, numpy.zeros_like(switch_origins)))
+        pointers[slice_index, :, 0] = values.argmax(axis=1)
+        pointers[slice_index, :, 1:] = origins
+        new_values = numpy.empty_like(values)
+        new_values[:, 0] = values.max(axis=1)
+        new_values[:, 1:] = numpy.where(active[:, slice_index],
+                                        gains[:, slice_index] + candidates.max(axis=0), -numpy.inf)
+        values = new_values
+    states = numpy.empty((number_of_groups, number_of_slices), dtype=int)
+    state = values.argmax(axis=1)
+    for slice_index in range(number_of_slices - 1, -1, -1):
+        states[:, slice_index] = state
+        state = pointers[slice_index, group_indices, state]
+    return states
+
+
+def to_datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+def determine_segments(group, group_start, states, active, slice_seconds, switching_time):
+    """
+    setzt die gewählten Zustände der Zeitscheiben einer Gruppe zu (Teil-)Kontakten zusammen
+    :param group: list of Contact
+    :param group_start: float
+    :param states: numpy.ndarray (Zeitscheiben)
+    :param active: numpy.ndarray (Zeitscheiben, Kontakte)
+    :param slice_seconds: float
+    :param switching_time: float
+    :return: list of Contact
+    """
+    segments = list()
+    states = states.tolist()
+    slice_index = 0
+    while slice_index < len(states):
+        state = states[slice_index]
+        if not state:
+            slice_index += 1
+            continue
+        last_index = slice_index
+        while last_index + 1 < len(states) and states[last_index + 1] == state:
+            last_index += 1
+        contact = group[state - 1]
+        previous_state = states[slice_index - 1] if slice_index else 0
+        next_state = states[last_index + 1] if last_index + 1 < len(states) else 0
+        start_time = contact.retrieve_start_time()
+        end_time = contact.retrieve_end_time()
+        is_first_slice = slice_index == 0 or not active[slice_index - 1, state - 1]
+        # Zeitscheiben gelten als aktiv, wenn ihre Mitte im Kontakt liegt; der Teilkontakt bleibt im Kontakt
+        if previous_state or not is_first_slice:
+            start_time = max(start_time, to_datetime(group_start + slice_index * slice_seconds + switching_time))
+        if next_state or (last_index + 1 < len(states) and active[last_index + 1, state - 1]):
+            end_time = min(end_time, to_datetime(group_start + (last_index + 1) * slice_seconds))
+        if start_time == contact.retrieve_start_time() and end_time == contact.retrieve_end_time():
+            segments.append(contact)
+        elif start_time < end_time:
+            segments.append(contact.create_partial_contact(start_time, end_time))
+        slice_index = last_index + 1
+    return segments
+
+
+def determine_best_atomic_contacts(group):
+    """
+    gibt die sich nicht überschneidenden ganzen Kontakte einer Gruppe mit größter Datenmenge zurück
+    :param group: list of Contact
+    :return: list of Contact
+    """
+    selected = determine_best_interval_sequence(
+        numpy.array([contact.retrieve_start_time().timestamp() for contact in group]),
+        numpy.array([contact.retrieve_end_time().timestamp() for contact in group]),
+        numpy.array([contact.get_data() for contact in group], dtype=float))
+    return [group[index] for index in selected]
+
+
+def best_contact_sequence_with_split_passes(contacts, switching_time, deadline=None,
+                                            slice_seconds=SPLIT_PASS_SLICE_SECONDS):
+    """
+    ermittelt aus Liste von Kontakten die Kontaktfolge mit den meisten übertragenen Daten, wobei während eines
+    Kontakts zu einem anderen gleichzeitigen Kontakt gewechselt werden darf; überlappende Kontakte werden in
+    Zeitscheiben zerlegt und je Zeitscheibe eine Antenne gewählt, jeder Wechsel kostet die Umschaltzeit;
+    ist die Zerlegung wegen der Zeitscheiben schlechter als die beste Folge ganzer Kontakte, wird diese verwendet
+    bei überschrittenem Zeitbudget wird die Kontaktfolge nur bis zum Beginn der ersten nicht berechneten Gruppe
+    ermittelt
+    :param contacts: list of Contact mit ermittelter Datenmenge
+    :param switching_time: float; Zeit ohne Übertragung in Sekunden beim Wechsel während eines Kontakts
+    :param deadline: general_utility.AnalysisDeadline
+    :param slice_seconds: float
+    :return: ContactSequence
+    """
+    switching_time = max(switching_time, MINIMUM_SWITCHING_TIME_SECONDS)
+    groups = determine_sorted_contact_groups([contact for contact in contacts if contact.get_data()])
+    best_sequence = ContactSequence()
+    for batch_start in range(0, len(groups), GROUPS_PER_BATCH):
+        if deadline and deadline.is_exceeded():
+            best_sequence.set_cutoff_time(groups[batch_start][0].retrieve_start_time())
+            break
+        batch = groups[batch_start:batch_start + GROUPS_PER_BATCH]
+        overlapping = [group for group in batch if len(group) > 1]
+        segments_of_groups = dict()
+        if overlapping:
+            group_starts, rates, active = determine_slice_rates(overlapping, slice_seconds)
+            states = determine_slice_states(rates, active, slice_seconds, switching_time)
+            for group_index, group in enumerate(overlapping):
+                segments_of_groups[id(group)] = determine_segments(
+                    group, group_starts[group_index], states[group_index], active[group_index], slice_seconds,
+                    switching_time)
+        for group in batch:
+            atomic_contacts = determine_best_atomic_contacts(group)
+            segments = segments_of_groups.get(id(group), atomic_contacts)
+            if sum(segment.get_data() for segment in segments) < sum(contact.get_data() for contact in atomic_contacts):
+                segments = atomic_contacts
+            for segment in segments:
+                best_sequence.add_contact(segment)
+    return best_sequence
@@ -0,0 +1,265 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import math
+import numpy
+from datetime import timedelta
+from skyfield.api import Topos
+from orbitscalc.antenna import MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES
+from orbitscalc.general_utility import retrieve_timescale
+from orbitscalc.spatial_index import determine_satellite_positions, to_julian_date, SECONDS_PER_DAY
+
+
+# Äquatorradius nach WGS84 in km
+EARTH_EQUATORIAL_RADIUS_KM = 6378.137
+# Mindestzuschlag auf die Elevation der Kontaktsuche am Mittelpunkt der Bodenstation
+STATION_ELEVATION_MARGIN_DEGREES = 0.5
+# größter Abstand einer Antenne vom Mittelpunkt, bis zu dem Kontakte gemeinsam gesucht werden
+MAXIMUM_DISTANCE_FROM_STATION_CENTER_KM = 20.0
+# Genauigkeit der Kontaktzeitpunkte je Antenne bei exakter Analyse
+REFINEMENT_EPSILON_SECONDS = 0.01
+# Erweiterung der Fenster, da Aufgang und Untergang von find_events um mehrere Sekunden abweichen können
+WINDOW_PADDING = timedelta(seconds=60)
+
+
+def determine_up_vectors(antennas_skyfield):
+    """
+    gibt erdfeste Einheitsvektoren der Ellipsoidnormalen (Zenit) der Antennen zurück
+    :param antennas_skyfield: list of skyfield.toposlib.Topos
+    :return: numpy.ndarray (n, 3)
+    """
+    latitudes = numpy.array([antenna.latitude.radians for antenna in antennas_skyfield])
+    longitudes = numpy.array([antenna.longitude.radians for antenna in antennas_skyfield])
+    return numpy.column_stack((
+        numpy.cos(latitudes) * numpy.cos(longitudes),
+        numpy.cos(latitudes) * numpy.sin(longitudes),
+        numpy.sin(latitudes),
+    ))
+
+
+class StationGeometry:
+    """
+    berechnet die Höhe des Satelliten über dem Horizont für mehrere Antennen einer Bodenstation gemeinsam,
+    mit einer SGP4-Propagation je Zeitpunkt und dem erdfesten Ortsvektor je Antenne
+    """
+    def __init__(self, satellite, antennas_skyfield, reference_time):
+        """
+        :param satellite: analysis.Satellite
+        :param antennas_skyfield: list of skyfield.toposlib.Topos
+        :param reference_time: datetime.datetime; Zeitpunkte werden in Sekunden ab diesem angegeben
+        """
+        self.__satellite_skyfield = satellite.get_skyfield()
+        self.__positions = numpy.array([antenna.itrf_xyz().km for antenna in antennas_skyfield]).reshape(-1, 3)
+        self.__up_vectors = determine_up_vectors(antennas_skyfield)
+        self.__reference_time = reference_time
+        self.__julian_date = to_julian_date(reference_time)
+        # Differenz UT1 - UTC für die Erddrehung, über den Analysezeitraum als konstant angenommen
+        reference_time_skyfield = retrieve_timescale().from_datetime(reference_time)
+        self.__ut1_offset = reference_time_skyfield.ut1 - self.__julian_date
+
+    def retrieve_altitudes(self, seconds, antenna_indices):
+        """
+        gibt Höhen über dem Horizont in Grad für Paare aus Zeitpunkt und Antenne zurück
+        :param seconds: numpy.ndarray; Sekunden ab Bezugszeitpunkt
+        :param antenna_indices: numpy.ndarray; Index der Antenne je Zeitpunkt
+        :return: numpy.ndarray
+        """
+        satellite_positions = determine_satellite_positions(
+            self.__satellite_skyfield, self.__julian_date, seconds / SECONDS_PER_DAY, self.__ut1_offset)
+        relative_positions = satellite_positions - self.__positions[antenna_indices]
+        sine = numpy.sum(relative_positions * self.__up_vectors[antenna_indices], axis=1) \
+            / numpy.linalg.norm(relative_positions, axis=1)
+        return numpy.degrees(numpy.arcsin(numpy.clip(sine, -1.0, 1.0)))
+
+    def to_datetime(self, seconds):
+        return self.__reference_time + timedelta(seconds=float(seconds))
+
+    def to_seconds(self, date_time):
+        return (date_time - self.__reference_time).total_seconds()
+
+
+def bisect_culminations(geometry, lower, upper, antenna_indices):
+    """
+    sucht in jedem Intervall gleichzeitig den Zeitpunkt größter Höhe über dem Vorzeichen der Höhenänderung
+    :param geometry: StationGeometry
+    :param lower: numpy.ndarray; Intervallbeginn in Sekunden
+    :param upper: numpy.ndarray; Intervallende in Sekunden
+    :param antenna_indices: numpy.ndarray
+    :return: numpy.ndarray
+    """
+    lower = lower.copy()
+    upper = upper.copy()
+    half_step = REFINEMENT_EPSILON_SECONDS / 2
+    while len(lower) and (upper - lower).max() > REFINEMENT_EPSILON_SECONDS:
+        middle = (lower + upper) / 2
+        altitudes = geometry.retrieve_altitudes(
+            numpy.concatenate((middle - half_step, middle + half_step)), numpy.concatenate((antenna_indices,) * 2))
+        rising = altitudes[len(middle):] > altitudes[:len(middle)]
+        lower = numpy.where(rising, middle, lower)
+        upper = numpy.where(rising, upper, middle)
+    return (lower + upper) / 2
+
+
+def bisect_crossings(geometry, below, above, antenna_indices, epsilon=REFINEMENT_EPSILON_SECONDS):
+    """
+    sucht in jedem Intervall gleichzeitig den Zeitpunkt, an dem die Mindesthöhe über dem Horizont erreicht wird
+    :param geometry: StationGeometry
+    :param below: numpy.ndarray; Zeitpunkte in Sekunden unter der Mindesthöhe
+    :param above: numpy.ndarray; Zeitpunkte in Sekunden über der Mindesthöhe (vor oder nach below)
+    :param antenna_indices: numpy.ndarray
+    :param epsilon: float; Intervalllänge in Sekunden, bei der die Suche abbricht
+    :return: numpy.ndarray; Mitte des letzten Intervalls, höchstens epsilon / 2 vom Erreichen der Mindesthöhe entfernt
+    """
+    below = below.copy()
+    above = above.copy()
+    while len(below) and numpy.abs(above - below).max() > epsilon:
+        middle = (below + above) / 2
+        is_above = geometry.retrieve_altitudes(middle, antenna_indices) >= \
+            MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES
+        above = numpy.where(is_above, middle, above)
+        below = numpy.where(is_above, below, middle)
+    return (below + above) / 2
+
+
+def determine_station_pass_windows(satellite, center_skyfield, elevation_margin, search_start_time, search_end_time):
+    """
+    gibt Zeitfenster zurück, in denen der Satellit am Mittelpunkt der Bodenstation höher als die um den Zuschlag
+    verminderte Mindesthöhe steht; jeder Kontakt einer Antenne der Bodenstation liegt in einem dieser Fenster
+    :param satellite: analysis.Satellite
+    :param center_skyfield: skyfield.toposlib.Topos
+    :param elevation_margin: float in Grad
+    :param search_start_time: datetime.datetime
+    :param search_end_time: datetime.datetime
+    :return: list of (datetime.datetime, datetime.datetime)
+    """
+    timescale = retrieve_timescale()
+    times, events = satellite.get_skyfield().find_events(
+        center_skyfield,
+        timescale.from_datetime(search_start_time),
+        timescale.from_datetime(search_end_time),
+        altitude_degrees=MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES - elevation_margin
+    )
+    windows = list()
+    # Fenster, das bereits zu Beginn der Suche geöffnet ist
+    window_start_time = search_start_time if len(events) and events[0] != 0 else None
+    for time, event in zip(times.utc_datetime(), events):
+        if event == 0:
+            window_start_time = max(time - WINDOW_PADDING, search_start_time)
+        elif event == 2 and window_start_time is not None:
+            windows.append((window_start_time, min(time + WINDOW_PADDING, search_end_time)))
+            window_start_time = None
+    if window_start_time is not None:
+        windows.append((window_start_time, search_end_time))
+    return windows
+
+
+def determine_sampled_pass_windows(satellite, center_skyfield, elevation_margin, search_start_time, search_end_time,
+                                   precision):
+    """
+    gibt Zeitfenster zwischen zwei Tiefstständen des Satelliten am Mittelpunkt der Bodenstation zurück,
+    in denen dieser höher als die um den Zuschlag verminderte Mindesthöhe steigt;
+    die Tiefststände werden nur im groben Zeitraster der Genauigkeit gesucht
+    :param satellite: analysis.Satellite
+    :param center_skyfield: skyfield.toposlib.Topos
+    :param elevation_margin: float in Grad
+    :param search_start_time: datetime.datetime
+    :param search_end_time: datetime.datetime
+    :param precision: analysis.AnalysisPrecisions; nicht exakt
+    :return: list of (datetime.datetime, datetime.datetime)
+    """
+    geometry = StationGeometry(satellite, [center_skyfield], search_start_time)
+    duration = (search_end_time - search_start_time).total_seconds()
+    coarse_step = satellite.get_orbit_duration() / precision.get_samples_per_orbit()
+    seconds = numpy.append(numpy.arange(0.0, duration, coarse_step), duration)
+    altitudes = geometry.retrieve_altitudes(seconds, numpy.zeros(len(seconds), dtype=int))
+    # zwischen zwei Tiefstständen steigt und fällt die Höhe nur einmal
+    inner = numpy.arange(1, len(seconds) - 1)
+    minima = inner[(altitudes[inner] <= altitudes[inner - 1]) & (altitudes[inner] < altitudes[inner + 1])]
+    boundaries = numpy.concatenate(([0], minima, [len(seconds) - 1]))
+    starts = seconds[boundaries[:-1]]
+    ends = seconds[boundaries[1:]]
+    indices = numpy.zeros(len(starts), dtype=int)
+    culminations = bisect_culminations(geometry, starts, ends, indices)
+    high_enough = geometry.retrieve_altitudes(culminations, indices) >= \
+        MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES - elevation_margin
+    return [(geometry.to_datetime(start), geometry.to_datetime(end))
+            for start, end in zip(starts[high_enough], ends[high_enough])]
+
+
+def determine_station_contact_times(analysis, coordinates, antennas, search_start_time, search_end_time):
+    """
+    ermittelt Kontakte mehrerer nah beieinander liegender Antennen einer Bodenstation gemeinsam:
+    Zeitfenster einmal am Mittelpunkt mit verminderter Mindesthöhe suchen,
+    Aufgang, Höchststand und Untergang je Antenne nur innerhalb dieser Fenster verfeinern
+    :param analysis: analysis.Analysis
+    :param coordinates: dict mit 'lat', 'lon' und 'alt' des Mittelpunkts der Bodenstation
+    :param antennas: list of antenna.Antenna
+    :param search_start_time: datetime.datetime
+    :param search_end_time: datetime.datetime
+    :return: list of list of (Beginn, Höchststand, Ende) je Antenne, bzw. None, falls Antennen zu weit verstreut sind
+    """
+    satellite = analysis.get_satellite()
+    center_skyfield = Topos(
+        latitude_degrees=float(coordinates['lat']),
+        longitude_degrees=float(coordinates['lon']),
+        elevation_m=float(coordinates['alt'])
+    )
+    antennas_skyfield = [antenna.get_skyfield() for antenna in antennas]
+    geometry = StationGeometry(satellite, antennas_skyfield, analysis.get_start_time())
+    distances = numpy.linalg.norm(
+        numpy.array([antenna.itrf_xyz().km for antenna in antennas_skyfield]) - center_skyfield.itrf_xyz().km, axis=1)
+    maximum_distance = distances.max()
+    if maximum_distance > MAXIMUM_DISTANCE_FROM_STATION_CENTER_KM:
+        return None
+    # Versatz zum Mittelpunkt ändert die Höhe höchstens um Winkel zum Satelliten (im Perigäum) und Neigung des Horizonts
+    perigee_altitude = satellite.retrieve_perigee_radius() - EARTH_EQUATORIAL_RADIUS_KM
+    elevation_margin = STATION_ELEVATION_MARGIN_DEGREES + math.degrees(
+        maximum_distance / perigee_altitude + maximum_distance / EARTH_EQUATORIAL_RADIUS_KM)
+    precision = analysis.get_precision()
+    epsilon = precision.get_tolerance_seconds()
+    if epsilon is None:
+        windows = determine_station_pass_windows(
+            satellite, center_skyfield, elevation_margin, search_start_time, search_end_time)
+        epsilon = REFINEMENT_EPSILON_SECONDS
+    else:
+        windows = determine_sampled_pass_windows(
+            satellite, center_skyfield, elevation_margin, search_start_time, search_end_time, precision)
+    contact_times = [list() for _ in antennas]
+    if not windows:
+        return contact_times
+    analysis.get_instrumentation().increment("Bodenstationen mit gemeinsamer Kontaktsuche")
+    # alle Paare aus Antenne und Fenster gleichzeitig verfeinern
+    window_starts = numpy.array([geometry.to_seconds(window[0]) for window in windows])
+    window_ends = numpy.array([geometry.to_seconds(window[1]) for window in windows])
+    antenna_indices = numpy.repeat(numpy.arange(len(antennas)), len(windows))
+    starts = numpy.tile(window_starts, len(antennas))
+    ends = numpy.tile(window_ends, len(antennas))
+    culminations = bisect_culminations(geometry, starts, ends, antenna_indices)
+    culmination_altitudes = geometry.retrieve_altitudes(culminations, antenna_indices)
+    visible = culmination_altitudes >= MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES
+    antenna_indices = antenna_indices[visible]
+    starts = starts[visible]
+    ends = ends[visible]
+    culminations = culminations[visible]
+    # Fenster am Rand des Analysezeitraums können mit einem bereits laufenden Kontakt beginnen oder enden
+    start_above = geometry.retrieve_altitudes(starts, antenna_indices) >= \
+        MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES
+    end_above = geometry.retrieve_altitudes(ends, antenna_indices) >= \
+        MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES
+    rises = numpy.where(start_above, starts, bisect_crossings(geometry, starts, culminations, antenna_indices, epsilon))
+    sets = numpy.where(end_above, ends, bisect_crossings(geometry, ends, culminations, antenna_indices, epsilon))
+    for antenna_index, rise, culmination, start, end, contact_set in zip(
+            antenna_indices, rises, culminations, starts, ends, sets):
+        # Höchststand am Rand des Fensters liegt außerhalb des Suchzeitraums
+        if culmination - start <= REFINEMENT_EPSILON_SECONDS or end - culmination <= REFINEMENT_EPSILON_SECONDS:
+            culmination_time = None
+        else:
+            culmination_time = geometry.to_datetime(culmination)
+        contact_times[antenna_index].append(
+            (geometry.to_datetime(rise), culmination_time, geometry.to_datetime(contact_set)))
+    for antenna_contact_times in contact_times:
+        antenna_contact_times.sort(key=lambda contact_time: contact_time[0])
+    return contact_times
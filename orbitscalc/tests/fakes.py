@@ -0,0 +1,267 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+from datetime import datetime, timedelta, timezone
+from skyfield.api import EarthSatellite, Topos
+from orbitscalc.analysis import AnalysisPrecisions, SchedulingMethods
+from orbitscalc.antenna import Antenna
+from orbitscalc.contact_records import determine_tle_hash
+from orbitscalc.contact_utility import ContactSequence
+from orbitscalc.general_utility import AnalysisInstrumentation, retrieve_timescale
+from orbitscalc.models import Aperture, GroundStation, Link
+
+
+REFERENCE_TIME = datetime(2021, 4, 14, tzinfo=timezone.utc)
+# Epoche des ISS-TLE; Bahnrechnungen nahe der Epoche sind am genauesten
+TLE_EPOCH = datetime(2020, 7, 14, 19, 34, tzinfo=timezone.utc)
+ISS_TLE = ("ISS (ZARYA)", "1 25544U 98067A   20196.81549769 -.00000199  00000-0  44991-5 0  9999",
+           "2 25544  51.6443 211.7288 0001419 115.0512 224.2366 15.49514614236291")
+
+
+def minutes(value):
+    return REFERENCE_TIME + timedelta(minutes=value)
+
+
+def create_form_data(**changes):
+    """
+    gibt gültige Formulareingaben einer eintägigen Analyse der ISS zurück
+    :param changes: abweichende Eingaben
+    :return: dict
+    """
+    form_data = {
+        "tle": "\n".join(ISS_TLE), "start_time_0": "2020-09-03", "start_time_1": "12:00", "end_time_0": "2020-09-04",
+        "end_time_1": "12:00", "time_input_style": "PerOrbit", "data_unit": "8000000.0", "data": "100",
+        "time_days": "1", "time_hours": "0", "time_minutes": "0", "eirp_unit": "dBW", "eirp": "10",
+        "minimum_frequency": "2", "maximum_frequency": "9", "minimum_frequency_unit": "9",
+        "maximum_frequency_unit": "9", "mode": "GroundStations", "precision": "Exact", "scheduling_method": "Instant",
+    }
+    form_data.update(changes)
+    return form_data
+
+
+def create_aperture(name="Neustrelitz", latitude=53.33, longitude=13.07):
+    """
+    legt Bodenstation mit einer betriebsbereiten X-Band-Antenne in der Datenbank an
+    :return: Aperture model object
+    """
+    ground_station = GroundStation.objects.create(name=name)
+    aperture = Aperture.objects.create(name="%s-0" % name, groundstation=ground_station, latitude=latitude,
+                                       longitude=longitude, altitude=600, gt_dbw_k=20, is_operational=True)
+    Link.objects.create(aperture=aperture, frequency_min_MHz=8000, frequency_max_MHz=8400, is_downlink=True)
+    return aperture
+
+
+def create_antenna(analysis, latitude=53.33, longitude=13.07, antenna_id=1):
+    """
+    erstellt Antenne einer nicht gespeicherten Aperture, die Kontakte im Zeitraum der Analyse sucht
+    :return: antenna.Antenna
+    """
+    aperture = Aperture(id=antenna_id, name="Neustrelitz-%i" % antenna_id, latitude=latitude, longitude=longitude,
+                        altitude=600, gt_dbw_k=20)
+    return Antenna(FakeGroundStation("Neustrelitz", analysis), aperture)
+
+
+class FakeSatellite:
+    def __init__(self):
+        name, line_one, line_two = ISS_TLE
+        self.__skyfield = EarthSatellite(line_one, line_two, name, retrieve_timescale())
+
+    def get_skyfield(self):
+        return self.__skyfield
+
+    def get_tle_hash(self):
+        return determine_tle_hash(ISS_TLE)
+
+
+class FakeAnalysis:
+    def __init__(self, satellite=None, start_time=REFERENCE_TIME, end_time=None, search_spans=None,
+                 precision=AnalysisPrecisions.Exact, scheduling_method=SchedulingMethods.Instant, handover_gap=0.0,
+                 data_generation_rate=0.0, storage_capacity=0.0):
+        self.__satellite = satellite or FakeSatellite()
+        self.__precision = precision
+        self.__scheduling_method = scheduling_method
+        self.__handover_gap = handover_gap
+        self.__data_generation_rate = data_generation_rate
+        self.__storage_capacity = storage_capacity
+        self.__start_time = start_time
+        self.__end_time = end_time or start_time + timedelta(days=1)
+        # Antennen-id: Zeitspannen mit möglichem Kontakt; ohne Angabe wird der ganze Zeitraum durchsucht
+        self.__search_spans = search_spans
+        self.__instrumentation = AnalysisInstrumentation()
+
+    def get_satellite(self):
+        return self.__satellite
+
+    def get_start_time(self):
+        return self.__start_time
+
+    def get_end_time(self):
+        return self.__end_time
+
+    def get_search_spans(self, antenna_id):
+        if self.__search_spans is None:
+            return None
+        return self.__search_spans.get(antenna_id, list())
+
+    def get_instrumentation(self):
+        return self.__instrumentation
+
+    def get_precision(self):
+        return self.__precision
+
+    def get_scheduling_method(self):
+        return self.__scheduling_method
+
+    def get_handover_gap(self):
+        return self.__handover_gap
+
+    def retrieve_data_generation_rate(self):
+        return self.__data_generation_rate
+
+    def get_storage_capacity(self):
+        return self.__storage_capacity
+
+
+class FakeGroundStation:
+    def __init__(self, name, analysis=None):
+        self.__name = name
+        self.__analysis = analysis or FakeAnalysis()
+
+    def get_name(self):
+        return self.__name
+
+    def get_analysis(self):
+        return self.__analysis
+
+
+class FakeAntenna:
+    """
+    Antenne ohne Datenbank und Skyfield mit den Eigenschaften, die die Planung von Kontaktfolgen abfragt
+    """
+    def __init__(self, ground_station, name, setup_time=0.0, teardown_time=0.0, antenna_id=None, usage_cost=1.0):
+        self.__ground_station = ground_station
+        self.__name = name
+        self.__setup_time = setup_time
+        self.__teardown_time = teardown_time
+        self.__antenna_id = antenna_id
+        self.__usage_cost = usage_cost
+        self.__contact_sequence = ContactSequence()
+
+    def get_ground_station(self):
+        return self.__ground_station
+
+    def get_name(self):
+        return self.__name
+
+    def retrieve_analysis(self):
+        return self.__ground_station.get_analysis()
+
+    def retrieve_setup_time(self):
+        return self.__setup_time
+
+    def retrieve_teardown_time(self):
+        return self.__teardown_time
+
+    def retrieve_id(self):
+        # ohne id keine Apertur in der Datenbank, also keine Links
+        return self.__antenna_id
+
+    def retrieve_usage_cost(self):
+        return self.__usage_cost
+
+    def get_contact_sequence(self):
+        return self.__contact_sequence
+
+    def get_skyfield(self):
+        return Topos(latitude_degrees=53.33, longitude_degrees=13.07)
+
+
+class FakeSite:
+    """
+    Antenne an einer Position auf der Erde, wie sie der räumliche Index und die grobe Propagation abfragen
+    """
+    def __init__(self, antenna_id, latitude, longitude):
+        self.__antenna_id = antenna_id
+        self.__skyfield = Topos(latitude_degrees=latitude, longitude_degrees=longitude, elevation_m=0)
+
+    def retrieve_id(self):
+        return self.__antenna_id
+
+    def get_skyfield(self):
+        return self.__skyfield
+
+
+class FakeContact:
+    """
+    Kontakt von start bis end Minuten nach REFERENCE_TIME mit gleichbleibender Datenrate
+    """
+    def __init__(self, antenna, start, end, data):
+        self.__antenna = antenna
+        self.__start_time = minutes(start)
+        self.__end_time = minutes(end)
+        self.__data = data
+        self.__is_optimal = False
+
+    def __repr__(self):
+        return "%s %s bis %s: %s" % (self.__antenna.get_name(), self.__start_time.time(), self.__end_time.time(),
+                                     self.__data)
+
+    def retrieve_start_time(self):
+        return self.__start_time
+
+    def retrieve_end_time(self):
+        return self.__end_time
+
+    def retrieve_culmination_time(self):
+        return self.__start_time + (self.__end_time - self.__start_time) / 2
+
+    def get_data(self):
+        return self.__data
+
+    def get_antenna(self):
+        return self.__antenna
+
+    def get_optimal(self):
+        return self.__is_optimal
+
+    def set_optimal(self):
+        self.__is_optimal = True
+
+    def get_optimal_intervals(self):
+        return [(self.__start_time, self.__end_time)] if self.__is_optimal else list()
+
+    def retrieve_data_rate_profile(self):
+        return [self.__start_time, self.__end_time], [self.__data / (self.__end_time - self.__start_time).seconds]
+
+    def create_limited_contact(self, maximum_data):
+        return FakeContact(self.__antenna, (self.__start_time - REFERENCE_TIME).total_seconds() / 60,
+                           (self.__end_time - REFERENCE_TIME).total_seconds() / 60, min(self.__data, maximum_data))
+
+    def create_partial_contact(self, start_time, end_time):
+        data_rate = self.retrieve_data_rate_profile()[1][0]
+        return FakeContact(self.__antenna, (start_time - REFERENCE_TIME).total_seconds() / 60,
+                           (end_time - REFERENCE_TIME).total_seconds() / 60,
+                           data_rate * (end_time - start_time).total_seconds())
+
+
+class FakeRecordedAntenna:
+    """
+    Antenne einer Aperture aus der Datenbank mit vorgegebenen Kontakten, wie sie gespeichert werden
+    """
+    def __init__(self, aperture, contacts):
+        self.__aperture = aperture
+        self.__contact_sequence = ContactSequence()
+        for contact in contacts:
+            self.__contact_sequence.add_contact(contact)
+
+    def retrieve_id(self):
+        return self.__aperture.id
+
+    def retrieve_coordinates(self):
+        return {'lat': self.__aperture.latitude, 'lon': self.__aperture.longitude, 'alt': self.__aperture.altitude}
+
+    def retrieve_recordable_contact_sequence(self):
+        return self.__contact_sequence
@@ -0,0 +1,58 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+from django.test import SimpleTestCase
+from orbitscalc.analysis import analyse_mode_ground_stations, determine_best_contact_sequence
+from orbitscalc.general_utility import AnalysisDeadline
+from orbitscalc.tests.fakes import FakeAntenna, FakeContact, FakeGroundStation, minutes
+
+
+class ExceededAfterChecks:
+    """
+    Zeitbudget, das nach einer festen Anzahl an Prüfungen überschritten ist
+    """
+    def __init__(self, number_of_checks):
+        self.__remaining_checks = number_of_checks
+
+    def is_exceeded(self):
+        self.__remaining_checks -= 1
+        return self.__remaining_checks < 0
+
+
+class AnalysisDeadlineTests(SimpleTestCase):
+    def test_without_budget_never_exceeded(self):
+        self.assertFalse(AnalysisDeadline().is_exceeded())
+
+    def test_exceeded_budget_stays_exceeded(self):
+        deadline = AnalysisDeadline(0)
+        self.assertTrue(deadline.is_exceeded())
+        self.assertTrue(deadline.get_exceeded())
+
+
+class PartialResultTests(SimpleTestCase):
+    def setUp(self):
+        antenna = FakeAntenna(FakeGroundStation("Neustrelitz"), "0")
+        self.contacts = [FakeContact(antenna, 0, 10, 5), FakeContact(antenna, 100, 110, 6),
+                         FakeContact(antenna, 200, 210, 7)]
+
+    def test_sequence_stops_after_last_optimized_group(self):
+        best_contact_sequence = determine_best_contact_sequence(self.contacts, ExceededAfterChecks(2))
+        self.assertEqual(best_contact_sequence.get_contacts(), self.contacts[:2])
+        self.assertEqual(best_contact_sequence.get_cutoff_time(), minutes(110))
+
+    def test_cutoff_at_first_group_if_none_was_optimized(self):
+        best_contact_sequence = determine_best_contact_sequence(self.contacts, AnalysisDeadline(0))
+        self.assertEqual(best_contact_sequence.get_contacts(), list())
+        self.assertEqual(best_contact_sequence.get_cutoff_time(), minutes(0))
+
+    def test_complete_sequence_within_budget(self):
+        best_contact_sequence = determine_best_contact_sequence(self.contacts, AnalysisDeadline())
+        self.assertEqual(best_contact_sequence.get_contacts(), self.contacts)
+        self.assertIsNone(best_contact_sequence.get_cutoff_time())
+
+    def test_ground_stations_after_exceeded_budget_are_left_out(self):
+        self.assertEqual(analyse_mode_ground_stations([FakeGroundStation("Neustrelitz")], 1, AnalysisDeadline(0)),
+                         list())
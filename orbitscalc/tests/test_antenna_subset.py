@@ -0,0 +1,51 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+from django.test import SimpleTestCase
+from orbitscalc.analysis import determine_best_contact_sequence
+from orbitscalc.antenna_subset import AntennaSubsetSearch
+from orbitscalc.tests.fakes import FakeAntenna, FakeContact, FakeGroundStation
+
+
+class AntennaSubsetSearchTests(SimpleTestCase):
+    def setUp(self):
+        self.station = FakeGroundStation("Neustrelitz")
+
+    def create_antenna(self, antenna_id, usage_cost, contacts):
+        antenna = FakeAntenna(self.station, str(antenna_id), antenna_id=antenna_id, usage_cost=usage_cost)
+        for start, end, data in contacts:
+            antenna.get_contact_sequence().add_contact(FakeContact(antenna, start, end, data))
+        return antenna
+
+    def test_cheaper_pair_instead_of_expensive_single_antenna(self):
+        first = self.create_antenna(1, 1, [(0, 10, 10)])
+        second = self.create_antenna(2, 1, [(100, 110, 10)])
+        expensive = self.create_antenna(3, 3, [(0, 10, 10), (100, 110, 10)])
+        search = AntennaSubsetSearch([first, second, expensive], 20, determine_best_contact_sequence)
+        self.assertEqual(search.search(), [first, second])
+        self.assertTrue(search.get_exact())
+
+    def test_single_antenna_if_it_is_cheaper(self):
+        first = self.create_antenna(1, 2, [(0, 10, 10)])
+        second = self.create_antenna(2, 2, [(100, 110, 10)])
+        cheap = self.create_antenna(3, 3, [(0, 10, 10), (100, 110, 10)])
+        search = AntennaSubsetSearch([first, second, cheap], 20, determine_best_contact_sequence)
+        self.assertEqual(search.search(), [cheap])
+
+    def test_overlapping_contacts_are_not_counted_twice(self):
+        # beide Antennen sehen denselben Überflug, zusammen übertragen sie nicht mehr als die bessere allein
+        first = self.create_antenna(1, 1, [(0, 10, 10)])
+        sibling = self.create_antenna(2, 1, [(0, 10, 9)])
+        later = self.create_antenna(3, 1, [(100, 110, 5)])
+        search = AntennaSubsetSearch([first, sibling, later], 15, determine_best_contact_sequence)
+        self.assertEqual(search.search(), [first, later])
+
+    def test_all_antennas_with_gain_if_target_is_unreachable(self):
+        first = self.create_antenna(1, 1, [(0, 10, 10)])
+        sibling = self.create_antenna(2, 1, [(0, 10, 9)])
+        search = AntennaSubsetSearch([first, sibling], 100, determine_best_contact_sequence)
+        self.assertEqual(search.search(), [first])
+        self.assertFalse(search.get_exact())
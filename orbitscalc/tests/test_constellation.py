@@ -0,0 +1,63 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import numpy
+from datetime import timedelta
+from django.test import SimpleTestCase, TestCase
+from orbitscalc.analysis import Satellite
+from orbitscalc.constellation import ConstellationAnalysis, lookup_sorted
+from orbitscalc.station_geometry import determine_station_contact_times
+from orbitscalc.tests.fakes import ISS_TLE, TLE_EPOCH, create_antenna, create_aperture, FakeAnalysis
+
+
+# Aufgang und Untergang werden zwischen Zeitpunkten im Abstand von 10 s linear interpoliert
+TOLERANCE_SECONDS = 2
+
+
+class LookupTests(SimpleTestCase):
+    def test_lookup_returns_zero_for_missing_keys(self):
+        values = lookup_sorted(numpy.array([2, 5]), numpy.array([20.0, 50.0]), numpy.array([5, 3, 2]))
+        self.assertEqual(values.tolist(), [50.0, 0.0, 20.0])
+
+
+class ConstellationAnalysisTests(TestCase):
+    def setUp(self):
+        self.satellite = Satellite(ISS_TLE, 10, 2e9, 9e9)
+        self.start_time = TLE_EPOCH
+        self.end_time = TLE_EPOCH + timedelta(days=1)
+        self.aperture = create_aperture()
+        self.constellation = ConstellationAnalysis(self.start_time, self.end_time, [self.satellite, self.satellite],
+                                                   [self.aperture])
+        self.constellation.analyse()
+
+    def test_contacts_match_the_single_satellite_search(self):
+        analysis = FakeAnalysis(self.satellite, self.start_time, self.end_time)
+        antenna = create_antenna(analysis, float(self.aperture.latitude), float(self.aperture.longitude))
+        expected = determine_station_contact_times(analysis, antenna.retrieve_coordinates(), [antenna],
+                                                   self.start_time, self.end_time)[0]
+        contacts = self.constellation.get_contacts()
+        for satellite_index in range(2):
+            indices = numpy.flatnonzero(contacts.satellite_indices == satellite_index)
+            self.assertEqual(len(indices), len(expected))
+            for index, (expected_start_time, culmination_time, expected_end_time) in zip(indices, expected):
+                start_time = self.constellation.retrieve_time_of_seconds(contacts.start_seconds[index])
+                end_time = self.constellation.retrieve_time_of_seconds(contacts.end_seconds[index])
+                self.assertLess(abs((start_time - expected_start_time).total_seconds()), TOLERANCE_SECONDS)
+                self.assertLess(abs((end_time - expected_end_time).total_seconds()), TOLERANCE_SECONDS)
+
+    def test_fleet_data_sums_the_best_sequences(self):
+        counts, durations, data = self.constellation.retrieve_contact_matrix()
+        self.assertEqual(counts[0, 0], counts[1, 0])
+        self.assertGreater(data[0, 0], 0)
+        results = self.constellation.retrieve_satellite_results()
+        self.assertEqual(self.constellation.retrieve_fleet_data(), results[0]["data"] + results[1]["data"])
+        self.assertAlmostEqual(results[0]["data"], data[0, 0])
+
+    def test_scheduling_shares_the_aperture(self):
+        results = self.constellation.retrieve_satellite_results()
+        # beide Satelliten haben dieselbe Bahn und konkurrieren um jeden Kontakt der einzigen Antenne
+        self.assertAlmostEqual(self.constellation.get_fleet_schedule().get_data(), results[0]["data"])
+
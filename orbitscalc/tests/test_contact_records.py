@@ -0,0 +1,58 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+from django.test import TestCase
+from orbitscalc.contact_records import determine_tle_hash, determine_position, load_recorded_contact_times, \
+    store_contact_records
+from orbitscalc.models import Aperture, ContactRecord, ContactRecordCoverage
+from orbitscalc.tests.fakes import ISS_TLE, minutes, create_aperture, FakeAnalysis, FakeContact, FakeRecordedAntenna
+
+
+class ContactRecordTests(TestCase):
+    def setUp(self):
+        self.aperture = create_aperture()
+        position = {"latitude": 53.33, "longitude": 13.07, "altitude": 600.0}
+        tle_hash = determine_tle_hash(ISS_TLE)
+        ContactRecordCoverage.objects.create(tle_hash=tle_hash, aperture=self.aperture, start_time=minutes(0),
+                                             end_time=minutes(1440), **position)
+        ContactRecord.objects.create(tle_hash=tle_hash, aperture=self.aperture, start_time=minutes(10),
+                                     culmination_time=minutes(15), end_time=minutes(20), **position)
+        self.analysis = FakeAnalysis()
+
+    def test_tle_hash_ignores_name_and_whitespace(self):
+        name, line_one, line_two = ISS_TLE
+        self.assertEqual(determine_tle_hash(("ISS", " " + line_one, line_two + " ")), determine_tle_hash(ISS_TLE))
+
+    def test_position_compares_decimal_and_float(self):
+        self.aperture.refresh_from_db()
+        self.assertEqual(determine_position(self.aperture.latitude, self.aperture.longitude, self.aperture.altitude),
+                         determine_position(53.33, 13.07, 600.0))
+
+    def test_records_are_loaded_when_position_is_unchanged(self):
+        self.aperture.gt_dbw_k = 25
+        self.aperture.save()
+        self.aperture.refresh_from_db()
+        recorded_contact_times = load_recorded_contact_times(self.analysis, [self.aperture])
+        self.assertEqual(recorded_contact_times, {self.aperture.id: [(minutes(10), minutes(15), minutes(20))]})
+
+    def test_records_are_ignored_when_position_changes(self):
+        Aperture.objects.filter(id=self.aperture.id).update(altitude=650)
+        self.aperture.refresh_from_db()
+        self.assertEqual(load_recorded_contact_times(self.analysis, [self.aperture]), {})
+
+    def test_records_are_ignored_without_full_coverage(self):
+        ContactRecordCoverage.objects.update(end_time=minutes(720))
+        self.assertEqual(load_recorded_contact_times(self.analysis, [self.aperture]), {})
+
+    def test_storing_replaces_overlapping_records_at_the_new_position(self):
+        Aperture.objects.filter(id=self.aperture.id).update(latitude=54.0)
+        self.aperture.refresh_from_db()
+        antenna = FakeRecordedAntenna(self.aperture, [FakeContact(None, 100, 110, 1.0),
+                                                      FakeContact(None, 200, 208, 1.0)])
+        store_contact_records(self.analysis, [antenna])
+        self.assertEqual(ContactRecordCoverage.objects.count(), 1)
+        self.assertEqual(load_recorded_contact_times(self.analysis, [self.aperture]), {self.aperture.id: [
+            (minutes(100), minutes(105), minutes(110)), (minutes(200), minutes(204), minutes(208))]})
@@ -0,0 +1,106 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+from datetime import timedelta
+from django.test import SimpleTestCase
+from orbitscalc.analysis import Satellite
+from orbitscalc.antenna import SEARCH_SPAN_MARGIN, MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES
+from orbitscalc.general_utility import AnalysisInstrumentation, retrieve_timescale
+from orbitscalc.spatial_index import ApertureSpatialIndex, determine_reachable_latitude, determine_search_spans
+from orbitscalc.tests.fakes import ISS_TLE, TLE_EPOCH, create_antenna, FakeAnalysis
+
+
+# Abweichung der Kontaktzeiten von find_events, das Zeitpunkte nur auf etwa eine Sekunde bestimmt
+TOLERANCE_SECONDS = 2
+# Abweichung der Höhe über Horizont von der Mindesthöhe zu Beginn und Ende eines Kontakts
+ALTITUDE_TOLERANCE_DEGREES = 0.02
+
+
+def retrieve_contact_times(antenna):
+    return [(contact.retrieve_start_time(), contact.retrieve_end_time())
+            for contact in antenna.get_contact_sequence().get_contacts()]
+
+
+class SatelliteOrbitTests(SimpleTestCase):
+    def setUp(self):
+        self.satellite = Satellite(ISS_TLE, 10, 2e9, 9e9)
+
+    def test_orbit_elements_are_parsed_from_tle(self):
+        self.assertAlmostEqual(self.satellite.get_inclination(), 51.6443)
+        self.assertAlmostEqual(self.satellite.get_eccentricity(), 0.0001419)
+        self.assertAlmostEqual(self.satellite.retrieve_semi_major_axis(), 6796, delta=5)
+
+    def test_reachable_latitude_adds_footprint_to_inclination(self):
+        reachable_latitude = determine_reachable_latitude(self.satellite)
+        self.assertGreater(reachable_latitude, 51.6443 + 15)
+        self.assertLess(reachable_latitude, 80)
+
+
+class SearchRangeTests(SimpleTestCase):
+    def test_without_spans_the_whole_period_is_searched(self):
+        analysis = FakeAnalysis(start_time=TLE_EPOCH)
+        antenna = create_antenna(analysis)
+        self.assertEqual(antenna.determine_search_ranges(), [(analysis.get_start_time(), analysis.get_end_time())])
+
+    def test_unreachable_antenna_is_not_searched(self):
+        self.assertEqual(create_antenna(FakeAnalysis(start_time=TLE_EPOCH, search_spans={})).determine_search_ranges(),
+                         [])
+
+    def test_spans_are_widened_clamped_and_merged(self):
+        start_time = TLE_EPOCH
+        spans = [(start_time + timedelta(minutes=2), start_time + timedelta(minutes=10)),
+                 (start_time + timedelta(minutes=15), start_time + timedelta(minutes=20)),
+                 (start_time + timedelta(minutes=60), start_time + timedelta(minutes=70))]
+        antenna = create_antenna(FakeAnalysis(start_time=start_time, search_spans={1: spans}))
+        self.assertEqual(antenna.determine_search_ranges(), [
+            (start_time, start_time + timedelta(minutes=20) + SEARCH_SPAN_MARGIN),
+            (start_time + timedelta(minutes=60) - SEARCH_SPAN_MARGIN,
+             start_time + timedelta(minutes=70) + SEARCH_SPAN_MARGIN)])
+
+
+class ContactSearchTests(SimpleTestCase):
+    def setUp(self):
+        self.satellite = Satellite(ISS_TLE, 10, 2e9, 9e9)
+        self.start_time = TLE_EPOCH
+        self.end_time = TLE_EPOCH + timedelta(days=1)
+
+    def test_search_per_span_finds_the_contacts_of_the_whole_period(self):
+        full_search = create_antenna(FakeAnalysis(self.satellite, self.start_time, self.end_time))
+        full_search.determine_contacts()
+        search_spans = determine_search_spans(self.satellite, ApertureSpatialIndex([full_search]), self.start_time,
+                                              self.end_time, AnalysisInstrumentation())
+        span_search = create_antenna(FakeAnalysis(self.satellite, self.start_time, self.end_time, search_spans))
+        span_search.determine_contacts()
+        full_contact_times = retrieve_contact_times(full_search)
+        span_contact_times = retrieve_contact_times(span_search)
+        self.assertTrue(full_contact_times)
+        self.assertEqual(len(span_contact_times), len(full_contact_times))
+        # die kürzeren Suchzeiträume bestimmen Auf- und Untergang mindestens so genau wie die Suche über den Zeitraum
+        timescale = retrieve_timescale()
+        topocentric = self.satellite.get_skyfield() - span_search.get_skyfield()
+        for contact_start_time, contact_end_time in span_contact_times:
+            for time in (contact_start_time, contact_end_time):
+                altitude, azimuth, distance = topocentric.at(timescale.from_datetime(time)).altaz()
+                self.assertAlmostEqual(altitude.degrees, MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES,
+                                       delta=ALTITUDE_TOLERANCE_DEGREES)
+
+    def test_contacts_running_at_the_range_edges_are_cut(self):
+        antenna = create_antenna(FakeAnalysis(self.satellite, self.start_time, self.end_time))
+        antenna.determine_contacts()
+        start_time, end_time = retrieve_contact_times(antenna)[1]
+        third_start_time, third_end_time = retrieve_contact_times(antenna)[2]
+        # Suchzeitraum beginnt während des zweiten und endet während des dritten Kontakts; find_events findet Auf-
+        # und Untergang nur um einen Höchststand im Suchzeitraum, daher vor bzw. nach dem Höchststand schneiden
+        cut_start_time = start_time + (end_time - start_time) / 4
+        cut_end_time = third_end_time - (third_end_time - third_start_time) / 4
+        cut = create_antenna(FakeAnalysis(self.satellite, cut_start_time, cut_end_time))
+        cut.determine_contacts()
+        cut_contact_times = retrieve_contact_times(cut)
+        self.assertEqual(len(cut_contact_times), 2)
+        self.assertEqual(cut_contact_times[0][0], cut_start_time)
+        self.assertLess(abs((cut_contact_times[0][1] - end_time).total_seconds()), TOLERANCE_SECONDS)
+        self.assertLess(abs((cut_contact_times[1][0] - third_start_time).total_seconds()), TOLERANCE_SECONDS)
+        self.assertEqual(cut_contact_times[1][1], cut_end_time)
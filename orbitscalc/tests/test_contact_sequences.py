@@ -0,0 +1,159 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import random
+from django.test import SimpleTestCase
+from orbitscalc.analysis import SchedulingMethods, determine_best_contact_sequence, \
+    determine_alternative_contact_sequences
+from orbitscalc.contact_utility import best_contact_sequence_from_sorted_group, \
+    best_contact_sequence_with_setup_times, determine_following_contacts, determine_sorted_contact_groups
+from orbitscalc.tests.fakes import FakeAnalysis, FakeAntenna, FakeContact, FakeGroundStation
+
+
+def determine_instant_sequence(contacts):
+    """
+    setzt die besten Kontaktfolgen aller Gruppen wie analysis.determine_best_contact_sequence zusammen
+    :return: list of FakeContact
+    """
+    selected = list()
+    for group in determine_sorted_contact_groups(contacts):
+        best_sequence = best_contact_sequence_from_sorted_group(group)
+        if best_sequence:
+            selected.extend(best_sequence.get_contacts())
+    return selected
+
+
+class InstantSchedulingTests(SimpleTestCase):
+    def setUp(self):
+        self.antenna = FakeAntenna(FakeGroundStation("Neustrelitz"), "0")
+
+    def test_following_contact_starts_after_end_of_current_contact(self):
+        contacts = [FakeContact(self.antenna, 0, 10, 5), FakeContact(self.antenna, 8, 20, 6),
+                    FakeContact(self.antenna, 18, 30, 5)]
+        self.assertEqual(determine_following_contacts(contacts), [contacts[2], None, None])
+
+    def test_chained_overlaps_combine_non_overlapping_contacts(self):
+        # A überlappt B, B überlappt C, A und C zusammen übertragen mehr als B
+        first, middle, last = FakeContact(self.antenna, 0, 10, 5), FakeContact(self.antenna, 8, 20, 6), \
+            FakeContact(self.antenna, 18, 30, 5)
+        self.assertEqual(determine_instant_sequence([first, middle, last]), [first, last])
+
+    def test_single_contact_when_it_outweighs_its_neighbours(self):
+        first, middle, last = FakeContact(self.antenna, 0, 10, 5), FakeContact(self.antenna, 8, 20, 11), \
+            FakeContact(self.antenna, 18, 30, 5)
+        self.assertEqual(determine_instant_sequence([first, middle, last]), [middle])
+
+    def test_touching_contacts_are_exclusive(self):
+        first, second = FakeContact(self.antenna, 0, 10, 5), FakeContact(self.antenna, 10, 20, 4)
+        self.assertEqual(determine_instant_sequence([first, second]), [first])
+
+    def test_long_chain_of_overlapping_contacts(self):
+        # jeder Kontakt überlappt nur seine Nachbarn; jeder zweite ergibt die beste Folge
+        contacts = [FakeContact(self.antenna, 3 * index, 3 * index + 4, 1) for index in range(2000)]
+        self.assertEqual(determine_instant_sequence(contacts), contacts[::2])
+
+    def test_same_data_as_setup_times_without_setup_times(self):
+        generator = random.Random(5)
+        for _ in range(20):
+            contacts = list()
+            for _ in range(12):
+                start = generator.uniform(0, 120)
+                contacts.append(FakeContact(self.antenna, start, start + generator.uniform(2, 15),
+                                            generator.randint(0, 10)))
+            selected = determine_instant_sequence(contacts)
+            self.assertEqual(sum(contact.get_data() for contact in selected),
+                             best_contact_sequence_with_setup_times(contacts, 0).retrieve_data())
+
+    def test_group_without_data_has_no_sequence(self):
+        self.assertIsNone(best_contact_sequence_from_sorted_group([FakeContact(self.antenna, 0, 10, 0)]))
+
+
+class SetupTimeTests(SimpleTestCase):
+    def setUp(self):
+        self.neustrelitz = FakeGroundStation("Neustrelitz")
+        self.weilheim = FakeGroundStation("Weilheim")
+
+    def test_setup_and_teardown_only_between_contacts_of_same_antenna(self):
+        # Abbau der ersten Antenne verzögert die zweite Antenne derselben Bodenstation nicht
+        first = FakeContact(FakeAntenna(self.neustrelitz, "0", 300, 300), 0, 10, 5)
+        second = FakeContact(FakeAntenna(self.neustrelitz, "1", 300, 300), 10.5, 20, 5)
+        self.assertEqual(best_contact_sequence_with_setup_times([first, second], 0).get_contacts(), [first, second])
+
+    def test_same_antenna_needs_teardown_and_setup_time(self):
+        antenna = FakeAntenna(self.neustrelitz, "0", 60, 60)
+        first, second = FakeContact(antenna, 0, 10, 5), FakeContact(antenna, 11, 20, 4)
+        self.assertEqual(best_contact_sequence_with_setup_times([first, second], 0).get_contacts(), [first])
+        later = FakeContact(antenna, 12.5, 20, 4)
+        self.assertEqual(best_contact_sequence_with_setup_times([first, later], 0).get_contacts(), [first, later])
+
+    def test_contact_of_other_antenna_in_between_does_not_shorten_setup_time(self):
+        antenna = FakeAntenna(self.neustrelitz, "0", 60, 60)
+        first, last = FakeContact(antenna, 0, 10, 5), FakeContact(antenna, 11, 20, 4.5)
+        between = FakeContact(FakeAntenna(self.neustrelitz, "1"), 10.2, 10.8, 1)
+        self.assertEqual(best_contact_sequence_with_setup_times([first, between, last], 0).get_contacts(),
+                         [first, between])
+
+    def test_handover_gap_only_between_ground_stations(self):
+        first = FakeContact(FakeAntenna(self.neustrelitz, "0"), 0, 10, 5)
+        same_station = FakeContact(FakeAntenna(self.neustrelitz, "1"), 10.5, 20, 5)
+        other_station = FakeContact(FakeAntenna(self.weilheim, "0"), 10.5, 20, 6)
+        self.assertEqual(best_contact_sequence_with_setup_times([first, same_station, other_station], 60)
+                         .get_contacts(), [first, same_station])
+        self.assertEqual(best_contact_sequence_with_setup_times([first, other_station], 20).get_contacts(),
+                         [first, other_station])
+
+    def test_analysis_with_setup_times_keeps_antenna_idle(self):
+        def create_contacts(scheduling_method):
+            ground_station = FakeGroundStation("Neustrelitz", FakeAnalysis(scheduling_method=scheduling_method))
+            antenna = FakeAntenna(ground_station, "0", 60, 60)
+            return [FakeContact(antenna, 0, 10, 5), FakeContact(antenna, 11, 20, 4)]
+
+        instant_sequence = determine_best_contact_sequence(create_contacts(SchedulingMethods.Instant))
+        self.assertEqual(len(instant_sequence.get_contacts()), 2)
+        setup_time_sequence = determine_best_contact_sequence(create_contacts(SchedulingMethods.SetupTimes))
+        self.assertEqual(len(setup_time_sequence.get_contacts()), 1)
+
+
+class AlternativeContactSequenceTests(SimpleTestCase):
+    def setUp(self):
+        self.neustrelitz = FakeGroundStation("Neustrelitz")
+        self.weilheim = FakeGroundStation("Weilheim")
+
+    def determine_best_and_alternatives(self, contacts):
+        # ohne Rüst- und Übergabezeiten die beste Folge sich nicht überschneidender Kontakte
+        best_contact_sequence = best_contact_sequence_with_setup_times(contacts, 0)
+        return best_contact_sequence, determine_alternative_contact_sequences(contacts, best_contact_sequence)
+
+    def test_no_alternative_beats_the_best_sequence(self):
+        antenna = FakeAntenna(self.neustrelitz, "0")
+        first, middle, last = FakeContact(antenna, 0, 10, 5), FakeContact(antenna, 8, 20, 6), \
+            FakeContact(antenna, 18, 30, 5)
+        best_contact_sequence, alternatives = self.determine_best_and_alternatives([first, middle, last])
+        self.assertEqual(best_contact_sequence.get_contacts(), [first, last])
+        self.assertEqual([alternative.get_contacts() for alternative in alternatives], [[middle], [first], [last]])
+
+    def test_alternatives_are_ranked_by_data(self):
+        contacts = [FakeContact(FakeAntenna(self.neustrelitz, "0"), 0, 10, 5),
+                    FakeContact(FakeAntenna(self.weilheim, "0"), 2, 9, 3),
+                    FakeContact(FakeAntenna(self.weilheim, "0"), 100, 110, 2)]
+        best_contact_sequence, alternatives = self.determine_best_and_alternatives(contacts)
+        self.assertEqual(best_contact_sequence.retrieve_data(), 7)
+        self.assertEqual([alternative.retrieve_data() for alternative in alternatives], [5, 5, 3])
+
+    def test_alternatives_keep_setup_times(self):
+        station = FakeGroundStation("Neustrelitz", FakeAnalysis(scheduling_method=SchedulingMethods.SetupTimes))
+        antenna = FakeAntenna(station, "0", 60, 60)
+        first, close, later = FakeContact(antenna, 0, 10, 5), FakeContact(antenna, 11, 20, 4), \
+            FakeContact(antenna, 30, 40, 1)
+        best_contact_sequence = determine_best_contact_sequence([first, close, later])
+        alternatives = determine_alternative_contact_sequences([first, close, later], best_contact_sequence)
+        self.assertEqual(best_contact_sequence.get_contacts(), [first, later])
+        for alternative in alternatives:
+            self.assertFalse({first, close} <= set(alternative.get_contacts()))
+
+    def test_no_alternatives_for_single_contact(self):
+        contacts = [FakeContact(FakeAntenna(self.neustrelitz, "0"), 0, 10, 5)]
+        self.assertEqual(self.determine_best_and_alternatives(contacts)[1], list())
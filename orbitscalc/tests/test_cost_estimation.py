@@ -0,0 +1,107 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+from datetime import timedelta
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from orbitscalc.analysis import AnalysisModes, AnalysisPrecisions, SchedulingMethods, Satellite
+from orbitscalc.background_queue import BackgroundAnalysisQueue
+from orbitscalc.cost_estimation import estimate_analysis_cost
+from orbitscalc.tests.fakes import ISS_TLE, REFERENCE_TIME, create_form_data
+from orbitscalc.views import BACKGROUND_ANALYSIS_QUEUE
+
+
+class CostEstimationTests(SimpleTestCase):
+    def setUp(self):
+        self.satellite = Satellite(ISS_TLE, 10, 2e9, 9e9)
+
+    def estimate(self, days, number_of_apertures, mode=AnalysisModes.All, precision=AnalysisPrecisions.Exact,
+                 scheduling_method=SchedulingMethods.Instant):
+        return estimate_analysis_cost(REFERENCE_TIME, REFERENCE_TIME + timedelta(days=days), self.satellite,
+                                      number_of_apertures, mode, precision, scheduling_method)
+
+    def test_cost_grows_with_apertures_and_duration(self):
+        small = self.estimate(1, 4)
+        self.assertGreater(self.estimate(1, 8).get_runtime_seconds(), small.get_runtime_seconds())
+        self.assertGreater(self.estimate(2, 4).get_memory_bytes(), small.get_memory_bytes())
+        # etwa 15,5 Orbits am Tag
+        self.assertEqual(small.get_number_of_contacts(), 18)
+
+    def test_just_orbit_needs_no_scheduling(self):
+        self.assertLess(self.estimate(1, 8, AnalysisModes.JustOrbit).get_runtime_seconds(),
+                        self.estimate(1, 8).get_runtime_seconds())
+
+    def test_subset_search_reoptimises_groups(self):
+        self.assertGreater(self.estimate(1, 8, AnalysisModes.MinimalSubset).get_runtime_seconds(),
+                           self.estimate(1, 8, AnalysisModes.GroundStations).get_runtime_seconds())
+
+    def test_coarse_precision_searches_faster(self):
+        self.assertLess(self.estimate(10, 8, precision=AnalysisPrecisions.Minute).get_runtime_seconds(),
+                        self.estimate(10, 8).get_runtime_seconds())
+
+    def test_split_passes_cost_more_scheduling(self):
+        self.assertGreater(self.estimate(10, 8, scheduling_method=SchedulingMethods.SplitPasses).get_runtime_seconds(),
+                           self.estimate(10, 8).get_runtime_seconds())
+        self.assertEqual(
+            self.estimate(10, 8, AnalysisModes.JustOrbit, scheduling_method=SchedulingMethods.SplitPasses)
+            .get_runtime_seconds(), self.estimate(10, 8, AnalysisModes.JustOrbit).get_runtime_seconds())
+
+    def test_storage_costs_more_scheduling(self):
+        self.assertGreater(self.estimate(10, 8, scheduling_method=SchedulingMethods.Storage).get_runtime_seconds(),
+                           self.estimate(10, 8).get_runtime_seconds())
+
+    def test_no_satellite_positions_for_long_periods(self):
+        # Satellitenpositionen für Cesium nur bis 90 Tage
+        self.assertLess(self.estimate(100, 1).get_number_of_positions(), self.estimate(80, 1).get_number_of_positions())
+
+
+class BackgroundQueueTests(SimpleTestCase):
+    def test_jobs_with_same_id_are_shared(self):
+        queue = BackgroundAnalysisQueue(1)
+        job = queue.submit("key", lambda: "Ergebnis", None)
+        self.assertIs(queue.submit("key", lambda: "anderes Ergebnis", None), job)
+        self.assertEqual(job.retrieve_result(), "Ergebnis")
+        self.assertIs(queue.get_job("key"), job)
+
+    def test_failed_job_raises_its_error(self):
+        def fail():
+            raise ValueError("Fehler")
+
+        job = BackgroundAnalysisQueue(1).submit("key", fail, None)
+        with self.assertRaises(ValueError):
+            job.retrieve_result()
+        self.assertTrue(job.retrieve_done())
+
+
+class AdmissionTests(TestCase):
+    @override_settings(ORBITSCALC_MAXIMUM_ANALYSIS_SECONDS=-1)
+    def test_too_expensive_analysis_is_rejected(self):
+        response = self.client.post(reverse("analyse"), create_form_data())
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Die Analyse ist zu aufwendig")
+
+    @override_settings(ORBITSCALC_BACKGROUND_ANALYSIS_SECONDS=-1)
+    def test_expensive_analysis_runs_in_background(self):
+        response = self.client.post(reverse("analyse"), create_form_data(data="101"))
+        self.assertEqual(response.status_code, 302)
+        job_id = response.url.rstrip("/").split("/")[-1]
+        BACKGROUND_ANALYSIS_QUEUE.get_job(job_id).retrieve_result()
+        self.assertEqual(self.client.get(response.url).status_code, 200)
+
+    def test_failed_background_analysis_shows_error(self):
+        def fail():
+            raise ValueError("Fehler")
+
+        request_data = QueryDict(mutable=True)
+        request_data.update(create_form_data())
+        job = BACKGROUND_ANALYSIS_QUEUE.submit("fehlgeschlagen", fail, request_data)
+        with self.assertRaises(ValueError):
+            job.retrieve_result()
+        with self.assertLogs("orbitscalc.views", "ERROR"):
+            response = self.client.get(reverse("analyse_job", kwargs={"job_id": "fehlgeschlagen"}))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "ist ein Fehler aufgetreten")
@@ -0,0 +1,74 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from orbitscalc.coverage import Coverage, determine_interval_union
+from orbitscalc.models import Operator
+from orbitscalc.tests.fakes import FakeAntenna, FakeContact, FakeGroundStation, create_aperture, create_form_data, \
+    minutes
+
+
+class IntervalUnionTests(SimpleTestCase):
+    def test_interval_union_merges_touching_intervals(self):
+        starts, ends, order, section_of_interval = determine_interval_union([5, 0, 10, 12], [8, 5, 11, 15])
+        self.assertEqual((starts.tolist(), ends.tolist()), ([0, 10, 12], [8, 11, 15]))
+        self.assertEqual((order.tolist(), section_of_interval.tolist()), ([1, 0, 2, 3], [0, 0, 1, 2]))
+
+    def test_contained_interval_does_not_end_section(self):
+        starts, ends, order, section_of_interval = determine_interval_union([0, 1, 6], [10, 2, 7])
+        self.assertEqual((starts.tolist(), ends.tolist()), ([0], [10]))
+        self.assertEqual(section_of_interval.tolist(), [0, 0, 0])
+
+    def test_interval_union_of_nothing(self):
+        starts, ends, order, section_of_interval = determine_interval_union([], [])
+        self.assertEqual((len(starts), len(ends), len(order), len(section_of_interval)), (0, 0, 0, 0))
+
+
+class CoverageTests(SimpleTestCase):
+    def setUp(self):
+        antenna = FakeAntenna(FakeGroundStation("Neustrelitz"), "Antenne 1")
+        # der letzte Kontakt reicht über das Ende des Analysezeitraums hinaus
+        contacts = [FakeContact(antenna, start, end, 1) for start, end in ((5, 15), (10, 20), (30, 40), (55, 70))]
+        self.coverage = Coverage(contacts, minutes(0), minutes(60))
+
+    def test_intervals_and_fraction(self):
+        self.assertEqual(self.coverage.retrieve_intervals(),
+                         [(minutes(5), minutes(20)), (minutes(30), minutes(40)), (minutes(55), minutes(60))])
+        self.assertEqual(self.coverage.retrieve_contact_seconds(), 30 * 60)
+        self.assertAlmostEqual(self.coverage.retrieve_contact_percentage(), 50)
+
+    def test_gaps_include_start_of_period(self):
+        self.assertEqual(self.coverage.retrieve_number_of_gaps(), 3)
+        self.assertEqual(self.coverage.retrieve_longest_gaps(2),
+                         [(minutes(40), minutes(55), 900.0), (minutes(20), minutes(30), 600.0)])
+        self.assertEqual(self.coverage.retrieve_maximum_gap_seconds(), 900)
+        self.assertEqual(self.coverage.retrieve_gap_percentiles()[50], 600)
+
+    def test_without_contacts_the_whole_period_is_one_gap(self):
+        coverage = Coverage(list(), minutes(0), minutes(60))
+        self.assertEqual(coverage.retrieve_contact_fraction(), 0)
+        self.assertEqual(coverage.retrieve_longest_gaps(), [(minutes(0), minutes(60), 3600.0)])
+
+
+class CoverageViewTests(TestCase):
+    def test_statistics_contain_coverage_of_network_operator_and_ground_stations(self):
+        form_data = dict()
+        operator = Operator.objects.create(name="DLR")
+        for name, latitude in (("Neustrelitz", 53.33), ("Weilheim", 47.88)):
+            aperture = create_aperture(name, latitude)
+            aperture.groundstation.operator.add(operator)
+            form_data.update({"_ground_station_%i" % aperture.groundstation_id: "on",
+                              "_antenna_%i" % aperture.id: "on"})
+        statistics = self.client.get(reverse("analyse_statistics"), create_form_data(**form_data)).json()
+        coverages = {(coverage["dimension"], coverage["name"]): coverage for coverage in statistics["coverage"]}
+        self.assertEqual(set(coverages), {("Network", "Netz"), ("Operator", "DLR"), ("GroundStation", "Neustrelitz"),
+                                          ("GroundStation", "Weilheim")})
+        network_fraction = coverages["Network", "Netz"]["contact_fraction"]
+        self.assertEqual(coverages["Operator", "DLR"]["contact_fraction"], network_fraction)
+        for name in ("Neustrelitz", "Weilheim"):
+            self.assertGreater(coverages["GroundStation", name]["contact_fraction"], 0)
+            self.assertLessEqual(coverages["GroundStation", name]["contact_fraction"], network_fraction)
@@ -0,0 +1,45 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import numpy
+from django.test import SimpleTestCase
+from orbitscalc.contact_utility import ContactSequence
+from orbitscalc.data_profile import DataProfile
+from orbitscalc.tests.fakes import FakeAntenna, FakeContact, FakeGroundStation, minutes
+
+
+class DataProfileTests(SimpleTestCase):
+    def setUp(self):
+        antenna = FakeAntenna(FakeGroundStation("Neustrelitz"), "0")
+        contact_sequence = ContactSequence()
+        contact_sequence.add_contact(FakeContact(antenna, 10, 20, 600))
+        contact_sequence.add_contact(FakeContact(antenna, 40, 50, 300))
+        # 600 bit je 30 Minuten angestrebt
+        self.data_profile = DataProfile(contact_sequence, minutes(0), minutes(60), 1800, 600)
+
+    def test_cumulative_data_rises_during_contacts(self):
+        timestamps = numpy.array([minutes(value).timestamp() for value in (5, 15, 30, 45, 60)])
+        self.assertEqual(self.data_profile.retrieve_cumulative_data(timestamps).tolist(), [0, 300, 600, 750, 900])
+
+    def test_timestamps_to_reach_data(self):
+        timestamps = self.data_profile.retrieve_timestamps_to_reach(numpy.array([0, 300, 750, 1000]))
+        self.assertEqual(timestamps[:3].tolist(), [minutes(value).timestamp() for value in (0, 15, 45)])
+        self.assertTrue(numpy.isnan(timestamps[3]))
+        self.assertIsNone(self.data_profile.retrieve_target_time())
+
+    def test_periods_and_minimum_window(self):
+        self.assertEqual(self.data_profile.retrieve_period_data()[0].tolist(), [600, 300])
+        self.assertEqual([period[:2] for period in self.data_profile.retrieve_insufficient_periods()],
+                         [(minutes(30), minutes(60))])
+        self.assertEqual(self.data_profile.retrieve_minimum_window()[2], 300)
+        self.assertFalse(self.data_profile.retrieve_minimum_window_sufficient())
+
+    def test_target_time_when_data_suffices(self):
+        contact_sequence = ContactSequence()
+        contact_sequence.add_contact(FakeContact(FakeAntenna(FakeGroundStation("Neustrelitz"), "0"), 10, 20, 1200))
+        data_profile = DataProfile(contact_sequence, minutes(0), minutes(60), 1800, 600)
+        # Gesamtziel 1200 bit im Analysezeitraum, erreicht am Ende des Kontakts
+        self.assertEqual(data_profile.retrieve_target_time(), minutes(20))
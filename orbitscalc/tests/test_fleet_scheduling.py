@@ -0,0 +1,69 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import numpy
+from django.test import SimpleTestCase
+from orbitscalc.fleet_scheduling import FleetScheduler, determine_best_interval_sequence, prepare_interval_sequence, \
+    schedule_contacts_of_satellites, select_k_best_intervals
+from orbitscalc.tests.fakes import FakeAntenna, FakeContact, FakeGroundStation
+
+
+class IntervalSequenceTests(SimpleTestCase):
+    def test_heaviest_compatible_intervals_are_selected(self):
+        selected = determine_best_interval_sequence(numpy.array([0.0, 5.0, 12.0, 11.0]),
+                                                    numpy.array([10.0, 20.0, 15.0, 30.0]),
+                                                    numpy.array([3.0, 5.0, 3.0, 2.0]))
+        self.assertEqual(selected.tolist(), [0, 2])
+
+    def test_touching_intervals_do_not_overlap(self):
+        selected = determine_best_interval_sequence(numpy.array([0.0, 10.0]), numpy.array([10.0, 20.0]),
+                                                    numpy.array([1.0, 1.0]))
+        self.assertEqual(selected.tolist(), [0])
+
+    def test_k_best_selections_in_descending_order(self):
+        order, compatible = prepare_interval_sequence(numpy.array([0.0, 5.0, 12.0]), numpy.array([10.0, 20.0, 15.0]))
+        selections = select_k_best_intervals(order, compatible, numpy.array([3.0, 5.0, 3.0]), 4)
+        self.assertEqual(selections, [(6.0, [0, 2]), (5.0, [1]), (3.0, [0]), (3.0, [2])])
+
+
+class FleetSchedulerTests(SimpleTestCase):
+    def assert_feasible(self, scheduler_input, selected):
+        satellite_keys, antenna_keys, start_times, end_times, data = scheduler_input
+        for first in selected:
+            for second in selected:
+                if first != second and start_times[first] <= end_times[second] and \
+                        start_times[second] <= end_times[first]:
+                    self.assertNotEqual(satellite_keys[first], satellite_keys[second])
+                    self.assertNotEqual(antenna_keys[first], antenna_keys[second])
+
+    def test_shared_aperture_serves_the_larger_contact(self):
+        scheduler_input = ([0, 1, 1], [7, 7, 8], [0.0, 5.0, 5.0], [10.0, 15.0, 15.0], [4.0, 3.0, 2.0])
+        fleet_schedule = FleetScheduler(*scheduler_input).schedule()
+        self.assertEqual(sorted(fleet_schedule.get_selected().tolist()), [0, 2])
+        self.assertEqual(fleet_schedule.get_data(), 6.0)
+        self.assertAlmostEqual(fleet_schedule.retrieve_optimality_gap(), 0.0, places=6)
+
+    def test_schedule_is_feasible_and_bounded(self):
+        random = numpy.random.RandomState(3)
+        number_of_contacts = 200
+        start_times = random.uniform(0, 10000, number_of_contacts)
+        scheduler_input = (random.randint(0, 10, number_of_contacts), random.randint(0, 4, number_of_contacts),
+                           start_times, start_times + random.uniform(100, 600, number_of_contacts),
+                           random.uniform(1, 10, number_of_contacts))
+        fleet_schedule = FleetScheduler(*scheduler_input).schedule()
+        self.assert_feasible(scheduler_input, fleet_schedule.get_selected().tolist())
+        self.assertGreater(fleet_schedule.get_data(), 0)
+        self.assertGreaterEqual(fleet_schedule.get_upper_bound() + 1e-6, fleet_schedule.get_data())
+
+    def test_contacts_of_analyses_are_scheduled_per_satellite(self):
+        antenna = FakeAntenna(FakeGroundStation("Neustrelitz"), "Neustrelitz-0", antenna_id=1)
+        first = [FakeContact(antenna, 0, 10, 4.0), FakeContact(antenna, 30, 40, 1.0)]
+        second = [FakeContact(antenna, 5, 15, 3.0)]
+        contact_sequences, fleet_schedule = schedule_contacts_of_satellites([first, second])
+        self.assertEqual(contact_sequences[0].get_contacts(), first)
+        self.assertEqual(contact_sequences[1].get_contacts(), [])
+        self.assertTrue(first[0].get_optimal())
+        self.assertEqual(fleet_schedule.get_data(), 5.0)
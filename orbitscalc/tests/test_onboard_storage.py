@@ -0,0 +1,84 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import numpy
+from django.test import SimpleTestCase
+from orbitscalc.analysis import SchedulingMethods, determine_alternative_contact_sequences, \
+    determine_best_contact_sequence
+from orbitscalc.onboard_storage import best_contact_sequence_with_storage, limit_contacts_to_storage, \
+    reduce_storage_states
+from orbitscalc.tests.fakes import FakeAnalysis, FakeAntenna, FakeContact, FakeGroundStation, REFERENCE_TIME, minutes
+
+
+class StorageTests(SimpleTestCase):
+    def setUp(self):
+        self.antenna = FakeAntenna(FakeGroundStation("Neustrelitz"), "0")
+
+    def determine_transferred_data(self, contacts, generation_rate, capacity):
+        best_sequence = best_contact_sequence_with_storage(contacts, generation_rate, capacity, REFERENCE_TIME,
+                                                           minutes(1440))
+        return [(contact.retrieve_start_time(), contact.get_data()) for contact in best_sequence.get_contacts()]
+
+    def test_contact_transfers_only_generated_data(self):
+        # 1 bit/s: 600 bit bis zum Beginn und 600 bit während des Kontakts
+        contact = FakeContact(self.antenna, 10, 20, 10000)
+        self.assertEqual(self.determine_transferred_data([contact], 1, 10000), [(minutes(10), 1200)])
+
+    def test_full_storage_loses_data(self):
+        contact = FakeContact(self.antenna, 10, 20, 10000)
+        self.assertEqual(self.determine_transferred_data([contact], 1, 100), [(minutes(10), 700)])
+
+    def test_storage_level_carries_over_between_contacts(self):
+        # der erste Kontakt leert den Speicher bis auf 60 bit, der zweite überträgt den Rest
+        first, second = FakeContact(self.antenna, 10, 11, 600), FakeContact(self.antenna, 12, 13, 600)
+        self.assertEqual(self.determine_transferred_data([first, second], 1, 10000),
+                         [(minutes(10), 600), (minutes(12), 180)])
+
+    def test_limited_contacts_follow_the_storage_level(self):
+        first, second = FakeContact(self.antenna, 10, 11, 600), FakeContact(self.antenna, 12, 13, 600)
+        contact_sequence = limit_contacts_to_storage([first, second], 1, 10000, REFERENCE_TIME)
+        self.assertEqual([contact.get_data() for contact in contact_sequence.get_contacts()], [600, 180])
+
+    def test_dominated_states_are_removed(self):
+        levels, values, nodes = reduce_storage_states(numpy.array([5.0, 3.0, 3.0, 1.0]),
+                                                      numpy.array([1.0, 4.0, 2.0, 3.0]),
+                                                      numpy.arange(4), 10, 10)
+        self.assertEqual((levels.tolist(), values.tolist(), nodes.tolist()), ([5.0, 3.0], [1.0, 4.0], [0, 1]))
+
+    def test_one_state_per_storage_level(self):
+        levels, values, nodes = reduce_storage_states(numpy.array([2.5, 2.1]), numpy.array([1.0, 3.0]),
+                                                      numpy.arange(2), 10, 10)
+        self.assertEqual((levels.tolist(), values.tolist(), nodes.tolist()), ([2.1], [3.0], [1]))
+
+
+class SchedulingMethodTests(SimpleTestCase):
+    """
+    ohne Rüst- und Übergabezeiten und mit ausreichend Daten an Bord stimmen die Verfahren überein
+    """
+    def determine_contacts(self, scheduling_method):
+        analysis = FakeAnalysis(scheduling_method=scheduling_method, data_generation_rate=1e6, storage_capacity=1e12)
+        neustrelitz, weilheim = FakeGroundStation("Neustrelitz", analysis), FakeGroundStation("Weilheim", analysis)
+        first, second = FakeAntenna(neustrelitz, "0"), FakeAntenna(weilheim, "0")
+        return [FakeContact(first, 0, 10, 5), FakeContact(second, 8, 20, 6), FakeContact(first, 18, 30, 5),
+                FakeContact(second, 100, 110, 3)]
+
+    def test_storage_agrees_with_setup_times_on_whole_contacts(self):
+        setup_time_sequence = determine_best_contact_sequence(self.determine_contacts(SchedulingMethods.SetupTimes))
+        storage_sequence = determine_best_contact_sequence(self.determine_contacts(SchedulingMethods.Storage))
+        self.assertEqual(setup_time_sequence.retrieve_data(), 13)
+        self.assertEqual(storage_sequence.retrieve_data(), 13)
+        contacts = storage_sequence.get_contacts()
+        for contact, next_contact in zip(contacts, contacts[1:]):
+            self.assertLess(contact.retrieve_end_time(), next_contact.retrieve_start_time())
+
+    def test_storage_alternatives_transfer_stored_data(self):
+        contacts = self.determine_contacts(SchedulingMethods.Storage)
+        best_contact_sequence = determine_best_contact_sequence(contacts)
+        alternatives = determine_alternative_contact_sequences(contacts, best_contact_sequence)
+        self.assertTrue(alternatives)
+        data = [alternative.retrieve_data() for alternative in alternatives]
+        self.assertEqual(data, sorted(data, reverse=True))
+        self.assertLessEqual(data[0], best_contact_sequence.retrieve_data())
@@ -0,0 +1,85 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import csv
+import io
+from unittest import mock
+from django.test import TestCase
+from django.urls import reverse
+from orbitscalc.models import Operator
+from orbitscalc.pass_statistics import STATISTICS_COLUMNS, StatisticsDimensions
+from orbitscalc.tests.fakes import create_aperture, create_form_data
+
+
+class FailedJob:
+    def retrieve_done(self):
+        return True
+
+    def retrieve_result(self):
+        raise RuntimeError("Propagation fehlgeschlagen")
+
+
+class RunningJob:
+    def retrieve_done(self):
+        return False
+
+
+class PassStatisticsViewTests(TestCase):
+    def setUp(self):
+        form_data = dict()
+        operator = Operator.objects.create(name="DLR")
+        for name, latitude in (("Neustrelitz", 53.33), ("Weilheim", 47.88)):
+            aperture = create_aperture(name, latitude)
+            aperture.groundstation.operator.add(operator)
+            form_data.update({"_ground_station_%i" % aperture.groundstation_id: "on",
+                              "_antenna_%i" % aperture.id: "on"})
+        self.form_data = create_form_data(**form_data)
+
+    def test_every_dimension_counts_every_pass(self):
+        statistics = self.client.get(reverse("analyse_statistics"), self.form_data).json()
+        self.assertGreater(statistics["number_of_passes"], 0)
+        self.assertEqual(statistics["number_of_days"], 2)
+        summaries = {summary["dimension"]: summary["rows"] for summary in statistics["summaries"]}
+        for dimension in StatisticsDimensions:
+            rows = summaries[dimension.name]
+            if dimension == StatisticsDimensions.Operator:
+                # die Überflüge beider Bodenstationen zählen bei ihrem gemeinsamen Betreiber
+                self.assertEqual([row["label"] for row in rows], ["DLR"])
+            if dimension == StatisticsDimensions.GroundStation:
+                self.assertEqual(len(rows), 2)
+            self.assertEqual(sum(row["number_of_passes"] for row in rows), statistics["number_of_passes"])
+        for row in summaries[StatisticsDimensions.Antenna.name]:
+            self.assertLessEqual(row["mean_duration_seconds"] * row["number_of_passes"], row["duration_seconds"] + 1e-6)
+            self.assertLessEqual(row["mean_maximum_elevation_degrees"], row["maximum_elevation_degrees"])
+            self.assertLessEqual(row["mean_gap_seconds"], row["maximum_gap_seconds"])
+            self.assertLess(row["mean_gap_seconds"], row["mean_revisit_seconds"])
+        for row in summaries[StatisticsDimensions.ElevationBin.name]:
+            lower, upper = [float(edge) for edge in row["label"].replace("°", "").split(" bis ")]
+            self.assertGreaterEqual(row["maximum_elevation_degrees"], lower)
+            self.assertLessEqual(row["maximum_elevation_degrees"], upper)
+
+    def test_csv_has_one_row_per_group(self):
+        response = self.client.get(reverse("analyse_statistics"), dict(self.form_data, format="csv"))
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.reader(io.StringIO(response.content.decode())))
+        self.assertEqual(rows[0], ["dimension", "label"] + list(STATISTICS_COLUMNS))
+        self.assertEqual({row[0] for row in rows[1:]}, {dimension.name for dimension in StatisticsDimensions})
+
+    def test_missing_antennas_are_rejected(self):
+        response = self.client.get(reverse("analyse_statistics"), create_form_data())
+        self.assertEqual(response.status_code, 400)
+
+    def test_running_background_analysis_is_not_repeated(self):
+        with mock.patch("orbitscalc.views.BACKGROUND_ANALYSIS_QUEUE.get_job", return_value=RunningJob()):
+            response = self.client.get(reverse("analyse_statistics"), self.form_data)
+        self.assertEqual(response.status_code, 409)
+
+    def test_failed_background_analysis_returns_error(self):
+        with mock.patch("orbitscalc.views.BACKGROUND_ANALYSIS_QUEUE.get_job", return_value=FailedJob()), \
+                self.assertLogs("orbitscalc.views", "ERROR"):
+            response = self.client.get(reverse("analyse_statistics"), self.form_data)
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("fehlgeschlagen", response.json()["message"])
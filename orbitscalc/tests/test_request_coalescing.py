@@ -0,0 +1,68 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import threading
+from decimal import Decimal
+from django.test import SimpleTestCase
+from orbitscalc.request_coalescing import SingleFlight, determine_request_key
+
+
+class RequestKeyTests(SimpleTestCase):
+    def test_key_ignores_order_of_selection_and_line_endings(self):
+        first = determine_request_key({"tle": "ISS\r\nzeile 1 \r\nzeile 2", "data": Decimal("1.50")}, [3, 1], [2, 1])
+        second = determine_request_key({"tle": "ISS\nzeile 1\nzeile 2", "data": Decimal("1.5")}, [1, 3], [1, 2])
+        self.assertEqual(first, second)
+
+    def test_key_differs_for_other_selection(self):
+        self.assertNotEqual(determine_request_key({"data": 1.5}, [1], []),
+                            determine_request_key({"data": 1.5}, [2], []))
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_identical_requests_compute_once(self):
+        single_flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = list()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return "Ergebnis"
+
+        results = list()
+        leader = threading.Thread(target=lambda: results.append(single_flight.execute("key", compute)))
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=lambda: results.append(single_flight.execute("key", compute)))
+        follower.start()
+        release.set()
+        leader.join()
+        follower.join()
+        self.assertEqual(results, ["Ergebnis", "Ergebnis"])
+        self.assertEqual(len(calls), 1)
+
+    def test_result_is_reused_until_it_expires(self):
+        calls = list()
+        single_flight = SingleFlight()
+        single_flight.execute("key", lambda: calls.append(1))
+        single_flight.execute("key", lambda: calls.append(1))
+        self.assertEqual(len(calls), 1)
+        expiring = SingleFlight(time_to_live=0)
+        expiring.execute("key", lambda: calls.append(1))
+        expiring.execute("key", lambda: calls.append(1))
+        self.assertEqual(len(calls), 3)
+
+    def test_failure_is_raised_and_not_kept(self):
+        single_flight = SingleFlight()
+
+        def fail():
+            raise ValueError("Fehler")
+
+        with self.assertRaises(ValueError):
+            single_flight.execute("key", fail)
+        self.assertEqual(single_flight.execute("key", lambda: "Ergebnis"), "Ergebnis")
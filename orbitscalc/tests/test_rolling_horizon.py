@@ -0,0 +1,43 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+from datetime import datetime, timedelta, timezone
+from django.test import TestCase
+from orbitscalc.analysis import Satellite
+from orbitscalc.general_utility import retrieve_timescale
+from orbitscalc.rolling_horizon import RollingHorizonPlanner
+from orbitscalc.tests.fakes import ISS_TLE, create_aperture
+
+
+class RollingHorizonTests(TestCase):
+    def setUp(self):
+        self.planner = RollingHorizonPlanner(Satellite(ISS_TLE, 10, 2e9, 9e9), [create_aperture()], timedelta(days=1),
+                                             timedelta(hours=6))
+
+    def test_ticks_commit_upcoming_contacts_that_have_not_ended(self):
+        # ab 22 Uhr überfliegt die ISS Neustrelitz mehrmals innerhalb des festgeschriebenen Zeitraums
+        now = datetime(2020, 9, 3, 22, tzinfo=timezone.utc)
+        committed_contacts = self.planner.tick(now)
+        self.assertTrue(committed_contacts)
+        for _ in range(2):
+            for contact in committed_contacts:
+                self.assertGreater(contact.retrieve_end_time(), now)
+                self.assertLess(contact.retrieve_start_time(), self.planner.get_frozen_end_time())
+            now += timedelta(hours=4)
+            committed_contacts = self.planner.tick(now)
+        self.assertEqual(self.planner.get_horizon_end_time(), now + timedelta(days=1))
+
+    def test_contacts_are_not_committed_twice(self):
+        now = datetime(2020, 9, 3, 22, tzinfo=timezone.utc)
+        committed_contacts = list(self.planner.tick(now))
+        committed_contacts += self.planner.tick(now + timedelta(hours=1))
+        start_times = [contact.retrieve_start_time() for contact in committed_contacts]
+        self.assertEqual(start_times, sorted(set(start_times)))
+        best_contacts = self.planner.retrieve_best_contact_sequence().get_contacts()
+        self.assertEqual(best_contacts[:len(committed_contacts)], committed_contacts)
+
+    def test_timescale_is_shared(self):
+        self.assertIs(retrieve_timescale(), retrieve_timescale())
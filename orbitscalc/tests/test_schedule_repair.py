@@ -0,0 +1,79 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+from django.test import SimpleTestCase
+from orbitscalc.analysis import SchedulingMethods
+from orbitscalc.contact_utility import best_contact_sequence_with_setup_times
+from orbitscalc.schedule_repair import ScheduleRepair
+from orbitscalc.tests.fakes import FakeAnalysis, FakeAntenna, FakeContact, FakeGroundStation, minutes
+
+
+class ScheduleRepairTests(SimpleTestCase):
+    def setUp(self):
+        ground_station = FakeGroundStation("Neustrelitz")
+        self.first_antenna = FakeAntenna(ground_station, "0", antenna_id=1)
+        self.second_antenna = FakeAntenna(ground_station, "1", antenna_id=2)
+        self.early = FakeContact(self.first_antenna, 0, 10, 5)
+        self.early_other = FakeContact(self.second_antenna, 0, 10, 4)
+        self.late = FakeContact(self.first_antenna, 100, 110, 3)
+
+    def retrieve_contacts(self, schedule_repair):
+        return schedule_repair.retrieve_best_contact_sequence().get_contacts()
+
+    def test_given_best_sequence_is_split_into_groups_without_recomputation(self):
+        best_contact_sequence = best_contact_sequence_with_setup_times([self.early, self.early_other, self.late], 0)
+        schedule_repair = ScheduleRepair([self.early, self.early_other, self.late], best_contact_sequence)
+        self.assertEqual(self.retrieve_contacts(schedule_repair), [self.early, self.late])
+        self.assertEqual(schedule_repair.get_number_of_recomputed_groups(), 0)
+
+    def test_removed_aperture_only_recomputes_its_groups(self):
+        schedule_repair = ScheduleRepair([self.early, self.early_other, self.late])
+        self.assertEqual(self.retrieve_contacts(schedule_repair), [self.early, self.late])
+        schedule_repair.remove_apertures([2])
+        self.assertEqual(self.retrieve_contacts(schedule_repair), [self.early, self.late])
+        self.assertEqual(schedule_repair.get_number_of_recomputed_groups(), 3)
+        schedule_repair.remove_apertures([1])
+        self.assertEqual(self.retrieve_contacts(schedule_repair), list())
+
+    def test_blocked_interval_cuts_contacts(self):
+        schedule_repair = ScheduleRepair([self.early, self.late])
+        schedule_repair.block_time_interval(minutes(4), minutes(6), [1])
+        contacts = self.retrieve_contacts(schedule_repair)
+        self.assertEqual([(contact.retrieve_start_time(), contact.retrieve_end_time()) for contact in contacts],
+                         [(minutes(0), minutes(4)), (minutes(6), minutes(10)), (minutes(100), minutes(110))])
+        self.assertAlmostEqual(contacts[0].get_data() + contacts[1].get_data(), 4)
+
+    def test_blocked_interval_of_other_aperture_keeps_contacts(self):
+        schedule_repair = ScheduleRepair([self.early, self.late])
+        schedule_repair.block_time_interval(minutes(4), minutes(6), [2])
+        self.assertEqual(self.retrieve_contacts(schedule_repair), [self.early, self.late])
+
+    def test_added_contacts_join_overlapping_groups(self):
+        schedule_repair = ScheduleRepair([self.early, self.late])
+        better = FakeContact(self.second_antenna, 2, 12, 8)
+        schedule_repair.add_contacts([better])
+        self.assertEqual(self.retrieve_contacts(schedule_repair), [better, self.late])
+
+    def test_setup_times_are_optimised_over_all_groups(self):
+        ground_station = FakeGroundStation("Neustrelitz", FakeAnalysis(scheduling_method=SchedulingMethods.SetupTimes))
+        antenna = FakeAntenna(ground_station, "0", 60, 60, antenna_id=1)
+        first, second = FakeContact(antenna, 0, 10, 5), FakeContact(antenna, 11, 20, 4)
+        schedule_repair = ScheduleRepair([first, second])
+        self.assertEqual(self.retrieve_contacts(schedule_repair), [first])
+        schedule_repair.remove_apertures([2])
+        self.assertEqual(self.retrieve_contacts(schedule_repair), [first])
+
+    def test_removed_contacts_are_replaced_in_their_group(self):
+        schedule_repair = ScheduleRepair([self.early, self.early_other, self.late])
+        schedule_repair.remove_contacts([self.early])
+        self.assertEqual(self.retrieve_contacts(schedule_repair), [self.early_other, self.late])
+
+    def test_committed_groups_are_no_longer_planned(self):
+        schedule_repair = ScheduleRepair([self.early, self.early_other, self.late])
+        self.assertEqual(schedule_repair.commit_groups_before(minutes(0)), list())
+        self.assertEqual(schedule_repair.commit_groups_before(minutes(50)), [self.early])
+        self.assertEqual(self.retrieve_contacts(schedule_repair), [self.late])
+
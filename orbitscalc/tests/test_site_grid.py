@@ -0,0 +1,75 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import numpy
+import struct
+import zlib
+from datetime import timedelta
+from django.test import SimpleTestCase, TestCase
+from orbitscalc.analysis import Satellite
+from orbitscalc.site_grid import SiteGridAnalysis, determine_geodetic_positions, encode_png
+from orbitscalc.tests.fakes import ISS_TLE, TLE_EPOCH, create_aperture
+
+
+class GeodeticPositionTests(SimpleTestCase):
+    def test_equator_and_pole(self):
+        positions, up_vectors = determine_geodetic_positions(numpy.array([0.0, 90.0]), numpy.array([0.0, 0.0]),
+                                                             numpy.array([1000.0, 0.0]))
+        numpy.testing.assert_allclose(positions[0], [6379.137, 0, 0], atol=1e-6)
+        numpy.testing.assert_allclose(positions[1], [0, 0, 6356.752], atol=1e-3)
+        numpy.testing.assert_allclose(up_vectors[1], [0, 0, 1], atol=1e-12)
+
+
+class HeatMapTests(SimpleTestCase):
+    def test_png_has_one_pixel_per_cell(self):
+        png = encode_png(numpy.array([[0.0, 1.0, numpy.nan], [0.5, 0.25, 0.0]]))
+        self.assertEqual(png[:8], b"\x89PNG\r\n\x1a\n")
+        width, height = struct.unpack(">II", png[16:24])
+        self.assertEqual((width, height), (3, 2))
+        data_length = struct.unpack(">I", png[33:37])[0]
+        raw = zlib.decompress(png[41:41 + data_length])
+        # je Zeile ein Byte Filtertyp und drei Byte je Pixel; nan schwarz, Maximum in der hellsten Farbe
+        self.assertEqual(len(raw), 2 * (1 + 3 * 3))
+        self.assertEqual(tuple(raw[4:7]), (250, 230, 50))
+        self.assertEqual(tuple(raw[7:10]), (0, 0, 0))
+
+
+class SiteGridAnalysisTests(TestCase):
+    def create_site_grid(self, antennas_data_base):
+        site_grid = SiteGridAnalysis(TLE_EPOCH, TLE_EPOCH + timedelta(hours=12), [Satellite(ISS_TLE, 10, 2e9, 9e9)],
+                                     antennas_data_base, 20, 8e9, 8.4e9, grid_step=10.0)
+        site_grid.analyse()
+        return site_grid
+
+    def test_cells_beyond_reachable_latitude_have_no_contacts(self):
+        site_grid = self.create_site_grid(list())
+        contact_seconds = site_grid.get_values("contact_seconds")
+        self.assertEqual(contact_seconds[numpy.abs(site_grid.get_latitudes()) >= 80].sum(), 0)
+        self.assertGreater(contact_seconds[site_grid.get_latitudes() == 50].sum(), 0)
+        number_of_contacts = site_grid.get_values("number_of_contacts")
+        self.assertTrue(numpy.all(number_of_contacts * 30 <= contact_seconds))
+        # ohne bestehendes Netz ist der Zuwachs die ganze Datenmenge
+        numpy.testing.assert_array_equal(site_grid.get_values("marginal_data"), site_grid.get_values("data"))
+        self.assertEqual(site_grid.get_network_data(), 0)
+
+    def test_existing_network_reduces_gain(self):
+        site_grid = self.create_site_grid([create_aperture(latitude=50, longitude=10)])
+        self.assertGreater(site_grid.get_network_data(), 0)
+        self.assertTrue(numpy.all(site_grid.get_values("marginal_data") <= site_grid.get_values("data")))
+        latitude_index = list(site_grid.get_latitudes()).index(50)
+        longitude_index = list(site_grid.get_longitudes()).index(10)
+        # am Standort der bestehenden Antenne mit gleichem G/T und Link fast kein Zuwachs (nur durch die Höhe)
+        self.assertLess(site_grid.get_values("marginal_data")[latitude_index, longitude_index],
+                        0.05 * site_grid.get_values("data")[latitude_index, longitude_index])
+        best_cell = site_grid.retrieve_best_cells(1)[0]
+        self.assertGreater(best_cell["marginal_data"], 0)
+
+    def test_geo_json_contains_every_cell(self):
+        site_grid = self.create_site_grid(list())
+        features = site_grid.generate_geo_json()["features"]
+        self.assertEqual(len(features), len(site_grid.get_latitudes()) * len(site_grid.get_longitudes()))
+        self.assertEqual(set(features[0]["properties"]),
+                         {"data", "marginal_data", "contact_seconds", "number_of_contacts"})
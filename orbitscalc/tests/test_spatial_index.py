@@ -0,0 +1,79 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import math
+from datetime import timedelta
+from django.test import SimpleTestCase
+from orbitscalc.general_utility import AnalysisInstrumentation, retrieve_timescale
+from orbitscalc.spatial_index import ApertureSpatialIndex, footprint_central_angle, determine_search_spans, \
+    EARTH_POLAR_RADIUS_KM
+from orbitscalc.tests.fakes import TLE_EPOCH, FakeSatellite, FakeSite
+
+
+class FootprintTests(SimpleTestCase):
+    def test_footprint_of_low_orbit(self):
+        angle = math.degrees(footprint_central_angle(EARTH_POLAR_RADIUS_KM + 420, minimum_elevation_degrees=0))
+        self.assertAlmostEqual(angle, 20.3, delta=0.1)
+
+    def test_footprint_shrinks_with_minimum_elevation(self):
+        radius = EARTH_POLAR_RADIUS_KM + 420
+        self.assertLess(footprint_central_angle(radius, 10), footprint_central_angle(radius, 0))
+
+    def test_footprint_is_empty_below_the_surface(self):
+        self.assertEqual(footprint_central_angle(EARTH_POLAR_RADIUS_KM / 2), 0.0)
+
+
+class ApertureSpatialIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = ApertureSpatialIndex([FakeSite(1, 53.33, 13.07), FakeSite(2, 53.0, 179.5),
+                                           FakeSite(3, -33.9, 18.4), FakeSite(4, 89.0, 0.0)])
+
+    def test_query_returns_apertures_in_cells_of_the_circle(self):
+        direction = self.index.get_directions()[0]
+        self.assertEqual(sorted(self.index.query(direction, math.radians(5)).tolist()), [0])
+
+    def test_query_wraps_around_the_date_line(self):
+        latitude = math.radians(53.0)
+        longitude = math.radians(-179.5)
+        direction = [math.cos(latitude) * math.cos(longitude), math.cos(latitude) * math.sin(longitude),
+                     math.sin(latitude)]
+        self.assertIn(1, self.index.query(direction, math.radians(3)).tolist())
+
+    def test_query_around_pole_covers_all_longitudes(self):
+        self.assertIn(3, self.index.query([0.0, 0.0, 1.0], math.radians(5)).tolist())
+
+
+class SearchSpanTests(SimpleTestCase):
+    def setUp(self):
+        self.satellite = FakeSatellite()
+        self.start_time = TLE_EPOCH
+        self.end_time = TLE_EPOCH + timedelta(days=1)
+
+    def test_spans_contain_all_contacts(self):
+        site = FakeSite(1, 53.33, 13.07)
+        search_spans = determine_search_spans(self.satellite, ApertureSpatialIndex([site]), self.start_time,
+                                              self.end_time, AnalysisInstrumentation())
+        timescale = retrieve_timescale()
+        times, events = self.satellite.get_skyfield().find_events(
+            site.get_skyfield(), timescale.from_datetime(self.start_time), timescale.from_datetime(self.end_time),
+            altitude_degrees=5)
+        self.assertTrue(len(times))
+        for time in times.utc_datetime():
+            self.assertTrue(any(start <= time <= end for start, end in search_spans[1]), time)
+
+    def test_unreachable_aperture_has_no_spans(self):
+        search_spans = determine_search_spans(self.satellite, ApertureSpatialIndex([FakeSite(1, -89.0, 0.0)]),
+                                              self.start_time, self.end_time, AnalysisInstrumentation())
+        self.assertEqual(search_spans, {1: []})
+
+    def test_chunks_outside_the_latitude_band_are_skipped(self):
+        instrumentation = AnalysisInstrumentation()
+        determine_search_spans(self.satellite, ApertureSpatialIndex([FakeSite(1, 50.0, 0.0)]), self.start_time,
+                               self.end_time, instrumentation)
+        counters = instrumentation.get_counters()
+        self.assertGreater(counters["Abschnitte ohne Kontaktmöglichkeit (Breitenband)"], 0)
+        self.assertLess(counters["Abschnitte ohne Kontaktmöglichkeit (Breitenband)"],
+                        counters["Abschnitte der groben Suche"])
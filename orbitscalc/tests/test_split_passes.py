@@ -0,0 +1,104 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+from django.test import SimpleTestCase, TestCase
+from orbitscalc.contact_utility import Contact, ContactGroup
+from orbitscalc.general_utility import retrieve_timescale
+from orbitscalc.split_passes import best_contact_sequence_with_split_passes
+from orbitscalc.tests.fakes import FakeAntenna, FakeContact, FakeGroundStation, minutes
+
+
+class SplitPassTests(SimpleTestCase):
+    def setUp(self):
+        self.neustrelitz = FakeAntenna(FakeGroundStation("Neustrelitz"), "0")
+        self.weilheim = FakeAntenna(FakeGroundStation("Weilheim"), "0")
+
+    def test_switch_to_better_antenna_during_pass(self):
+        # 1 bit/s bis 10 Minuten, ab 5 Minuten 10 bit/s an der zweiten Antenne
+        first, second = FakeContact(self.neustrelitz, 0, 10, 600), FakeContact(self.weilheim, 5, 15, 6000)
+        contacts = best_contact_sequence_with_split_passes([first, second], 0).get_contacts()
+        self.assertEqual([contact.get_antenna() for contact in contacts], [self.neustrelitz, self.weilheim])
+        self.assertEqual(contacts[0].retrieve_start_time(), first.retrieve_start_time())
+        self.assertEqual(contacts[1].retrieve_end_time(), second.retrieve_end_time())
+        self.assertGreater(contacts[1].retrieve_start_time(), contacts[0].retrieve_end_time())
+        self.assertGreater(sum(contact.get_data() for contact in contacts), second.get_data())
+
+    def test_segment_does_not_start_before_rise_within_slice(self):
+        # Aufgang 3 s nach Beginn einer Zeitscheibe, vor deren Mitte: der Wechsel darf nicht vor dem Aufgang beginnen
+        first, second = FakeContact(self.neustrelitz, 0, 10, 600), FakeContact(self.weilheim, 5.05, 15, 5970)
+        for contact in best_contact_sequence_with_split_passes([first, second], 0).get_contacts():
+            source = first if contact.get_antenna() is self.neustrelitz else second
+            self.assertGreaterEqual(contact.retrieve_start_time(), source.retrieve_start_time())
+            self.assertLessEqual(contact.retrieve_end_time(), source.retrieve_end_time())
+
+    def test_whole_contacts_when_switching_does_not_pay(self):
+        first, second = FakeContact(self.neustrelitz, 0, 10, 600), FakeContact(self.weilheim, 2, 8, 10)
+        self.assertEqual(best_contact_sequence_with_split_passes([first, second], 0).get_contacts(), [first])
+
+
+class OptimalIntervalTests(TestCase):
+    """
+    Teilkontakte und begrenzte Kontakte werden optimal, die Darstellung (ContactGroup) nutzt die ursprünglichen Kontakte
+    """
+    def setUp(self):
+        self.contact = Contact(FakeAntenna(FakeGroundStation("Neustrelitz"), "0"))
+        timescale = retrieve_timescale()
+        for minute in (0, 5, 10):
+            self.contact.add_relative_position_by_skyfield_time(timescale.from_datetime(minutes(minute)))
+        self.contact.determine_max_data()
+
+    def determine_intervals_of_original(self):
+        group = ContactGroup()
+        group.add_contact_and_adjust_times(self.contact)
+        return [(interval.get_start_time(), interval.get_end_time(), interval.get_optimal())
+                for interval in group.determine_intervals()]
+
+    def assertTimesAlmostEqual(self, first, second):
+        self.assertLess(abs((first - second).total_seconds()), 0.001)
+
+    def test_partial_contact_marks_its_time_span_on_original(self):
+        self.contact.create_partial_contact(minutes(2), minutes(6)).set_optimal()
+        intervals = self.determine_intervals_of_original()
+        self.assertEqual([is_optimal for _, _, is_optimal in intervals], [False, True, False])
+        self.assertTimesAlmostEqual(intervals[1][0], minutes(2))
+        self.assertTimesAlmostEqual(intervals[1][1], minutes(6))
+
+    def test_limited_contact_marks_original_without_sharing_intervals(self):
+        limited = self.contact.create_limited_contact(0)
+        other_limited = self.contact.create_limited_contact(0)
+        limited.set_optimal()
+        self.assertTrue(self.contact.get_optimal())
+        self.assertFalse(other_limited.get_optimal())
+        self.assertEqual([is_optimal for _, _, is_optimal in self.determine_intervals_of_original()], [True])
+
+
+class ContactGroupIntervalTests(SimpleTestCase):
+    def setUp(self):
+        self.antenna = FakeAntenna(FakeGroundStation("Neustrelitz"), "0")
+
+    def determine_intervals(self, *contacts):
+        group = ContactGroup()
+        for start, end, is_optimal in contacts:
+            contact = FakeContact(self.antenna, start, end, 1)
+            if is_optimal:
+                contact.set_optimal()
+            group.add_contact_and_adjust_times(contact)
+        return [(interval.get_start_time(), interval.get_end_time(), interval.get_optimal())
+                for interval in group.determine_intervals()]
+
+    def test_contact_bridging_two_intervals_merges_them(self):
+        intervals = self.determine_intervals((0, 10, True), (20, 30, True), (5, 25, False), (40, 50, True),
+                                             (9, 21, True))
+        self.assertEqual(intervals, [(minutes(0), minutes(30), True), (minutes(30), minutes(40), False),
+                                     (minutes(40), minutes(50), True)])
+
+    def test_touching_and_contained_contacts_form_one_interval(self):
+        intervals = self.determine_intervals((10, 20, True), (0, 10, True), (2, 5, True), (0, 25, False))
+        self.assertEqual(intervals, [(minutes(0), minutes(20), True), (minutes(20), minutes(25), False)])
+
+    def test_group_without_optimal_contact_is_one_interval(self):
+        self.assertEqual(self.determine_intervals((0, 10, False), (5, 15, False)),
+                         [(minutes(0), minutes(15), False)])
@@ -0,0 +1,86 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+from datetime import timedelta
+from django.test import SimpleTestCase
+from orbitscalc.analysis import AnalysisPrecisions, Satellite
+from orbitscalc.antenna import MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES
+from orbitscalc.general_utility import retrieve_timescale
+from orbitscalc.station_geometry import determine_station_contact_times, determine_station_pass_windows
+from orbitscalc.tests.fakes import ISS_TLE, TLE_EPOCH, create_antenna, FakeAnalysis
+
+
+# Abweichung der Höhe über Horizont von der Mindesthöhe zu Beginn und Ende eines Kontakts
+ALTITUDE_TOLERANCE_DEGREES = 0.02
+CENTER = {'lat': 53.33, 'lon': 13.07, 'alt': 600}
+
+
+class StationContactTimeTests(SimpleTestCase):
+    def setUp(self):
+        satellite = Satellite(ISS_TLE, 10, 2e9, 9e9)
+        self.analysis = FakeAnalysis(satellite, TLE_EPOCH, TLE_EPOCH + timedelta(days=1))
+
+    def test_shared_search_matches_search_per_antenna(self):
+        antennas = [create_antenna(self.analysis, 53.33, 13.07, 1), create_antenna(self.analysis, 53.36, 13.12, 2)]
+        contact_times = determine_station_contact_times(
+            self.analysis, CENTER, antennas, self.analysis.get_start_time(), self.analysis.get_end_time())
+        self.assertEqual(self.analysis.get_instrumentation().get_counters()[
+            "Bodenstationen mit gemeinsamer Kontaktsuche"], 1)
+        timescale = retrieve_timescale()
+        for antenna, antenna_contact_times in zip(antennas, contact_times):
+            antenna.determine_contacts()
+            self.assertTrue(antenna_contact_times)
+            self.assertEqual(len(antenna_contact_times), len(antenna.get_contact_sequence().get_contacts()))
+            topocentric = self.analysis.get_satellite().get_skyfield() - antenna.get_skyfield()
+            for start_time, culmination_time, end_time in antenna_contact_times:
+                self.assertTrue(start_time < culmination_time < end_time)
+                for time in (start_time, end_time):
+                    altitude, azimuth, distance = topocentric.at(timescale.from_datetime(time)).altaz()
+                    self.assertAlmostEqual(altitude.degrees, MINIMUM_ALTITUDE_OVER_HORIZON_FOR_CONTACT_DEGREES,
+                                           delta=ALTITUDE_TOLERANCE_DEGREES)
+
+    def test_scattered_antennas_are_searched_individually(self):
+        antennas = [create_antenna(self.analysis, 53.33, 13.07, 1), create_antenna(self.analysis, 53.8, 13.07, 2)]
+        self.assertIsNone(determine_station_contact_times(
+            self.analysis, CENTER, antennas, self.analysis.get_start_time(), self.analysis.get_end_time()))
+
+    def test_window_open_at_search_start_begins_there(self):
+        antenna = create_antenna(self.analysis)
+        antenna.determine_contacts()
+        contact = antenna.get_contact_sequence().get_contacts()[0]
+        # find_events findet Auf- und Untergang nur um einen Höchststand im Suchzeitraum
+        before_culmination = \
+            contact.retrieve_start_time() + (contact.retrieve_end_time() - contact.retrieve_start_time()) / 4
+        windows = determine_station_pass_windows(self.analysis.get_satellite(), antenna.get_skyfield(), 1.0,
+                                                 before_culmination, before_culmination + timedelta(hours=1))
+        self.assertEqual(windows[0][0], before_culmination)
+        self.assertGreater(windows[0][1], contact.retrieve_end_time())
+
+
+class SampledContactTimeTests(SimpleTestCase):
+    def setUp(self):
+        self.satellite = Satellite(ISS_TLE, 10, 2e9, 9e9)
+        self.start_time = TLE_EPOCH
+        self.end_time = TLE_EPOCH + timedelta(days=1)
+
+    def determine_contact_times(self, precision):
+        analysis = FakeAnalysis(self.satellite, self.start_time, self.end_time, precision=precision)
+        return determine_station_contact_times(analysis, CENTER, [create_antenna(analysis)], self.start_time,
+                                               self.end_time)[0]
+
+    def test_coarse_grid_finds_every_contact_within_tolerance(self):
+        exact_contact_times = self.determine_contact_times(AnalysisPrecisions.Exact)
+        self.assertTrue(exact_contact_times)
+        for precision in (AnalysisPrecisions.Second, AnalysisPrecisions.TenSeconds, AnalysisPrecisions.Minute):
+            contact_times = self.determine_contact_times(precision)
+            self.assertEqual(len(contact_times), len(exact_contact_times), precision)
+            for (start_time, culmination_time, end_time), (exact_start_time, exact_culmination_time,
+                                                            exact_end_time) in zip(contact_times, exact_contact_times):
+                tolerance = precision.get_tolerance_seconds()
+                self.assertLessEqual(abs((start_time - exact_start_time).total_seconds()), tolerance)
+                self.assertLessEqual(abs((end_time - exact_end_time).total_seconds()), tolerance)
+                # Höchststände werden unabhängig von der Genauigkeit genau bestimmt
+                self.assertLess(abs((culmination_time - exact_culmination_time).total_seconds()), 1)
@@ -0,0 +1,61 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import json
+from unittest import mock
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from orbitscalc.tests.fakes import create_aperture, create_form_data
+from orbitscalc.views import format_server_sent_event, parse_selection
+
+
+def read_events(response):
+    """
+    gibt die übertragenen Server-Sent Events als list of (Ereignis, Daten) zurück
+    """
+    events = list()
+    for message in b"".join(response.streaming_content).decode().split("\n\n"):
+        if message:
+            event, data = message.split("\n")
+            events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+class ServerSentEventTests(SimpleTestCase):
+    def test_event_format(self):
+        self.assertEqual(format_server_sent_event("done", {"partial": False}),
+                         'event: done\ndata: {"partial": false}\n\n')
+
+    def test_parse_selection(self):
+        data = QueryDict("_ground_station_1=on&_antenna_4=on&_antenna_5=on&_operator_2=on&mode=All")
+        self.assertEqual(parse_selection(data), ([1], [4, 5], [2]))
+
+
+class AnalysisStreamViewTests(TestCase):
+    def setUp(self):
+        aperture = create_aperture()
+        self.form_data = create_form_data(**{"_ground_station_%i" % aperture.groundstation_id: "on",
+                                             "_antenna_%i" % aperture.id: "on"})
+
+    def test_results_are_streamed_per_ground_station(self):
+        events = read_events(self.client.get(reverse("analyse_stream"), self.form_data))
+        self.assertEqual([event for event, data in events], ["ground_station", "done"])
+        self.assertEqual(events[0][1]["name"], "Neustrelitz")
+        self.assertTrue(events[0][1]["contacts"])
+        self.assertFalse(events[1][1]["partial"])
+
+    def test_only_independent_modes_are_streamed(self):
+        events = read_events(self.client.get(reverse("analyse_stream"), dict(self.form_data, mode="All")))
+        self.assertEqual([event for event, data in events], ["analysis_error"])
+
+    @override_settings(ORBITSCALC_BACKGROUND_ANALYSIS_SECONDS=-1)
+    def test_expensive_analysis_is_queued_like_the_form(self):
+        with mock.patch("orbitscalc.views.submit_background_analysis") as submit_background_analysis:
+            events = read_events(self.client.get(reverse("analyse_stream"), self.form_data))
+        self.assertEqual(submit_background_analysis.call_count, 1)
+        self.assertEqual([event for event, data in events], ["queued"])
+        self.assertTrue(events[0][1]["url"].startswith("/analyse/job/"))
@@ -0,0 +1,72 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import numpy
+from datetime import timedelta
+from django.test import SimpleTestCase, TestCase
+from orbitscalc.models import ApertureUnavailability
+from orbitscalc.unavailability import UnavailabilityIndex, expand_recurrences, merge_intervals
+from orbitscalc.tests.fakes import FakeAnalysis, REFERENCE_TIME, create_antenna, create_aperture, minutes
+
+
+class IntervalMergeTests(SimpleTestCase):
+    def test_overlapping_and_contained_intervals_are_merged(self):
+        starts, ends = merge_intervals(numpy.array([10.0, 0.0, 2.0, 30.0]), numpy.array([20.0, 5.0, 3.0, 40.0]))
+        self.assertEqual(starts.tolist(), [0.0, 10.0, 30.0])
+        self.assertEqual(ends.tolist(), [5.0, 20.0, 40.0])
+
+    def test_recurrences_inside_window(self):
+        # stündliche Sperrung von 10 Minuten bis zur Wiederholung, die um 3 Uhr beginnt
+        starts, ends, blocks = expand_recurrences(
+            numpy.array([0.0, 500.0]), numpy.array([600.0, 700.0]), numpy.array([3600.0, 0.0]),
+            numpy.array([10800.0, numpy.inf]), 3000.0, 20000.0)
+        self.assertEqual(starts.tolist(), [3600.0, 7200.0, 10800.0])
+        self.assertEqual(ends.tolist(), [4200.0, 7800.0, 11400.0])
+        self.assertEqual(blocks.tolist(), [0, 0, 0])
+
+
+class UnavailabilityIndexTests(SimpleTestCase):
+    def setUp(self):
+        start, end = minutes(5).timestamp(), minutes(10).timestamp()
+        self.unavailability_index = UnavailabilityIndex({1: (numpy.array([start]), numpy.array([end]))})
+
+    def test_blocked_part_is_cut_out(self):
+        self.assertEqual(self.unavailability_index.retrieve_available_parts(1, minutes(0), minutes(20)),
+                         [(minutes(0), minutes(5)), (minutes(10), minutes(20))])
+        self.assertEqual(self.unavailability_index.retrieve_available_parts(1, minutes(6), minutes(9)), list())
+
+    def test_other_apertures_are_available(self):
+        self.assertFalse(self.unavailability_index.has_blocks(2))
+        self.assertEqual(self.unavailability_index.retrieve_available_parts(2, minutes(0), minutes(20)),
+                         [(minutes(0), minutes(20))])
+
+
+class UnavailabilityDatabaseTests(TestCase):
+    def test_recurring_blocks_are_loaded(self):
+        aperture = create_aperture()
+        ApertureUnavailability.objects.create(aperture=aperture, start_time=REFERENCE_TIME - timedelta(days=7),
+                                              end_time=REFERENCE_TIME - timedelta(days=7) + timedelta(hours=1),
+                                              recurrence_interval_hours=24)
+        unavailability_index = UnavailabilityIndex.from_database([aperture.id], REFERENCE_TIME, minutes(2880))
+        # Wiederholungen um 0 Uhr jeden Tages, die erste Sperrung liegt vor dem Analysezeitraum
+        self.assertEqual(unavailability_index.retrieve_available_parts(aperture.id, minutes(1410), minutes(1530)),
+                         [(minutes(1410), minutes(1440)), (minutes(1500), minutes(1530))])
+
+    def test_contacts_are_clipped_but_recorded_unclipped(self):
+        antenna = create_antenna(FakeAnalysis())
+        antenna.determine_contacts()
+        contacts = antenna.get_contact_sequence().get_contacts()
+        contact = contacts[0]
+        culmination_time = contact.retrieve_culmination_time()
+        unavailability_index = UnavailabilityIndex({antenna.retrieve_id(): (
+            numpy.array([culmination_time.timestamp()]), numpy.array([contact.retrieve_end_time().timestamp()]))})
+        antenna.clip_contacts_to_availability(unavailability_index)
+        clipped_contacts = antenna.get_contact_sequence().get_contacts()
+        self.assertEqual(len(clipped_contacts), len(contacts))
+        self.assertEqual(clipped_contacts[0].retrieve_start_time(), contact.retrieve_start_time())
+        self.assertLess(abs((clipped_contacts[0].retrieve_end_time() - culmination_time).total_seconds()), 0.001)
+        self.assertEqual(clipped_contacts[1:], contacts[1:])
+        self.assertEqual(antenna.retrieve_recordable_contact_sequence().get_contacts(), contacts)
@@ -0,0 +1,132 @@
+"""
+Orbitscalc
+Copyright 2021 Hannes Diener
+Licensed under the Apache License, Version 2.0
+"""
+
+import numpy
+from datetime import datetime, timezone
+from django.db.models import Q
+from orbitscalc.models import ApertureUnavailability
+
+
+SECONDS_PER_HOUR = 3600
+
+
+def expand_recurrences(start_times, end_times, intervals, recurrence_ends, window_start, window_end):
+    """
+    gibt alle Wiederholungen der Sperrungen zurück, die sich mit dem Zeitfenster überschneiden
+    :param start_times: numpy.ndarray; Beginn der ersten Sperrung in Sekunden
+    :param end_times: numpy.ndarray; Ende der ersten Sperrung in Sekunden
+    :param intervals: numpy.ndarray; Abstand der Wiederholungen in Sekunden, 0 für einmalige Sperrung
+    :param recurrence_ends: numpy.ndarray; Beginn der letzten Wiederholung in Sekunden, inf für unbegrenzt
+    :param window_start: float
+    :param window_end: float
+    :return: numpy.ndarray Beginne, numpy.ndarray Enden, numpy.ndarray Index der Sperrung je Wiederholung
+    """
+    durations = end_times - start_times
+    recurring = intervals > 0
+    safe_intervals = numpy.where(recurring, intervals, 1.0)
+    # erste Wiederholung, die nach Beginn des Fensters endet, und letzte, die vor dessen Ende beginnt
+    first = numpy.where(recurring, numpy.maximum(numpy.ceil((window_start - end_times) / safe_intervals), 0), 0)
+    last_start = numpy.minimum(window_end, recurrence_ends)
+    last = numpy.where(recurring, numpy.floor((last_start - start_times) / safe_intervals), 0)
+    counts = numpy.maximum(last - first + 1, 0).astype(int)
+    blocks = numpy.repeat(numpy.arange(len(start_times)), counts)
+    # laufende Nummer der Wiederholung innerhalb jeder Sperrung
+    offsets = numpy.arange(len(blocks)) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+    starts = start_times[blocks] + (first[blocks] + offsets) * intervals[blocks]
+    ends = starts + durations[blocks]
+    inside = (ends > window_start) & (starts < window_end)
+    return starts[inside], ends[inside], blocks[inside]
+
+
+def merge_intervals(starts, ends):
+    """
+    vereinigt sich überschneidende Intervalle zu disjunkten, nach Beginn sortierten Intervallen
+    :param starts: numpy.ndarray
+    :param ends: numpy.ndarray
+    :return: numpy.ndarray, numpy.ndarray
+    """
+    if not len(starts):
+        return starts, ends
+    order = numpy.argsort(starts, kind="stable")
+    starts = starts[order]
+    ends = numpy.maximum.accumulate(ends[order])
+    # neues Intervall, wo der Beginn hinter allen bisherigen Enden liegt
+    is_new = numpy.concatenate(([True], starts[1:] > ends[:-1]))
+    group_ends = numpy.concatenate((numpy.flatnonzero(is_new)[1:] - 1, [len(starts) - 1]))
+    return starts[is_new], ends[group_ends]
+
+
+def to_datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+class UnavailabilityIndex:
+    """
+    disjunkte, sortierte Sperrzeiträume je Antenne; verfügbare Teile eines Kontakts werden per Binärsuche ermittelt
+    """
+    def __init__(self, blocks_by_aperture):
+        """
+        :param blocks_by_aperture: dict Antennen-id: (numpy.ndarray Beginne, numpy.ndarray Enden) in Sekunden
+        """
+        self.__blocks = {aperture_id: merge_intervals(starts, ends)
+                         for aperture_id, (starts, ends) in blocks_by_aperture.items() if len(starts)}
+
+    @classmethod
+    def from_database(cls, aperture_ids, start_time, end_time):
+        """
+        lädt mit einer Abfrage die Sperrungen der Antennen, die den Zeitraum betreffen können
+        :param aperture_ids: list of int
+        :param start_time: datetime.datetime
+        :param end_time: datetime.datetime
+        :return: UnavailabilityIndex
+        """
+        records = list(ApertureUnavailability.objects.filter(
+            Q(end_time__gte=start_time) | Q(recurrence_interval_hours__isnull=False),
+            aperture_id__in=aperture_ids, start_time__lte=end_time,
+        ).values_list("aperture_id", "start_time", "end_time", "recurrence_interval_hours", "recurrence_end"))
+        if not records:
+            return cls(dict())
+        aperture_of_records = numpy.array([record[0] for record in records])
+        starts, ends, blocks = expand_recurrences(
+            numpy.array([record[1].timestamp() for record in records]),
+            numpy.array([record[2].timestamp() for record in records]),
+            numpy.array([float(record[3]) * SECONDS_PER_HOUR if record[3] else 0.0 for record in records]),
+            numpy.array([record[4].timestamp() if record[4] else numpy.inf for record in records]),
+            start_time.timestamp(), end_time.timestamp())
+        apertures = aperture_of_records[blocks]
+        order = numpy.argsort(apertures, kind="stable")
+        aperture_ids, firsts = numpy.unique(apertures[order], return_index=True)
+        return cls({aperture_id: (starts[indices], ends[indices]) for aperture_id, indices in zip(
+            aperture_ids.tolist(), numpy.split(order, firsts[1:]))})
+
+    def has_blocks(self, aperture_id):
+        return aperture_id in self.__blocks
+
+    def retrieve_available_parts(self, aperture_id, start_time, end_time):
+        """
+        gibt die nicht gesperrten Teile des Zeitraums an der Antenne zurück
+        :param aperture_id: int
+        :param start_time: datetime.datetime
+        :param end_time: datetime.datetime
+        :return: list of (datetime.datetime, datetime.datetime)
+        """
+        if aperture_id not in self.__blocks:
+            return [(start_time, end_time)]
+        block_starts, block_ends = self.__blocks[aperture_id]
+        start = start_time.timestamp()
+        end = end_time.timestamp()
+        first = numpy.searchsorted(block_ends, start, side="right")
+        last = numpy.searchsorted(block_starts, end, side="left")
+        parts = list()
+        cursor = start
+        for block_start, block_end in zip(block_starts[first:last].tolist(), block_ends[first:last].tolist()):
+            if block_start > cursor:
+                parts.append((cursor, block_start))
+            cursor = max(cursor, block_end)
+        if cursor < end:
+            parts.append((cursor, end))
+        return [(start_time if part_start == start else to_datetime(part_start),
+                 end_time if part_end == end else to_datetime(part_end)) for part_start, part_end in parts]
@@ -15,6 +15,9 @@ faviconView = RedirectView.as_view(url='/static/favicon.ico', permanent=True)
 
 urlpatterns = [
     path('analyse', views.AnalysisView.as_view(), name="analyse"),
+    path('analyse/stream', views.AnalysisStreamView.as_view(), name="analyse_stream"),
+    path('analyse/job/<str:job_id>', views.AnalysisJobView.as_view(), name="analyse_job"),
+    path('analyse/statistics', views.AnalysisStatisticsView.as_view(), name="analyse_statistics"),
     path('', views.AnalysisView.as_view()),
     re_path(r'^favicon\.ico$', faviconView),
 ]
\ No newline at end of file
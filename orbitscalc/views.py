@@ -4,20 +4,39 @@ Copyright 2021 Hannes Diener
 Licensed under the Apache License, Version 2.0
 """
 
-from django.shortcuts import render
+from django.shortcuts import render, redirect
+from django.urls import reverse
+from django.http import StreamingHttpResponse, HttpResponse, JsonResponse
+from django.conf import settings
 from .models import GroundStation, Operator, Aperture
 from datetime import timezone
 from .analysis import Analysis, Satellite
 from .forms import InputForm, TimeInputStyles
 from django.views import View
+import csv
 import math
-from orbitscalc.analysis import AnalysisModes
+import json
+import logging
+from orbitscalc.analysis import AnalysisModes, AnalysisPrecisions, SchedulingMethods
+from orbitscalc.request_coalescing import SingleFlight, determine_request_key
+from orbitscalc.cost_estimation import estimate_analysis_cost
+from orbitscalc.background_queue import BackgroundAnalysisQueue
 
 
+logger = logging.getLogger(__name__)
+
 ANALYSIS_TEMPLATE = 'orbitscalc/analysis.html'
 ANTENNA_PREFIX = "_antenna_"
 OPERATOR_PREFIX = "_operator_"
 GROUND_STATION_PREFIX = "_ground_station_"
+# maximale Laufzeit einer Analyse in Sekunden, danach wird ein Teilergebnis ausgegeben
+ANALYSIS_TIME_BUDGET_SECONDS = 120
+BACKGROUND_ANALYSIS_TIME_BUDGET_SECONDS = 1800
+# geteilt von allen Anfragen dieses Prozesses
+ANALYSIS_SINGLE_FLIGHT = SingleFlight()
+BACKGROUND_ANALYSIS_QUEUE = BackgroundAnalysisQueue(settings.ORBITSCALC_HEAVY_ANALYSIS_CONCURRENCY)
+# Modi, deren Ergebnisse je Bodenstation unabhängig sind und daher schrittweise übertragen werden können
+STREAMABLE_ANALYSIS_MODES = (AnalysisModes.GroundStations, AnalysisModes.Antennas)
 
 
 def create_display_information():
@@ -85,6 +104,262 @@ def create_display_information():
     }
 
 
+def determine_analysis_times(cleaned_data):
+    """
+    gibt Start- und Endzeit der Analyse in UTC zurück
+    :param cleaned_data: dict
+    :return: datetime.datetime, datetime.datetime
+    """
+    start_time = cleaned_data['start_time'].replace(tzinfo=timezone.utc)
+    end_time = cleaned_data['end_time'].replace(tzinfo=timezone.utc)
+    return start_time, end_time
+
+
+def create_satellite(cleaned_data):
+    """
+    erstellt Satellit aus gültigen Formulareingaben
+    :param cleaned_data: dict
+    :return: analysis.Satellite
+    """
+    # TLE
+    tle = cleaned_data['tle'].splitlines()
+    name = tle[0]
+    tle1 = tle[1]
+    tle2 = tle[2]
+    # EIRP in W
+    eirp_unit = cleaned_data["eirp_unit"]
+    eirp = float(cleaned_data["eirp"])
+    if eirp_unit == "W":
+        # eirp von W in dBW umwandeln
+        eirp = 10 * math.log(eirp, 10)
+    # Frequenzbereich
+    minimum_frequency = float(cleaned_data["minimum_frequency"])
+    maximum_frequency = float(cleaned_data["maximum_frequency"])
+    minimum_frequency_unit = float(cleaned_data["minimum_frequency_unit"])
+    maximum_frequency_unit = float(cleaned_data["maximum_frequency_unit"])
+    minimum_frequency = minimum_frequency * pow(10, minimum_frequency_unit)
+    maximum_frequency = maximum_frequency * pow(10, maximum_frequency_unit)
+    tle = (name, tle1, tle2)
+    return Satellite(tle, eirp, minimum_frequency, maximum_frequency)
+
+
+def determine_analysis_mode(cleaned_data, antenna_ids):
+    """
+    gibt Analysemodus zurück; falls keine Antennen ausgewählt wurden, wird nur der Orbit dargestellt
+    :param cleaned_data: dict
+    :param antenna_ids: list of int
+    :return: analysis.AnalysisModes
+    """
+    if not antenna_ids:
+        return AnalysisModes.JustOrbit
+    return AnalysisModes[cleaned_data["mode"]]
+
+
+def create_analysis(cleaned_data, time_budget=ANALYSIS_TIME_BUDGET_SECONDS):
+    """
+    erstellt noch nicht durchgeführte Analyse aus gültigen Formulareingaben
+    :param cleaned_data: dict
+    :param time_budget: float
+    :return: analysis.Analysis
+    """
+    start_time, end_time = determine_analysis_times(cleaned_data)
+    # Datenzeitraum mit Eingabemethode
+    time_input_style = cleaned_data['time_input_style']
+    data_period = None
+    if time_input_style == TimeInputStyles.PerOrbit.name:
+        data_period = False
+    elif time_input_style == TimeInputStyles.Custom.name:
+        days = float(cleaned_data["time_days"])
+        hours = float(cleaned_data["time_hours"])
+        minutes = float(cleaned_data["time_minutes"])
+        # Zeitraum der Datenmenge in SI-Einheit
+        data_period = (days * 24 * 60 + hours * 60 + minutes) * 60
+    elif time_input_style == TimeInputStyles.Whole.name:
+        data_period = (end_time - start_time).total_seconds()
+    # Datenmenge in bit
+    data_unit = float(cleaned_data["data_unit"])
+    data = float(cleaned_data["data"])
+    data *= data_unit
+    # AnalyseObjekt mit Daten zu Satelliten erstellen
+    satellite = create_satellite(cleaned_data)
+    handover_gap = float(cleaned_data.get("handover_gap") or 0)
+    # Größe des Datenspeichers in bit
+    storage_capacity = None
+    if cleaned_data.get("storage_capacity") and cleaned_data.get("storage_capacity_unit"):
+        storage_capacity = float(cleaned_data["storage_capacity"]) * float(cleaned_data["storage_capacity_unit"])
+    return Analysis(start_time, end_time, data_period, data, satellite, time_budget,
+                    AnalysisPrecisions[cleaned_data["precision"]],
+                    SchedulingMethods[cleaned_data["scheduling_method"]], handover_gap, storage_capacity)
+
+
+def run_analysis(cleaned_data, antenna_ids, operator_ids, time_budget=ANALYSIS_TIME_BUDGET_SECONDS):
+    """
+    erstellt Analyse aus gültigen Formulareingaben und führt sie mit den ausgewählten Antennen durch
+    :param cleaned_data: dict
+    :param antenna_ids: list of int
+    :param operator_ids: list of int
+    :param time_budget: float
+    :return: analysis.Analysis
+    """
+    analysis = create_analysis(cleaned_data, time_budget)
+    operators_database = list()
+    antennas_data_base = list()
+    for antenna_id in antenna_ids:
+        antennas_data_base.append(Aperture.objects.get(pk=antenna_id))
+    for operator_id in operator_ids:
+        operators_database.append(Operator.objects.get(pk=operator_id))
+    analysis.analyse(operators_database, antennas_data_base, determine_analysis_mode(cleaned_data, antenna_ids))
+    return analysis
+
+
+def estimate_requested_analysis_cost(cleaned_data, antenna_ids):
+    """
+    schätzt Kosten der Analyse aus gültigen Formulareingaben vor der Berechnung
+    :param cleaned_data: dict
+    :param antenna_ids: list of int
+    :return: cost_estimation.AnalysisCostEstimate
+    """
+    start_time, end_time = determine_analysis_times(cleaned_data)
+    return estimate_analysis_cost(
+        start_time, end_time, create_satellite(cleaned_data), len(antenna_ids),
+        determine_analysis_mode(cleaned_data, antenna_ids), AnalysisPrecisions[cleaned_data["precision"]],
+        SchedulingMethods[cleaned_data["scheduling_method"]])
+
+
+def submit_background_analysis(request_key, cleaned_data, antenna_ids, operator_ids, request_data):
+    """
+    reiht aufwendige Analyse in die Hintergrundwarteschlange ein, deren Threads die gleichzeitig laufenden
+    aufwendigen Analysen begrenzen; identische Anfragen teilen sich eine Berechnung
+    :param request_key: str
+    :param cleaned_data: dict
+    :param antenna_ids: list of int
+    :param operator_ids: list of int
+    :param request_data: QueryDict mit den Eingaben der Anfrage
+    :return: background_queue.BackgroundJob
+    """
+    return BACKGROUND_ANALYSIS_QUEUE.submit(request_key, lambda: ANALYSIS_SINGLE_FLIGHT.execute(
+        request_key,
+        lambda: run_analysis(cleaned_data, antenna_ids, operator_ids, BACKGROUND_ANALYSIS_TIME_BUDGET_SECONDS)
+    ), request_data)
+
+
+def parse_selection(data):
+    """
+    ermittelt ids der ausgewählten Bodenstationen, Antennen und Betreiber aus Anfrage
+    :param data: QueryDict
+    :return: list of int, list of int, list of int
+    """
+    # zum Darstellen im Template: keys von type=betreiber/bodenstation/antenne: _typ_id
+    ground_stations = list()
+    antennas = list()
+    operators = list()
+    for k in data.keys():
+        # Bodenstationen aus Anfrage ermitteln
+        if k[:len(GROUND_STATION_PREFIX)] == GROUND_STATION_PREFIX:
+            ground_station_id = int(k[len(GROUND_STATION_PREFIX):])
+            ground_stations.append(ground_station_id)
+        # Antennen aus Anfrage ermitteln
+        elif k[:len(ANTENNA_PREFIX)] == ANTENNA_PREFIX:
+            antenna_id = int(k[len(ANTENNA_PREFIX):])
+            antennas.append(antenna_id)
+        # Betreiber aus Anfrage ermitteln
+        elif k[:len(OPERATOR_PREFIX)] == OPERATOR_PREFIX:
+            operator_id = int(k[len(OPERATOR_PREFIX):])
+            operators.append(operator_id)
+    return ground_stations, antennas, operators
+
+
+def format_server_sent_event(event, data):
+    """
+    gibt Ereignis im Format der Server-Sent Events mit JSON-Daten zurück
+    :param event: str
+    :param data: dict
+    :return: str
+    """
+    return "event: %s\ndata: %s\n\n" % (event, json.dumps(data))
+
+
+def serialize_data_error_bound(analysis, contact_sequence):
+    """
+    gibt größtmögliche Abweichung der Datenmenge einer Kontaktfolge zurück, bei exakter Analyse None
+    :param analysis: analysis.Analysis
+    :param contact_sequence: contact_utility.ContactSequence
+    :return: str
+    """
+    if analysis.get_precision().get_tolerance_seconds() is None:
+        return None
+    return contact_sequence.retrieve_data_error_bound_with_unit()
+
+
+def serialize_antenna_result(antenna):
+    """
+    gibt Ergebnis einer Antenne im Modus Antennas als dict zurück
+    :param antenna: antenna.Antenna
+    :return: dict
+    """
+    return {
+        "id": antenna.retrieve_id(),
+        "name": antenna.get_name(),
+        "data_with_unit": antenna.retrieve_data_with_unit(),
+        "data_error_bound_with_unit": serialize_data_error_bound(
+            antenna.retrieve_analysis(), antenna.get_contact_sequence()),
+        "share_percentage": antenna.retrieve_share_percentage(),
+        "sufficient": antenna.determine_sufficient(),
+        "contacts": [contact.generate_output_string()
+                     for contact in antenna.get_contact_sequence().get_contacts() if contact.get_data() > 0],
+        "data_profile": antenna.get_contact_sequence().get_data_profile().generate_output_string(),
+    }
+
+
+def serialize_ground_station_result(ground_station, mode):
+    """
+    gibt Ergebnis einer Bodenstation in den Modi GroundStations und Antennas als dict zurück
+    :param ground_station: ground_station.GroundStation
+    :param mode: analysis.AnalysisModes
+    :return: dict
+    """
+    result = {
+        "id": ground_station.retrieve_id(),
+        "name": ground_station.get_name(),
+    }
+    if mode == AnalysisModes.Antennas:
+        result["antennas"] = [serialize_antenna_result(antenna) for antenna in ground_station.get_antennas()]
+    else:
+        result.update({
+            "data_with_unit": ground_station.retrieve_data_with_unit(),
+            "data_error_bound_with_unit": serialize_data_error_bound(
+                ground_station.get_analysis(), ground_station.get_best_contact_sequence()),
+            "share_percentage": ground_station.retrieve_share_percentage(),
+            "sufficient": ground_station.retrieve_sufficient(),
+            "contacts": [contact.generate_output_string()
+                         for contact in ground_station.get_best_contact_sequence().get_contacts()],
+            "data_profile": ground_station.get_best_contact_sequence().get_data_profile().generate_output_string(),
+        })
+        storage_profile = ground_station.get_best_contact_sequence().get_storage_profile()
+        if storage_profile:
+            result["storage_overflow_with_unit"] = storage_profile.retrieve_overflow_data_with_unit()
+    return result
+
+
+def generate_ground_station_events(analysis, antennas_data_base, mode):
+    """
+    führt Analyse schrittweise durch und gibt Ergebnis jeder Bodenstation als Ereignis zurück
+    :param analysis: analysis.Analysis
+    :param antennas_data_base: list of Aperture model objects
+    :param mode: analysis.AnalysisModes
+    :return: generator of str
+    """
+    for ground_station in analysis.analyse_ground_stations_progressively(antennas_data_base, mode):
+        yield format_server_sent_event("ground_station", serialize_ground_station_result(ground_station, mode))
+    yield format_server_sent_event("done", {
+        "target_data_with_unit": analysis.retrieve_target_data_with_unit(),
+        "partial": analysis.retrieve_partial(),
+        "time_tolerance_seconds": analysis.get_precision().get_tolerance_seconds(),
+        "incomplete_ground_stations": [
+            ground_station.get_name() for ground_station in analysis.get_incomplete_ground_stations()],
+    })
+
+
 class AnalysisView(View):
     def __init__(self):
         super().__init__()
@@ -96,28 +371,15 @@ class AnalysisView(View):
         form = InputForm()
         return render(request, self.template, {'form': form, "display_information": self.display_information})
 
-    def post(self, request):
-        form = InputForm(request.POST)
-        # zum Darstellen im Template: keys von type=betreiber/bodenstation/antenne: _typ_id
-        data = request.POST
-        ground_stations = list()
-        antennas = list()
-        operators = list()
-        # GroundStation.objects.get(pk=nummer)
-        for k in data.keys():
-            # Bodenstationen aus Anfrage ermitteln
-            if k[:len(GROUND_STATION_PREFIX)] == GROUND_STATION_PREFIX:
-                ground_station_id = int(k[len(GROUND_STATION_PREFIX):])
-                ground_stations.append(ground_station_id)
-            # Antennen aus Anfrage ermitteln
-            elif k[:len(ANTENNA_PREFIX)] == ANTENNA_PREFIX:
-                antenna_id = int(k[len(ANTENNA_PREFIX):])
-                antennas.append(antenna_id)
-            # Betreiber aus Anfrage ermitteln
-            elif k[:len(OPERATOR_PREFIX)] == OPERATOR_PREFIX:
-                operator_id = int(k[len(OPERATOR_PREFIX):])
-                operators.append(operator_id)
-                self.display_information["operators"][operator_id]["selected"] = True
+    def determine_selection(self, data):
+        """
+        ermittelt ausgewählte Antennen und Betreiber aus Anfrage und markiert Auswahl zum Darstellen
+        :param data: QueryDict
+        :return: list of int, list of int
+        """
+        ground_stations, antennas, operators = parse_selection(data)
+        for operator_id in operators:
+            self.display_information["operators"][operator_id]["selected"] = True
         # Liste zum Darstellen akutalisieren                
         for ground_station_id in ground_stations:
             ground_station = self.display_information["ground_stations"][ground_station_id]
@@ -125,72 +387,147 @@ class AnalysisView(View):
             for antenna_id in ground_station["antennas"].values():
                 if antenna_id["id"] in antennas:
                     antenna_id["selected"] = True
+        return antennas, operators
+
+    def render_analysis(self, request, form, analysis, display_mode):
+        context = {
+            'form': form,
+            "display_information": self.display_information,
+            "analysis": analysis,
+            "display_mode": display_mode
+        }
+        for mode in AnalysisModes:
+            context[mode.name] = mode.name
+        return render(request, self.template, context)
+
+    def post(self, request):
+        form = InputForm(request.POST)
+        antennas, operators = self.determine_selection(request.POST)
         # Pruefen, ob restliche Eingaben geultig
         if form.is_valid():
-            # TLE
-            tle = form.cleaned_data['tle'].splitlines()
-            name = tle[0]
-            tle1 = tle[1]
-            tle2 = tle[2]
-            # Start- und Endzeit in UTC umwandeln
-            start_time = form.cleaned_data['start_time'].replace(tzinfo=timezone.utc)
-            end_time = form.cleaned_data['end_time'].replace(tzinfo=timezone.utc)
-            # Datenzeitraum mit Eingabemethode
-            time_input_style = form.cleaned_data['time_input_style']
-            data_period = None
-            if time_input_style == TimeInputStyles.PerOrbit.name:
-                data_period = False
-            elif time_input_style == TimeInputStyles.Custom.name:
-                days = float(form.cleaned_data["time_days"])
-                hours = float(form.cleaned_data["time_hours"])
-                minutes = float(form.cleaned_data["time_minutes"])
-                # Zeitraum der Datenmenge in SI-Einheit
-                data_period = (days * 24 * 60 + hours * 60 + minutes) * 60
-            elif time_input_style == TimeInputStyles.Whole.name:
-                data_period = (end_time - start_time).total_seconds()
-            # Datenmenge in bit
-            data_unit = float(form.cleaned_data["data_unit"])
-            data = float(form.cleaned_data["data"])
-            data *= data_unit
-            # EIRP in W
-            eirp_unit = form.cleaned_data["eirp_unit"]
-            eirp = float(form.cleaned_data["eirp"])
-            if eirp_unit == "W":
-                # eirp von W in dBW umwandeln
-                eirp = 10 * math.log(eirp, 10)
-            # Frequenzbereich
-            minimum_frequency = float(form.cleaned_data["minimum_frequency"])
-            maximum_frequency = float(form.cleaned_data["maximum_frequency"])
-            minimum_frequency_unit = float(form.cleaned_data["minimum_frequency_unit"])
-            maximum_frequency_unit = float(form.cleaned_data["maximum_frequency_unit"])
-            minimum_frequency = minimum_frequency * pow(10, minimum_frequency_unit)
-            maximum_frequency = maximum_frequency * pow(10, maximum_frequency_unit)
-            # Analysemodus
-            analysis_mode = AnalysisModes[form.cleaned_data["mode"]]
-            # AnalyseObjekt mit Daten zu Satelliten erstellen
-            tle = (name, tle1, tle2)
-            satellite = Satellite(tle, eirp, minimum_frequency, maximum_frequency)
-            analysis = Analysis(start_time, end_time, data_period, data, satellite)
-            operators_database = list()
-            antennas_data_base = list()
-            for antenna_id in antennas:
-                antennas_data_base.append(Aperture.objects.get(pk=antenna_id))
-            for operator_id in operators:
-                operators_database.append(Operator.objects.get(pk=operator_id))
-            # Falls nichts ausgewählt nur darstellen
-            if not antennas_data_base:
-                analysis_mode = AnalysisModes.JustOrbit
-                display_mode = "no_antennas_selected"
+            # identische gleichzeitige Anfragen teilen sich eine Berechnung
+            request_key = determine_request_key(form.cleaned_data, antennas, operators)
+            # Kosten vor der Berechnung abschätzen
+            cost_estimate = estimate_requested_analysis_cost(form.cleaned_data, antennas)
+            if cost_estimate.get_runtime_seconds() > settings.ORBITSCALC_MAXIMUM_ANALYSIS_SECONDS:
+                form.add_error(None, "Die Analyse ist zu aufwendig (geschätzte Dauer %i s). "
+                                     "Bitte Analysezeitraum oder Antennenauswahl verkleinern."
+                               % cost_estimate.get_runtime_seconds())
+            elif cost_estimate.get_runtime_seconds() > settings.ORBITSCALC_BACKGROUND_ANALYSIS_SECONDS:
+                # aufwendige Analysen im Hintergrund berechnen
+                submit_background_analysis(request_key, form.cleaned_data, antennas, operators, request.POST.copy())
+                return redirect("analyse_job", job_id=request_key)
             else:
-                display_mode = "result"
-            analysis.analyse(operators_database, antennas_data_base, analysis_mode)
-            context = {
-                'form': form,
-                "display_information": self.display_information,
-                "analysis": analysis,
-                "display_mode": display_mode
-            }
-            for mode in AnalysisModes:
-                context[mode.name] = mode.name
-            return render(request, self.template, context)
+                analysis = ANALYSIS_SINGLE_FLIGHT.execute(
+                    request_key, lambda: run_analysis(form.cleaned_data, antennas, operators))
+                # Falls nichts ausgewählt nur darstellen
+                if not antennas:
+                    display_mode = "no_antennas_selected"
+                else:
+                    display_mode = "result"
+                return self.render_analysis(request, form, analysis, display_mode)
         return render(request, self.template, {'form': form, "display_information": self.display_information})
+
+
+class AnalysisJobView(AnalysisView):
+    """
+    zeigt Ergebnis einer Hintergrundanalyse bzw. Wartehinweis, solange diese noch läuft
+    """
+    def get(self, request, job_id):
+        job = BACKGROUND_ANALYSIS_QUEUE.get_job(job_id)
+        if not job:
+            return redirect("analyse")
+        form = InputForm(job.get_request_data())
+        form.is_valid()
+        self.determine_selection(job.get_request_data())
+        if not job.retrieve_done():
+            return self.render_analysis(request, form, None, "queued")
+        try:
+            analysis = job.retrieve_result()
+        except Exception:
+            logger.exception("Hintergrundanalyse %s fehlgeschlagen", job_id)
+            return self.render_analysis(request, form, None, "failed")
+        return self.render_analysis(request, form, analysis, "result")
+
+
+class AnalysisStreamView(View):
+    """
+    überträgt die Ergebnisse der Modi GroundStations und Antennas als Server-Sent Events,
+    sobald die jeweilige Bodenstation berechnet ist
+    """
+    def get(self, request):
+        form = InputForm(request.GET)
+        ground_stations, antennas, operators = parse_selection(request.GET)
+        if not form.is_valid():
+            return self.respond_with_error("Die Eingaben sind ungültig.")
+        mode = determine_analysis_mode(form.cleaned_data, antennas)
+        if mode not in STREAMABLE_ANALYSIS_MODES:
+            return self.respond_with_error(
+                "Schrittweise Ergebnisse sind nur für Bodenstationen oder Antennen einzeln möglich.")
+        cost_estimate = estimate_requested_analysis_cost(form.cleaned_data, antennas)
+        if cost_estimate.get_runtime_seconds() > settings.ORBITSCALC_MAXIMUM_ANALYSIS_SECONDS:
+            return self.respond_with_error("Die Analyse ist zu aufwendig (geschätzte Dauer %i s)."
+                                           % cost_estimate.get_runtime_seconds())
+        if cost_estimate.get_runtime_seconds() > settings.ORBITSCALC_BACKGROUND_ANALYSIS_SECONDS:
+            # aufwendige Analysen wie beim Absenden des Formulars im Hintergrund berechnen
+            request_key = determine_request_key(form.cleaned_data, antennas, operators)
+            submit_background_analysis(request_key, form.cleaned_data, antennas, operators, request.GET.copy())
+            return StreamingHttpResponse(
+                [format_server_sent_event("queued", {"url": reverse("analyse_job", kwargs={"job_id": request_key})})],
+                content_type="text/event-stream")
+        analysis = create_analysis(form.cleaned_data)
+        antennas_data_base = [Aperture.objects.get(pk=antenna_id) for antenna_id in antennas]
+        response = StreamingHttpResponse(
+            generate_ground_station_events(analysis, antennas_data_base, mode), content_type="text/event-stream")
+        # Ereignisse nicht zwischenspeichern, damit sie sofort beim Client ankommen
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @staticmethod
+    def respond_with_error(message):
+        return StreamingHttpResponse(
+            [format_server_sent_event("analysis_error", {"message": message})], content_type="text/event-stream")
+
+
+class AnalysisStatisticsView(View):
+    """
+    gibt die Statistik der Überflüge einer Analyse als JSON (mit Abdeckung durch die Kontakte) oder CSV zurück;
+    die Analyse wird wie beim Absenden des Formulars mit identischen Anfragen geteilt, aufwendige Analysen nur aus
+    fertigen Hintergrundanalysen
+    """
+    def get(self, request):
+        form = InputForm(request.GET)
+        ground_stations, antennas, operators = parse_selection(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"message": "Die Eingaben sind ungültig."}, status=400)
+        if not antennas:
+            return JsonResponse({"message": "Es sind keine Antennen ausgewählt."}, status=400)
+        request_key = determine_request_key(form.cleaned_data, antennas, operators)
+        job = BACKGROUND_ANALYSIS_QUEUE.get_job(request_key)
+        if job and not job.retrieve_done():
+            return JsonResponse({"message": "Die Analyse wird noch im Hintergrund berechnet."}, status=409)
+        if job:
+            try:
+                analysis = job.retrieve_result()
+            except Exception:
+                logger.exception("Hintergrundanalyse %s fehlgeschlagen", request_key)
+                return JsonResponse({"message": "Die Analyse im Hintergrund ist fehlgeschlagen."}, status=500)
+        else:
+            cost_estimate = estimate_requested_analysis_cost(form.cleaned_data, antennas)
+            if cost_estimate.get_runtime_seconds() > settings.ORBITSCALC_BACKGROUND_ANALYSIS_SECONDS:
+                return JsonResponse({"message": "Die Analyse ist zu aufwendig (geschätzte Dauer %i s)."
+                                                % cost_estimate.get_runtime_seconds()}, status=400)
+            analysis = ANALYSIS_SINGLE_FLIGHT.execute(
+                request_key, lambda: run_analysis(form.cleaned_data, antennas, operators))
+        pass_statistics = analysis.retrieve_pass_statistics()
+        if request.GET.get("format") == "csv":
+            response = HttpResponse(content_type="text/csv")
+            response["Content-Disposition"] = 'attachment; filename="ueberflugstatistik.csv"'
+            csv.writer(response).writerows(pass_statistics.generate_csv_rows())
+            return response
+        statistics = pass_statistics.generate_json()
+        statistics["coverage"] = [
+            {"dimension": coverage["dimension"].name, "name": coverage["name"], **coverage["coverage"].generate_json()}
+            for coverage in analysis.retrieve_coverages()]
+        return JsonResponse(statistics)